@@ -1,2 +1 @@
 from ._warps_cy import _warp_fast
-from ._daisy import _daisy
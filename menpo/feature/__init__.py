@@ -1,6 +1,12 @@
-from .features import (gradient, hog, lbp, es, igo, no_op, gaussian_filter,
-                       daisy, normalize, normalize_norm, normalize_std,
-                       normalize_var, features_selection_widget)
+from .features import (gradient, gradient_batch, hog, hog_batch, scan_pyramid,
+                       lbp, es, igo, es_batch, igo_batch, no_op,
+                       gaussian_filter, gaussian_filter_batch, daisy,
+                       normalize, normalize_norm, normalize_std, normalize_var,
+                       features_selection_widget)
+from .integral import IntegralHOG
+from .cache import (cached, clear_feature_caches, feature_cache_stats,
+                    FeatureCache)
+from .bounded import mask_bounded
 # Optional dependencies may return nothing.
 from .optional import *
 
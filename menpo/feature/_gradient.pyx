@@ -3,31 +3,318 @@ cimport numpy as np
 cimport cython
 
 
-ctypedef fused DOUBLE_TYPES:
+ctypedef fused PIXEL_TYPES:
+    unsigned char
+    float
+    double
+
+
+ctypedef fused OUTPUT_TYPES:
     float
     double
 
 
 cdef extern from "cpp/central_difference.h":
-    void central_difference[T](const T* input, const Py_ssize_t rows,
-                               const Py_ssize_t cols, const Py_ssize_t n_channels,
-                               T* output)
+    void central_difference[T, O](const T* input, const Py_ssize_t rows,
+                                  const Py_ssize_t cols,
+                                  const Py_ssize_t n_channels,
+                                  const Py_ssize_t row_from,
+                                  const Py_ssize_t row_to, O* output) nogil
+
+
+cdef extern from "cpp/gaussian_filter.h":
+    void separable_filter[T, O](const T* input, const Py_ssize_t rows,
+                                const Py_ssize_t cols,
+                                const Py_ssize_t n_channels,
+                                const double* weights_y,
+                                const Py_ssize_t radius_y,
+                                const double* weights_x,
+                                const Py_ssize_t radius_x,
+                                const Py_ssize_t row_from,
+                                const Py_ssize_t row_to, O* output) nogil
+
+
+cdef extern from "cpp/daisy.h":
+    void daisy_orientation_maps[T](const T* input, const Py_ssize_t rows,
+                                   const Py_ssize_t cols,
+                                   const Py_ssize_t n_channels,
+                                   const Py_ssize_t n_orientations,
+                                   const Py_ssize_t row_from,
+                                   const Py_ssize_t row_to,
+                                   double* output) nogil
+    void daisy_descriptors(const double* smoothed, const Py_ssize_t rows,
+                           const Py_ssize_t cols,
+                           const Py_ssize_t n_orientations,
+                           const int* samples, const Py_ssize_t n_samples,
+                           const int* centres, const Py_ssize_t centre_from,
+                           const Py_ssize_t centre_to,
+                           const int normalization,
+                           const Py_ssize_t descriptor_stride,
+                           const Py_ssize_t value_stride,
+                           double* output) nogil
+
+
+cdef extern from "cpp/gradient_features.h":
+    void igo_kernel[T, O](const T* input, const Py_ssize_t rows,
+                          const Py_ssize_t cols, const Py_ssize_t n_channels,
+                          const bint double_angles, O* output) nogil
+    void gradient_magnitude_kernel[T, O](const T* input,
+                                         const Py_ssize_t rows,
+                                         const Py_ssize_t cols,
+                                         const Py_ssize_t n_channels,
+                                         O* output) nogil
+    void es_kernel[T, O](const T* input, const Py_ssize_t rows,
+                         const Py_ssize_t cols, const Py_ssize_t n_channels,
+                         const double median, O* output) nogil
+
+
+# The pixel types read without a conversion
+_PIXEL_DTYPES = (np.uint8, np.float32, np.float64)
+
+
+def _batch(pixels, n_output_channels, dtype):
+    # The C contiguous (N, C, H, W) pixels of an image (C, H, W) or a batch of
+    # images, along with the (N, n_output_channels * C, H, W) output
+    if pixels.dtype not in _PIXEL_DTYPES:
+        pixels = pixels.astype(np.float64)
+    pixels = np.ascontiguousarray(pixels)
+    if pixels.ndim == 3:
+        pixels = pixels[None]
+    n, n_channels, rows, cols = pixels.shape
+    output = np.empty((n, n_output_channels * n_channels, rows, cols),
+                      dtype=dtype)
+    return pixels, output
+
+
+def _apply_rows(n_images, n_rows, apply_rows, n_threads):
+    # Calls apply_rows(i, from, to) over all the rows of all the images of a
+    # batch, in parallel if n_threads > 1 - each call writes to separate rows
+    # of the output
+    if n_threads is None or n_threads <= 1:
+        for i in range(n_images):
+            apply_rows(i, 0, n_rows)
+        return
+    from multiprocessing.pool import ThreadPool
+    # Split the images in enough chunks of rows to keep all the threads busy
+    n_chunks = min(n_rows, max(1, -(-4 * n_threads // n_images)))
+    bounds = np.linspace(0, n_rows, n_chunks + 1).astype(np.int64)
+    pool = ThreadPool(n_threads)
+    try:
+        pool.map(lambda t: apply_rows(t[0], bounds[t[1]], bounds[t[1] + 1]),
+                 [(i, j) for i in range(n_images) for j in range(n_chunks)])
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _gaussian_kernel(sigma, truncate=4.0):
+    # The normalized 1D Gaussian kernel of scipy.ndimage.gaussian_filter,
+    # truncated at truncate standard deviations
+    radius = int(truncate * sigma + 0.5)
+    if sigma <= 1e-15 or radius == 0:
+        return np.ones(1)
+    x = np.arange(-radius, radius + 1)
+    weights = np.exp(-0.5 / (sigma * sigma) * x ** 2)
+    return weights / weights.sum()
 
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
-cpdef gradient_cython(np.ndarray[DOUBLE_TYPES, ndim=3] input):
+def _central_difference(const PIXEL_TYPES[:, :, ::1] pixels,
+                        OUTPUT_TYPES[:, :, ::1] output,
+                        Py_ssize_t row_from, Py_ssize_t row_to):
+    if pixels.shape[1] == 0 or pixels.shape[2] == 0:
+        return
+    with nogil:
+        central_difference(&pixels[0, 0, 0], pixels.shape[1], pixels.shape[2],
+                           pixels.shape[0], row_from, row_to,
+                           &output[0, 0, 0])
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _separable_filter(const PIXEL_TYPES[:, :, ::1] pixels,
+                      PIXEL_TYPES[:, :, ::1] output,
+                      const double[::1] weights_y, const double[::1] weights_x,
+                      Py_ssize_t row_from, Py_ssize_t row_to):
+    if pixels.shape[1] == 0 or pixels.shape[2] == 0:
+        return
+    with nogil:
+        separable_filter(&pixels[0, 0, 0], pixels.shape[1], pixels.shape[2],
+                         pixels.shape[0], &weights_y[0],
+                         weights_y.shape[0] // 2, &weights_x[0],
+                         weights_x.shape[0] // 2, row_from, row_to,
+                         &output[0, 0, 0])
+
+
+def gradient_cython(pixels, n_threads=None):
+    r"""
+    The gradient of a ``(C, H, W)`` image, or of a ``(N, C, H, W)`` batch of
+    images, with the rows of the images computed in parallel by
+    ``n_threads`` threads. `float32` pixels produce a `float32` gradient,
+    all others a `float64` gradient.
+    """
+    dtype = pixels.dtype if pixels.dtype in (np.float32, np.float64) \
+        else np.float64
+    batch, output = _batch(pixels, 2, dtype)
+    _apply_rows(batch.shape[0], batch.shape[2],
+                lambda i, row_from, row_to: _central_difference(
+                    batch[i], output[i], row_from, row_to), n_threads)
+    return output if pixels.ndim == 4 else output[0]
+
+
+def gaussian_filter_cython(pixels, sigma_y, sigma_x, n_threads=None):
+    r"""
+    The separable Gaussian filtering of a ``(C, H, W)`` image, or of a
+    ``(N, C, H, W)`` batch of images, of ``uint8``, `float32` or `float64`
+    pixels, with the rows of the images filtered in parallel by
+    ``n_threads`` threads. The output has the datatype of the pixels.
+    """
+    batch, output = _batch(pixels, 1, pixels.dtype)
+    weights_y = _gaussian_kernel(sigma_y)
+    weights_x = _gaussian_kernel(sigma_x)
+    _apply_rows(batch.shape[0], batch.shape[2],
+                lambda i, row_from, row_to: _separable_filter(
+                    batch[i], output[i], weights_y, weights_x, row_from,
+                    row_to), n_threads)
+    return output if pixels.ndim == 4 else output[0]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _igo(const PIXEL_TYPES[:, :, ::1] pixels,
+         OUTPUT_TYPES[:, :, ::1] output, bint double_angles):
+    with nogil:
+        igo_kernel(&pixels[0, 0, 0], pixels.shape[1], pixels.shape[2],
+                   pixels.shape[0], double_angles, &output[0, 0, 0])
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _gradient_magnitude(const PIXEL_TYPES[:, :, ::1] pixels,
+                        OUTPUT_TYPES[:, :, ::1] output):
+    with nogil:
+        gradient_magnitude_kernel(&pixels[0, 0, 0], pixels.shape[1],
+                                  pixels.shape[2], pixels.shape[0],
+                                  &output[0, 0, 0])
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _es(const PIXEL_TYPES[:, :, ::1] pixels,
+        OUTPUT_TYPES[:, :, ::1] output, double median):
+    with nogil:
+        es_kernel(&pixels[0, 0, 0], pixels.shape[1], pixels.shape[2],
+                  pixels.shape[0], median, &output[0, 0, 0])
+
+
+def igo_cython(pixels, bint double_angles, dtype):
+    r"""
+    The IGO features of a ``(C, H, W)`` image, or of a ``(N, C, H, W)``
+    batch of images, computed in a single pass over the pixels.
+    """
+    batch, output = _batch(pixels, 4 if double_angles else 2, dtype)
+    for i in range(batch.shape[0]):
+        _igo(batch[i], output[i], double_angles)
+    return output if pixels.ndim == 4 else output[0]
+
+
+def es_cython(pixels, dtype):
+    r"""
+    The ES features of a ``(C, H, W)`` image, or of a ``(N, C, H, W)``
+    batch of images (each normalized by its own median gradient magnitude),
+    computed in two passes over the pixels.
+    """
+    batch, output = _batch(pixels, 2, dtype)
+    n_channels = batch.shape[1]
+    for i in range(batch.shape[0]):
+        # The magnitudes are stored in the first half of the output, which
+        # is then overwritten with the features
+        magnitudes = output[i, :n_channels]
+        _gradient_magnitude(batch[i], magnitudes)
+        median = np.median(magnitudes, overwrite_input=True)
+        _es(batch[i], output[i], median)
+    return output if pixels.ndim == 4 else output[0]
+
+
+# The normalizations of the DAISY descriptors (see cpp/daisy.h)
+_DAISY_NORMALIZATIONS = {'off': 0, 'l1': 1, 'l2': 2, 'daisy': 3}
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _daisy_orientation_maps(const PIXEL_TYPES[:, :, ::1] pixels,
+                            double[:, :, ::1] output, Py_ssize_t row_from,
+                            Py_ssize_t row_to):
+    if pixels.shape[1] == 0 or pixels.shape[2] == 0:
+        return
+    with nogil:
+        daisy_orientation_maps(&pixels[0, 0, 0], pixels.shape[1],
+                               pixels.shape[2], pixels.shape[0],
+                               output.shape[0], row_from, row_to,
+                               &output[0, 0, 0])
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _daisy_descriptors(const double[:, :, :, ::1] smoothed,
+                       const int[:, ::1] samples, const int[:, ::1] centres,
+                       Py_ssize_t centre_from, Py_ssize_t centre_to,
+                       int normalization, Py_ssize_t descriptor_stride,
+                       Py_ssize_t value_stride, double[::1] output):
+    if centre_from == centre_to:
+        return
+    with nogil:
+        daisy_descriptors(&smoothed[0, 0, 0, 0], smoothed.shape[2],
+                          smoothed.shape[3], smoothed.shape[1],
+                          &samples[0, 0], samples.shape[0], &centres[0, 0],
+                          centre_from, centre_to, normalization,
+                          descriptor_stride, value_stride, &output[0])
+
 
-    cdef Py_ssize_t n_channels = input.shape[0]
-    cdef Py_ssize_t rows = input.shape[1]
-    cdef Py_ssize_t cols = input.shape[2]
-    # Maintain the dtype that was passed in (float or double)
-    dtype = input.dtype
-    cdef np.ndarray[DOUBLE_TYPES, ndim=3] output = np.zeros((n_channels * 2,
-                                                            rows, cols),
-                                                            dtype=dtype)
+def daisy_cython(pixels, centres, samples, sigmas, n_orientations,
+                 normalization, bint channels_first, n_threads=None):
+    r"""
+    The DAISY descriptors of a ``(C, H, W)`` image at the ``(n_centres, 2)``
+    centres. The orientation maps are computed once (from the channel of
+    largest gradient magnitude at each pixel) and smoothed by each of the
+    ``sigmas``, then the ``(n_samples, 3)`` samples (smoothing level and
+    offset from the centre) of every descriptor are read from them. The
+    descriptors are returned as ``(n_samples * n_orientations, n_centres)``
+    if ``channels_first``, else as ``(n_centres, n_samples *
+    n_orientations)``. The rows of the maps and the centres are split between
+    ``n_threads`` threads.
+    """
+    if pixels.dtype not in _PIXEL_DTYPES:
+        pixels = pixels.astype(np.float64)
+    pixels = np.ascontiguousarray(pixels)
+    centres = np.ascontiguousarray(centres, dtype=np.int32)
+    samples = np.ascontiguousarray(samples, dtype=np.int32)
+    rows, cols = pixels.shape[1:]
+    n_centres = centres.shape[0]
+    descriptor_length = samples.shape[0] * n_orientations
 
-    central_difference(&input[0,0,0], rows, cols, n_channels,
-                       &output[0,0,0])
+    maps = np.empty((n_orientations, rows, cols))
+    _apply_rows(1, rows, lambda i, row_from, row_to: _daisy_orientation_maps(
+        pixels, maps, row_from, row_to), n_threads)
+    smoothed = np.empty((len(sigmas),) + maps.shape)
+    for level, sigma in enumerate(sigmas):
+        weights = _gaussian_kernel(sigma)
+        _apply_rows(1, rows, lambda i, row_from, row_to: _separable_filter(
+            maps, smoothed[level], weights, weights, row_from, row_to),
+            n_threads)
 
-    return output
+    output = np.empty(n_centres * descriptor_length)
+    if channels_first:
+        descriptor_stride, value_stride = 1, n_centres
+    else:
+        descriptor_stride, value_stride = descriptor_length, 1
+    _apply_rows(1, n_centres, lambda i, centre_from, centre_to:
+                _daisy_descriptors(smoothed, samples, centres, centre_from,
+                                   centre_to,
+                                   _DAISY_NORMALIZATIONS[normalization],
+                                   descriptor_stride, value_stride, output),
+                n_threads)
+    if channels_first:
+        return output.reshape(descriptor_length, n_centres)
+    return output.reshape(n_centres, descriptor_length)
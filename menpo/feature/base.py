@@ -1,5 +1,5 @@
 from __future__ import division
-from functools import wraps
+from functools import partial, wraps
 import numpy as np
 from menpo.image import Image, MaskedImage, BooleanImage
 from menpo.transform import Translation, NonUniformScale
@@ -97,6 +97,8 @@ def imgfeature(wrapped):
             return wrapped(image, *args, **kwargs).pixels
         else:
             return wrapped(image, *args, **kwargs)
+
+    wrapper._feature_kind = 'imgfeature'
     return wrapper
 
 
@@ -111,6 +113,8 @@ def ndfeature(wrapped):
             return rebuild_feature_image(image, feature)
         else:
             return wrapped(image, *args, **kwargs)
+
+    wrapper._feature_kind = 'ndfeature'
     return wrapper
 
 
@@ -118,13 +122,54 @@ def winitfeature(wrapped):
 
     @wraps(wrapped)
     def wrapper(image, *args, **kwargs):
-        if not isinstance(image, np.ndarray):
-            # Image supplied to ndarray feature -
-            # extract pixels and go
-            feature, centres = wrapped(image.pixels, *args, **kwargs)
+        pixels = image if isinstance(image, np.ndarray) else image.pixels
+        result = wrapped(pixels, *args, **kwargs)
+        if isinstance(result, np.ndarray):
+            # descriptors that do not form an image (e.g. computed at a set
+            # of points) are always returned as they are
+            return result
+        elif not isinstance(image, np.ndarray):
+            # Image supplied to ndarray feature - rebuild an image
+            feature, centres = result
             return rebuild_feature_image_with_centres(image, feature, centres)
         else:
             # user just supplied ndarray - give them ndarray back
-            return wrapped(image, *args, **kwargs)[0]
+            return result[0]
 
+    wrapper._feature_kind = 'winitfeature'
+    # The raw feature, which also returns the window centres
+    wrapper._window_feature = wrapped
     return wrapper
+
+
+def unwrap_partial_feature(feature):
+    r"""
+    The feature function of a (possibly nested) partial of keyword arguments
+    (e.g. :map:`sparse_hog`), along with the keyword arguments.
+
+    Parameters
+    ----------
+    feature : `callable`
+        The feature function or a partial of it.
+
+    Returns
+    -------
+    func : `callable`
+        The feature function.
+    keywords : `dict`
+        The keyword arguments of the partial (empty if ``feature`` is not
+        a partial).
+
+    Raises
+    ------
+    ValueError
+        Only partials of keyword arguments are supported
+    """
+    keywords = {}
+    while isinstance(feature, partial):
+        if feature.args:
+            raise ValueError('Only partials of keyword arguments are '
+                             'supported')
+        keywords = dict(feature.keywords or {}, **keywords)
+        feature = feature.func
+    return feature, keywords
@@ -0,0 +1,177 @@
+from functools import wraps
+
+import numpy as np
+
+from .base import rebuild_feature_image, unwrap_partial_feature
+from .features import (gradient, gaussian_filter, igo, es, lbp, hog,
+                       _window_centres)
+
+
+def mask_bounded(feature, margin=None, crop=False):
+    r"""
+    Wraps a feature function (e.g. :map:`hog`, :map:`igo` or :map:`lbp`, or
+    a partial of them such as :map:`double_igo`) so that, for
+    :map:`MaskedImage` inputs, the features are only computed within the
+    bounding box of the ``True`` mask values (see
+    :meth:`BooleanImage.bounds_true`) rather than over the whole image. For
+    typical face masks inside large frames this is a fraction of the work.
+
+    The bounding box is extended by a ``margin`` of pixels, so that the
+    features of the masked pixels see the same neighbourhood as they would
+    in the whole image. The features are then either padded back (with
+    zeros) to an image of the shape of the input, with its mask and
+    landmarks, or returned as the cropped feature image, whose mask and
+    landmarks are offset to the bounding box.
+
+    Features computed at a set of ``points`` (e.g. by :map:`hog`, :map:`lbp`
+    or :map:`daisy`) are instead computed within the bounding box of the
+    points (and their ``sample_offsets``), extended by the ``margin``, and
+    returned as they are. The points are given in the frame of the input
+    image, as for the feature.
+
+    Inputs that are not masked (`ndarray` or :map:`Image`), or whose mask is
+    all ``True`` or all ``False``, are passed to the feature as they are. So
+    are calls that provide an ``out`` array to write the features to.
+
+    Note that features that are normalized over the whole image (e.g. by the
+    median gradient magnitude of :map:`es`) are normalized over the bounding
+    box instead.
+
+    Parameters
+    ----------
+    feature : `callable`
+        The feature function to bound.
+    margin : `int` or ``None``, optional
+        The number of pixels the bounding box of the mask is extended by. If
+        ``None``, the support of the kernel of the feature is used, as given
+        by its arguments - this is only known for :map:`gradient`,
+        :map:`gaussian_filter`, :map:`igo`, :map:`es`, :map:`lbp` and
+        :map:`hog`.
+    crop : `bool`, optional
+        If ``True``, the cropped feature image is returned. Otherwise, the
+        features are padded back to the shape of the input, which requires
+        features that are of the same shape as the image they are computed
+        from (e.g. dense :map:`hog` or :map:`lbp` with ``padding=True`` and
+        a window step of ``1`` pixel).
+
+    Returns
+    -------
+    bounded_feature : `callable`
+        The mask bounded feature function, called exactly as the feature.
+
+    Raises
+    ------
+    ValueError
+        ``margin`` is negative
+    ValueError
+        ``margin`` is ``None`` and the support of the feature is not known
+        (raised when the bounded feature is called)
+    ValueError
+        The features are not of the same shape as the image they are
+        computed from and ``crop`` is ``False`` (raised when the bounded
+        feature is called)
+    """
+    if margin is not None and margin < 0:
+        raise ValueError('margin should be non-negative '
+                         '({} provided)'.format(margin))
+    func, keywords = unwrap_partial_feature(feature)
+
+    @wraps(func)
+    def bounded_feature(image, *args, **kwargs):
+        feature_kwargs = dict(keywords)
+        feature_kwargs.update(kwargs)
+        if (not hasattr(image, 'mask') or image.mask.all_true() or
+                image.mask.n_true() == 0 or 'out' in feature_kwargs):
+            return func(image, *args, **feature_kwargs)
+        support = margin
+        if support is None:
+            support = _kernel_support(func, args, feature_kwargs)
+        points = feature_kwargs.get('points')
+        if points is not None:
+            return _points_bounded_feature(func, image, support, args,
+                                           feature_kwargs)
+        min_b, max_b = image.mask.bounds_true(boundary=support)
+        # bounds_true is inclusive of the maximum indices
+        max_b = max_b + 1
+        cropped = image.crop(min_b, max_b, constrain_to_boundary=True)
+        f_image = func(cropped, *args, **feature_kwargs)
+        if crop:
+            return f_image
+        if f_image.shape != cropped.shape:
+            raise ValueError('The features are of shape {} rather than the '
+                             'shape of the image {} they were computed from, '
+                             'so they can not be padded back - use '
+                             'crop=True'.format(f_image.shape, cropped.shape))
+        f_pixels = np.zeros((f_image.n_channels,) + image.shape,
+                            dtype=f_image.pixels.dtype)
+        f_pixels[:, min_b[0]:max_b[0], min_b[1]:max_b[1]] = f_image.pixels
+        return rebuild_feature_image(image, f_pixels)
+
+    return bounded_feature
+
+
+def _points_bounded_feature(func, image, support, args, kwargs):
+    # The features at points, computed within the bounding box of the
+    # (rounded) window centres. The centres are passed to the feature in the
+    # frame of the box, as points without offsets
+    centres, points_shape = _window_centres(kwargs['points'],
+                                            kwargs.get('sample_offsets'))
+    if centres.size == 0:
+        return func(image, *args, **kwargs)
+    min_b = np.maximum(centres.min(axis=0) - support, 0)
+    max_b = np.minimum(centres.max(axis=0) + support + 1, image.shape)
+    if np.any(max_b <= min_b):
+        # The windows are all outside of the image
+        return func(image, *args, **kwargs)
+    cropped = image.crop(min_b, max_b)
+    kwargs = dict(kwargs, points=centres - min_b, sample_offsets=None)
+    descriptors = func(cropped, *args, **kwargs)
+    return descriptors.reshape(points_shape + descriptors.shape[2:])
+
+
+def _kernel_support(func, args, kwargs):
+    # The number of pixels around each pixel that its features depend on -
+    # the supports take the arguments of their features
+    support = _KERNEL_SUPPORTS.get(func)
+    if support is None:
+        raise ValueError('The kernel support of {} is not known - provide '
+                         'the margin'.format(getattr(func, '__name__',
+                                                     repr(func))))
+    return support(*args, **kwargs)
+
+
+def _gradient_support(*args, **kwargs):
+    return 1
+
+
+def _gaussian_filter_support(sigma, *args, **kwargs):
+    # The kernels are truncated at 4 standard deviations
+    return int(np.ceil(4 * np.max(sigma)))
+
+
+def _lbp_support(radius=None, *args, **kwargs):
+    return 4 if radius is None else int(np.max(radius))
+
+
+def _hog_support(mode='dense', algorithm='dalaltriggs', num_bins=9,
+                 cell_size=8, block_size=2, signed_gradient=True,
+                 l2_norm_clip=0.2, window_height=1, window_width=1,
+                 window_unit='blocks', *args, **kwargs):
+    # The window, which bounds the support of the blocks (and of their
+    # gradients) in either direction of its centre
+    block_in_pixels = (cell_size * block_size if algorithm == 'dalaltriggs'
+                       else 3 * cell_size)
+    if mode == 'sparse':
+        return block_in_pixels
+    if window_unit == 'blocks':
+        window_height *= block_in_pixels
+        window_width *= block_in_pixels
+    return int(max(window_height, window_width))
+
+
+_KERNEL_SUPPORTS = {gradient: _gradient_support,
+                    gaussian_filter: _gaussian_filter_support,
+                    igo: _gradient_support,
+                    es: _gradient_support,
+                    lbp: _lbp_support,
+                    hog: _hog_support}
@@ -0,0 +1,306 @@
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import threading
+
+import numpy as np
+
+from menpo.shape import PointCloud
+
+from .base import (rebuild_feature_image, rebuild_feature_image_with_centres,
+                   unwrap_partial_feature)
+
+
+# {feature function: FeatureCache} of all the caches handed out by cached
+_FEATURE_CACHES = {}
+_FEATURE_CACHES_LOCK = threading.Lock()
+
+
+class FeatureCache(object):
+    r"""
+    An in-memory, least recently used cache of the results of a feature
+    function. Results are keyed by a fingerprint of the content of the
+    pixels (rather than the identity of the image) along with the arguments
+    of the feature, so the same pixels passed many times (e.g. across fitting
+    iterations or when rebuilding a pyramid) only have their features
+    computed once.
+
+    Caches are not usually built directly - see :map:`cached`.
+
+    Parameters
+    ----------
+    max_bytes : `int`, optional
+        The maximum total size of the cached results in bytes. When exceeded,
+        the least recently used results are evicted. Results that are larger
+        than ``max_bytes`` are never cached.
+
+    Raises
+    ------
+    ValueError
+        ``max_bytes`` is not positive
+    """
+
+    def __init__(self, max_bytes=2 ** 28):
+        if max_bytes <= 0:
+            raise ValueError('max_bytes should be positive '
+                             '({} provided)'.format(max_bytes))
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # {key: (result, n_bytes)}, least recently used first
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return ('FeatureCache of {} results ({} of {} bytes) - {} hits, {} '
+                'misses, {} evictions'.format(self.n_items, self.n_bytes,
+                                              self.max_bytes, self.hits,
+                                              self.misses, self.evictions))
+
+    @property
+    def n_items(self):
+        r"""
+        The number of cached results.
+
+        :type: `int`
+        """
+        return len(self._results)
+
+    @property
+    def hit_rate(self):
+        r"""
+        The fraction of lookups that were answered by the cache (``0`` if
+        there have been none).
+
+        :type: `float`
+        """
+        n_lookups = self.hits + self.misses
+        return self.hits / float(n_lookups) if n_lookups > 0 else 0.
+
+    def get(self, key):
+        r"""
+        The cached result of a key, which becomes the most recently used.
+
+        Parameters
+        ----------
+        key : `hashable`
+            The key of the result.
+
+        Returns
+        -------
+        result : `object` or ``None``
+            The result, or ``None`` if it is not cached.
+        """
+        with self._lock:
+            entry = self._results.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._results[key] = entry
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result):
+        r"""
+        Caches the result of a key, evicting the least recently used results
+        to stay within ``max_bytes``. The arrays of the result are made
+        read-only, as they are shared by everyone that looks it up.
+
+        Parameters
+        ----------
+        key : `hashable`
+            The key of the result.
+        result : `ndarray` or `tuple` of `ndarray`
+            The result to cache.
+        """
+        arrays = result if isinstance(result, tuple) else (result,)
+        for a in arrays:
+            a.flags.writeable = False
+        n_bytes = sum(a.nbytes for a in arrays)
+        if n_bytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._results.pop(key, None)
+            if previous is not None:
+                self.n_bytes -= previous[1]
+            self._results[key] = (result, n_bytes)
+            self.n_bytes += n_bytes
+            self._evict(self.max_bytes)
+
+    def clear(self):
+        r"""
+        Evicts all the cached results and resets the statistics.
+        """
+        with self._lock:
+            self._results.clear()
+            self.n_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def resize(self, max_bytes):
+        r"""
+        Changes the maximum size of the cache, evicting the least recently
+        used results if it shrinks.
+
+        Parameters
+        ----------
+        max_bytes : `int`
+            The new maximum total size of the cached results in bytes.
+        """
+        if max_bytes <= 0:
+            raise ValueError('max_bytes should be positive '
+                             '({} provided)'.format(max_bytes))
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict(max_bytes)
+
+    def _evict(self, max_bytes):
+        while self.n_bytes > max_bytes:
+            _, (_, n_bytes) = self._results.popitem(last=False)
+            self.n_bytes -= n_bytes
+            self.evictions += 1
+
+
+def cached(feature, max_bytes=None):
+    r"""
+    Wraps a feature function (e.g. :map:`hog`, :map:`igo`, :map:`lbp` or
+    :map:`daisy`, or a partial of them such as :map:`sparse_hog`) so that its
+    results are cached and reused whenever it is called again with pixels of
+    the same content and the same arguments.
+
+    The wrapped function is called exactly as the feature and returns the
+    same type - :map:`Image` inputs still get an :map:`Image` back, rebuilt
+    with their own landmarks (and mask) around the cached pixels, so only the
+    pixel computation is cached. The arrays of the results are shared with
+    the cache and so are read-only.
+
+    There is a single cache per feature function (shared by all the partials
+    of it), so ``cached(hog)`` can be called wherever needed. See
+    :map:`feature_cache_stats` and :map:`clear_feature_caches`.
+
+    Parameters
+    ----------
+    feature : `callable`
+        The feature function to cache.
+    max_bytes : `int` or ``None``, optional
+        The maximum total size of the cached results of the feature in
+        bytes, after which the least recently used are evicted. If ``None``,
+        the current size of the cache is kept (``256MB`` for a new cache).
+
+    Returns
+    -------
+    cached_feature : `callable`
+        The caching feature function. Its cache is available as
+        ``cached_feature.cache``.
+
+    Raises
+    ------
+    ValueError
+        ``max_bytes`` is not positive
+    """
+    func, keywords = unwrap_partial_feature(feature)
+    with _FEATURE_CACHES_LOCK:
+        cache = _FEATURE_CACHES.get(func)
+        if cache is None:
+            cache = FeatureCache() if max_bytes is None else \
+                FeatureCache(max_bytes=max_bytes)
+            _FEATURE_CACHES[func] = cache
+        elif max_bytes is not None:
+            cache.resize(max_bytes)
+    kind = getattr(func, '_feature_kind', None)
+
+    @wraps(func)
+    def cached_feature(image, *args, **kwargs):
+        feature_kwargs = dict(keywords)
+        feature_kwargs.update(kwargs)
+        is_ndarray = isinstance(image, np.ndarray)
+        if 'out' in feature_kwargs or (kind is None and not is_ndarray):
+            # Results written to a provided array (or images of unknown
+            # features, that can not be rebuilt around cached pixels) are
+            # never cached
+            return func(image, *args, **feature_kwargs)
+        pixels = image if is_ndarray else image.pixels
+        mask = None
+        if kind == 'imgfeature' and hasattr(image, 'mask'):
+            # The normalization of an image depends on its mask
+            mask = image.mask.pixels
+        key = (_fingerprint(pixels), _fingerprint(mask), _fingerprint(args),
+               _fingerprint(feature_kwargs))
+        result = cache.get(key)
+        if result is None:
+            if kind == 'winitfeature':
+                result = func._window_feature(pixels, *args, **feature_kwargs)
+                if not isinstance(result, np.ndarray):
+                    result = (result[0], result[1])
+            elif kind == 'imgfeature':
+                result = func(image, *args, **feature_kwargs).pixels
+            else:
+                result = func(pixels, *args, **feature_kwargs)
+            cache.put(key, result)
+        if isinstance(result, tuple):
+            # Window iterating features (pixels, centres)
+            if is_ndarray:
+                return result[0]
+            return rebuild_feature_image_with_centres(image, result[0],
+                                                      result[1])
+        if is_ndarray or kind == 'winitfeature':
+            # Descriptors that do not form an image are returned as they are
+            return result
+        return rebuild_feature_image(image, result)
+
+    cached_feature.cache = cache
+    return cached_feature
+
+
+def feature_cache_stats():
+    r"""
+    The statistics of the cache of every feature function wrapped by
+    :map:`cached`.
+
+    Returns
+    -------
+    stats : `dict`
+        ``{feature name: {statistic: value}}`` with the ``hits``,
+        ``misses``, ``hit_rate``, ``evictions``, ``n_items``, ``n_bytes`` and
+        ``max_bytes`` of each cache.
+    """
+    with _FEATURE_CACHES_LOCK:
+        caches = list(_FEATURE_CACHES.items())
+    return dict((getattr(func, '__name__', repr(func)),
+                 {'hits': cache.hits, 'misses': cache.misses,
+                  'hit_rate': cache.hit_rate, 'evictions': cache.evictions,
+                  'n_items': cache.n_items, 'n_bytes': cache.n_bytes,
+                  'max_bytes': cache.max_bytes})
+                for func, cache in caches)
+
+
+def clear_feature_caches():
+    r"""
+    Evicts all the results (and resets the statistics) of the cache of every
+    feature function wrapped by :map:`cached`.
+    """
+    with _FEATURE_CACHES_LOCK:
+        caches = list(_FEATURE_CACHES.values())
+    for cache in caches:
+        cache.clear()
+
+
+def _fingerprint(value):
+    # A hashable fingerprint of the content of a value - arrays are hashed
+    # rather than compared, so large arrays are cheap to use as keys
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha1(np.ascontiguousarray(value).data).hexdigest()
+        return 'ndarray', value.dtype.str, value.shape, digest
+    elif isinstance(value, PointCloud):
+        return 'PointCloud', _fingerprint(value.points)
+    elif isinstance(value, (list, tuple)):
+        return type(value).__name__, tuple(_fingerprint(v) for v in value)
+    elif isinstance(value, dict):
+        return 'dict', tuple(sorted((k, _fingerprint(v))
+                                    for k, v in value.items()))
+    try:
+        hash(value)
+    except TypeError:
+        return 'repr', repr(value)
+    return value
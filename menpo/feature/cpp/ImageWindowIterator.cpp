@@ -6,6 +6,23 @@
 ImageWindowIterator::ImageWindowIterator(double *image, unsigned int imageHeight, unsigned int imageWidth, unsigned int numberOfChannels,
 		unsigned int windowHeight, unsigned int windowWidth, unsigned int windowStepHorizontal,
 		unsigned int windowStepVertical, bool enablePadding) {
+    // Fortran ordered (height x width x channels) image
+    init(image, FLOAT64, 1, imageHeight, imageHeight * imageWidth, 1.0, imageHeight, imageWidth, numberOfChannels,
+         windowHeight, windowWidth, windowStepHorizontal, windowStepVertical, enablePadding);
+}
+
+ImageWindowIterator::ImageWindowIterator(const void *image, unsigned int imageDataType, ptrdiff_t rowStride,
+		ptrdiff_t columnStride, ptrdiff_t channelStride, double scale, unsigned int imageHeight,
+		unsigned int imageWidth, unsigned int numberOfChannels, unsigned int windowHeight, unsigned int windowWidth,
+		unsigned int windowStepHorizontal, unsigned int windowStepVertical, bool enablePadding) {
+    init(image, imageDataType, rowStride, columnStride, channelStride, scale, imageHeight, imageWidth,
+         numberOfChannels, windowHeight, windowWidth, windowStepHorizontal, windowStepVertical, enablePadding);
+}
+
+void ImageWindowIterator::init(const void *image, unsigned int imageDataType, ptrdiff_t rowStride,
+		ptrdiff_t columnStride, ptrdiff_t channelStride, double scale, unsigned int imageHeight,
+		unsigned int imageWidth, unsigned int numberOfChannels, unsigned int windowHeight, unsigned int windowWidth,
+		unsigned int windowStepHorizontal, unsigned int windowStepVertical, bool enablePadding) {
     unsigned int numberOfWindowsHorizontally, numberOfWindowsVertically;
 
     // Find number of windows
@@ -19,6 +36,11 @@ ImageWindowIterator::ImageWindowIterator(double *image, unsigned int imageHeight
     }
 
 	this->_image = image;
+	this->_imageDataType = imageDataType;
+	this->_rowStride = rowStride;
+	this->_columnStride = columnStride;
+	this->_channelStride = channelStride;
+	this->_scale = scale;
 	this->_imageHeight = imageHeight;
 	this->_imageWidth = imageWidth;
 	this->_numberOfChannels = numberOfChannels;
@@ -35,56 +57,106 @@ ImageWindowIterator::~ImageWindowIterator() {
 }
 
 
+// Copy the (zero padded) window of a strided image of any supported type to
+// a Fortran ordered (height x width x channels) window of doubles
+template <typename T>
+static void copyStridedWindow(const T *image, ptrdiff_t rowStride, ptrdiff_t columnStride, ptrdiff_t channelStride,
+		double scale, int imageHeight, int imageWidth, int numberOfChannels, int rowFrom, int columnFrom,
+		int windowHeight, int windowWidth, double *windowImage) {
+	int i, j, k;
+	for (k = 0; k < numberOfChannels; k++) {
+		for (j = columnFrom; j < columnFrom + windowWidth; j++) {
+			double *windowColumn = windowImage + windowHeight*((j-columnFrom)+windowWidth*k);
+			if (j < 0 || j > imageWidth-1) {
+				for (i = 0; i < windowHeight; i++)
+					windowColumn[i] = 0;
+				continue;
+			}
+			const T *imageColumn = image + j*columnStride + k*channelStride;
+			for (i = rowFrom; i < rowFrom + windowHeight; i++) {
+				if (i < 0 || i > imageHeight-1)
+					windowColumn[i-rowFrom] = 0;
+				else
+					windowColumn[i-rowFrom] = scale * (double)imageColumn[i*rowStride];
+			}
+		}
+	}
+}
+
+void ImageWindowIterator::copyWindowImage(int rowFrom, int columnFrom, double *windowImage) {
+	switch (_imageDataType) {
+		case FLOAT32:
+			copyStridedWindow((const float *)_image, _rowStride, _columnStride, _channelStride, _scale,
+			                  (int)_imageHeight, (int)_imageWidth, (int)_numberOfChannels, rowFrom, columnFrom,
+			                  (int)_windowHeight, (int)_windowWidth, windowImage);
+			break;
+		case UINT8:
+			copyStridedWindow((const unsigned char *)_image, _rowStride, _columnStride, _channelStride, _scale,
+			                  (int)_imageHeight, (int)_imageWidth, (int)_numberOfChannels, rowFrom, columnFrom,
+			                  (int)_windowHeight, (int)_windowWidth, windowImage);
+			break;
+		default:
+			copyStridedWindow((const double *)_image, _rowStride, _columnStride, _channelStride, _scale,
+			                  (int)_imageHeight, (int)_imageWidth, (int)_numberOfChannels, rowFrom, columnFrom,
+			                  (int)_windowHeight, (int)_windowWidth, windowImage);
+	}
+}
+
 void ImageWindowIterator::apply(double *outputImage, int *windowsCenters, WindowFeature *windowFeature) {
-	int rowCenter, rowFrom, rowTo, columnCenter, columnFrom, columnTo, i, j, k;
+    // Fortran ordered (vertical windows x horizontal windows x descriptor) output
+    apply(outputImage, 1, _numberOfWindowsVertically, _numberOfWindowsVertically*_numberOfWindowsHorizontally,
+          windowsCenters, windowFeature, 0, _numberOfWindowsVertically);
+}
+
+void ImageWindowIterator::windowLimits(unsigned int windowIndexVertical, unsigned int windowIndexHorizontal,
+		int *rowFrom, int *rowCenter, int *columnFrom, int *columnCenter) {
+    if (!_enablePadding) {
+        *rowFrom = windowIndexVertical*_windowStepVertical;
+        *rowCenter = *rowFrom + (int)round((double)_windowHeight / 2.0) - 1;
+        *columnFrom = windowIndexHorizontal*_windowStepHorizontal;
+        *columnCenter = *columnFrom + (int)round((double)_windowWidth / 2.0) - 1;
+    }
+    else {
+        *rowCenter = windowIndexVertical*_windowStepVertical;
+        *rowFrom = *rowCenter - (int)round((double)_windowHeight / 2.0) + 1;
+        *columnCenter = windowIndexHorizontal*_windowStepHorizontal;
+        *columnFrom = *columnCenter - (int)ceil((double)_windowWidth / 2.0) + 1;
+    }
+}
+
+// Computes the descriptors of the rows of windows in the range
+// [windowIndexVerticalFrom, windowIndexVerticalTo). Different ranges can be
+// computed concurrently, as only the rows of the output in the range are
+// written to.
+template <typename O>
+void ImageWindowIterator::applyRows(O *outputImage, ptrdiff_t outputStrideVertical,
+		ptrdiff_t outputStrideHorizontal, ptrdiff_t outputStrideDescriptor, int *windowsCenters,
+		WindowFeature *windowFeature, unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo) {
+	int rowCenter, rowFrom, columnCenter, columnFrom;
 	unsigned int windowIndexHorizontal, windowIndexVertical, d;
-	int imageHeight = (int)_imageHeight;
-	int imageWidth = (int)_imageWidth;
-	int numberOfChannels = (int)_numberOfChannels;
 
     // Initialize temporary matrices
 	double* windowImage = new double[_windowHeight*_windowWidth*_numberOfChannels];
 	double* descriptorVector = new double[windowFeature->descriptorLengthPerWindow];
 
     // Main loop
-    for (windowIndexVertical = 0; windowIndexVertical < _numberOfWindowsVertically; windowIndexVertical++) {
+    for (windowIndexVertical = windowIndexVerticalFrom; windowIndexVertical < windowIndexVerticalTo; windowIndexVertical++) {
         for (windowIndexHorizontal = 0; windowIndexHorizontal < _numberOfWindowsHorizontally; windowIndexHorizontal++) {
             // Find window limits
-            if (!_enablePadding) {
-                rowFrom = windowIndexVertical*_windowStepVertical;
-                rowTo = rowFrom + _windowHeight - 1;
-                rowCenter = rowFrom + (int)round((double)_windowHeight / 2.0) - 1;
-                columnFrom = windowIndexHorizontal*_windowStepHorizontal;
-                columnTo = columnFrom + _windowWidth - 1;
-                columnCenter = columnFrom + (int)round((double)_windowWidth / 2.0) - 1;
-            }
-            else {
-                rowCenter = windowIndexVertical*_windowStepVertical;
-                rowFrom = rowCenter - (int)round((double)_windowHeight / 2.0) + 1;
-                rowTo = rowFrom + _windowHeight - 1;
-                columnCenter = windowIndexHorizontal*_windowStepHorizontal;
-                columnFrom = columnCenter - (int)ceil((double)_windowWidth / 2.0) + 1;
-                columnTo = columnFrom + _windowWidth - 1;
-            }
+            windowLimits(windowIndexVertical, windowIndexHorizontal, &rowFrom, &rowCenter, &columnFrom,
+                         &columnCenter);
 
             // Copy window image
-			for (i = rowFrom; i <= rowTo; i++) {
-				for (j = columnFrom; j <= columnTo; j++) {
-					if (i < 0 || i > imageHeight-1 || j < 0 || j > imageWidth-1)
-						for (k = 0; k < numberOfChannels; k++)
-							windowImage[(i-rowFrom)+_windowHeight*((j-columnFrom)+_windowWidth*k)] = 0;
-					else
-						for (k=0; k < numberOfChannels; k++)
-							windowImage[(i-rowFrom)+_windowHeight*((j-columnFrom)+_windowWidth*k)] = _image[i+imageHeight*(j+imageWidth*k)];
-				}
-			}
+            copyWindowImage(rowFrom, columnFrom, windowImage);
 
             // Compute descriptor of window
             windowFeature->apply(windowImage, descriptorVector);
 
             // Store results
+            O *output = outputImage + windowIndexVertical*outputStrideVertical +
+                        windowIndexHorizontal*outputStrideHorizontal;
             for (d = 0; d < windowFeature->descriptorLengthPerWindow; d++)
-            	outputImage[windowIndexVertical+_numberOfWindowsVertically*(windowIndexHorizontal+_numberOfWindowsHorizontally*d)] = descriptorVector[d];
+            	output[d*outputStrideDescriptor] = (O)descriptorVector[d];
             windowsCenters[windowIndexVertical+_numberOfWindowsVertically*windowIndexHorizontal] = rowCenter;
             windowsCenters[windowIndexVertical+_numberOfWindowsVertically*(windowIndexHorizontal+_numberOfWindowsHorizontally)] = columnCenter;
         }
@@ -95,3 +167,80 @@ void ImageWindowIterator::apply(double *outputImage, int *windowsCenters, Window
     delete[] descriptorVector;
 }
 
+void ImageWindowIterator::apply(double *outputImage, ptrdiff_t outputStrideVertical,
+		ptrdiff_t outputStrideHorizontal, ptrdiff_t outputStrideDescriptor, int *windowsCenters,
+		WindowFeature *windowFeature, unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo) {
+	applyRows(outputImage, outputStrideVertical, outputStrideHorizontal, outputStrideDescriptor, windowsCenters,
+	          windowFeature, windowIndexVerticalFrom, windowIndexVerticalTo);
+}
+
+// As above, for features of integer values (e.g. LBP codes) that are stored
+// compactly. The values are converted as they are stored.
+void ImageWindowIterator::apply(unsigned char *outputImage, ptrdiff_t outputStrideVertical,
+		ptrdiff_t outputStrideHorizontal, ptrdiff_t outputStrideDescriptor, int *windowsCenters,
+		WindowFeature *windowFeature, unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo) {
+	applyRows(outputImage, outputStrideVertical, outputStrideHorizontal, outputStrideDescriptor, windowsCenters,
+	          windowFeature, windowIndexVerticalFrom, windowIndexVerticalTo);
+}
+
+void ImageWindowIterator::apply(unsigned short *outputImage, ptrdiff_t outputStrideVertical,
+		ptrdiff_t outputStrideHorizontal, ptrdiff_t outputStrideDescriptor, int *windowsCenters,
+		WindowFeature *windowFeature, unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo) {
+	applyRows(outputImage, outputStrideVertical, outputStrideHorizontal, outputStrideDescriptor, windowsCenters,
+	          windowFeature, windowIndexVerticalFrom, windowIndexVerticalTo);
+}
+
+// Computes the responses of a linear filter (weights and bias) to the
+// descriptors of the rows of windows in the range
+// [windowIndexVerticalFrom, windowIndexVerticalTo). The descriptor of each
+// window is only kept until its response is computed. The responses are a C
+// ordered (vertical windows x horizontal windows) matrix.
+void ImageWindowIterator::score(double *responses, int *windowsCenters, const double *weights, double bias,
+		WindowFeature *windowFeature, unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo) {
+	int rowCenter, rowFrom, columnCenter, columnFrom;
+	unsigned int windowIndexHorizontal, windowIndexVertical, d;
+	double response;
+
+	double* windowImage = new double[_windowHeight*_windowWidth*_numberOfChannels];
+	double* descriptorVector = new double[windowFeature->descriptorLengthPerWindow];
+
+    for (windowIndexVertical = windowIndexVerticalFrom; windowIndexVertical < windowIndexVerticalTo; windowIndexVertical++) {
+        for (windowIndexHorizontal = 0; windowIndexHorizontal < _numberOfWindowsHorizontally; windowIndexHorizontal++) {
+            windowLimits(windowIndexVertical, windowIndexHorizontal, &rowFrom, &rowCenter, &columnFrom,
+                         &columnCenter);
+            copyWindowImage(rowFrom, columnFrom, windowImage);
+            windowFeature->apply(windowImage, descriptorVector);
+
+            response = bias;
+            for (d = 0; d < windowFeature->descriptorLengthPerWindow; d++)
+            	response += weights[d] * descriptorVector[d];
+            responses[windowIndexVertical*_numberOfWindowsHorizontally + windowIndexHorizontal] = response;
+            windowsCenters[windowIndexVertical+_numberOfWindowsVertically*windowIndexHorizontal] = rowCenter;
+            windowsCenters[windowIndexVertical+_numberOfWindowsVertically*(windowIndexHorizontal+_numberOfWindowsHorizontally)] = columnCenter;
+        }
+    }
+
+    delete[] windowImage;
+    delete[] descriptorVector;
+}
+
+// Computes the descriptors of the (zero padded) windows centred at the given
+// (row, column) centres. The descriptors are stored contiguously, one window
+// after the other.
+void ImageWindowIterator::applyAtCentres(double *descriptors, const int *windowsCenters,
+		unsigned int numberOfWindows, WindowFeature *windowFeature) {
+	int rowFrom, columnFrom;
+	unsigned int n;
+
+	double* windowImage = new double[_windowHeight*_windowWidth*_numberOfChannels];
+
+	for (n = 0; n < numberOfWindows; n++) {
+		// Window limits are found as for the windows of a padded image
+		rowFrom = windowsCenters[2*n] - (int)round((double)_windowHeight / 2.0) + 1;
+		columnFrom = windowsCenters[2*n+1] - (int)ceil((double)_windowWidth / 2.0) + 1;
+		copyWindowImage(rowFrom, columnFrom, windowImage);
+		windowFeature->apply(windowImage, descriptors + n*windowFeature->descriptorLengthPerWindow);
+	}
+
+	delete[] windowImage;
+}
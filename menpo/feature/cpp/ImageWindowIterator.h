@@ -1,6 +1,10 @@
 #pragma once
+#include <cstddef>
 #include "WindowFeature.h"
 
+// The supported data types of the input image
+enum ImageDataType { FLOAT64 = 0, FLOAT32 = 1, UINT8 = 2 };
+
 class ImageWindowIterator {
 public:
 	unsigned int _numberOfWindowsHorizontally, _numberOfWindowsVertically, _numberOfWindows;
@@ -11,8 +15,39 @@ public:
 	ImageWindowIterator(double *image, unsigned int imageHeight, unsigned int imageWidth, unsigned int numberOfChannels,
 	        unsigned int windowHeight, unsigned int windowWidth, unsigned int windowStepHorizontal,
 			unsigned int windowStepVertical, bool enablePadding);
+	ImageWindowIterator(const void *image, unsigned int imageDataType, ptrdiff_t rowStride, ptrdiff_t columnStride,
+	        ptrdiff_t channelStride, double scale, unsigned int imageHeight, unsigned int imageWidth,
+	        unsigned int numberOfChannels, unsigned int windowHeight, unsigned int windowWidth,
+	        unsigned int windowStepHorizontal, unsigned int windowStepVertical, bool enablePadding);
 	virtual ~ImageWindowIterator();
 	void apply(double *outputImage, int *windowsCenters, WindowFeature *windowFeature);
+	void apply(double *outputImage, ptrdiff_t outputStrideVertical, ptrdiff_t outputStrideHorizontal,
+	        ptrdiff_t outputStrideDescriptor, int *windowsCenters, WindowFeature *windowFeature,
+	        unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo);
+	void apply(unsigned char *outputImage, ptrdiff_t outputStrideVertical, ptrdiff_t outputStrideHorizontal,
+	        ptrdiff_t outputStrideDescriptor, int *windowsCenters, WindowFeature *windowFeature,
+	        unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo);
+	void apply(unsigned short *outputImage, ptrdiff_t outputStrideVertical, ptrdiff_t outputStrideHorizontal,
+	        ptrdiff_t outputStrideDescriptor, int *windowsCenters, WindowFeature *windowFeature,
+	        unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo);
+	void applyAtCentres(double *descriptors, const int *windowsCenters, unsigned int numberOfWindows,
+	        WindowFeature *windowFeature);
+	void score(double *responses, int *windowsCenters, const double *weights, double bias,
+	        WindowFeature *windowFeature, unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo);
 private:
-	double *_image;
+	const void *_image;
+	unsigned int _imageDataType;
+	ptrdiff_t _rowStride, _columnStride, _channelStride;
+	double _scale;
+	void init(const void *image, unsigned int imageDataType, ptrdiff_t rowStride, ptrdiff_t columnStride,
+	        ptrdiff_t channelStride, double scale, unsigned int imageHeight, unsigned int imageWidth,
+	        unsigned int numberOfChannels, unsigned int windowHeight, unsigned int windowWidth,
+	        unsigned int windowStepHorizontal, unsigned int windowStepVertical, bool enablePadding);
+	void copyWindowImage(int rowFrom, int columnFrom, double *windowImage);
+	template <typename O>
+	void applyRows(O *outputImage, ptrdiff_t outputStrideVertical, ptrdiff_t outputStrideHorizontal,
+	        ptrdiff_t outputStrideDescriptor, int *windowsCenters, WindowFeature *windowFeature,
+	        unsigned int windowIndexVerticalFrom, unsigned int windowIndexVerticalTo);
+	void windowLimits(unsigned int windowIndexVertical, unsigned int windowIndexHorizontal, int *rowFrom,
+	        int *rowCenter, int *columnFrom, int *columnCenter);
 };
@@ -3,32 +3,31 @@
 LBP::LBP(unsigned int windowHeight, unsigned int windowWidth,
          unsigned int numberOfChannels, unsigned int *radius,
          unsigned int *samples, unsigned int numberOfRadiusSamplesCombinations,
-         unsigned int mapping_type, unsigned int *uniqueSamples,
-         unsigned int *whichMappingTable, unsigned int numberOfUniqueSamples) {
-	unsigned int descriptorLengthPerWindow =
-	                numberOfRadiusSamplesCombinations * numberOfChannels;
+         unsigned int **mappingTables, unsigned int *numberOfBins,
+         unsigned int cellSize) {
+    unsigned int i;
+    // a code per radius/samples combination per channel, or (if cellSize is
+    // not 0) a histogram of the codes over the cell
+    unsigned int descriptorLengthPerChannel = numberOfRadiusSamplesCombinations;
+    if (cellSize > 0) {
+        descriptorLengthPerChannel = 0;
+        for (i = 0; i < numberOfRadiusSamplesCombinations; i++)
+            descriptorLengthPerChannel += numberOfBins[i];
+    }
     this->samples = samples;
-    this->whichMappingTable = whichMappingTable;
+    this->numberOfBins = numberOfBins;
+    this->cellSize = cellSize;
     this->numberOfRadiusSamplesCombinations = numberOfRadiusSamplesCombinations;
-    this->descriptorLengthPerWindow = descriptorLengthPerWindow;
+    this->descriptorLengthPerWindow = descriptorLengthPerChannel * numberOfChannels;
     this->windowHeight = windowHeight;
     this->windowWidth = windowWidth;
     this->numberOfChannels = numberOfChannels;
 
-    // find mapping table for each unique samples value
-    unsigned int **mapping_tables, i;
-    mapping_tables = new unsigned int*[numberOfUniqueSamples];
-    for (i = 0; i < numberOfUniqueSamples; i++) {
-	    mapping_tables[i] = new unsigned int[power2(uniqueSamples[i])];
-	    if (mapping_type != 0)
-    	    generate_codes_mapping_table(mapping_tables[i], mapping_type,
-    	                                 uniqueSamples[i]);
-    	else {
-    	    for (int j = 0; j < power2(uniqueSamples[i]); j++)
-        	    mapping_tables[i][j] = j;
-        }
-	}
-    this->mapping_tables = mapping_tables;
+    // the codes mapping table of each radius/samples combination - the tables
+    // are owned by the caller, which shares them between features
+    mapping_tables = new unsigned int*[numberOfRadiusSamplesCombinations];
+    for (i = 0; i < numberOfRadiusSamplesCombinations; i++)
+        mapping_tables[i] = mappingTables[i];
 
     // find coordinates of the window centre in the window reference frame
     // (axes origin in bottom left corner)
@@ -56,6 +55,10 @@ LBP::LBP(unsigned int windowHeight, unsigned int windowWidth,
 
 LBP::~LBP() {
     // empty memory
+    for (unsigned int i = 0; i < numberOfRadiusSamplesCombinations; i++) {
+        delete [] samples_x_tables[i];
+        delete [] samples_y_tables[i];
+    }
     delete [] mapping_tables;
     delete [] samples_x_tables;
     delete [] samples_y_tables;
@@ -63,25 +66,31 @@ LBP::~LBP() {
 
 
 void LBP::apply(double *windowImage, double *descriptorVector) {
-    LBPdescriptor(windowImage, this->samples,
-                  this->numberOfRadiusSamplesCombinations,
-                  this->samples_x_tables, this->samples_y_tables,
-                  this->whichMappingTable, this->mapping_tables,
-                  this->windowHeight, this->windowWidth,
-                  this->numberOfChannels, descriptorVector);
+    if (this->cellSize > 0)
+        LBPhistograms(windowImage, this->samples,
+                      this->numberOfRadiusSamplesCombinations,
+                      this->samples_x_tables, this->samples_y_tables,
+                      this->mapping_tables, this->numberOfBins,
+                      this->cellSize, this->windowHeight, this->windowWidth,
+                      this->numberOfChannels, descriptorVector);
+    else
+        LBPdescriptor(windowImage, this->samples,
+                      this->numberOfRadiusSamplesCombinations,
+                      this->samples_x_tables, this->samples_y_tables,
+                      this->mapping_tables, this->windowHeight,
+                      this->windowWidth, this->numberOfChannels,
+                      descriptorVector);
 }
 
 
 void LBPdescriptor(double *inputImage, unsigned int *samples,
                    unsigned int numberOfRadiusSamplesCombinations,
                    double **samples_x_tables, double **samples_y_tables,
-                   unsigned int *whichMappingTable,
                    unsigned int **mapping_tables, unsigned int imageHeight,
                    unsigned int imageWidth, unsigned int numberOfChannels,
                    double *descriptorVector) {
-    unsigned int i, s, ch;
-    int centre_y, centre_x, rx, ry, fx, fy, cx, cy, lbp_code;
-    double centre_val, sample_val, tx, ty, w1, w2, w3, w4;
+    unsigned int i, ch;
+    int centre_y, centre_x, lbp_code;
 
     // find coordinates of the window centre in the window reference frame (axes origin in bottom left corner)
     centre_y = (int)((imageHeight - 1) / 2);
@@ -89,142 +98,119 @@ void LBPdescriptor(double *inputImage, unsigned int *samples,
 
     // for each radius/samples combination
     for (i = 0; i < numberOfRadiusSamplesCombinations; i++) {
-        // for each channel, compute the lbp code
+        // for each channel, compute the lbp code of the window centre
         for (ch = 0; ch < numberOfChannels; ch++) {
-            // value of centre
-            centre_val = inputImage[centre_y + centre_x * imageHeight +
-                                    ch * imageHeight * imageWidth];
-            lbp_code = 0;
-            for (s = 0; s < samples[i]; s++) {
-                // check if interpolation is needed
-                rx = (int)round(samples_x_tables[i][s]);
-                ry = (int)round(samples_y_tables[i][s]);
-                if ( (fabs(samples_x_tables[i][s] - rx) < small_val) &&
-                     (fabs(samples_y_tables[i][s] - ry) < small_val) )
-                    sample_val = inputImage[ry + rx * imageHeight +
-                                            ch * imageHeight * imageWidth];
-                else {
-                    fx = (int)floor(samples_x_tables[i][s]);
-                    fy = (int)floor(samples_y_tables[i][s]);
-                    cx = (int)ceil(samples_x_tables[i][s]);
-                    cy = (int)ceil(samples_y_tables[i][s]);
-                    tx = samples_x_tables[i][s] - fx;
-                    ty = samples_y_tables[i][s] - fy;
-                    // compute interpolation weights and value
-                    w1 = (1 - tx) * (1 - ty);
-                    w2 =      tx  * (1 - ty);
-                    w3 = (1 - tx) *      ty ;
-                    w4 =      tx  *      ty ;
-                    sample_val = w1 * inputImage[fy + fx*imageHeight +
-                                                 ch*imageHeight*imageWidth] +
-                                 w2 * inputImage[fy + cx*imageHeight +
-                                                 ch*imageHeight*imageWidth] +
-                                 w3 * inputImage[cy + fx*imageHeight +
-                                                 ch*imageHeight*imageWidth] +
-                                 w4 * inputImage[cy + cx*imageHeight +
-                                                 ch*imageHeight*imageWidth];
-                }
-
-                // update the lbp code
-                if (sample_val >= centre_val)
-                    lbp_code += power2(s);
-            }
+            lbp_code = LBPcode(inputImage + ch * imageHeight * imageWidth,
+                               imageHeight, centre_y, centre_x, 0, 0,
+                               samples[i], samples_x_tables[i],
+                               samples_y_tables[i]);
 
             // store lbp code with mapping
             descriptorVector[i + ch*numberOfRadiusSamplesCombinations] =
-                mapping_tables[whichMappingTable[i]][lbp_code];
+                mapping_tables[i][lbp_code];
         }
     }
 }
 
-int power2(int index) {
-    if (index == 0)
-        return 1;
-    int number = 2;
-    for (int i = 1; i < index; i++)
-        number = number * 2;
-    return number;
-}
 
-void generate_codes_mapping_table(unsigned int *mapping_table,
-                                  unsigned int mapping_type,
-                                  unsigned int n_samples) {
-    int c;
-    unsigned int newMax = 0;
-    if (mapping_type == 1) {
-        // uniform-2
-        newMax = n_samples * (n_samples - 1) + 3;
-        int index = 0, num_trans;
-        for (c = 0; c < power2(n_samples); c++) {
-            // number of 1->0 and 0->1 transitions in a binary string x is
-            // equal to the number of 1-bits in XOR(x, rotate_left(x))
-            num_trans = count_bit_transitions(c, n_samples);
-            if (num_trans <= 2) {
-                mapping_table[c] = index;
-                index += 1;
-            }
-            else
-                mapping_table[c] = newMax - 1;
-        }
-    }
-    else if (mapping_type == 2) {
-        // rotation invariant
-        int rm, r;
-        unsigned int j;
-        int *tmp_map = new int[power2(n_samples)];
-        for (c = 0; c < power2(n_samples); c++)
-            tmp_map[c] = -1;
-        newMax = 0;
-        for (c = 0; c < power2(n_samples); c++) {
-            rm = c;
-            r = c;
-            for (j = 1; j < n_samples; j++) {
-                r = leftRotate(r, n_samples, 1);
-                if (r < rm)
-                    rm = r;
-            }
-            if (tmp_map[rm] < 0) {
-                tmp_map[rm] = newMax;
-                newMax += 1;
+// The histograms of the (mapped) codes of the cellSize x cellSize pixels in
+// the middle of the window, for each radius/samples combination, for each
+// channel. The window is larger than the cell by the largest radius on every
+// side, so that the samples of all the codes are inside the window.
+void LBPhistograms(double *inputImage, unsigned int *samples,
+                   unsigned int numberOfRadiusSamplesCombinations,
+                   double **samples_x_tables, double **samples_y_tables,
+                   unsigned int **mapping_tables, unsigned int *numberOfBins,
+                   unsigned int cellSize, unsigned int imageHeight,
+                   unsigned int imageWidth, unsigned int numberOfChannels,
+                   double *descriptorVector) {
+    unsigned int i, ch, x, y, histogramsLength = 0;
+    int centre_y, centre_x, lbp_code;
+    double *histogram;
+
+    for (i = 0; i < numberOfRadiusSamplesCombinations; i++)
+        histogramsLength += numberOfBins[i];
+    for (i = 0; i < histogramsLength * numberOfChannels; i++)
+        descriptorVector[i] = 0;
+
+    // the codes are computed relative to the window centre, which is offset
+    // to each pixel of the cell
+    centre_y = (int)((imageHeight - 1) / 2);
+    centre_x = (int)((imageWidth - 1) / 2);
+    int cellFrom_y = (int)((imageHeight - cellSize) / 2);
+    int cellFrom_x = (int)((imageWidth - cellSize) / 2);
+
+    for (ch = 0; ch < numberOfChannels; ch++) {
+        histogram = descriptorVector + ch * histogramsLength;
+        for (i = 0; i < numberOfRadiusSamplesCombinations; i++) {
+            for (x = 0; x < cellSize; x++) {
+                for (y = 0; y < cellSize; y++) {
+                    lbp_code = LBPcode(inputImage + ch * imageHeight * imageWidth,
+                                       imageHeight, centre_y, centre_x,
+                                       cellFrom_y + y - centre_y,
+                                       cellFrom_x + x - centre_x, samples[i],
+                                       samples_x_tables[i], samples_y_tables[i]);
+                    histogram[mapping_tables[i][lbp_code]] += 1;
+                }
             }
-            mapping_table[c] = tmp_map[rm];
-        }
-    }
-    else if (mapping_type == 3) {
-        // rotation invariant and uniform-2
-        int num_trans;
-        newMax = n_samples + 2;
-        for (c = 0; c < power2(n_samples); c++) {
-            // number of 1->0 and 0->1 transitions in a binary string x is
-            // equal to the number of 1-bits in XOR(x, rotate_left(x))
-            num_trans = count_bit_transitions(c, n_samples);
-            if (num_trans <= 2)
-                mapping_table[c] = count_bits(c);
-            else
-                mapping_table[c] = n_samples + 1;
+            histogram += numberOfBins[i];
         }
     }
 }
 
-int count_bit_transitions(int a, unsigned int n_samples) {
-    int b = a >> 1; // sign-extending shift properly counts bits at the ends
-    int c = a ^ b;  // xor marks bits that are not the same as their neighbors on the left
-    if (a >= power2(n_samples - 1))
-        return count_bits(c) - 1; // count number of set bits in c
-    else
-        return count_bits(c); // count number of set bits in c
-}
 
-int count_bits(int n) {
-    unsigned int c; // c accumulates the total bits set in v
-    for (c = 0; n; c++)
-        n &= n - 1; // clear the least significant bit set
-    return c;
+// The (unmapped) code of the pixel offset by (offset_y, offset_x) from the
+// centre (centre_y, centre_x) of a Fortran ordered channel of a window. The
+// samples tables hold the coordinates of the samples around the centre.
+int LBPcode(double *channelImage, unsigned int imageHeight, int centre_y,
+            int centre_x, int offset_y, int offset_x, unsigned int samples,
+            double *samples_x_table, double *samples_y_table) {
+    unsigned int s;
+    int rx, ry, fx, fy, cx, cy, lbp_code = 0;
+    double centre_val, sample_val, sample_x, sample_y, tx, ty, w1, w2, w3, w4;
+
+    // value of centre
+    centre_val = channelImage[centre_y + offset_y +
+                              (centre_x + offset_x) * imageHeight];
+    for (s = 0; s < samples; s++) {
+        sample_x = samples_x_table[s] + offset_x;
+        sample_y = samples_y_table[s] + offset_y;
+        // check if interpolation is needed
+        rx = (int)round(sample_x);
+        ry = (int)round(sample_y);
+        if ( (fabs(sample_x - rx) < small_val) &&
+             (fabs(sample_y - ry) < small_val) )
+            sample_val = channelImage[ry + rx * imageHeight];
+        else {
+            fx = (int)floor(sample_x);
+            fy = (int)floor(sample_y);
+            cx = (int)ceil(sample_x);
+            cy = (int)ceil(sample_y);
+            tx = sample_x - fx;
+            ty = sample_y - fy;
+            // compute interpolation weights and value
+            w1 = (1 - tx) * (1 - ty);
+            w2 =      tx  * (1 - ty);
+            w3 = (1 - tx) *      ty ;
+            w4 =      tx  *      ty ;
+            sample_val = w1 * channelImage[fy + fx*imageHeight] +
+                         w2 * channelImage[fy + cx*imageHeight] +
+                         w3 * channelImage[cy + fx*imageHeight] +
+                         w4 * channelImage[cy + cx*imageHeight];
+        }
+
+        // update the lbp code
+        if (sample_val >= centre_val)
+            lbp_code += power2(s);
+    }
+    return lbp_code;
 }
 
-int leftRotate(int num, unsigned int len_bits, unsigned int move_bits) {
-   // In num<<move_bits, last move_bits bits are 0. To put first 3 bits of num
-   // at last, do bitwise or of num<<move_bits with num >>(len_bits - move_bits)
-   return ((num << move_bits % len_bits) & (power2(len_bits) - 1)) |
-          ((num & (power2(len_bits) - 1)) >> (len_bits - (move_bits % len_bits)));
+int power2(int index) {
+    if (index == 0)
+        return 1;
+    int number = 2;
+    for (int i = 1; i < index; i++)
+        number = number * 2;
+    return number;
 }
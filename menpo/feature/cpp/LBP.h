@@ -16,29 +16,31 @@ public:
 	LBP(unsigned int windowHeight, unsigned int windowWidth,
 	    unsigned int numberOfChannels, unsigned int *radius,
 	    unsigned int *samples, unsigned int numberOfRadiusSamplesCombinations,
-	    unsigned int mapping_type, unsigned int *uniqueSamples,
-	    unsigned int *whichMappingTable, unsigned int numberOfUniqueSamples);
+	    unsigned int **mappingTables, unsigned int *numberOfBins,
+	    unsigned int cellSize);
 	virtual ~LBP();
 	void apply(double *windowImage, double *descriptorVector);
 private:
-    unsigned int *samples, *whichMappingTable, **mapping_tables;
+    unsigned int *samples, **mapping_tables, *numberOfBins;
     unsigned int numberOfRadiusSamplesCombinations, windowHeight, windowWidth,
-                 numberOfChannels;
+                 numberOfChannels, cellSize;
     double **samples_x_tables, **samples_y_tables;
 };
 
 void LBPdescriptor(double *inputImage, unsigned int *samples,
                    unsigned int numberOfRadiusSamplesCombinations,
                    double **samples_x_tables, double **samples_y_tables,
-                   unsigned int *whichMappingTable,
                    unsigned int **mapping_tables, unsigned int imageHeight,
                    unsigned int imageWidth, unsigned int numberOfChannels,
                    double *descriptorVector);
+void LBPhistograms(double *inputImage, unsigned int *samples,
+                   unsigned int numberOfRadiusSamplesCombinations,
+                   double **samples_x_tables, double **samples_y_tables,
+                   unsigned int **mapping_tables, unsigned int *numberOfBins,
+                   unsigned int cellSize, unsigned int imageHeight,
+                   unsigned int imageWidth, unsigned int numberOfChannels,
+                   double *descriptorVector);
+int LBPcode(double *channelImage, unsigned int imageHeight, int centre_y,
+            int centre_x, int offset_y, int offset_x, unsigned int samples,
+            double *samples_x_table, double *samples_y_table);
 int power2(int index);
-void generate_codes_mapping_table(unsigned int *mapping_table,
-                                  unsigned int mapping_type,
-                                  unsigned int n_samples);
-int count_bit_transitions(int a, unsigned int n_samples);
-int count_bits(int n);
-int leftRotate(int num, unsigned int len_bits, unsigned int move_bits);
-
@@ -1,54 +1,52 @@
-#include <stdio.h>
+#pragma once
 
-static inline long long SUB2IND(const long long j, const long long i, const long long k,
-                                const long long row_size, const long long col_size,
-                                const long long n_channels) {
-    //return ((i + col_size * j) * n_channels) + k;
-    return (i + col_size * j) + (row_size * col_size * k);
+// The gradient of a (rows x cols) channel at pixel (j, i), computed with
+// central differences in the interior and one sided differences at the
+// edges, in double precision whatever the type of the pixels.
+template<typename T>
+static inline void gradient_at(const T* channel, const long long rows, const long long cols,
+                               const long long j, const long long i, double *dy, double *dx) {
+    const T* p = channel + j * cols + i;
+    if (rows == 1)
+        *dy = 0;
+    else if (j == 0)
+        *dy = (double)p[cols] - (double)p[0];
+    else if (j == rows - 1)
+        *dy = (double)p[0] - (double)p[-cols];
+    else
+        *dy = ((double)p[cols] - (double)p[-cols]) / 2.0;
+    if (cols == 1)
+        *dx = 0;
+    else if (i == 0)
+        *dx = (double)p[1] - (double)p[0];
+    else if (i == cols - 1)
+        *dx = (double)p[0] - (double)p[-1];
+    else
+        *dx = ((double)p[1] - (double)p[-1]) / 2.0;
 }
 
-template<typename T>
+// The gradient of the rows [row_from, row_to) of a (n_channels x rows x cols)
+// C ordered image. The output is (2 * n_channels x rows x cols), ordered as
+// [dy, dx], each over all channels. Each call only writes its own rows of
+// the output, so disjoint row ranges can be computed concurrently.
+template<typename T, typename O>
 void central_difference(const T* in, const long long rows,
                         const long long cols, const long long n_channels,
-                        T* out) {
-    const long long n_output_channels = n_channels * 2;
-    long long output_index = 0;
+                        const long long row_from, const long long row_to,
+                        O* out) {
+    const long long size = rows * cols;
+    double dy, dx;
 
-    #pragma omp for
     for (long long k = 0; k < n_channels; ++k) {
-        // row-derivative
-        for (long long i = 0; i < cols; ++i) {
-            for (long long j = 0; j < rows; ++j) {
-                if (j == 0) {
-                    output_index = SUB2IND(0, i, k, rows, cols, n_output_channels);
-                    out[output_index] = in[SUB2IND(1, i, k, rows, cols, n_channels)] - in[SUB2IND(0, i, k, rows, cols, n_channels)];
-                }
-                else if (j == rows - 1) {
-                    output_index = SUB2IND(j, i, k, rows, cols, n_output_channels);
-                    out[output_index] = in[SUB2IND(j, i, k, rows, cols, n_channels)] - in[SUB2IND(j - 1, i, k, rows, cols, n_channels)];
-                }
-                else {
-                    output_index = SUB2IND(j, i, k, rows, cols, n_output_channels);
-                    out[output_index] = (in[SUB2IND(j + 1, i, k, rows, cols, n_channels)] - in[SUB2IND(j - 1, i, k, rows, cols, n_channels)]) / 2.0;
-                }
-            }
-        }
-
-        // column-derivative
-        for (long long j = 0; j < rows; ++j) {
+        const T* channel = in + k * size;
+        O* dy_out = out + k * size;
+        O* dx_out = out + (n_channels + k) * size;
+        for (long long j = row_from; j < row_to; ++j) {
             for (long long i = 0; i < cols; ++i) {
-                if (i == 0) {
-                    output_index = SUB2IND(j, 0, n_channels + k , rows, cols, n_output_channels);
-                    out[output_index] = in[SUB2IND(j, 1, k, rows, cols, n_channels)] - in[SUB2IND(j, 0, k, rows, cols, n_channels)];
-                }
-                else if (i == cols - 1) {
-                    output_index = SUB2IND(j, cols - 1, n_channels + k, rows, cols, n_output_channels);
-                    out[output_index] = in[SUB2IND(j, i, k, rows, cols, n_channels)] - in[SUB2IND(j, i - 1, k, rows, cols, n_channels)];
-                }
-                else {
-                    output_index = SUB2IND(j, i, n_channels + k, rows, cols, n_output_channels);
-                    out[output_index] = (in[SUB2IND(j, i + 1, k, rows, cols, n_channels)] - in[SUB2IND(j, i - 1, k, rows, cols, n_channels)]) / 2.0;
-                }
+                gradient_at(channel, rows, cols, j, i, &dy, &dx);
+                const long long index = j * cols + i;
+                dy_out[index] = (O)dy;
+                dx_out[index] = (O)dx;
             }
         }
     }
@@ -0,0 +1,117 @@
+#pragma once
+#include <math.h>
+#include <vector>
+#include "central_difference.h"
+
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+
+// DAISY descriptors [1], following the implementation of scikit-image.
+//
+// [1] E. Tola, V. Lepetit and P. Fua, "Daisy: An efficient dense descriptor
+//     applied to wide-baseline stereo", IEEE Transactions on Pattern Analysis
+//     and Machine Intelligence, vol. 32, num. 5, p. 815-830, 2010.
+
+enum DaisyNormalization {
+    DAISY_NORMALIZATION_OFF = 0,
+    DAISY_NORMALIZATION_L1 = 1,
+    DAISY_NORMALIZATION_L2 = 2,
+    DAISY_NORMALIZATION_HISTOGRAMS = 3
+};
+
+// The (n_orientations x rows x cols) orientation maps of the rows
+// [row_from, row_to) of a (n_channels x rows x cols) C ordered image. At each
+// pixel, the gradient of the channel of largest magnitude contributes its
+// magnitude to every orientation, weighted by a circular normal distribution
+// around the orientation. Each call only writes its own rows of the output.
+template<typename T>
+void daisy_orientation_maps(const T* in, const long long rows, const long long cols,
+                            const long long n_channels, const long long n_orientations,
+                            const long long row_from, const long long row_to,
+                            double* out) {
+    const long long size = rows * cols;
+    const double kappa = n_orientations / M_PI;
+    std::vector<double> angles(n_orientations);
+    for (long long o = 0; o < n_orientations; ++o)
+        angles[o] = 2 * o * M_PI / n_orientations - M_PI;
+    double dy, dx, magnitude, max_magnitude, orientation;
+
+    for (long long j = row_from; j < row_to; ++j) {
+        for (long long i = 0; i < cols; ++i) {
+            max_magnitude = 0;
+            orientation = 0;
+            for (long long k = 0; k < n_channels; ++k) {
+                gradient_at(in + k * size, rows, cols, j, i, &dy, &dx);
+                magnitude = sqrt(dy * dy + dx * dx);
+                if (magnitude > max_magnitude) {
+                    max_magnitude = magnitude;
+                    orientation = atan2(dy, dx);
+                }
+            }
+            const long long index = j * cols + i;
+            for (long long o = 0; o < n_orientations; ++o)
+                out[o * size + index] = exp(kappa * cos(orientation - angles[o])) * max_magnitude;
+        }
+    }
+}
+
+// The descriptors at the centres [centre_from, centre_to) of the
+// (n_centres x 2) centres, sampled from the (n_levels x n_orientations x rows
+// x cols) smoothed orientation maps. The descriptor is the concatenation of
+// the (n_samples x 3) samples, each the histogram of smoothing level
+// samples[s, 0] at offset (samples[s, 1], samples[s, 2]) from the centre.
+// Samples outside the image are read at the nearest pixel of the image.
+// Value d of descriptor n is written to
+// out[n * descriptor_stride + d * value_stride].
+inline void daisy_descriptors(const double* smoothed, const long long rows, const long long cols,
+                              const long long n_orientations, const int* samples,
+                              const long long n_samples, const int* centres,
+                              const long long centre_from, const long long centre_to,
+                              const int normalization, const long long descriptor_stride,
+                              const long long value_stride, double* out) {
+    const long long size = rows * cols;
+    const long long descriptor_length = n_samples * n_orientations;
+    std::vector<double> descriptor(descriptor_length);
+
+    for (long long n = centre_from; n < centre_to; ++n) {
+        for (long long s = 0; s < n_samples; ++s) {
+            long long y = centres[2 * n] + samples[3 * s + 1];
+            long long x = centres[2 * n + 1] + samples[3 * s + 2];
+            y = y < 0 ? 0 : (y >= rows ? rows - 1 : y);
+            x = x < 0 ? 0 : (x >= cols ? cols - 1 : x);
+            const double* level = smoothed + samples[3 * s] * n_orientations * size;
+            for (long long o = 0; o < n_orientations; ++o)
+                descriptor[s * n_orientations + o] = level[o * size + y * cols + x];
+        }
+
+        if (normalization != DAISY_NORMALIZATION_OFF) {
+            for (long long d = 0; d < descriptor_length; ++d)
+                descriptor[d] += 1e-10;
+            if (normalization == DAISY_NORMALIZATION_HISTOGRAMS) {
+                for (long long s = 0; s < n_samples; ++s) {
+                    double* histogram = &descriptor[s * n_orientations];
+                    double norm = 0;
+                    for (long long o = 0; o < n_orientations; ++o)
+                        norm += histogram[o] * histogram[o];
+                    norm = sqrt(norm);
+                    for (long long o = 0; o < n_orientations; ++o)
+                        histogram[o] /= norm;
+                }
+            }
+            else {
+                double norm = 0;
+                for (long long d = 0; d < descriptor_length; ++d)
+                    norm += normalization == DAISY_NORMALIZATION_L1 ?
+                        descriptor[d] : descriptor[d] * descriptor[d];
+                if (normalization == DAISY_NORMALIZATION_L2)
+                    norm = sqrt(norm);
+                for (long long d = 0; d < descriptor_length; ++d)
+                    descriptor[d] /= norm;
+            }
+        }
+
+        for (long long d = 0; d < descriptor_length; ++d)
+            out[n * descriptor_stride + d * value_stride] = descriptor[d];
+    }
+}
@@ -0,0 +1,80 @@
+#pragma once
+#include <math.h>
+#include <vector>
+
+// The index of the pixel read for index i of an axis of length n, reflecting
+// about the edges (d c b a | a b c d | d c b a), as scipy.ndimage's default
+// 'reflect' mode.
+static inline long long reflect_index(long long i, const long long n) {
+    const long long period = 2 * n;
+    i %= period;
+    if (i < 0)
+        i += period;
+    return i < n ? i : period - 1 - i;
+}
+
+template<typename T>
+static inline T from_double(const double value) {
+    return (T)value;
+}
+
+// Integer pixels are rounded and saturated rather than truncated
+template<>
+inline unsigned char from_double<unsigned char>(const double value) {
+    if (value <= 0)
+        return 0;
+    if (value >= 255)
+        return 255;
+    return (unsigned char)(value + 0.5);
+}
+
+// Separable filtering of the rows [row_from, row_to) of a
+// (n_channels x rows x cols) C ordered image - each channel is correlated
+// with the (2 * radius_y + 1) vertical kernel weights_y, then with the
+// (2 * radius_x + 1) horizontal kernel weights_x. The vertical pass of the
+// rows is kept in double precision (in a buffer of the size of the rows) and
+// only converted to the type of the output at the end, so
+// each call only reads the input and writes its own rows of the output and
+// disjoint row ranges can be filtered concurrently.
+template<typename T, typename O>
+void separable_filter(const T* in, const long long rows, const long long cols,
+                      const long long n_channels,
+                      const double* weights_y, const long long radius_y,
+                      const double* weights_x, const long long radius_x,
+                      const long long row_from, const long long row_to,
+                      O* out) {
+    const long long size = rows * cols;
+    std::vector<double> vertical((row_to - row_from) * cols);
+    std::vector<long long> columns(cols + 2 * radius_x);
+    for (long long i = 0; i < cols + 2 * radius_x; ++i)
+        columns[i] = reflect_index(i - radius_x, cols);
+
+    for (long long k = 0; k < n_channels; ++k) {
+        const T* channel = in + k * size;
+        O* channel_out = out + k * size;
+        // vertical pass
+        for (long long j = row_from; j < row_to; ++j) {
+            double* v = &vertical[(j - row_from) * cols];
+            for (long long i = 0; i < cols; ++i)
+                v[i] = 0;
+            for (long long t = -radius_y; t <= radius_y; ++t) {
+                const T* row = channel + reflect_index(j + t, rows) * cols;
+                const double w = weights_y[t + radius_y];
+                for (long long i = 0; i < cols; ++i)
+                    v[i] += w * (double)row[i];
+            }
+        }
+        // horizontal pass
+        for (long long j = row_from; j < row_to; ++j) {
+            const double* v = &vertical[(j - row_from) * cols];
+            O* row_out = channel_out + j * cols;
+            for (long long i = 0; i < cols; ++i) {
+                const long long* c = &columns[i];
+                double value = 0;
+                for (long long t = 0; t <= 2 * radius_x; ++t)
+                    value += weights_x[t] * v[c[t]];
+                row_out[i] = from_double<O>(value);
+            }
+        }
+    }
+}
@@ -0,0 +1,95 @@
+#pragma once
+#include <math.h>
+#include "central_difference.h"
+
+// Fused kernels that compute features of the gradient of each channel of a
+// (n_channels x rows x cols) C ordered image in a single pass over the
+// pixels, without storing the gradient. The gradient is computed as by
+// central_difference (one sided differences at the edges) in double
+// precision, whatever the type of the pixels and of the output.
+
+// Image Gradient Orientations - for each channel, the sine and cosine of the
+// angle phi of (dy + i dx), then (if double_angles) of 2 phi. The output is
+// (2 * n_channels x rows x cols), or (4 * n_channels x rows x cols) with
+// double angles, ordered as
+// [sin(phi), (sin(2 phi),) cos(phi), (cos(2 phi))], each over all channels.
+template<typename T, typename O>
+void igo_kernel(const T* in, const long long rows, const long long cols,
+                const long long n_channels, const bool double_angles, O* out) {
+    const long long size = rows * cols;
+    const long long n_angles = double_angles ? 2 : 1;
+    double dy, dx, magnitude, s, c;
+
+    for (long long k = 0; k < n_channels; ++k) {
+        const T* channel = in + k * size;
+        O* sin_out = out + k * size;
+        O* cos_out = out + (n_angles * n_channels + k) * size;
+        O* sin2_out = out + (n_channels + k) * size;
+        O* cos2_out = out + (3 * n_channels + k) * size;
+        for (long long j = 0; j < rows; ++j) {
+            for (long long i = 0; i < cols; ++i) {
+                gradient_at(channel, rows, cols, j, i, &dy, &dx);
+                // phi = 0 for a zero gradient
+                magnitude = sqrt(dy * dy + dx * dx);
+                s = 0;
+                c = 1;
+                if (magnitude > 0) {
+                    s = dx / magnitude;
+                    c = dy / magnitude;
+                }
+                const long long index = j * cols + i;
+                sin_out[index] = (O)s;
+                cos_out[index] = (O)c;
+                if (double_angles) {
+                    sin2_out[index] = (O)(2 * s * c);
+                    cos2_out[index] = (O)(c * c - s * s);
+                }
+            }
+        }
+    }
+}
+
+// The (n_channels x rows x cols) gradient magnitudes - the first pass of the
+// Edge Structure features, which are normalized by their median
+template<typename T, typename O>
+void gradient_magnitude_kernel(const T* in, const long long rows, const long long cols,
+                               const long long n_channels, O* out) {
+    const long long size = rows * cols;
+    double dy, dx;
+
+    for (long long k = 0; k < n_channels; ++k) {
+        const T* channel = in + k * size;
+        O* magnitude_out = out + k * size;
+        for (long long j = 0; j < rows; ++j) {
+            for (long long i = 0; i < cols; ++i) {
+                gradient_at(channel, rows, cols, j, i, &dy, &dx);
+                magnitude_out[j * cols + i] = (O)sqrt(dy * dy + dx * dx);
+            }
+        }
+    }
+}
+
+// Edge Structure - the gradient divided by its magnitude plus the median
+// magnitude. The output is (2 * n_channels x rows x cols), ordered as the
+// gradient ([dy, dx], each over all channels).
+template<typename T, typename O>
+void es_kernel(const T* in, const long long rows, const long long cols,
+               const long long n_channels, const double median, O* out) {
+    const long long size = rows * cols;
+    double dy, dx, norm;
+
+    for (long long k = 0; k < n_channels; ++k) {
+        const T* channel = in + k * size;
+        O* dy_out = out + k * size;
+        O* dx_out = out + (n_channels + k) * size;
+        for (long long j = 0; j < rows; ++j) {
+            for (long long i = 0; i < cols; ++i) {
+                gradient_at(channel, rows, cols, j, i, &dy, &dx);
+                norm = sqrt(dy * dy + dx * dx) + median;
+                const long long index = j * cols + i;
+                dy_out[index] = (O)(dy / norm);
+                dx_out[index] = (O)(dx / norm);
+            }
+        }
+    }
+}
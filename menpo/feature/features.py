@@ -1,12 +1,51 @@
 from __future__ import division
+from collections import namedtuple
 import itertools
 import warnings
 import numpy as np
 scipy_gaussian_filter = None  # expensive
 
-from .base import ndfeature, winitfeature, imgfeature
-from ._gradient import gradient_cython
-from .windowiterator import WindowIterator, WindowIteratorResult
+from menpo.image import Image
+from menpo.shape import PointCloud
+
+from .base import (ndfeature, winitfeature, imgfeature,
+                   unwrap_partial_feature)
+from ._gradient import (gradient_cython, gaussian_filter_cython, igo_cython,
+                        es_cython, daisy_cython)
+from .windowiterator import (WindowIterator, WindowIteratorResult,
+                             _lbp_mapping_table)
+
+
+def _window_centres(points, sample_offsets=None):
+    # The (n_points * n_offsets, 2) integer centres of the windows around the
+    # points, along with (n_points, n_offsets)
+    points = getattr(points, 'points', points)
+    if sample_offsets is None:
+        sample_offsets = np.zeros([1, 2])
+    centres = points[:, None, :] + np.asarray(sample_offsets)[None, :, :]
+    return (np.round(centres).astype(np.int32).reshape(-1, 2),
+            centres.shape[:2])
+
+
+# The datatypes of the pixels that are Gaussian filtered natively
+_NATIVE_FILTER_DTYPES = (np.uint8, np.float32, np.float64)
+
+
+def _check_n_threads(n_threads):
+    if n_threads is not None and n_threads <= 0:
+        raise ValueError('n_threads should be positive '
+                         '({} provided)'.format(n_threads))
+
+
+def _check_batch(pixels, feature_name):
+    if pixels.ndim != 4:
+        raise ValueError('{} batches are 4D arrays (N, C, H, W) ({}D '
+                         'provided)'.format(feature_name, pixels.ndim))
+
+
+def _linear_responses(descriptors, weights, bias):
+    # The responses of a linear filter to (..., K) descriptors
+    return np.dot(descriptors, np.ravel(weights)) + bias
 
 
 def _np_gradient(pixels):
@@ -39,7 +78,7 @@ def _np_gradient(pixels):
 
 
 @ndfeature
-def gradient(pixels):
+def gradient(pixels, n_threads=None):
     r"""
     Calculates the gradient of an input image. The image is assumed to have
     channel information on the first axis. In the case of multiple channels,
@@ -55,8 +94,12 @@ def gradient(pixels):
         Either the image object itself or an array where the first dimension
         is interpreted as channels. This means an N-dimensional image is
         represented by an N+1 dimensional array.
-        If the image is 2-dimensional the pixels should be of type
-        float/double (int is not supported).
+        The gradient of 2D images is computed natively, with the GIL
+        released - `float32` pixels produce a `float32` gradient and all
+        others (e.g. `uint8`) a `float64` gradient.
+    n_threads : `int` or ``None``, optional
+        If not ``None``, the rows of a 2D image are split between
+        ``n_threads`` threads.
 
     Returns
     -------
@@ -68,19 +111,74 @@ def gradient(pixels):
         ``I[:, 0, 0] = [R0_y, G0_y, B0_y, R0_x, G0_x, B0_x]``. To be clear,
         all the ``y``-gradients are returned over each channel, then all
         the ``x``-gradients.
+
+    Raises
+    ------
+    ValueError
+        ``n_threads`` is not positive
     """
+    _check_n_threads(n_threads)
     if (pixels.ndim - 1) == 2:  # 2D Image
-        return gradient_cython(pixels)
+        return gradient_cython(pixels, n_threads=n_threads)
     else:
         return _np_gradient(pixels)
 
 
+def gradient_batch(pixels, n_threads=None):
+    r"""
+    Calculates the gradient of a batch of 2D images of the same shape, as
+    for :map:`gradient`. The gradients of all the images are written directly
+    to a single array.
+
+    Parameters
+    ----------
+    pixels : ``(N, C, X, Y)`` `ndarray`
+        The pixels of the ``N`` images.
+    n_threads : `int` or ``None``, optional
+        If not ``None``, the rows of the images are split between
+        ``n_threads`` threads.
+
+    Returns
+    -------
+    gradient : ``(N, 2 * C, X, Y)`` `ndarray`
+        The gradient of each image, ordered as for :map:`gradient`.
+
+    Raises
+    ------
+    ValueError
+        The pixels are not a 4D array
+    ValueError
+        ``n_threads`` is not positive
+    """
+    _check_batch(pixels, 'Gradient')
+    _check_n_threads(n_threads)
+    return gradient_cython(pixels, n_threads=n_threads)
+
+
+def _gaussian_sigmas(sigma):
+    # The (vertical, horizontal) standard deviations of the Gaussian filter
+    # of a 2D image
+    sigma = np.ravel(sigma).astype(np.float64)
+    if sigma.size == 1:
+        return sigma[0], sigma[0]
+    if sigma.size != 2:
+        raise ValueError('sigma of a 2D image should be a single value or a '
+                         'value per axis ({} provided)'.format(sigma.size))
+    return sigma[0], sigma[1]
+
+
 @ndfeature
-def gaussian_filter(pixels, sigma):
+def gaussian_filter(pixels, sigma, n_threads=None):
     r"""
     Calculates the convolution of the input image with a multidimensional
     Gaussian filter.
 
+    2D images of `uint8`, `float32` or `float64` pixels are filtered natively
+    and separably (vertically then horizontally, with the kernel of
+    ``scipy.ndimage.gaussian_filter`` and its ``reflect`` boundary mode),
+    with the GIL released. Other images are filtered by
+    ``scipy.ndimage.gaussian_filter``, channel by channel.
+
     Parameters
     ----------
     pixels : :map:`Image` or subclass or ``(C, X, Y, ..., Z)`` `ndarray`
@@ -91,12 +189,25 @@ def gaussian_filter(pixels, sigma):
         The standard deviation for Gaussian kernel. The standard deviations of
         the Gaussian filter are given for each axis as a `list`, or as a single
         `float`, in which case it is equal for all axes.
+    n_threads : `int` or ``None``, optional
+        If not ``None``, the rows of a 2D image are split between
+        ``n_threads`` threads.
 
     Returns
     -------
     output_image : :map:`Image` or subclass or ``(X, Y, ..., Z, C)`` `ndarray`
         The filtered image has the same type and size as the input ``pixels``.
+
+    Raises
+    ------
+    ValueError
+        ``n_threads`` is not positive
     """
+    _check_n_threads(n_threads)
+    if pixels.ndim == 3 and pixels.dtype in _NATIVE_FILTER_DTYPES:
+        sigma_y, sigma_x = _gaussian_sigmas(sigma)
+        return gaussian_filter_cython(pixels, sigma_y, sigma_x,
+                                      n_threads=n_threads)
     global scipy_gaussian_filter
     if scipy_gaussian_filter is None:
         from scipy.ndimage import gaussian_filter as scipy_gaussian_filter
@@ -106,16 +217,61 @@ def gaussian_filter(pixels, sigma):
     return output
 
 
+def gaussian_filter_batch(pixels, sigma, n_threads=None):
+    r"""
+    Calculates the convolution of a batch of 2D images of the same shape
+    with a Gaussian filter, as for :map:`gaussian_filter`. The filtered images
+    are written directly to a single array.
+
+    Parameters
+    ----------
+    pixels : ``(N, C, X, Y)`` `ndarray`
+        The `uint8`, `float32` or `float64` pixels of the ``N`` images.
+    sigma : `float` or `list` of `float`
+        The standard deviation of the Gaussian filter, as a single `float`
+        or a `float` for each of the two axes.
+    n_threads : `int` or ``None``, optional
+        If not ``None``, the rows of the images are split between
+        ``n_threads`` threads.
+
+    Returns
+    -------
+    filtered : ``(N, C, X, Y)`` `ndarray`
+        The filtered images, of the datatype of the pixels.
+
+    Raises
+    ------
+    ValueError
+        The pixels are not a 4D array of a supported datatype
+    ValueError
+        ``n_threads`` is not positive
+    """
+    _check_batch(pixels, 'Gaussian filter')
+    _check_n_threads(n_threads)
+    if pixels.dtype not in _NATIVE_FILTER_DTYPES:
+        raise ValueError('Gaussian filter batches must be uint8, float32 or '
+                         'float64 ({} provided)'.format(pixels.dtype))
+    sigma_y, sigma_x = _gaussian_sigmas(sigma)
+    return gaussian_filter_cython(pixels, sigma_y, sigma_x,
+                                  n_threads=n_threads)
+
+
 @winitfeature
 def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         cell_size=8, block_size=2, signed_gradient=True, l2_norm_clip=0.2,
         window_height=1, window_width=1, window_unit='blocks',
         window_step_vertical=1, window_step_horizontal=1,
-        window_step_unit='pixels', padding=True, verbose=False):
+        window_step_unit='pixels', padding=True, verbose=False, out=None,
+        n_threads=None, points=None, sample_offsets=None,
+        approximate_integral_hog=None, weights=None, bias=0.):
     r"""
     Extracts Histograms of Oriented Gradients (HOG) features from the input
     image.
 
+    The pixels are read in place - `float64`, `float32` and `uint8` pixels
+    are never copied or converted. Floating point pixels are expected to be
+    in the range ``[0, 1]`` and `uint8` pixels in the range ``[0, 255]``.
+
     Parameters
     ----------
     pixels : :map:`Image` or subclass or ``(C, X, Y, ..., Z)`` `ndarray`
@@ -182,6 +338,49 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         valid only for the ``dalaltriggs`` algorithm.
     verbose : `bool`, optional
         Flag to print HOG related information.
+    out : ``(K, X, Y)`` `ndarray` or ``None``, optional
+        If not ``None``, a `float64` array the HOG features are written into
+        (the returned features are a view of it). Not supported if
+        ``points`` is not ``None``.
+    n_threads : `int` or ``None``, optional
+        If not ``None``, the rows of windows are computed in parallel by
+        ``n_threads`` threads. The HOG computation always releases the GIL,
+        so :map:`hog_batch` can be used to parallelize over many images. Not
+        supported if ``points`` is not ``None``.
+    points : :map:`PointCloud` or ``(n_points, 2)`` `ndarray`, optional
+        If not ``None``, the descriptors are only computed for the windows
+        centred at these points (rounded to the nearest pixel), rather than
+        for every window of the image. The window size is defined as for the
+        selected ``mode`` and windows are zero padded where they exceed the
+        image. The cost is proportional to the number of points rather than
+        to the image area.
+    sample_offsets : ``(n_offsets, 2)`` `ndarray` or ``None``, optional
+        The offsets from each point that windows are centred at. If
+        ``None``, a single window centred at each point is used. Only used
+        if ``points`` is not ``None``.
+    approximate_integral_hog : :map:`IntegralHOG` or ``None``, optional
+        If not ``None``, the integral orientation histograms of ``pixels``
+        that approximate ``dalaltriggs`` descriptors are queried from, in
+        constant time per block, rather than computing every window from the
+        pixels. Building it once and reusing it across window sizes and steps
+        amortizes the cost of the gradient and histogram computation. Its
+        ``num_bins`` and ``signed_gradient`` must match those provided and
+        ``n_threads`` is ignored. Note that these descriptors are **not** the
+        ones of ``dalaltriggs`` - the gradients are computed over the whole
+        image and are not spatially interpolated between the cells (see
+        :map:`IntegralHOG`), so they only loosely correlate with them and the
+        two should not be mixed.
+    weights : ``(K,)`` `ndarray` or ``None``, optional
+        If not ``None``, the weights of a linear filter that the descriptor
+        of every window is scored with. The response of each window is
+        computed as soon as its descriptor is, so the dense features are
+        never stored, and a single channel image of the responses is
+        returned rather than the features (``out`` is not used). If
+        ``points`` is not ``None``, the ``(n_points, n_offsets)`` responses
+        are returned. See :map:`scan_pyramid`.
+    bias : `float`, optional
+        The bias of the linear filter. Only used if ``weights`` is not
+        ``None``.
 
     Returns
     -------
@@ -189,7 +388,10 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         The HOG features image. It has the same type as the input ``pixels``.
         The output number of channels in the case of ``dalaltriggs`` is
         ``K = num_bins * block_size *block_size`` and ``K = 31`` in the case of
-        ``zhuramanan``.
+        ``zhuramanan``. If ``points`` is not ``None``, an
+        ``(n_points, n_offsets, K)`` `ndarray` of the descriptors is always
+        returned. If ``weights`` is not ``None``, the responses of the linear
+        filter are returned instead.
 
     Raises
     ------
@@ -217,6 +419,10 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         Vertical window step must be > 0
     ValueError
         Window step unit must be either pixels or cells
+    ValueError
+        Integral HOG is only supported by the dalaltriggs algorithm
+    ValueError
+        out or n_threads are provided along with points
 
     References
     ----------
@@ -227,8 +433,7 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         localization in the wild", Proceedings of the IEEE Conference on
         Computer Vision and Pattern Recognition (CVPR), 2012.
     """
-    # TODO: This is a temporary fix
-    # flip axis
+    # The window iterator expects the channels at the back - this is a view
     pixels = np.rollaxis(pixels, 0, len(pixels.shape))
 
     # Parse options
@@ -244,6 +449,8 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         raise ValueError("Block size (in cells) must be > 0")
     if l2_norm_clip <= 0.0:
         raise ValueError("Value for L2-norm clipping must be > 0.0")
+    if points is not None and (out is not None or n_threads is not None):
+        raise ValueError("out and n_threads are not supported with points")
     if mode == 'dense':
         if window_unit not in ['pixels', 'blocks']:
             raise ValueError("Window unit must be either pixels or blocks")
@@ -267,9 +474,8 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         if window_step_unit not in ['pixels', 'cells']:
             raise ValueError("Window step unit must be either pixels or cells")
 
-    # Correct input image_data
-    pixels = np.asfortranarray(pixels)
-    pixels *= 255.
+    # HOG is computed on pixels in the range [0, 255]
+    scale = 1. if pixels.dtype == np.uint8 else 255.
 
     # Dense case
     if mode == 'dense':
@@ -296,38 +502,227 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
                                                  cell_size)
                 window_step_horizontal = np.uint32(window_step_horizontal *
                                                    cell_size)
-        iterator = WindowIterator(pixels, window_height, window_width,
-                                  window_step_horizontal,
-                                  window_step_vertical, padding)
     # Sparse case
     else:
-        # Create iterator
         if algorithm == 'dalaltriggs':
             algorithm = 1
-            window_size = cell_size * block_size
-            step = cell_size
+            window_height = window_width = cell_size * block_size
         else:
             algorithm = 2
-            window_size = 3 * cell_size
-            step = cell_size
-        iterator = WindowIterator(pixels, window_size, window_size, step,
-                                  step, False)
+            window_height = window_width = 3 * cell_size
+        window_step_vertical = window_step_horizontal = cell_size
+        padding = False
+    # Approximate descriptors queried from the integral orientation
+    # histograms
+    integral_hog = approximate_integral_hog
+    if integral_hog is not None:
+        if algorithm != 1:
+            raise ValueError("Integral HOG is only supported by the "
+                             "dalaltriggs algorithm")
+        if integral_hog.shape != pixels.shape[:2]:
+            raise ValueError("The integral HOG was built from an image of "
+                             "shape {} rather than {}".format(
+                                 integral_hog.shape, pixels.shape[:2]))
+        if (integral_hog.num_bins != num_bins or
+                integral_hog.signed_gradient != signed_gradient):
+            raise ValueError("The integral HOG orientation bins do not match "
+                             "num_bins and signed_gradient")
+        window_height = int(window_height)
+        window_width = int(window_width)
+        if points is not None:
+            centres, n_points_offsets = _window_centres(points,
+                                                        sample_offsets)
+            descriptors = integral_hog.descriptors_at_centres(
+                centres, window_height, window_width, cell_size=cell_size,
+                block_size=block_size, l2_norm_clip=l2_norm_clip)
+            descriptors = descriptors.reshape(n_points_offsets +
+                                              (descriptors.shape[-1],))
+            if weights is not None:
+                return _linear_responses(descriptors, weights, bias)
+            return descriptors
+        result = integral_hog.windows(
+            window_height, window_width,
+            window_step_vertical=int(window_step_vertical),
+            window_step_horizontal=int(window_step_horizontal),
+            padding=padding, cell_size=cell_size, block_size=block_size,
+            l2_norm_clip=l2_norm_clip,
+            out=out if weights is None else None)
+        if weights is not None:
+            responses = _linear_responses(np.rollaxis(result.pixels, 0, 3),
+                                          weights, bias)
+            result = WindowIteratorResult(responses[None], result.centres)
+        return result
+    # Create iterator
+    iterator = WindowIterator(pixels, window_height, window_width,
+                              window_step_horizontal, window_step_vertical,
+                              padding or points is not None, scale=scale)
     # Print iterator's info
     if verbose:
         print(iterator)
     # Compute HOG
-    hog_descriptor = iterator.HOG(algorithm, num_bins, cell_size, block_size,
-                                  signed_gradient, l2_norm_clip, verbose)
-    # TODO: This is a temporal fix
-    # flip axis
-    hog_descriptor = WindowIteratorResult(
-        np.ascontiguousarray(np.rollaxis(hog_descriptor.pixels, -1)),
-        hog_descriptor.centres)
-    return hog_descriptor
+    if points is not None:
+        centres, n_points_offsets = _window_centres(points, sample_offsets)
+        descriptors = iterator.HOG(algorithm, num_bins, cell_size,
+                                   block_size, signed_gradient, l2_norm_clip,
+                                   verbose, centres=centres)
+        descriptors = descriptors.reshape(n_points_offsets +
+                                          (descriptors.shape[-1],))
+        if weights is not None:
+            return _linear_responses(descriptors, weights, bias)
+        return descriptors
+    return iterator.HOG(algorithm, num_bins, cell_size, block_size,
+                        signed_gradient, l2_norm_clip, verbose,
+                        outputImage=out, n_threads=n_threads,
+                        weights=weights, bias=bias)
+
+
+def hog_batch(images, n_threads=None, out=None, **kwargs):
+    r"""
+    Extracts Histograms of Oriented Gradients (HOG) features from a batch of
+    images, in parallel. As the HOG computation releases the GIL, the images
+    are processed concurrently by a pool of threads.
+
+    Parameters
+    ----------
+    images : `list` of :map:`Image` or ``(C, X, Y)`` `ndarray`
+        The images (or arrays of pixels) to compute the features of.
+    n_threads : `int` or ``None``, optional
+        The number of threads used. If ``None``, the images are processed
+        sequentially on the calling thread.
+    out : ``(N, K, X, Y)`` `ndarray` or ``None``, optional
+        If not ``None``, a `float64` array the HOG features of the ``i`` th
+        image are written into (at ``out[i]``). Only possible if all the
+        features have the same shape.
+    **kwargs : `dict`, optional
+        The options of the HOG computation, see :map:`hog`.
+
+    Returns
+    -------
+    hogs : `list` of :map:`Image` or ``(K, X, Y)`` `ndarray`
+        The HOG features of each image, of the same type as the images.
+
+    Raises
+    ------
+    ValueError
+        ``n_threads`` is not positive or ``out`` is not of length ``N``.
+    """
+    _check_n_threads(n_threads)
+    if out is not None and len(out) != len(images):
+        raise ValueError('out should have an entry for each of the {} '
+                         'images ({} provided)'.format(len(images), len(out)))
+
+    def image_hog(i):
+        return hog(images[i], out=None if out is None else out[i], **kwargs)
+
+    if n_threads is None:
+        return [image_hog(i) for i in range(len(images))]
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(n_threads)
+    try:
+        return pool.map(image_hog, range(len(images)))
+    finally:
+        pool.close()
+        pool.join()
+
+
+PyramidScanLevel = namedtuple('PyramidScanLevel', ('scale', 'responses',
+                                                   'centres', 'scores'))
+
+
+def scan_pyramid(image, feature, weights, bias=0., scales=(1., 0.5),
+                 top_k=10, **kwargs):
+    r"""
+    Scans an image pyramid with a linear filter on a window iterating
+    feature (e.g. :map:`hog` or :map:`lbp`), as in sliding window detection.
+    At each scale, the descriptor of every window is scored as soon as it is
+    computed, so the dense features of the pyramid are never stored.
+
+    Parameters
+    ----------
+    image : :map:`Image` or subclass or ``(C, X, Y)`` `ndarray`
+        The image to scan.
+    feature : `callable`
+        The window iterating feature, i.e. :map:`hog`, :map:`lbp` or a
+        partial of them (e.g. :map:`sparse_hog`).
+    weights : ``(K,)`` `ndarray`
+        The weights of the linear filter, where ``K`` is the descriptor
+        length per window of the feature.
+    bias : `float`, optional
+        The bias of the linear filter.
+    scales : `list` of `float`, optional
+        The scales of the image pyramid. The image is rescaled by each of
+        them before it is scanned.
+    top_k : `int`, optional
+        The number of highest scoring windows reported per scale.
+    **kwargs : `dict`, optional
+        The options of the feature computation.
+
+    Returns
+    -------
+    levels : `list` of ``PyramidScanLevel``
+        The result of each scale, a named tuple with the ``scale``, the
+        ``(n_windows_vertical, n_windows_horizontal)`` ``responses`` of all
+        the windows of the rescaled image, and the ``centres`` (as a
+        :map:`PointCloud` in the coordinates of ``image``) and ``scores`` of
+        the ``top_k`` highest scoring windows, best first.
+
+    Raises
+    ------
+    ValueError
+        The feature is not a window iterating feature
+    ValueError
+        ``top_k`` is not positive
+    """
+    if top_k <= 0:
+        raise ValueError('top_k should be positive '
+                         '({} provided)'.format(top_k))
+    feature, feature_kwargs = unwrap_partial_feature(feature)
+    feature_kwargs.update(kwargs)
+    window_feature = getattr(feature, '_window_feature', None)
+    if window_feature is None:
+        raise ValueError('The feature must be a window iterating feature, '
+                         'e.g. hog or lbp')
+    if isinstance(image, np.ndarray):
+        image = Image(image, copy=False)
+
+    levels = []
+    for scale in scales:
+        if scale == 1:
+            level, transform = image, None
+        else:
+            level, transform = image.rescale(scale, return_transform=True)
+        responses, centres = window_feature(level.pixels, weights=weights,
+                                            bias=bias, **feature_kwargs)
+        responses = responses[0]
+        scores = responses.ravel()
+        k = min(top_k, scores.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        best_centres = centres.reshape(-1, 2)[best].astype(np.float)
+        if transform is not None:
+            # Back to the coordinates of the image
+            best_centres = transform.apply(best_centres)
+        levels.append(PyramidScanLevel(scale, responses,
+                                       PointCloud(best_centres, copy=False),
+                                       scores[best]))
+    return levels
+
+
+def _gradient_feature_dtype(pixels, dtype):
+    # The datatype of the features of the gradient of the pixels
+    if dtype is not None:
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64):
+            raise ValueError('dtype must be either float32 or float64 '
+                             '({} provided)'.format(dtype))
+        return dtype
+    if pixels.dtype in (np.float32, np.float64):
+        return pixels.dtype
+    return np.dtype(np.float64)
 
 
 @ndfeature
-def igo(pixels, double_angles=False, verbose=False):
+def igo(pixels, double_angles=False, verbose=False, dtype=None):
     r"""
     Extracts Image Gradient Orientation (IGO) features from the input image.
     The output image has ``N * C`` number of channels, where ``N`` is the
@@ -351,6 +746,10 @@ def igo(pixels, double_angles=False, verbose=False):
         channels.
     verbose : `bool`, optional
         Flag to print IGO related information.
+    dtype : `numpy.dtype` or ``None``, optional
+        The datatype of the features, e.g. ``np.float32`` to halve their
+        size. If ``None``, floating point pixels keep their datatype and
+        other pixels produce `float64` features.
 
     Returns
     -------
@@ -363,6 +762,8 @@ def igo(pixels, double_angles=False, verbose=False):
     ------
     ValueError
         Image has to be 2D in order to extract IGOs.
+    ValueError
+        dtype must be either float32 or float64
 
     References
     ----------
@@ -375,32 +776,11 @@ def igo(pixels, double_angles=False, verbose=False):
         raise ValueError('IGOs only work on 2D images. Expects image data '
                          'to be 3D, channels + shape.')
     n_img_chnls = pixels.shape[0]
-    # feature channels per image channel
-    feat_chnls = 2
-    if double_angles:
-        feat_chnls = 4
-
-    # compute gradients
-    grad = gradient(pixels)
-    # compute angles
-    grad_orient = np.angle(grad[:n_img_chnls] + 1j * grad[n_img_chnls:])
-    # compute igo image
-    igo_pixels = np.empty((n_img_chnls * feat_chnls,
-                           pixels.shape[1], pixels.shape[2]),
-                          dtype=pixels.dtype)
-
-    if double_angles:
-        dbl_grad_orient = 2 * grad_orient
-        # y angles
-        igo_pixels[:n_img_chnls] = np.sin(grad_orient)
-        igo_pixels[n_img_chnls:n_img_chnls*2] = np.sin(dbl_grad_orient)
-
-        # x angles
-        igo_pixels[n_img_chnls*2:n_img_chnls*3] = np.cos(grad_orient)
-        igo_pixels[n_img_chnls*3:] = np.cos(dbl_grad_orient)
-    else:
-        igo_pixels[:n_img_chnls] = np.sin(grad_orient)  # y
-        igo_pixels[n_img_chnls:] = np.cos(grad_orient)  # x
+
+    # compute igo image - the gradient orientations (and their sines and
+    # cosines) are computed in a single pass over the pixels
+    igo_pixels = igo_cython(pixels, double_angles,
+                            _gradient_feature_dtype(pixels, dtype))
 
     # print information
     if verbose:
@@ -416,7 +796,7 @@ def igo(pixels, double_angles=False, verbose=False):
 
 
 @ndfeature
-def es(pixels, verbose=False):
+def es(pixels, verbose=False, dtype=None):
     r"""
     Extracts Edge Structure (ES) features from the input image. The output image
     has ``N * C`` number of channels, where ``N`` is the number of channels of
@@ -430,6 +810,10 @@ def es(pixels, verbose=False):
         is represented by an N+1 dimensional array.
     verbose : `bool`, optional
         Flag to print ES related information.
+    dtype : `numpy.dtype` or ``None``, optional
+        The datatype of the features, e.g. ``np.float32`` to halve their
+        size. If ``None``, floating point pixels keep their datatype and
+        other pixels produce `float64` features.
 
     Returns
     -------
@@ -441,6 +825,8 @@ def es(pixels, verbose=False):
     ------
     ValueError
         Image has to be 2D in order to extract ES features.
+    ValueError
+        dtype must be either float32 or float64
 
     References
     ----------
@@ -453,20 +839,9 @@ def es(pixels, verbose=False):
         raise ValueError('ES features only work on 2D images. Expects '
                          'image data to be 3D, channels + shape.')
     n_img_chnls = pixels.shape[0]
-    # feature channels per image channel
-    feat_channels = 2
-    # compute gradients
-    grad = gradient(pixels)
-    # compute magnitude
-    grad_abs = np.abs(grad[:n_img_chnls] + 1j * grad[n_img_chnls:])
-    # compute es image
-    grad_abs = grad_abs + np.median(grad_abs)
-    es_pixels = np.empty((pixels.shape[0] * feat_channels,
-                          pixels.shape[1], pixels.shape[2]),
-                         dtype=pixels.dtype)
-
-    es_pixels[:n_img_chnls] = grad[:n_img_chnls] / grad_abs
-    es_pixels[n_img_chnls:] = grad[n_img_chnls:] / grad_abs
+    # compute es image - the gradient magnitudes (and their median) are
+    # computed in a first pass over the pixels and the features in a second
+    es_pixels = es_cython(pixels, _gradient_feature_dtype(pixels, dtype))
 
     # print information
     if verbose:
@@ -479,21 +854,88 @@ def es(pixels, verbose=False):
     return es_pixels
 
 
-@ndfeature
+def igo_batch(pixels, double_angles=False, dtype=None):
+    r"""
+    Extracts Image Gradient Orientation (IGO) features from a batch of 2D
+    images of the same shape, as for :map:`igo`. The features of all the
+    images are written directly to a single array, without any temporary
+    gradient or angle arrays.
+
+    Parameters
+    ----------
+    pixels : ``(N, C, X, Y)`` `ndarray`
+        The pixels of the ``N`` images.
+    double_angles : `bool`, optional
+        If ``True``, the features of the double gradient orientations are
+        also computed (see :map:`igo`).
+    dtype : `numpy.dtype` or ``None``, optional
+        The datatype of the features. If ``None``, floating point pixels keep
+        their datatype and other pixels produce `float64` features.
+
+    Returns
+    -------
+    igo : ``(N, K * C, X, Y)`` `ndarray`
+        The IGO features of each image, where ``K = 2``, or ``K = 4`` if
+        ``double_angles`` is ``True``.
+
+    Raises
+    ------
+    ValueError
+        The pixels are not a 4D array
+    """
+    _check_batch(pixels, 'IGO')
+    return igo_cython(pixels, double_angles,
+                      _gradient_feature_dtype(pixels, dtype))
+
+
+def es_batch(pixels, dtype=None):
+    r"""
+    Extracts Edge Structure (ES) features from a batch of 2D images of the
+    same shape, as for :map:`es`. Each image is normalized by its own median
+    gradient magnitude.
+
+    Parameters
+    ----------
+    pixels : ``(N, C, X, Y)`` `ndarray`
+        The pixels of the ``N`` images.
+    dtype : `numpy.dtype` or ``None``, optional
+        The datatype of the features. If ``None``, floating point pixels keep
+        their datatype and other pixels produce `float64` features.
+
+    Returns
+    -------
+    es : ``(N, 2 * C, X, Y)`` `ndarray`
+        The ES features of each image.
+
+    Raises
+    ------
+    ValueError
+        The pixels are not a 4D array
+    """
+    _check_batch(pixels, 'ES')
+    return es_cython(pixels, _gradient_feature_dtype(pixels, dtype))
+
+
+@winitfeature
 def daisy(pixels, step=1, radius=15, rings=2, histograms=2, orientations=8,
-          normalization='l1', sigmas=None, ring_radii=None, verbose=False):
+          normalization='l1', sigmas=None, ring_radii=None, verbose=False,
+          points=None, sample_offsets=None, n_threads=None):
     r"""
-    Extracts Daisy features from the input image. The output image has ``N * C``
-    number of channels, where ``N`` is the number of channels of the original
-    image and ``C`` is the feature channels determined by the input options.
-    Specifically, ``C = (rings * histograms + 1) * orientations``.
+    Extracts Daisy features from the input image. The output image has ``C``
+    number of channels, determined by the input options. Specifically,
+    ``C = (rings * histograms + 1) * orientations``.
+
+    The orientation maps of the image are computed once, in a single native
+    pass over the pixels (with the gradient of the channel of largest
+    magnitude at each pixel, so multi-channel images cost a single set of
+    maps), smoothed with a separable Gaussian filter for the centre and each
+    ring, and the descriptors are then sampled from them.
 
     Parameters
     ----------
-    pixels : :map:`Image` or subclass or ``(C, X, Y, ..., Z)`` `ndarray`
+    pixels : :map:`Image` or subclass or ``(C, X, Y)`` `ndarray`
         Either the image object itself or an array with the pixels. The first
-        dimension is interpreted as channels. This means an N-dimensional image
-        is represented by an N+1 dimensional array.
+        dimension is interpreted as channels.
     step : `int`, optional
         The sampling step that defines the density of the output image.
     radius : `int`, optional
@@ -529,13 +971,26 @@ def daisy(pixels, step=1, radius=15, rings=2, histograms=2, orientations=8,
         since no radius is needed for the centre histogram.
     verbose : `bool`
         Flag to print Daisy related information.
+    points : :map:`PointCloud` or ``(n_points, 2)`` `ndarray`, optional
+        If not ``None``, the descriptors are only sampled at these points
+        (rounded to the nearest pixel), rather than every ``step`` pixels over
+        the image. Histograms that fall outside the image are read at the
+        nearest pixel of the image.
+    sample_offsets : ``(n_offsets, 2)`` `ndarray` or ``None``, optional
+        The offsets from each point that descriptors are sampled at. If
+        ``None``, a single descriptor is sampled at each point. Only used
+        if ``points`` is not ``None``.
+    n_threads : `int` or ``None``, optional
+        If not ``None``, the rows of the orientation maps and the descriptors
+        are computed in parallel by ``n_threads`` threads.
 
     Returns
     -------
-    daisy : :map:`Image` or subclass or ``(X, Y, ..., Z, C)`` `ndarray`
-        The ES features image. It has the same type and shape as the input
-        ``pixels``. The output number of channels is
-        ``C = (rings * histograms + 1) * orientations``.
+    daisy : :map:`Image` or subclass or ``(C, X, Y)`` `ndarray`
+        The Daisy features image, with a pixel for each descriptor, centred
+        every ``step`` pixels at least ``radius`` pixels from the edges of the
+        image. If ``points`` is not ``None``, the ``(n_points, n_offsets, C)``
+        descriptors are returned instead.
 
     Raises
     ------
@@ -543,6 +998,10 @@ def daisy(pixels, step=1, radius=15, rings=2, histograms=2, orientations=8,
         len(sigmas)-1 != len(ring_radii)
     ValueError
         Invalid normalization method.
+    ValueError
+        Image has to be 2D in order to extract Daisy features.
+    ValueError
+        ``n_threads`` is not positive
 
     References
     ----------
@@ -550,8 +1009,6 @@ def daisy(pixels, step=1, radius=15, rings=2, histograms=2, orientations=8,
         applied to wide-baseline stereo", IEEE Transactions on Pattern Analysis
         and Machine Intelligence, vol. 32, num. 5, p. 815-830, 2010.
     """
-    from menpo.external.skimage._daisy import _daisy
-
     # Parse options
     if sigmas is not None and ring_radii is not None \
             and len(sigmas) - 1 != len(ring_radii):
@@ -569,12 +1026,43 @@ def daisy(pixels, step=1, radius=15, rings=2, histograms=2, orientations=8,
         normalization = 'off'
     if normalization not in ['l1', 'l2', 'daisy', 'off']:
         raise ValueError('Invalid normalization method.')
+    if pixels.ndim != 3:
+        raise ValueError('Daisy features only work on 2D images. Expects '
+                         'image data to be 3D, channels + shape.')
+    _check_n_threads(n_threads)
+    radius = int(radius)
+
+    # The smoothing of the centre histogram and of each ring
+    level_sigmas = ([sigmas[0]] + list(sigmas))[:rings + 1]
+    # The (smoothing level, offset) of each histogram of a descriptor
+    samples = [(0, 0, 0)]
+    for i in range(rings):
+        for j in range(histograms):
+            theta = 2 * np.pi * j / histograms
+            samples.append((i + 1,
+                            int(np.round(ring_radii[i] * np.sin(theta))),
+                            int(np.round(ring_radii[i] * np.cos(theta)))))
 
     # Compute daisy features
-    daisy_descriptor = _daisy(pixels, step=step, radius=radius, rings=rings,
-                              histograms=histograms, orientations=orientations,
-                              normalization=normalization, sigmas=sigmas,
-                              ring_radii=ring_radii)
+    if points is not None:
+        centres, n_points_offsets = _window_centres(points, sample_offsets)
+        daisy_descriptor = daisy_cython(pixels, centres, samples,
+                                        level_sigmas, orientations,
+                                        normalization, False,
+                                        n_threads=n_threads)
+        daisy_descriptor = daisy_descriptor.reshape(n_points_offsets +
+                                                    (-1,))
+    else:
+        centres = np.stack(np.meshgrid(
+            np.arange(radius, pixels.shape[1] - radius, step),
+            np.arange(radius, pixels.shape[2] - radius, step),
+            indexing='ij'), axis=-1).astype(np.int32)
+        daisy_descriptor = daisy_cython(pixels, centres.reshape(-1, 2),
+                                        samples, level_sigmas, orientations,
+                                        normalization, True,
+                                        n_threads=n_threads)
+        daisy_descriptor = daisy_descriptor.reshape((-1,) +
+                                                    centres.shape[:2])
 
     # print information
     if verbose:
@@ -590,12 +1078,18 @@ def daisy(pixels, step=1, radius=15, rings=2, histograms=2, orientations=8,
                                                                 normalization)
         else:
             info_str = "{}  - No normalization emplyed.\n".format(info_str)
-        info_str = "{}Output image size {}W x {}H x {}.".format(
-            info_str, daisy_descriptor.shape[2], daisy_descriptor.shape[1],
-            daisy_descriptor.shape[0])
+        if points is not None:
+            info_str = "{}Output {} descriptors of length {}.".format(
+                info_str, centres.shape[0], daisy_descriptor.shape[-1])
+        else:
+            info_str = "{}Output image size {}W x {}H x {}.".format(
+                info_str, daisy_descriptor.shape[2],
+                daisy_descriptor.shape[1], daisy_descriptor.shape[0])
         print(info_str)
 
-    return daisy_descriptor
+    if points is not None:
+        return daisy_descriptor
+    return WindowIteratorResult(daisy_descriptor, centres)
 
 
 # TODO: Needs fixing ...
@@ -603,13 +1097,17 @@ def daisy(pixels, step=1, radius=15, rings=2, histograms=2, orientations=8,
 def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
         window_step_vertical=1, window_step_horizontal=1,
         window_step_unit='pixels', padding=True, verbose=False,
-        skip_checks=False):
+        skip_checks=False, points=None, sample_offsets=None, weights=None,
+        bias=0., cell_size=None, dtype=None):
     r"""
     Extracts Local Binary Pattern (LBP) features from the input image. The
     output image has ``N * C`` number of channels, where ``N`` is the number of
     channels of the original image and ``C`` is the number of radius/samples
     values combinations that are used in the LBP computation.
 
+    The codes mapping tables are computed once per number of samples and
+    mapping type and then reused by every call.
+
     Parameters
     ----------
     pixels : :map:`Image` or subclass or ``(C, X, Y, ..., Z)`` `ndarray`
@@ -649,13 +1147,50 @@ def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
         Flag to print LBP related information.
     skip_checks : `bool`, optional
         If ``True``, do not perform any validation of the parameters.
+    points : :map:`PointCloud` or ``(n_points, 2)`` `ndarray`, optional
+        If not ``None``, the descriptors are only computed for the windows
+        centred at these points (rounded to the nearest pixel), rather than
+        for every window of the image. Windows are zero padded where they
+        exceed the image.
+    sample_offsets : ``(n_offsets, 2)`` `ndarray` or ``None``, optional
+        The offsets from each point that windows are centred at. If
+        ``None``, a single window centred at each point is used. Only used
+        if ``points`` is not ``None``.
+    weights : ``(C,)`` `ndarray` or ``None``, optional
+        If not ``None``, the weights of a linear filter that the descriptor
+        of every window is scored with. The response of each window is
+        computed as soon as its descriptor is, so the dense features are
+        never stored, and a single channel image of the responses is
+        returned rather than the features. If ``points`` is not ``None``,
+        the ``(n_points, n_offsets)`` responses are returned. See
+        :map:`scan_pyramid`.
+    bias : `float`, optional
+        The bias of the linear filter. Only used if ``weights`` is not
+        ``None``.
+    cell_size : `int` or ``None``, optional
+        If not ``None``, the histograms of the (mapped) codes of the pixels of
+        each cell of ``cell_size x cell_size`` pixels are computed rather
+        than the codes, as in [2]. The histograms of all the radius/samples
+        combinations are concatenated, for each channel, and have a bin per
+        mapped value (e.g. ``samples + 2`` bins for ``riu2``). The cells tile
+        the image without overlapping, at least the largest radius away from
+        its edges, so the window steps and ``padding`` are not used. If
+        ``points`` is not ``None``, the cells are centred at the points.
+    dtype : `numpy.dtype` or ``None``, optional
+        The datatype of the features, which can be `float64`, or `uint8` or
+        `uint16` to store the codes (or histogram counts) compactly. If
+        ``None``, `float64` is used. Not used if ``weights`` is not ``None``.
 
     Returns
     -------
     lbp : :map:`Image` or subclass or ``(X, Y, ..., Z, C)`` `ndarray`
         The ES features image. It has the same type and shape as the input
         ``pixels``. The output number of channels is
-        ``C = len(radius) * len(samples)``.
+        ``C = len(radius) * len(samples)``, or the total number of histogram
+        bins if ``cell_size`` is not ``None``. If ``points`` is not ``None``,
+        an ``(n_points, n_offsets, C)`` `ndarray` of the descriptors is
+        always returned. If ``weights`` is not ``None``, the responses of the
+        linear filter are returned instead.
 
     Raises
     ------
@@ -677,6 +1212,10 @@ def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
         Vertical window step must be > 0
     ValueError
         Window step unit must be either pixels or window
+    ValueError
+        Cell size must be > 0
+    ValueError
+        dtype must be float64, uint8 or uint16 and able to hold the features
 
     References
     ----------
@@ -684,14 +1223,17 @@ def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
         and rotation invariant texture classification with local binary
         patterns", IEEE Transactions on Pattern Analysis and Machine
         Intelligence, vol. 24, num. 7, p. 971-987, 2002.
+    .. [2] T. Ahonen, A. Hadid and M. Pietikainen, "Face description with
+        local binary patterns: Application to face recognition", IEEE
+        Transactions on Pattern Analysis and Machine Intelligence, vol. 28,
+        num. 12, p. 2037-2041, 2006.
     """
     if radius is None:
         radius = range(1, 5)
     if samples is None:
         samples = [8]*4
 
-    # TODO: This is a temporal fix
-    # flip axis
+    # The window iterator expects the channels at the back - this is a view
     pixels = np.rollaxis(pixels, 0, len(pixels.shape))
 
     if not skip_checks:
@@ -729,45 +1271,73 @@ def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
             raise ValueError("Window step unit must be either pixels or "
                              "window")
 
-    # Correct input image_data
-    pixels = np.asfortranarray(pixels)
+        if cell_size is not None and cell_size < 1:
+            raise ValueError("Cell size must be > 0")
 
     # Parse options
     radius = np.asfortranarray(radius)
     samples = np.asfortranarray(samples)
-    window_height = np.uint32(2 * radius.max() + 1)
+    dtype = _lbp_dtype(samples, mapping_type, cell_size, dtype)
+    if cell_size is not None:
+        # The windows are the cells along with the support of the samples
+        cell_size = int(cell_size)
+        window_height = np.uint32(cell_size + 2 * radius.max())
+        window_step_vertical = window_step_horizontal = cell_size
+        padding = False
+    else:
+        cell_size = 0
+        window_height = np.uint32(2 * radius.max() + 1)
     window_width = window_height
-    if window_step_unit == 'window':
+    if window_step_unit == 'window' and cell_size == 0:
         window_step_vertical = np.uint32(window_step_vertical * window_height)
         window_step_horizontal = np.uint32(window_step_horizontal *
                                            window_width)
-    if mapping_type == 'u2':
-        mapping_type = 1
-    elif mapping_type == 'ri':
-        mapping_type = 2
-    elif mapping_type == 'riu2':
-        mapping_type = 3
-    else:
-        mapping_type = 0
 
     # Create iterator object
     iterator = WindowIterator(pixels, window_height, window_width,
                               window_step_horizontal, window_step_vertical,
-                              padding)
+                              padding or points is not None)
 
     # Print iterator's info
     if verbose:
         print(iterator)
 
     # Compute LBP
-    lbp_descriptor = iterator.LBP(radius, samples, mapping_type, verbose)
-
-    # TODO: This is a temporary fix
-    # flip axis
-    lbp_descriptor = WindowIteratorResult(
-        np.ascontiguousarray(np.rollaxis(lbp_descriptor.pixels, -1)),
-        lbp_descriptor.centres)
-    return lbp_descriptor
+    if points is not None:
+        centres, n_points_offsets = _window_centres(points, sample_offsets)
+        descriptors = iterator.LBP(radius, samples, mapping_type, verbose,
+                                   centres=centres, cell_size=cell_size,
+                                   dtype=dtype)
+        descriptors = descriptors.reshape(n_points_offsets +
+                                          (descriptors.shape[-1],))
+        if weights is not None:
+            return _linear_responses(descriptors, weights, bias)
+        return descriptors
+    return iterator.LBP(radius, samples, mapping_type, verbose,
+                        weights=weights, bias=bias, cell_size=cell_size,
+                        dtype=dtype)
+
+
+def _lbp_dtype(samples, mapping_type, cell_size, dtype):
+    # The datatype of the LBP features, which must be able to hold the
+    # largest mapped code (or count of a histogram bin)
+    if dtype is None:
+        return np.dtype(np.float64)
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float64, np.uint8, np.uint16):
+        raise ValueError('dtype must be float64, uint8 or uint16 '
+                         '({} provided)'.format(dtype))
+    if dtype == np.float64:
+        return dtype
+    if cell_size is not None:
+        max_value = cell_size ** 2
+    else:
+        max_value = max(_lbp_mapping_table(s, mapping_type)[1]
+                        for s in np.ravel(samples)) - 1
+    if max_value > np.iinfo(dtype).max:
+        raise ValueError('LBP features of up to {} can not be stored as '
+                         '{}'.format(max_value, dtype))
+    return dtype
 
 
 @imgfeature
@@ -0,0 +1,127 @@
+import numpy as np
+from numpy.testing import assert_allclose, raises
+
+from menpo.image import Image, MaskedImage
+from menpo.shape import PointCloud
+from menpo.feature import (mask_bounded, double_igo, gaussian_filter, hog,
+                           igo, lbp, daisy)
+
+
+def _face_image():
+    image = MaskedImage(np.random.random((2, 80, 90)))
+    image.mask.pixels[...] = False
+    image.mask.pixels[0, 30:45, 40:52] = True
+    image.landmarks['test'] = PointCloud(np.array([[35., 45]]))
+    return image
+
+
+def _assert_masked_allclose(result, expected):
+    mask = expected.mask.mask
+    assert_allclose(result.pixels[:, mask], expected.pixels[:, mask])
+
+
+def test_mask_bounded_igo():
+    image = _face_image()
+    result = mask_bounded(igo)(image, double_angles=True)
+    expected = igo(image, double_angles=True)
+    assert type(result) == MaskedImage
+    assert result.pixels.shape == expected.pixels.shape
+    assert_allclose(result.mask.pixels, image.mask.pixels)
+    assert_allclose(result.landmarks['test'].lms.points, [[35, 45]])
+    _assert_masked_allclose(result, expected)
+    # Outside of the bounding box (and the margin) the features are padded
+    assert np.all(result.pixels[:, :28] == 0)
+
+
+def test_mask_bounded_partial():
+    image = _face_image()
+    _assert_masked_allclose(mask_bounded(double_igo)(image),
+                            double_igo(image))
+
+
+def test_mask_bounded_lbp():
+    image = _face_image()
+    result = mask_bounded(lbp)(image, radius=2, samples=8)
+    _assert_masked_allclose(result, lbp(image, radius=2, samples=8))
+
+
+def test_mask_bounded_hog():
+    image = _face_image()
+    result = mask_bounded(hog)(image, cell_size=4)
+    _assert_masked_allclose(result, hog(image, cell_size=4))
+
+
+def test_mask_bounded_gaussian_filter():
+    image = _face_image()
+    result = mask_bounded(gaussian_filter)(image, 1.5)
+    _assert_masked_allclose(result, gaussian_filter(image, 1.5))
+
+
+def test_mask_bounded_crop():
+    image = _face_image()
+    result = mask_bounded(igo, margin=3, crop=True)(image)
+    assert result.shape == (21, 18)
+    assert result.mask.n_true() == image.mask.n_true()
+    assert_allclose(result.landmarks['test'].lms.points, [[8, 8]])
+    assert_allclose(result.pixels[:, result.mask.mask],
+                    igo(image).pixels[:, image.mask.mask])
+
+
+def test_mask_bounded_crop_unknown_support():
+    image = _face_image()
+    result = mask_bounded(daisy, margin=20, crop=True)(image, step=4)
+    assert result.shape == (7, 6)
+
+
+def test_mask_bounded_empty_mask():
+    image = MaskedImage(np.random.random((1, 20, 20)))
+    image.mask.pixels[...] = False
+    assert_allclose(mask_bounded(igo)(image).pixels, igo(image).pixels)
+
+
+def test_mask_bounded_points():
+    image = _face_image()
+    points = PointCloud(np.array([[36.5, 44.2], [31., 50.5], [40., 60.]]))
+    offsets = np.array([[0., 0.], [1.5, -2.5]])
+    for crop in [True, False]:
+        assert_allclose(mask_bounded(hog, crop=crop)(image, points=points),
+                        hog(image, points=points))
+        assert_allclose(
+            mask_bounded(lbp, crop=crop)(image, radius=2, samples=8,
+                                         points=points,
+                                         sample_offsets=offsets),
+            lbp(image, radius=2, samples=8, points=points,
+                sample_offsets=offsets))
+    assert_allclose(
+        mask_bounded(daisy, margin=45)(image, points=points.points),
+        daisy(image, points=points.points))
+
+
+def test_mask_bounded_points_empty():
+    image = _face_image()
+    points = np.zeros((0, 2))
+    assert (mask_bounded(hog)(image, points=points).shape ==
+            hog(image, points=points).shape)
+
+
+def test_mask_bounded_not_masked():
+    pixels = np.random.random((1, 20, 20))
+    bounded_igo = mask_bounded(igo)
+    assert_allclose(bounded_igo(pixels), igo(pixels))
+    assert_allclose(bounded_igo(Image(pixels)).pixels, igo(pixels))
+    assert_allclose(bounded_igo(MaskedImage(pixels)).pixels, igo(pixels))
+
+
+@raises(ValueError)
+def test_mask_bounded_unknown_support():
+    mask_bounded(daisy)(_face_image())
+
+
+@raises(ValueError)
+def test_mask_bounded_pad_shape_changed():
+    mask_bounded(hog)(_face_image(), mode='sparse', cell_size=4)
+
+
+@raises(ValueError)
+def test_mask_bounded_negative_margin():
+    mask_bounded(igo, margin=-1)
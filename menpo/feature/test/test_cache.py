@@ -0,0 +1,147 @@
+import numpy as np
+from numpy.testing import assert_allclose, raises
+
+from menpo.image import Image, MaskedImage
+from menpo.shape import PointCloud
+from menpo.feature import (cached, clear_feature_caches, feature_cache_stats,
+                           FeatureCache, hog, igo, lbp, normalize_std,
+                           sparse_hog)
+from menpo.feature.base import ndfeature
+
+
+def test_feature_cache_lru_eviction():
+    cache = FeatureCache(max_bytes=3 * 80)
+    for i in range(3):
+        cache.put(i, np.zeros(10))
+    assert cache.get(0) is not None
+    cache.put(3, np.zeros(10))
+    # 1 was the least recently used
+    assert cache.get(1) is None
+    assert cache.get(0) is not None
+    assert cache.n_items == 3
+    assert cache.n_bytes == 240
+    assert cache.evictions == 1
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+
+def test_feature_cache_too_large():
+    cache = FeatureCache(max_bytes=10)
+    cache.put(0, np.zeros(10))
+    assert cache.n_items == 0
+    assert cache.get(0) is None
+
+
+def test_feature_cache_resize():
+    cache = FeatureCache(max_bytes=800)
+    for i in range(10):
+        cache.put(i, np.zeros(10))
+    cache.resize(160)
+    assert cache.n_items == 2
+    assert cache.get(9) is not None
+
+
+@raises(ValueError)
+def test_feature_cache_max_bytes_not_positive():
+    FeatureCache(max_bytes=0)
+
+
+def test_cached_ndfeature():
+    calls = []
+
+    @ndfeature
+    def double(pixels):
+        calls.append(1)
+        return pixels * 2
+
+    cached_double = cached(double)
+    image = Image(np.random.random((1, 10, 12)))
+    image.landmarks['test'] = PointCloud(np.array([[1., 2]]))
+    first = cached_double(image)
+    # Same content, different image
+    second = cached_double(image.copy())
+    assert len(calls) == 1
+    assert type(second) == Image
+    assert_allclose(second.pixels, image.pixels * 2)
+    assert_allclose(second.landmarks['test'].lms.points, [[1, 2]])
+    assert first.pixels is second.pixels
+    assert not second.pixels.flags.writeable
+    assert_allclose(cached_double(image.pixels), image.pixels * 2)
+    assert len(calls) == 1
+    # Different content
+    cached_double(image.pixels + 1)
+    assert len(calls) == 2
+    assert cached_double.cache.hits == 2
+    assert cached_double.cache.misses == 2
+
+
+def test_cached_hog():
+    image = MaskedImage(np.random.random((1, 40, 50)))
+    image.landmarks['test'] = PointCloud(np.array([[10., 20]]))
+    cached_hog = cached(hog)
+    cached_hog.cache.clear()
+    expected = hog(image, mode='sparse')
+    for _ in range(2):
+        result = cached_hog(image, mode='sparse')
+        assert type(result) == MaskedImage
+        assert_allclose(result.pixels, expected.pixels)
+        assert_allclose(result.landmarks['test'].lms.points,
+                        expected.landmarks['test'].lms.points)
+    assert cached_hog.cache.hits == 1
+    # The arguments are part of the key
+    assert cached_hog(image, mode='dense').shape == image.shape
+    assert cached_hog.cache.misses == 2
+    # Partials share the cache of their feature
+    assert cached(sparse_hog).cache is cached_hog.cache
+    assert_allclose(cached(sparse_hog)(image.pixels), expected.pixels)
+    assert cached_hog.cache.hits == 2
+
+
+def test_cached_lbp_points():
+    pixels = np.random.random((1, 30, 30))
+    points = np.array([[10, 12], [3, 4]])
+    cached_lbp = cached(lbp)
+    expected = lbp(pixels, radius=2, samples=8, points=points)
+    assert_allclose(cached_lbp(pixels, radius=2, samples=8, points=points),
+                    expected)
+    assert_allclose(cached_lbp(pixels, radius=2, samples=8,
+                               points=PointCloud(points)), expected)
+    assert_allclose(cached_lbp(pixels, radius=2, samples=8,
+                               points=points + 1),
+                    lbp(pixels, radius=2, samples=8, points=points + 1))
+
+
+def test_cached_imgfeature_mask():
+    cached_normalize_std = cached(normalize_std)
+    image = MaskedImage(np.random.random((1, 20, 20)))
+    masked = image.copy()
+    masked.mask.pixels[0, :10] = False
+    assert_allclose(cached_normalize_std(image).pixels,
+                    normalize_std(image).pixels)
+    # The same pixels with a different mask are normalized differently
+    assert_allclose(cached_normalize_std(masked).pixels,
+                    normalize_std(masked).pixels)
+
+
+def test_cached_out_is_not_cached():
+    pixels = np.random.random((1, 30, 30))
+    cached_hog = cached(hog)
+    out = np.empty((36, 2, 2))
+    assert cached_hog(pixels, mode='sparse', out=out) is out
+    assert out.flags.writeable
+
+
+def test_feature_cache_stats():
+    cached_igo = cached(igo, max_bytes=2 ** 20)
+    clear_feature_caches()
+    pixels = np.random.random((1, 10, 10))
+    cached_igo(pixels)
+    cached_igo(pixels)
+    stats = feature_cache_stats()['igo']
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
+    assert stats['n_items'] == 1
+    assert stats['max_bytes'] == 2 ** 20
+    clear_feature_caches()
+    assert feature_cache_stats()['igo']['n_items'] == 0
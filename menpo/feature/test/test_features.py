@@ -8,8 +8,12 @@ from nose.plugins.attrib import attr
 
 from menpo.testing import is_same_array
 from menpo.image import Image, MaskedImage
-from menpo.feature import (hog, lbp, es, igo, daisy, no_op, normalize,
-                           normalize_norm, normalize_std, normalize_var)
+from menpo.shape import PointCloud
+from menpo.feature import (hog, hog_batch, IntegralHOG, scan_pyramid, lbp, es,
+                           igo, es_batch, igo_batch, daisy, no_op, normalize,
+                           normalize_norm, normalize_std, normalize_var,
+                           sparse_hog, gradient, gaussian_filter,
+                           gaussian_filter_batch)
 import menpo.io as mio
 
 
@@ -152,6 +156,330 @@ def test_hog_channels_zhuramanan():
         assert_allclose(hog_img.n_channels, n_channels)
 
 
+def test_hog_input_types():
+    pixels = np.random.randint(0, 256, size=(3, 40, 50)).astype(np.uint8)
+    float_pixels = pixels / 255.
+    hog_uint8 = hog(pixels, window_step_vertical=3)
+    float32_pixels = float_pixels.astype(np.float32)
+    hog_float32 = hog(float32_pixels, window_step_vertical=3)
+    hog_float64 = hog(float_pixels, window_step_vertical=3)
+    assert_allclose(hog_uint8, hog_float64)
+    # Rounding to float32 can move gradients across orientation bins, so
+    # compare against the same (rounded) values in double precision
+    assert_allclose(hog_float32,
+                    hog(float32_pixels.astype(np.float64),
+                        window_step_vertical=3))
+    # The input is never modified
+    assert_allclose(float_pixels, pixels / 255.)
+
+
+def test_hog_n_threads():
+    image = Image(np.random.random((2, 45, 37)))
+    hog_img = hog(image, window_step_horizontal=2)
+    hog_threaded = hog(image, window_step_horizontal=2, n_threads=3)
+    assert_allclose(hog_threaded.pixels, hog_img.pixels)
+    assert_allclose(hog_threaded.landmarks.n_groups, 0)
+
+
+def test_hog_out():
+    pixels = np.random.random((1, 30, 30))
+    expected = hog(pixels, mode='sparse')
+    out = np.empty_like(expected)
+    assert hog(pixels, mode='sparse', out=out) is out
+    assert_allclose(out, expected)
+
+
+@raises(ValueError)
+def test_hog_out_wrong_shape():
+    pixels = np.random.random((1, 30, 30))
+    hog(pixels, mode='sparse', out=np.empty((36, 3, 3)))
+
+
+def test_hog_batch():
+    images = [Image(np.random.random((1, 30, 40))) for _ in range(5)]
+    expected = [hog(img, mode='sparse').pixels for img in images]
+    for n_threads in [None, 2]:
+        hogs = hog_batch(images, n_threads=n_threads, mode='sparse')
+        assert len(hogs) == len(images)
+        for h, e in zip(hogs, expected):
+            assert type(h) == Image
+            assert_allclose(h.pixels, e)
+
+
+def test_hog_batch_out():
+    pixels = [np.random.random((1, 30, 40)) for _ in range(4)]
+    out = np.empty((4,) + hog(pixels[0], mode='sparse').shape)
+    hogs = hog_batch(pixels, n_threads=2, out=out, mode='sparse')
+    for i in range(4):
+        assert is_same_array(hogs[i], out[i])
+        assert_allclose(out[i], hog(pixels[i], mode='sparse'))
+
+
+@raises(ValueError)
+def test_hog_batch_out_wrong_length():
+    hog_batch([np.random.random((1, 30, 40))], out=np.empty((2, 36, 2, 3)))
+
+
+def test_hog_points():
+    image = Image(np.random.random((2, 40, 50)))
+    points = PointCloud(np.array([[0, 0], [10.2, 20.7], [39, 49]]))
+    dense = hog(image, cell_size=4, window_height=2, window_width=2)
+    descriptors = hog(image, cell_size=4, window_height=2, window_width=2,
+                      points=points)
+    assert descriptors.shape == (3, 1, dense.n_channels)
+    for i, (y, x) in enumerate(np.round(points.points).astype(int)):
+        assert_allclose(descriptors[i, 0], dense.pixels[:, y, x])
+
+
+def test_hog_points_sample_offsets():
+    pixels = np.random.random((1, 40, 50))
+    points = np.array([[20, 20], [5, 30]])
+    offsets = np.array([[0, 0], [-2, 3], [4, 1]])
+    # Dense windows (padded) are centred at every pixel
+    dense = hog(pixels)
+    descriptors = hog(pixels, mode='sparse', points=points,
+                      sample_offsets=offsets)
+    assert descriptors.shape == (2, 3, 36)
+    assert_allclose(descriptors[0, 0], dense[:, 20, 20])
+    assert_allclose(descriptors[1, 0], dense[:, 5, 30])
+    single = hog(pixels, mode='sparse', points=np.array([[24, 21]]))
+    assert_allclose(descriptors[0, 2], single[0, 0])
+    assert_allclose(descriptors[1, 1], hog(pixels, mode='sparse',
+                                           points=np.array([[3, 33]]))[0, 0])
+
+
+def test_hog_points_empty():
+    pixels = np.random.random((1, 40, 50))
+    assert hog(pixels, points=np.zeros((0, 2))).shape == (0, 1, 36)
+    assert hog(pixels, points=PointCloud(np.zeros((0, 2))),
+               sample_offsets=np.zeros((3, 2))).shape == (0, 3, 36)
+    assert hog(pixels, points=np.zeros((0, 2)),
+               approximate_integral_hog=IntegralHOG(pixels)).shape == (0, 1,
+                                                                       36)
+
+
+@raises(ValueError)
+def test_hog_points_out():
+    hog(np.random.random((1, 40, 50)), points=np.array([[20, 20]]),
+        out=np.empty((36, 40, 50)))
+
+
+@raises(ValueError)
+def test_hog_points_n_threads():
+    hog(np.random.random((1, 40, 50)), points=np.array([[20, 20]]),
+        n_threads=2)
+
+
+def test_integral_hog_histograms():
+    ihog = IntegralHOG(np.random.random((3, 20, 30)), num_bins=6)
+    assert ihog.shape == (20, 30)
+    rows, cols = np.mgrid[:20, :30]
+    pixel_hists = ihog.histograms(rows, cols, 1, 1)
+    assert pixel_hists.shape == (20, 30, 6)
+    assert_allclose(ihog.histograms(3, 5, 7, 11),
+                    pixel_hists[3:10, 5:16].sum(axis=(0, 1)))
+    # Regions are clipped to the image
+    assert_allclose(ihog.histograms([-4, 15], 25, 10, 10),
+                    [pixel_hists[:6, 25:].sum(axis=(0, 1)),
+                     pixel_hists[15:, 25:].sum(axis=(0, 1))])
+
+
+def test_integral_hog_orientation():
+    # A horizontal ramp has a single gradient orientation (0 radians), that
+    # falls at the edge of the last bin
+    ramp = np.tile(np.arange(20.) / 20, (1, 10, 1))
+    hists = IntegralHOG(ramp, num_bins=9).histograms(0, 0, 10, 20)
+    assert_allclose(hists[:8], 0)
+    assert hists[8] > 0
+
+
+def test_integral_hog_descriptors():
+    ihog = IntegralHOG(np.random.random((1, 40, 50)))
+    descriptor = ihog.descriptors(3, 7, 24, 32, cell_size=8, block_size=2)
+    assert descriptor.shape == (3 * 2 * 36,)
+    # Brute force - blocks are ordered column by column
+    expected = []
+    for x in range(3):
+        for y in range(2):
+            block = np.concatenate([
+                ihog.histograms(3 + 4 + 8 * (y + i), 7 + 4 + 8 * (x + j),
+                                8, 8)
+                for i in range(2) for j in range(2)])
+            block /= np.linalg.norm(block)
+            block = np.minimum(block, 0.2)
+            expected.append(block / np.linalg.norm(block))
+    assert_allclose(descriptor, np.concatenate(expected))
+    tops = np.array([[3, 0], [10, 3]])
+    lefts = np.array([[7, 0], [2, 7]])
+    descriptors = ihog.descriptors(tops, lefts, 24, 32)
+    assert descriptors.shape == (2, 2, 216)
+    assert_allclose(descriptors[1, 1], descriptor)
+
+
+def test_hog_integral_hog():
+    image = Image(np.random.random((2, 45, 37)))
+    image.landmarks['test'] = PointCloud(np.array([[10., 12], [30, 20]]))
+    ihog = IntegralHOG(image)
+    for kwargs in [dict(mode='sparse'),
+                   dict(window_height=2, window_width=2, padding=False,
+                        window_step_vertical=2, window_step_unit='cells'),
+                   dict(window_height=1, window_width=1,
+                        window_step_horizontal=3)]:
+        expected = hog(image, **kwargs)
+        hog_img = hog(image, approximate_integral_hog=ihog, **kwargs)
+        assert type(hog_img) == Image
+        assert hog_img.pixels.shape == expected.pixels.shape
+        assert_allclose(hog_img.landmarks['test'].lms.points,
+                        expected.landmarks['test'].lms.points)
+    points = np.array([[10, 12], [40, 3]])
+    descriptors = hog(image, mode='sparse', points=points,
+                      approximate_integral_hog=ihog)
+    assert descriptors.shape == (2, 1, 36)
+    assert_allclose(descriptors[:, 0],
+                    ihog.descriptors(points[:, 0] - 7, points[:, 1] - 7, 16,
+                                     16))
+
+
+def test_hog_integral_hog_approximation_error():
+    # The integral HOG descriptors only approximate the ones of hog - bound
+    # how far they are on a natural image
+    image = mio.import_builtin_asset('einstein.jpg').resize([120, 120])
+    expected = hog(image, mode='sparse').pixels
+    approximate = hog(image, mode='sparse',
+                      approximate_integral_hog=IntegralHOG(image)).pixels
+    error = np.abs(approximate - expected)
+    assert np.corrcoef(approximate.ravel(), expected.ravel())[0, 1] > 0.4
+    assert error.mean() < 0.1
+    assert error.max() < 0.5
+
+
+def test_hog_integral_hog_out():
+    pixels = np.random.random((1, 30, 30))
+    ihog = IntegralHOG(pixels)
+    expected = hog(pixels, mode='sparse', approximate_integral_hog=ihog)
+    out = np.empty_like(expected)
+    assert hog(pixels, mode='sparse', approximate_integral_hog=ihog,
+               out=out) is out
+    assert_allclose(out, expected)
+
+
+@raises(ValueError)
+def test_hog_integral_hog_zhuramanan():
+    pixels = np.random.random((1, 30, 30))
+    hog(pixels, algorithm='zhuramanan',
+        approximate_integral_hog=IntegralHOG(pixels))
+
+
+@raises(ValueError)
+def test_hog_integral_hog_wrong_shape():
+    hog(np.random.random((1, 30, 30)),
+        approximate_integral_hog=IntegralHOG(np.random.random((1, 30, 31))))
+
+
+@raises(ValueError)
+def test_hog_integral_hog_wrong_num_bins():
+    pixels = np.random.random((1, 30, 30))
+    hog(pixels, approximate_integral_hog=IntegralHOG(pixels, num_bins=6))
+
+
+def test_hog_weights():
+    image = Image(np.random.random((2, 40, 50)))
+    dense = hog(image, window_step_vertical=3)
+    weights = np.random.randn(dense.n_channels)
+    expected = np.tensordot(weights, dense.pixels, axes=1) + 0.5
+    for n_threads in [None, 2]:
+        responses = hog(image, window_step_vertical=3, weights=weights,
+                        bias=0.5, n_threads=n_threads)
+        assert type(responses) == Image
+        assert responses.pixels.shape == (1,) + dense.shape
+        assert_allclose(responses.pixels[0], expected)
+
+
+def test_hog_weights_points():
+    pixels = np.random.random((1, 40, 50))
+    points = np.array([[20, 20], [5, 30]])
+    weights = np.random.randn(36)
+    descriptors = hog(pixels, mode='sparse', points=points)
+    responses = hog(pixels, mode='sparse', points=points, weights=weights,
+                    bias=-1.)
+    assert responses.shape == (2, 1)
+    assert_allclose(responses, descriptors.dot(weights) - 1.)
+
+
+def test_hog_weights_integral_hog():
+    pixels = np.random.random((1, 40, 50))
+    ihog = IntegralHOG(pixels)
+    dense = hog(pixels, mode='sparse', approximate_integral_hog=ihog)
+    weights = np.random.randn(dense.shape[0])
+    responses = hog(pixels, mode='sparse', approximate_integral_hog=ihog,
+                    weights=weights, bias=2.)
+    assert_allclose(responses[0], np.tensordot(weights, dense, axes=1) + 2.)
+
+
+@raises(ValueError)
+def test_hog_weights_wrong_length():
+    hog(np.random.random((1, 30, 30)), mode='sparse', weights=np.ones(35))
+
+
+def test_lbp_weights():
+    pixels = np.random.random((1, 30, 40))
+    dense = lbp(pixels, radius=2, samples=8)
+    weights = np.random.randn(dense.shape[0])
+    responses = lbp(pixels, radius=2, samples=8, weights=weights, bias=1.)
+    assert_allclose(responses[0], np.tensordot(weights, dense, axes=1) + 1.)
+
+
+def test_scan_pyramid():
+    image = Image(np.random.random((1, 60, 80)))
+    weights = np.random.randn(36)
+    levels = scan_pyramid(image, sparse_hog, weights, bias=1.,
+                          scales=(1., 0.5), top_k=5)
+    assert [level.scale for level in levels] == [1., 0.5]
+    responses = hog(image, mode='sparse', weights=weights, bias=1.)
+    assert_allclose(levels[0].responses, responses.pixels[0])
+    assert levels[1].responses.shape == hog(image.rescale(0.5),
+                                            mode='sparse').shape
+    for level in levels:
+        assert level.centres.n_points == 5
+        assert_allclose(level.scores, np.sort(level.responses.ravel())[:-6:-1])
+        assert np.all(level.centres.points >= 0)
+        assert np.all(level.centres.points < image.shape)
+    # The best window of the first level
+    v, h = np.unravel_index(levels[0].responses.argmax(),
+                            levels[0].responses.shape)
+    assert_allclose(levels[0].centres.points[0], [v * 8 + 7, h * 8 + 7])
+
+
+def test_scan_pyramid_top_k_larger_than_windows():
+    pixels = np.random.random((1, 20, 20))
+    levels = scan_pyramid(pixels, lbp, np.ones(2), top_k=1000, radius=[1, 2],
+                          samples=[8, 8], window_step_vertical=4,
+                          window_step_horizontal=4)
+    assert levels[0].scores.shape == (25,)
+
+
+@raises(ValueError)
+def test_scan_pyramid_not_a_window_feature():
+    scan_pyramid(np.random.random((1, 20, 20)), igo, np.ones(2))
+
+def test_lbp_points():
+    image = Image(np.random.random((1, 40, 50)))
+    points = PointCloud(np.array([[3, 4], [20, 30], [39, 0]]))
+    dense = lbp(image, radius=2, samples=8)
+    descriptors = lbp(image, radius=2, samples=8, points=points,
+                      sample_offsets=np.array([[0, 0], [1, 1]]))
+    assert descriptors.shape == (3, 2, dense.n_channels)
+    for i, (y, x) in enumerate(points.points.astype(int)):
+        assert_allclose(descriptors[i, 0], dense.pixels[:, y, x])
+    assert_allclose(descriptors[1, 1], dense.pixels[:, 21, 31])
+
+
+def test_lbp_points_empty():
+    pixels = np.random.random((1, 40, 50))
+    assert lbp(pixels, radius=2, samples=8,
+               points=np.zeros((0, 2))).shape == (0, 1, 1)
+
+
 @attr('cyvlfeat')
 def test_dsift_channels():
     from menpo.feature import dsift
@@ -252,6 +580,128 @@ def test_es_values():
     assert_allclose(es_img.pixels, res)
 
 
+def igo_reference(pixels, double_angles=False):
+    n_channels = pixels.shape[0]
+    grad = gradient(pixels)
+    phi = np.angle(grad[:n_channels] + 1j * grad[n_channels:])
+    if double_angles:
+        return np.concatenate([np.sin(phi), np.sin(2 * phi), np.cos(phi),
+                               np.cos(2 * phi)])
+    return np.concatenate([np.sin(phi), np.cos(phi)])
+
+
+def es_reference(pixels):
+    n_channels = pixels.shape[0]
+    grad = gradient(pixels)
+    grad_abs = np.abs(grad[:n_channels] + 1j * grad[n_channels:])
+    return grad / np.tile(grad_abs + np.median(grad_abs), (2, 1, 1))
+
+
+def test_igo_reference():
+    pixels = np.random.random((3, 20, 31))
+    for double_angles in [False, True]:
+        assert_allclose(igo(pixels, double_angles=double_angles),
+                        igo_reference(pixels, double_angles=double_angles),
+                        atol=1e-12)
+
+
+def test_es_reference():
+    pixels = np.random.random((2, 23, 17))
+    assert_allclose(es(pixels), es_reference(pixels), atol=1e-12)
+
+
+def test_igo_es_dtypes():
+    pixels = np.random.randint(0, 256, size=(2, 15, 20)).astype(np.uint8)
+    float_pixels = pixels.astype(np.float64)
+    for feature, kwargs in [(igo, {}), (igo, {'double_angles': True}),
+                            (es, {})]:
+        expected = feature(float_pixels, **kwargs)
+        result = feature(pixels, **kwargs)
+        assert result.dtype == np.float64
+        assert_allclose(result, expected)
+        result = feature(float_pixels, dtype=np.float32, **kwargs)
+        assert result.dtype == np.float32
+        assert_allclose(result, expected, rtol=1e-5, atol=1e-6)
+        result = feature(float_pixels.astype(np.float32), **kwargs)
+        assert result.dtype == np.float32
+        assert_allclose(result, expected, rtol=1e-5, atol=1e-6)
+
+
+@raises(ValueError)
+def test_igo_wrong_dtype():
+    igo(np.random.random((1, 10, 10)), dtype=np.int32)
+
+
+def test_igo_es_batch():
+    pixels = np.random.random((4, 2, 12, 15))
+    igo_pixels = igo_batch(pixels, double_angles=True)
+    es_pixels = es_batch(pixels, dtype=np.float32)
+    assert igo_pixels.shape == (4, 8, 12, 15)
+    assert es_pixels.shape == (4, 4, 12, 15)
+    assert es_pixels.dtype == np.float32
+    for i in range(4):
+        assert_allclose(igo_pixels[i], igo(pixels[i], double_angles=True))
+        assert_allclose(es_pixels[i], es(pixels[i]), rtol=1e-5, atol=1e-6)
+
+
+@raises(ValueError)
+def test_igo_batch_not_4d():
+    igo_batch(np.random.random((2, 12, 15)))
+
+
+def _scipy_gaussian_filter(pixels, sigma):
+    from scipy.ndimage import gaussian_filter as scipy_gaussian_filter
+    return np.array([scipy_gaussian_filter(p, sigma) for p in pixels])
+
+
+def test_gaussian_filter_scipy():
+    pixels = np.random.random((3, 31, 24))
+    for sigma in [0.5, 2., [1., 3.], [0., 1.5], 20.]:
+        assert_allclose(gaussian_filter(pixels, sigma),
+                        _scipy_gaussian_filter(pixels, sigma))
+
+
+def test_gaussian_filter_float32_n_threads():
+    pixels = np.random.random((2, 40, 33)).astype(np.float32)
+    filtered = gaussian_filter(pixels, 1.7, n_threads=3)
+    assert filtered.dtype == np.float32
+    assert_allclose(filtered, _scipy_gaussian_filter(pixels, 1.7),
+                    rtol=1e-5, atol=1e-6)
+
+
+def test_gaussian_filter_uint8():
+    pixels = np.random.randint(0, 256, size=(1, 20, 20)).astype(np.uint8)
+    filtered = gaussian_filter(Image(pixels), 1.)
+    assert filtered.pixels.dtype == np.uint8
+    expected = _scipy_gaussian_filter(pixels.astype(np.float64), 1.)
+    assert_allclose(filtered.pixels, np.round(expected))
+
+
+def test_gaussian_filter_3d_image():
+    pixels = np.random.random((2, 8, 9, 10))
+    assert_allclose(gaussian_filter(pixels, 1.),
+                    _scipy_gaussian_filter(pixels, 1.))
+
+
+def test_gaussian_filter_batch():
+    pixels = np.random.random((4, 2, 16, 21))
+    filtered = gaussian_filter_batch(pixels, [2., 1.], n_threads=2)
+    assert filtered.shape == pixels.shape
+    for i in range(4):
+        assert_allclose(filtered[i],
+                        _scipy_gaussian_filter(pixels[i], [2., 1.]))
+
+
+@raises(ValueError)
+def test_gaussian_filter_batch_dtype():
+    gaussian_filter_batch(np.zeros((2, 1, 10, 10), dtype=np.int32), 1.)
+
+
+@raises(ValueError)
+def test_gaussian_filter_sigma_per_axis():
+    gaussian_filter(np.random.random((1, 10, 10)), [1., 2., 3.])
+
+
 def test_daisy_values():
     image = Image([[1., 2., 3., 4.], [2., 1., 3., 4.], [1., 2., 3., 4.],
                    [2., 1., 3., 4.]])
@@ -263,6 +713,41 @@ def test_daisy_values():
     assert_allclose(np.around(daisy_img.pixels[40, 1, 1], 6), 0.000163)
 
 
+def test_daisy_points():
+    image = Image(np.random.random((2, 40, 45)))
+    image.landmarks['test'] = PointCloud(np.array([[20., 25.]]))
+    dense = daisy(image, step=1, radius=6, normalization='daisy')
+    points = np.array([[10, 12], [30, 36], [8, 9]])
+    offsets = np.array([[0, 0], [1, -2]])
+    descriptors = daisy(image, radius=6, normalization='daisy',
+                        points=PointCloud(points), sample_offsets=offsets)
+    assert descriptors.shape == (3, 2, dense.n_channels)
+    centres = points[:, None, :] + offsets[None] - 6
+    assert_allclose(descriptors,
+                    np.rollaxis(dense.pixels[:, centres[..., 0],
+                                             centres[..., 1]], 0, 3))
+    # The landmarks are moved to the grid of descriptors
+    assert_allclose(dense.landmarks['test'].lms.points, [[14, 19]])
+
+
+def test_daisy_points_outside_image():
+    pixels = np.random.random((1, 20, 20))
+    descriptors = daisy(pixels, radius=8, points=np.array([[0., 19.]]))
+    assert descriptors.shape == (1, 1, 40)
+    assert np.all(np.isfinite(descriptors))
+
+
+def test_daisy_n_threads():
+    pixels = np.random.random((3, 50, 41))
+    assert_allclose(daisy(pixels, step=3, n_threads=3),
+                    daisy(pixels, step=3))
+
+
+@raises(ValueError)
+def test_daisy_3d_image_exception():
+    daisy(np.random.random((1, 20, 20, 20)))
+
+
 @attr('cyvlfeat')
 def test_dsift_values():
     from menpo.feature import dsift
@@ -296,6 +781,67 @@ def test_lbp_values():
     assert_allclose(lbp_img.pixels, 4.)
 
 
+def test_lbp_mapping_table():
+    from menpo.feature.windowiterator import _lbp_mapping_table
+    table, n_values = _lbp_mapping_table(8, 'u2')
+    assert n_values == 59
+    assert table.dtype == np.uint32
+    assert table[0] == 0
+    # 0b01010101 is not uniform
+    assert table[85] == 58
+    assert _lbp_mapping_table(8, 'u2')[0] is table
+    assert not table.flags.writeable
+    table, n_values = _lbp_mapping_table(8, 'riu2')
+    assert n_values == 10
+    assert table[0b00111000] == 3
+    assert _lbp_mapping_table(8, 'ri')[1] == 36
+    assert _lbp_mapping_table(4, 'none')[1] == 16
+
+
+def test_lbp_dtype():
+    image = Image(np.random.random((2, 30, 25)))
+    codes = lbp(image, radius=[1, 2], samples=[8, 12])
+    for dtype in [np.uint8, np.uint16]:
+        compact = lbp(image, radius=[1, 2], samples=[8, 12], dtype=dtype)
+        assert compact.pixels.dtype == dtype
+        assert_allclose(compact.pixels, codes.pixels)
+    descriptors = lbp(image, radius=2, samples=8, dtype=np.uint8,
+                      points=np.array([[10, 12]]))
+    assert descriptors.dtype == np.uint8
+
+
+@raises(ValueError)
+def test_lbp_dtype_too_small_exception():
+    lbp(np.random.random((1, 20, 20)), radius=1, samples=12,
+        mapping_type='none', dtype=np.uint8)
+
+
+def test_lbp_cell_histograms():
+    pixels = np.random.random((2, 40, 33))
+    cell_size = 6
+    histograms = lbp(pixels, radius=[1, 3], samples=[8, 12],
+                     cell_size=cell_size, dtype=np.uint16)
+    codes = lbp(pixels, radius=[1, 3], samples=[8, 12]).astype(np.int64)
+    # (40 - 2 * 3) // 6 cells vertically, 2 channels of (8 + 2) + (12 + 2)
+    # bins each
+    assert histograms.shape == (48, 5, 4)
+    for i in range(5):
+        for j in range(4):
+            y, x = i * cell_size + 3, j * cell_size + 3
+            cell = codes[:, y:y + cell_size, x:x + cell_size]
+            expected = [np.bincount(c.ravel(), minlength=n_bins)
+                        for c, n_bins in zip(cell, [10, 14, 10, 14])]
+            assert_allclose(histograms[:, i, j], np.concatenate(expected))
+
+
+def test_lbp_cell_histograms_points():
+    pixels = np.random.random((1, 30, 30))
+    histograms = lbp(pixels, radius=1, samples=8, cell_size=4,
+                     points=np.array([[15, 15]]))
+    assert histograms.shape == (1, 1, 10)
+    assert histograms.sum() == 16
+
+
 def test_constrain_landmarks():
     breaking_bad = mio.import_builtin_asset('breakingbad.jpg').as_masked()
     breaking_bad = breaking_bad.crop_to_landmarks(boundary=20)
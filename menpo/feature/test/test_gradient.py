@@ -2,7 +2,7 @@ from nose.tools import raises
 import numpy as np
 from numpy.testing import assert_allclose
 from menpo.image import Image
-from menpo.feature import gradient
+from menpo.feature import gradient, gradient_batch
 
 from menpo.feature.features import _np_gradient
 import menpo.io as mio
@@ -58,10 +58,42 @@ def test_gradient_takeo_double():
     assert_allclose(grad_image.pixels, np_grad)
 
 
-@raises(TypeError)
-def test_gradient_uint8_exception():
+def test_gradient_uint8():
     image = Image(example_image.astype(np.uint8))
-    gradient(image)
+    grad_image = gradient(image)
+    _check_assertions(grad_image, image.shape, image.n_channels * 2,
+                      np.float64)
+    assert_allclose(grad_image.pixels[0], y_grad)
+    assert_allclose(grad_image.pixels[1], x_grad)
+
+
+def test_gradient_takeo_n_threads():
+    grad = gradient(takeo.pixels, n_threads=3)
+    assert_allclose(grad, _np_gradient(takeo.pixels))
+
+
+def test_gradient_non_contiguous():
+    pixels = takeo.pixels[:, ::2, ::3]
+    assert_allclose(gradient(pixels), _np_gradient(pixels))
+
+
+def test_gradient_batch():
+    pixels = np.random.random((3, 2, 20, 15)).astype(np.float32)
+    grad = gradient_batch(pixels, n_threads=2)
+    assert grad.shape == (3, 4, 20, 15)
+    assert grad.dtype == np.float32
+    for i in range(3):
+        assert_allclose(grad[i], _np_gradient(pixels[i]), rtol=1e-5)
+
+
+@raises(ValueError)
+def test_gradient_batch_3d_exception():
+    gradient_batch(takeo.pixels)
+
+
+@raises(ValueError)
+def test_gradient_n_threads_exception():
+    gradient(takeo, n_threads=0)
 
 
 def _check_assertions(actual_image, expected_shape, expected_n_channels,
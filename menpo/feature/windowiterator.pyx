@@ -1,14 +1,22 @@
 import numpy as np
 cimport numpy as np
 from libcpp cimport bool
+from libcpp.vector cimport vector
 from collections import namedtuple
 
+np.import_array()
+
 WindowIteratorResult = namedtuple('WindowInteratorResult', ('pixels',
                                                             'centres'))
 
 cdef extern from "cpp/ImageWindowIterator.h":
+    cdef enum ImageDataType:
+        FLOAT64, FLOAT32, UINT8
     cdef cppclass ImageWindowIterator:
-        ImageWindowIterator(double *image, unsigned int imageHeight,
+        ImageWindowIterator(const void *image, unsigned int imageDataType,
+                            Py_ssize_t rowStride, Py_ssize_t columnStride,
+                            Py_ssize_t channelStride, double scale,
+                            unsigned int imageHeight,
                             unsigned int imageWidth,
                             unsigned int numberOfChannels,
                             unsigned int windowHeight,
@@ -16,8 +24,34 @@ cdef extern from "cpp/ImageWindowIterator.h":
                             unsigned int windowStepHorizontal,
                             unsigned int windowStepVertical,
                             bool enablePadding)
-        void apply(double *outputImage, int *windowsCenters,
-                   WindowFeature *windowFeature)
+        void apply(double *outputImage, Py_ssize_t outputStrideVertical,
+                   Py_ssize_t outputStrideHorizontal,
+                   Py_ssize_t outputStrideDescriptor, int *windowsCenters,
+                   WindowFeature *windowFeature,
+                   unsigned int windowIndexVerticalFrom,
+                   unsigned int windowIndexVerticalTo) nogil
+        void apply(unsigned char *outputImage,
+                   Py_ssize_t outputStrideVertical,
+                   Py_ssize_t outputStrideHorizontal,
+                   Py_ssize_t outputStrideDescriptor, int *windowsCenters,
+                   WindowFeature *windowFeature,
+                   unsigned int windowIndexVerticalFrom,
+                   unsigned int windowIndexVerticalTo) nogil
+        void apply(unsigned short *outputImage,
+                   Py_ssize_t outputStrideVertical,
+                   Py_ssize_t outputStrideHorizontal,
+                   Py_ssize_t outputStrideDescriptor, int *windowsCenters,
+                   WindowFeature *windowFeature,
+                   unsigned int windowIndexVerticalFrom,
+                   unsigned int windowIndexVerticalTo) nogil
+        void applyAtCentres(double *descriptors, const int *windowsCenters,
+                            unsigned int numberOfWindows,
+                            WindowFeature *windowFeature) nogil
+        void score(double *responses, int *windowsCenters,
+                   const double *weights, double bias,
+                   WindowFeature *windowFeature,
+                   unsigned int windowIndexVerticalFrom,
+                   unsigned int windowIndexVerticalTo) nogil
         unsigned int _numberOfWindowsHorizontally, \
             _numberOfWindowsVertically, _numberOfWindows, _imageWidth, \
             _imageHeight, _numberOfChannels, _windowHeight, _windowWidth, \
@@ -48,31 +82,69 @@ cdef extern from "cpp/LBP.h":
             unsigned int numberOfChannels, unsigned int *radius,
             unsigned int *samples,
             unsigned int numberOfRadiusSamplesCombinations,
-            unsigned int mapping_type, unsigned int *uniqueSamples,
-            unsigned int *whichMappingTable, unsigned int numberOfUniqueSamples)
+            unsigned int **mappingTables, unsigned int *numberOfBins,
+            unsigned int cellSize)
         void apply(double *windowImage, double *descriptorVector)
 
+# The image data types that are read without any conversion
+_IMAGE_DATA_TYPES = {np.dtype(np.float64): FLOAT64,
+                     np.dtype(np.float32): FLOAT32,
+                     np.dtype(np.uint8): UINT8}
+
+# The data types of the output images - features of integer values (e.g. LBP
+# codes) can be stored compactly
+ctypedef fused OUTPUT_TYPES:
+    double
+    unsigned char
+    unsigned short
+
+_OUTPUT_DATA_TYPES = (np.float64, np.uint8, np.uint16)
+
+
+cdef class _WindowFeature:
+    # Owns a WindowFeature so that it can be shared by Python threads
+    cdef WindowFeature *feature
+    # Keeps alive the arrays the feature reads (e.g. LBP mapping tables)
+    cdef object data
+
+    def __dealloc__(self):
+        del self.feature
+
+
 cdef class WindowIterator:
     cdef ImageWindowIterator* iterator
+    # Keeps the image alive, as the iterator reads its memory
+    cdef object image
 
-    def __cinit__(self, np.ndarray[np.float64_t, ndim=3] image,
-                  unsigned int windowHeight, unsigned int windowWidth,
-                  unsigned int windowStepHorizontal,
-                  unsigned int windowStepVertical, bool enablePadding):
-        cdef np.ndarray[np.float64_t, ndim=3, mode='fortran'] image_f = \
-            np.require(image, requirements='F')
-        self.iterator = new ImageWindowIterator(&image_f[0, 0, 0],
-                                                image.shape[0], image.shape[1],
-                                                image.shape[2], windowHeight,
-                                                windowWidth,
-                                                windowStepHorizontal,
-                                                windowStepVertical,
-                                                enablePadding)
+    def __cinit__(self, image, unsigned int windowHeight,
+                  unsigned int windowWidth, unsigned int windowStepHorizontal,
+                  unsigned int windowStepVertical, bool enablePadding,
+                  double scale=1.0):
+        # The image is (height, width, channels) of any memory layout (e.g.
+        # a view of C-ordered pixels with the channels rolled to the back).
+        # float64, float32 and uint8 images are read without a copy.
+        if image.ndim != 3:
+            raise ValueError("The image must be 3D (height, width, channels)")
+        if image.dtype not in _IMAGE_DATA_TYPES:
+            image = image.astype(np.float64)
+        if any(s % image.itemsize for s in image.strides):
+            image = np.ascontiguousarray(image)
+        cdef np.ndarray data = image
+        self.image = image
+        strides = [s // image.itemsize for s in image.strides]
+        self.iterator = new ImageWindowIterator(
+            np.PyArray_DATA(data), _IMAGE_DATA_TYPES[image.dtype],
+            strides[0], strides[1], strides[2], scale, image.shape[0],
+            image.shape[1], image.shape[2], windowHeight, windowWidth,
+            windowStepHorizontal, windowStepVertical, enablePadding)
         if self.iterator._numberOfWindowsHorizontally == 0 or \
                         self.iterator._numberOfWindowsVertically == 0:
             raise ValueError("The window-related options are wrong. "
                              "The number of windows is 0.")
 
+    def __dealloc__(self):
+        del self.iterator
+
     def __str__(self):
         info_str = "Window Iterator:\n" \
                    "  - Input image is {}W x {}H with {} channels.\n" \
@@ -93,9 +165,151 @@ cdef class WindowIterator:
                     <int>self.iterator._numberOfWindowsVertically)
         return info_str
 
+    def _output_image(self, unsigned int descriptorLength, outputImage,
+                      dtype=np.float64):
+        # The (descriptor, vertical windows, horizontal windows) output
+        shape = (descriptorLength, self.iterator._numberOfWindowsVertically,
+                 self.iterator._numberOfWindowsHorizontally)
+        if outputImage is None:
+            return np.empty(shape, dtype=dtype)
+        if outputImage.shape != shape or outputImage.dtype != dtype:
+            raise ValueError("The output image must be a {} array of "
+                             "shape {} ({} {} provided)".format(
+                np.dtype(dtype), shape, outputImage.dtype,
+                outputImage.shape))
+        return outputImage
+
+    def _apply(self, _WindowFeature feature,
+               OUTPUT_TYPES[:, :, :] outputImage,
+               int[:, :, :] windowsCenters, unsigned int windowIndexFrom,
+               unsigned int windowIndexTo):
+        # Computes the rows of windows [windowIndexFrom, windowIndexTo) with
+        # the GIL released
+        cdef Py_ssize_t itemsize = sizeof(OUTPUT_TYPES)
+        with nogil:
+            self.iterator.apply(&outputImage[0, 0, 0],
+                                outputImage.strides[1] // itemsize,
+                                outputImage.strides[2] // itemsize,
+                                outputImage.strides[0] // itemsize,
+                                &windowsCenters[0, 0, 0], feature.feature,
+                                windowIndexFrom, windowIndexTo)
+
+    def _apply_at_centres(self, _WindowFeature feature, centres):
+        # The (n_centres, descriptor) descriptors of the windows centred at
+        # the (row, column) centres
+        cdef int[:, ::1] windowsCenters = np.require(
+            centres, dtype=np.int32, requirements='C')
+        cdef unsigned int n_centres = windowsCenters.shape[0]
+        cdef double[:, ::1] descriptors = np.empty(
+            (n_centres, feature.feature.descriptorLengthPerWindow))
+        if n_centres > 0:
+            with nogil:
+                self.iterator.applyAtCentres(&descriptors[0, 0],
+                                             &windowsCenters[0, 0], n_centres,
+                                             feature.feature)
+        return np.asarray(descriptors)
+
+    def _score(self, _WindowFeature feature, double[::1] weights,
+               double bias, double[:, ::1] responses,
+               int[:, :, :] windowsCenters, unsigned int windowIndexFrom,
+               unsigned int windowIndexTo):
+        # Scores the rows of windows [windowIndexFrom, windowIndexTo) with
+        # the GIL released
+        with nogil:
+            self.iterator.score(&responses[0, 0], &windowsCenters[0, 0, 0],
+                                &weights[0], bias, feature.feature,
+                                windowIndexFrom, windowIndexTo)
+
+    def _windows_centres(self):
+        return np.zeros([self.iterator._numberOfWindowsVertically,
+                         self.iterator._numberOfWindowsHorizontally, 2],
+                        order='F', dtype=np.int32)
+
+    def _apply_rows(self, apply_rows, n_threads):
+        # Calls apply_rows(from, to) over all the rows of windows, in parallel
+        # if n_threads > 1 - each call writes to separate rows of the output
+        cdef unsigned int n_rows = self.iterator._numberOfWindowsVertically
+        if n_threads is None or n_threads <= 1 or n_rows == 1:
+            apply_rows(0, n_rows)
+            return
+        from multiprocessing.pool import ThreadPool
+        n_chunks = min(n_rows, 4 * n_threads)
+        bounds = np.linspace(0, n_rows, n_chunks + 1).astype(np.int64)
+        pool = ThreadPool(n_threads)
+        try:
+            pool.map(lambda i: apply_rows(bounds[i], bounds[i + 1]),
+                     range(n_chunks))
+        finally:
+            pool.close()
+            pool.join()
+
+    def _apply_feature(self, _WindowFeature feature, outputImage, n_threads,
+                       centres=None, weights=None, bias=0., dtype=np.float64):
+        if centres is not None:
+            return self._apply_at_centres(feature, centres).astype(
+                dtype, copy=False)
+        if weights is not None:
+            return self.score(feature, weights, bias=bias,
+                              n_threads=n_threads)
+        outputImage = self._output_image(
+            feature.feature.descriptorLengthPerWindow, outputImage,
+            dtype=dtype)
+        windowsCenters = self._windows_centres()
+        self._apply_rows(lambda i, j: self._apply(feature, outputImage,
+                                                  windowsCenters, i, j),
+                         n_threads)
+        return WindowIteratorResult(outputImage,
+                                    np.ascontiguousarray(windowsCenters))
+
+    def score(self, _WindowFeature feature, weights, bias=0.,
+              n_threads=None):
+        r"""
+        The responses of a linear filter to the descriptors of all the
+        windows. The descriptor of each window is discarded as soon as its
+        response is computed, so the dense features are never stored.
+
+        Parameters
+        ----------
+        feature : `_WindowFeature`
+            The feature computed at every window.
+        weights : ``(K,)`` `ndarray`
+            The weights of the filter, where ``K`` is the descriptor length
+            per window.
+        bias : `float`, optional
+            The bias of the filter.
+        n_threads : `int` or ``None``, optional
+            If not ``None``, the rows of windows are scored in parallel by
+            ``n_threads`` threads.
+
+        Returns
+        -------
+        responses : ``(1, n_windows_vertical, n_windows_horizontal)`` `ndarray`
+            The responses of the windows.
+        centres : ``(n_windows_vertical, n_windows_horizontal, 2)`` `ndarray`
+            The centres of the windows.
+        """
+        weights = np.require(weights, dtype=np.float64, requirements='C')
+        if weights.size != feature.feature.descriptorLengthPerWindow:
+            raise ValueError("The weights must be of length {} ({} "
+                             "provided)".format(
+                <int>feature.feature.descriptorLengthPerWindow,
+                weights.size))
+        weights = weights.ravel()
+        responses = np.empty((1, self.iterator._numberOfWindowsVertically,
+                              self.iterator._numberOfWindowsHorizontally))
+        windowsCenters = self._windows_centres()
+        self._apply_rows(lambda i, j: self._score(feature, weights, bias,
+                                                  responses[0],
+                                                  windowsCenters, i, j),
+                         n_threads)
+        return WindowIteratorResult(responses,
+                                    np.ascontiguousarray(windowsCenters))
+
     def HOG(self, method, numberOfOrientationBins, cellHeightAndWidthInPixels,
             blockHeightAndWidthInCells, enableSignedGradients,
-            l2normClipping, verbose):
+            l2normClipping, verbose, outputImage=None, n_threads=None,
+            centres=None, weights=None, bias=0.):
+        cdef _WindowFeature feature = _WindowFeature()
         cdef HOG *hog = new HOG(self.iterator._windowHeight,
                                 self.iterator._windowWidth,
                                 self.iterator._numberOfChannels, method,
@@ -103,18 +317,11 @@ cdef class WindowIterator:
                                 cellHeightAndWidthInPixels,
                                 blockHeightAndWidthInCells,
                                 enableSignedGradients, l2normClipping)
+        feature.feature = hog
         if hog.numberOfBlocksPerWindowVertically == 0 or \
                 hog.numberOfBlocksPerWindowHorizontally == 0:
             raise ValueError("The window-related options are wrong. "
                              "The number of blocks per window is 0.")
-        cdef double[:, :, :] outputImage = np.zeros(
-            [self.iterator._numberOfWindowsVertically,
-             self.iterator._numberOfWindowsHorizontally,
-             hog.descriptorLengthPerWindow], order='F')
-        cdef int[:, :, :] windowsCenters = np.zeros(
-            [self.iterator._numberOfWindowsVertically,
-             self.iterator._numberOfWindowsHorizontally,
-             2], order='F', dtype=np.int32)
         if verbose:
             info_str = "HOG features:\n"
             if method == 1:
@@ -158,38 +365,36 @@ cdef class WindowIterator:
                 <int>self.iterator._numberOfWindowsVertically,
                 <int>hog.descriptorLengthPerWindow)
             print(info_str)
-        self.iterator.apply(&outputImage[0,0,0], &windowsCenters[0,0,0], hog)
-        del hog
-        return WindowIteratorResult(np.ascontiguousarray(outputImage),
-                                    np.ascontiguousarray(windowsCenters))
+        return self._apply_feature(feature, outputImage, n_threads,
+                                   centres=centres, weights=weights,
+                                   bias=bias)
 
-    def LBP(self, radius, samples, mapping_type, verbose):
-        # find unique samples (thus lbp codes mappings)
-        uniqueSamples, whichMappingTable = np.unique(samples,
-                                                     return_inverse=True)
-        numberOfUniqueSamples = uniqueSamples.size
+    def LBP(self, radius, samples, mapping_type, verbose, outputImage=None,
+            n_threads=None, centres=None, weights=None, bias=0.,
+            cell_size=0, dtype=np.float64):
+        # the (cached) codes mapping table of each radius/samples combination
+        tables = [_lbp_mapping_table(s, mapping_type)
+                  for s in np.ravel(samples)]
         cdef unsigned int[:] cradius = np.ascontiguousarray(radius,
                                                             dtype=np.uint32)
         cdef unsigned int[:] csamples = np.ascontiguousarray(samples,
                                                              dtype=np.uint32)
-        cdef unsigned int[:] cuniqueSamples = np.ascontiguousarray(
-            uniqueSamples, dtype=np.uint32)
-        cdef unsigned int[:] cwhichMappingTable = np.ascontiguousarray(
-            whichMappingTable, dtype=np.uint32)
+        cdef unsigned int[:] cnumberOfBins = np.array(
+            [n_bins for _, n_bins in tables], dtype=np.uint32)
+        cdef const unsigned int[::1] table
+        cdef vector[unsigned int*] mappingTables
+        for t, _ in tables:
+            table = t
+            mappingTables.push_back(<unsigned int*>&table[0])
+        cdef _WindowFeature feature = _WindowFeature()
         cdef LBP *lbp = new LBP(self.iterator._windowHeight,
                                 self.iterator._windowWidth,
                                 self.iterator._numberOfChannels, &cradius[0],
-                                &csamples[0], radius.size, mapping_type,
-                                &cuniqueSamples[0], &cwhichMappingTable[0],
-                                numberOfUniqueSamples)
-        cdef double[:, :, :] outputImage = np.zeros(
-            [self.iterator._numberOfWindowsVertically,
-             self.iterator._numberOfWindowsHorizontally,
-             lbp.descriptorLengthPerWindow], order='F')
-        cdef int[:, :, :] windowsCenters = np.zeros(
-            [self.iterator._numberOfWindowsVertically,
-             self.iterator._numberOfWindowsHorizontally,
-             2], order='F', dtype=np.int32)
+                                &csamples[0], radius.size,
+                                mappingTables.data(), &cnumberOfBins[0],
+                                cell_size)
+        feature.data = (cradius, csamples, cnumberOfBins, tables)
+        feature.feature = lbp
         if verbose:
             info_str = "LBP features:\n"
             if radius.size == 1:
@@ -212,16 +417,20 @@ cdef class WindowIterator:
                 for k in range(samples.size - 1):
                     info_str = "{0}{1}, ".format(info_str, <int>samples[k])
                 info_str = "{0}{1}].\n".format(info_str, <int>samples[-1])
-            if mapping_type == 1:
+            if mapping_type == 'u2':
                 info_str = "{0}  - Uniform-2 codes mapping.\n".format(info_str)
-            elif mapping_type == 2:
+            elif mapping_type == 'ri':
                 info_str = "{0}  - Rotation-Invariant codes mapping.\n".format(
                     info_str)
-            elif mapping_type == 3:
+            elif mapping_type == 'riu2':
                 info_str = "{0}  - Uniform-2 and Rotation-Invariant codes " \
                            "mapping.\n".format(info_str)
-            elif mapping_type == 0:
+            elif mapping_type == 'none':
                 info_str = "{0}  - No codes mapping used.\n".format(info_str)
+            if cell_size > 0:
+                info_str = "{0}  - Histograms of the codes over cells of " \
+                           "{1} x {1} pixels.\n".format(info_str,
+                                                        <int>cell_size)
             info_str = "{0}  - Descriptor length per window = " \
                        "{1} x 1.\n".format(info_str,
                                            <int>lbp.descriptorLengthPerWindow)
@@ -230,15 +439,16 @@ cdef class WindowIterator:
                 <int>self.iterator._numberOfWindowsVertically,
                 <int>lbp.descriptorLengthPerWindow)
             print(info_str)
-        self.iterator.apply(&outputImage[0,0,0], &windowsCenters[0,0,0], lbp)
-        del lbp
-        return WindowIteratorResult(np.ascontiguousarray(outputImage),
-                                    np.ascontiguousarray(windowsCenters))
+        return self._apply_feature(feature, outputImage, n_threads,
+                                   centres=centres, weights=weights,
+                                   bias=bias, dtype=dtype)
+
 
 def _lbp_mapping_table(n_samples, mapping_type='riu2'):
     r"""
     Returns the mapping table for LBP codes in a neighbourhood of n_samples
-    number of sampling points.
+    number of sampling points. Tables are computed once per
+    ``(n_samples, mapping_type)`` and then shared (and so are read-only).
 
     Parameters
     ----------
@@ -251,81 +461,70 @@ def _lbp_mapping_table(n_samples, mapping_type='riu2'):
 
         Default: 'riu2'
 
+    Returns
+    -------
+    table : ``(2 ** n_samples,)`` `ndarray` of `uint32`
+        The mapped value of each code.
+    n_values : `int`
+        The number of distinct mapped values, which are in
+        ``[0, n_values)``.
+
     Raises
     -------
     ValueError
         mapping_type can be 'u2' or 'ri' or 'riu2' or 'none'.
     """
-    # initialize the output lbp codes mapping table
-    table = range(2**n_samples)
-    # uniform-2 mapping
-    if mapping_type == 'u2':
-        # initialize the number of patterns in the mapping table
-        new_max = n_samples * (n_samples - 1) + 3
-        index = 0
-        for c in range(2**n_samples):
-            # number of 1->0 and 0->1 transitions in a binary string x is equal
-            # to the number of 1-bits in XOR(x, rotate_left(x))
-            num_trans = bin(c ^ circural_rotation_left(c, 1, n_samples)).\
-                count('1')
-            if num_trans <= 2:
-                table[c] = index
-                index += 1
-            else:
-                table[c] = new_max - 1
-    # rotation-invariant mapping
+    key = (int(n_samples), mapping_type)
+    mapping = _LBP_MAPPING_TABLES.get(key)
+    if mapping is None:
+        table, n_values = _compute_lbp_mapping_table(*key)
+        table = table.astype(np.uint32)
+        table.flags.writeable = False
+        mapping = _LBP_MAPPING_TABLES.setdefault(key, (table, n_values))
+    return mapping
+
+
+# {(n_samples, mapping_type): (table, n_values)} of the LBP mapping tables
+_LBP_MAPPING_TABLES = {}
+
+
+def _compute_lbp_mapping_table(n_samples, mapping_type):
+    codes = np.arange(2 ** n_samples, dtype=np.int64)
+    if mapping_type == 'none':
+        return codes, 2 ** n_samples
     elif mapping_type == 'ri':
-        new_max = 0
-        tmp_map = np.zeros((2**n_samples, 1), dtype=np.int) - 1
-        for c in range(2**n_samples):
-            rm = c
-            r = c
-            for j in range(1, n_samples):
-                r = circural_rotation_left(r, 1, n_samples)
-                rm = min(rm, r)
-            if tmp_map[rm, 0] < 0:
-                tmp_map[rm, 0] = new_max
-                new_max += 1
-            table[c] = tmp_map[rm, 0]
-    # uniform-2 and rotation-invariant mapping
-    elif mapping_type == 'riu2':
-        new_max = n_samples + 2
-        for c in range(2**n_samples):
-            # number of 1->0 and 0->1 transitions in a binary string x is equal
-            # to the number of 1-bits in XOR(x, rotate_left(x))
-            num_trans = bin(c ^ circural_rotation_left(c, 1, n_samples)).\
-                count('1')
-            if num_trans <= 2:
-                table[c] = bin(c).count('1')
-            else:
-                table[c] = n_samples + 1
-    elif mapping_type == 'none':
-        table = 0
-        new_max = 0
-    else:
+        # the smallest of the circular rotations of each code - the mapped
+        # values are the ranks of the distinct smallest rotations
+        smallest = codes.copy()
+        rotated = codes
+        for _ in range(1, n_samples):
+            rotated = _circular_rotation_left(rotated, n_samples)
+            smallest = np.minimum(smallest, rotated)
+        distinct, table = np.unique(smallest, return_inverse=True)
+        return table, distinct.size
+    elif mapping_type not in ('u2', 'riu2'):
         raise ValueError('Wrong mapping type.')
-    return table, new_max
+    # number of 1->0 and 0->1 transitions in a binary string x is equal to
+    # the number of 1-bits in XOR(x, rotate_left(x))
+    uniform = _count_bits(codes ^ _circular_rotation_left(codes, n_samples),
+                          n_samples) <= 2
+    if mapping_type == 'u2':
+        n_values = n_samples * (n_samples - 1) + 3
+        table = np.full(codes.size, n_values - 1, dtype=np.int64)
+        table[uniform] = np.arange(np.count_nonzero(uniform))
+        return table, n_values
+    # riu2
+    table = np.where(uniform, _count_bits(codes, n_samples), n_samples + 1)
+    return table, n_samples + 2
 
 
-def circural_rotation_left(val, rot_bits, max_bits):
-    r"""
-    Applies a circular left shift of 'rot_bits' bits on the given number 'num'
-    keeping 'max_bits' number of bits.
-
-    Parameters
-    ----------
-    val :  int
-        The input number to be shifted.
-    rot_bins : int
-        The number of bits of the left circular shift.
-    max_bits : int
-        The number of bits of the output number. All the bits in positions
-        larger than max_bits are dropped.
-    """
-    return (val << rot_bits % max_bits) & (2**max_bits - 1) | \
-           ((val & (2**max_bits - 1)) >> (max_bits - (rot_bits % max_bits)))
+def _circular_rotation_left(codes, n_bits):
+    # the circular left shift by one bit of codes of n_bits bits
+    return ((codes << 1) & (2 ** n_bits - 1)) | (codes >> (n_bits - 1))
 
 
-def circural_rotation_right(val, rot_bits, max_bits):
-    return ((val & (2**max_bits - 1)) >> rot_bits % max_bits) | \
-           (val << (max_bits - (rot_bits % max_bits)) & (2**max_bits - 1))
+def _count_bits(codes, n_bits):
+    counts = np.zeros(codes.shape, dtype=np.int64)
+    for b in range(n_bits):
+        counts += (codes >> b) & 1
+    return counts
@@ -15,7 +15,8 @@ from menpo.transform import (Translation, NonUniformScale, Rotation,
                              transform_about_centre)
 from menpo.visualize.base import ImageViewer, LandmarkableViewable, Viewable
 
-from .interpolation import scipy_interpolation, cython_interpolation
+from .interpolation import (scipy_interpolation, cython_interpolation,
+                            area_interpolation)
 from .patches import extract_patches, set_patches
 
 
@@ -1499,13 +1500,21 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
                                     as_single_array=as_single_array)
 
     def set_patches(self, patches, patch_centers, offset=None,
-                    offset_index=None):
+                    offset_index=None, mode='overwrite', return_weights=False):
         r"""
         Set the values of a group of patches into the correct regions of a copy
         of this image. Given an array of patches and a set of patch centers,
         the patches' values are copied in the regions of the image that are
         centred on the coordinates of the given centers.
 
+        Multiple offsets can be set in a single (GIL-free) call by passing an
+        ``(n_offsets, 2)`` `offset`. Together with the accumulation `mode`, this
+        allows dense reconstructions from overlapping patches, e.g. ::
+
+            patches = image.extract_patches(centers, sample_offsets=offsets)
+            recon = blank.set_patches(patches, centers, offset=offsets,
+                                      mode='mean')
+
         The patches argument can have any of the two formats that are returned
         from the `extract_patches()` and `extract_patches_around_landmarks()`
         methods. Specifically it can be:
@@ -1526,35 +1535,50 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
             objects.
         patch_centers : :map:`PointCloud`
             The centers to set the patches around.
-        offset : `list` or `tuple` or ``(1, 2)`` `ndarray` or ``None``, optional
-            The offset to apply on the patch centers within the image.
+        offset : `list` or `tuple` or ``(n_offsets, 2)`` `ndarray` or ``None``, optional
+            The offset(s) to apply on the patch centers within the image.
             If ``None``, then ``(0, 0)`` is used.
-        offset_index : `int` or ``None``, optional
+        offset_index : `int` or `list` of `int` or ``None``, optional
             The offset index within the provided `patches` argument, thus the
-            index of the second dimension from which to sample. If ``None``,
-            then ``0`` is used.
+            index of the second dimension from which to sample. One index must
+            be provided per row of `offset`. If ``None``, then ``0`` is used
+            for a single offset and ``range(n_offsets)`` for multiple offsets.
+        mode : ``{'overwrite', 'add', 'mean', 'max'}``, optional
+            How overlapping patches are combined. ``'overwrite'`` keeps the
+            last patch written on each pixel, ``'add'`` adds the patches to
+            the existing pixel values, ``'mean'`` and ``'max'`` set each
+            covered pixel to the mean/maximum of the patches that overlap it.
+            Pixels that are not covered by any patch are left untouched.
+            Sums and means are accumulated in double precision - for integer
+            images, they are rounded and saturated to the range of the
+            `dtype` (e.g. ``[0, 255]`` for `uint8`) rather than overflowing.
+        return_weights : `bool`, optional
+            If ``True``, the ``(height, width)`` `ndarray` counting the number
+            of patches that were written to each pixel is also returned.
+
+        Returns
+        -------
+        new_image : :map:`Image`
+            A new image where the provided patch locations have been set to
+            the provided values.
+        weights : ``(height, width)`` `ndarray`
+            The number of patches written to each pixel. Only returned if
+            ``return_weights=True``.
 
         Raises
         ------
         ValueError
             If image is not 2D
         ValueError
-            If offset does not have shape (1, 2)
+            If offset does not have shape (n_offsets, 2)
+        ValueError
+            If mode is not one of 'overwrite', 'add', 'mean' or 'max'
         """
         # parse arguments
         if self.n_dims != 2:
             raise ValueError('Only two dimensional patch insertion is '
                              'currently supported.')
-        if offset is None:
-            offset = np.zeros([1, 2], dtype=np.intp)
-        elif isinstance(offset, tuple) or isinstance(offset, list):
-            offset = np.asarray([offset])
-        offset = np.require(offset, dtype=np.intp)
-        if not offset.shape == (1, 2):
-            raise ValueError('The offset must be a tuple, a list or a '
-                             'numpy.array with shape (1, 2).')
-        if offset_index is None:
-            offset_index = 0
+        offset, offset_index = _parse_set_patches_offsets(offset, offset_index)
 
         # if patches is a list, convert it to array
         if isinstance(patches, list):
@@ -1563,12 +1587,16 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
 
         copy = self.copy()
         # set patches
-        set_patches(patches, copy.pixels, patch_centers.points, offset,
-                    offset_index)
-        return copy
+        weights = set_patches(patches, copy.pixels, patch_centers.points,
+                              offset, offset_index, mode=mode)
+        if return_weights:
+            return copy, weights
+        else:
+            return copy
 
     def set_patches_around_landmarks(self, patches, group=None,
-                                     offset=None, offset_index=None):
+                                     offset=None, offset_index=None,
+                                     mode='overwrite', return_weights=False):
         r"""
         Set the values of a group of patches around the landmarks existing in a
         copy of this image. Given an array of patches, a group and a label, the
@@ -1595,23 +1623,31 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
             objects.
         group : `str` or ``None`` optional
             The landmark group to use as patch centres.
-        offset : `list` or `tuple` or ``(1, 2)`` `ndarray` or ``None``, optional
-            The offset to apply on the patch centers within the image.
+        offset : `list` or `tuple` or ``(n_offsets, 2)`` `ndarray` or ``None``, optional
+            The offset(s) to apply on the patch centers within the image.
             If ``None``, then ``(0, 0)`` is used.
-        offset_index : `int` or ``None``, optional
+        offset_index : `int` or `list` of `int` or ``None``, optional
             The offset index within the provided `patches` argument, thus the
-            index of the second dimension from which to sample. If ``None``,
-            then ``0`` is used.
+            index of the second dimension from which to sample. One index must
+            be provided per row of `offset`. If ``None``, then ``0`` is used
+            for a single offset and ``range(n_offsets)`` for multiple offsets.
+        mode : ``{'overwrite', 'add', 'mean', 'max'}``, optional
+            How overlapping patches are combined. See `set_patches` for more
+            information.
+        return_weights : `bool`, optional
+            If ``True``, the ``(height, width)`` `ndarray` counting the number
+            of patches that were written to each pixel is also returned.
 
         Raises
         ------
         ValueError
             If image is not 2D
         ValueError
-            If offset does not have shape (1, 2)
+            If offset does not have shape (n_offsets, 2)
         """
         return self.set_patches(patches, self.landmarks[group].lms,
-                                offset=offset, offset_index=offset_index)
+                                offset=offset, offset_index=offset_index,
+                                mode=mode, return_weights=return_weights)
 
     def warp_to_mask(self, template_mask, transform, warp_landmarks=True,
                      order=1, mode='constant', cval=0.0, batch_size=None,
@@ -1878,12 +1914,17 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
         else:
             return warped_image
 
-    def rescale(self, scale, round='ceil', order=1,
+    def rescale(self, scale, round='ceil', order=1, method='interpolation',
                 return_transform=False):
         r"""
         Return a copy of this image, rescaled by a given factor.
         Landmarks are rescaled appropriately.
 
+        When downsampling, ``method='area'`` averages the pixels covered by
+        each output pixel rather than interpolating at a single point. This
+        avoids aliasing and, for integer factors (e.g. ``rescale(0.5)``), is
+        computed exactly and much faster by block reduction.
+
         Parameters
         ----------
         scale : `float` or `tuple` of `floats`
@@ -1906,6 +1947,14 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
             5         Bi-quintic
             ========= ====================
 
+            Ignored if ``method='area'``.
+        method : ``{interpolation, area}``, optional
+            If ``'interpolation'``, the image is warped using interpolation of
+            the given `order`. If ``'area'``, each output pixel is set to the
+            mean of the input pixels that it covers (box filtering). Note that
+            the two methods use a different pixel grid alignment: for
+            ``'area'`` the pixel centres map as
+            ``x_new = (x + 0.5) * scale - 0.5``.
         return_transform : `bool`, optional
             If ``True``, then the :map:`Transform` object that was used to
             perform the rescale is also returned.
@@ -1923,7 +1972,11 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
         ValueError:
             If less scales than dimensions are provided.
             If any scale is less than or equal to 0.
+            If method is not one of interpolation or area.
         """
+        if method not in ('interpolation', 'area'):
+            raise ValueError("method must be either 'interpolation' or "
+                             "'area'")
         # Pythonic way of converting to list if we are passed a single float
         try:
             if len(scale) < self.n_dims:
@@ -1947,6 +2000,9 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
         # while respecting the users rounding preference.
         template_shape = round_image_shape(transform.apply(self.shape),
                                            round)
+        if method == 'area':
+            return self._rescale_area(template_shape, scale,
+                                      return_transform=return_transform)
         # due to image indexing, we can't just apply the pseudoinverse
         # transform to achieve the scaling we want though!
         # Consider a 3x rescale on a 2x4 image. Looking at each dimension:
@@ -1964,6 +2020,38 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
                                   mode='nearest',
                                   return_transform=return_transform)
 
+    def _rescale_area(self, template_shape, scale, return_transform=False):
+        r"""
+        Rescale this image by area averaging. See `rescale` for more
+        information.
+
+        Parameters
+        ----------
+        template_shape : `tuple`
+            The shape of the rescaled image.
+        scale : ``(n_dims,)`` `ndarray`
+            The scale factor per dimension.
+        return_transform : `bool`, optional
+            If ``True``, then the :map:`Transform` object that was used to
+            perform the rescale is also returned.
+
+        Returns
+        -------
+        rescaled_image : ``type(self)``
+            A copy of this image, rescaled.
+        transform : :map:`Transform`
+            The transform **from the rescaled image back to this image**. It
+            only applies if `return_transform` is ``True``.
+        """
+        # Output pixel i covers [i / scale, (i + 1) / scale) so the centres
+        # are related by x = (x_new + 0.5) / scale - 0.5
+        inverse_transform = NonUniformScale(1.0 / scale).compose_before(
+            Translation(0.5 / scale - 0.5))
+        rescaled_pixels = area_interpolation(self.pixels, template_shape,
+                                             scale)
+        return self._build_warp_to_shape(rescaled_pixels, inverse_transform,
+                                         True, return_transform)
+
     def rescale_to_diagonal(self, diagonal, round='ceil',
                             return_transform=False):
         r"""
@@ -2089,7 +2177,8 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
         return self.rescale(scale, round=round, order=order,
                             return_transform=return_transform)
 
-    def resize(self, shape, order=1, return_transform=False):
+    def resize(self, shape, order=1, method='interpolation',
+               return_transform=False):
         r"""
         Return a copy of this image, resized to a particular shape.
         All image information (landmarks, and mask in the case of
@@ -2113,6 +2202,12 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
             5         Bi-quintic
             ========= =====================
 
+            Ignored if ``method='area'``.
+        method : ``{interpolation, area}``, optional
+            If ``'interpolation'``, the image is warped using interpolation of
+            the given `order`. If ``'area'``, each output pixel is set to the
+            mean of the input pixels that it covers. See `rescale` for more
+            information.
         return_transform : `bool`, optional
             If ``True``, then the :map:`Transform` object that was used to
             perform the resize is also returned.
@@ -2142,7 +2237,7 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
         # errors. For example, if we want (250, 250), we need to ensure that
         # we get (250, 250) even if the number we obtain is 250 to some
         # floating point inaccuracy.
-        return self.rescale(scales, round='round', order=order,
+        return self.rescale(scales, round='round', order=order, method=method,
                             return_transform=return_transform)
 
     def zoom(self, scale, cval=0.0, return_transform=False):
@@ -2452,7 +2547,7 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
                                   warp_landmarks=True,
                                   return_transform=return_transform)
 
-    def pyramid(self, n_levels=3, downscale=2):
+    def pyramid(self, n_levels=3, downscale=2, method='interpolation'):
         r"""
         Return a rescaled pyramid of this image. The first image of the
         pyramid will be a copy of the original, unmodified, image, and counts
@@ -2465,6 +2560,9 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
             unmodified image
         downscale : `float`, optional
             Downscale factor.
+        method : ``{interpolation, area}``, optional
+            The rescaling method, see `rescale` for more information.
+            ``'area'`` is recommended for integer downscale factors.
 
         Yields
         ------
@@ -2474,7 +2572,7 @@ class Image(Vectorizable, Landmarkable, Viewable, LandmarkableViewable):
         image = self.copy()
         yield image
         for _ in range(n_levels - 1):
-            image = image.rescale(1.0 / downscale)
+            image = image.rescale(1.0 / downscale, method=method)
             yield image
 
     def gaussian_pyramid(self, n_levels=3, downscale=2, sigma=None):
@@ -2954,6 +3052,56 @@ def _convert_patches_list_to_single_array(patches_list, n_center):
     return patches_array
 
 
+def _parse_set_patches_offsets(offset, offset_index):
+    r"""
+    Parses the `offset` and `offset_index` arguments of the `set_patches()`
+    methods into the ``(n_offsets, 2)`` and ``(n_offsets,)`` `intp` arrays
+    expected by the Cython implementation.
+
+    Parameters
+    ----------
+    offset : `list` or `tuple` or ``(n_offsets, 2)`` `ndarray` or ``None``
+        The offset(s) to apply on the patch centers within the image.
+        If ``None``, then ``(0, 0)`` is used.
+    offset_index : `int` or `list` of `int` or ``None``
+        The offset index (one per offset) within the patches array. If
+        ``None``, then ``0`` is used for a single offset and
+        ``range(n_offsets)`` for multiple offsets.
+
+    Returns
+    -------
+    offset : ``(n_offsets, 2)`` `ndarray`
+        The parsed offsets.
+    offset_index : ``(n_offsets,)`` `ndarray`
+        The parsed offset indices.
+
+    Raises
+    ------
+    ValueError
+        If offset does not have shape (n_offsets, 2)
+    ValueError
+        If the number of offset indices does not match the number of offsets
+    """
+    if offset is None:
+        offset = np.zeros([1, 2], dtype=np.intp)
+    elif isinstance(offset, tuple) or isinstance(offset, list):
+        offset = np.asarray(offset)
+        if offset.ndim == 1:
+            offset = offset[None]
+    offset = np.require(offset, dtype=np.intp)
+    if not (offset.ndim == 2 and offset.shape[1] == 2):
+        raise ValueError('The offset must be a tuple, a list or a '
+                         'numpy.array with shape (n_offsets, 2).')
+    if offset_index is None:
+        offset_index = np.arange(offset.shape[0])
+    offset_index = np.require(np.atleast_1d(offset_index), dtype=np.intp)
+    if offset_index.shape != (offset.shape[0],):
+        raise ValueError('One offset index must be provided per offset '
+                         '({} offsets and {} indices were given).'.format(
+                             offset.shape[0], offset_index.size))
+    return offset, offset_index
+
+
 def _create_patches_image(patches, patch_centers, patches_indices=None,
                           offset_index=None, background='black'):
     r"""
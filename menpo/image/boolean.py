@@ -3,7 +3,8 @@ from warnings import warn
 import numpy as np
 
 from menpo.transform import Translation
-from .base import Image, _convert_patches_list_to_single_array
+from .base import (Image, _convert_patches_list_to_single_array,
+                   _parse_set_patches_offsets)
 from .patches import set_patches
 
 
@@ -561,6 +562,25 @@ class BooleanImage(Image):
         else:
             return boolean_image
 
+    def _rescale_area(self, template_shape, scale, return_transform=False):
+        r"""
+        Rescale this image by area averaging. A pixel of the rescaled image is
+        ``True`` if at least half of the area it covers is ``True``. See
+        `rescale` for more information.
+        """
+        rescaled, transform = Image._rescale_area(self, template_shape, scale,
+                                                  return_transform=True)
+        boolean_image = BooleanImage(rescaled.pixels[0], copy=False)
+        if rescaled.has_landmarks:
+            boolean_image.landmarks = rescaled.landmarks
+        if hasattr(rescaled, 'path'):
+            boolean_image.path = rescaled.path
+        # optionally return the transform
+        if return_transform:
+            return boolean_image, transform
+        else:
+            return boolean_image
+
     def _build_warp_to_mask(self, template_mask, sampled_pixel_values,
                             **kwargs):
         r"""
@@ -712,7 +732,7 @@ class BooleanImage(Image):
         return copy
 
     def set_patches(self, patches, patch_centers, offset=None,
-                    offset_index=None):
+                    offset_index=None, mode='overwrite', return_weights=False):
         r"""
         Set the values of a group of patches into the correct regions in a copy
         of this image. Given an array of patches and a set of patch centers,
@@ -739,41 +759,43 @@ class BooleanImage(Image):
             objects.
         patch_centers : :map:`PointCloud`
             The centers to set the patches around.
-        offset : `list` or `tuple` or ``(1, 2)`` `ndarray` or ``None``, optional
-            The offset to apply on the patch centers within the image.
+        offset : `list` or `tuple` or ``(n_offsets, 2)`` `ndarray` or ``None``, optional
+            The offset(s) to apply on the patch centers within the image.
             If ``None``, then ``(0, 0)`` is used.
-        offset_index : `int` or ``None``, optional
+        offset_index : `int` or `list` of `int` or ``None``, optional
             The offset index within the provided `patches` argument, thus the
-            index of the second dimension from which to sample. If ``None``,
-            then ``0`` is used.
+            index of the second dimension from which to sample. One index must
+            be provided per row of `offset`. If ``None``, then ``0`` is used
+            for a single offset and ``range(n_offsets)`` for multiple offsets.
+        mode : ``{'overwrite', 'add', 'mean', 'max'}``, optional
+            How overlapping patches are combined. ``'add'`` and ``'max'`` act
+            as a logical OR with the existing mask, while ``'mean'`` sets
+            each covered pixel by majority vote of the overlapping patches.
+        return_weights : `bool`, optional
+            If ``True``, the ``(height, width)`` `ndarray` counting the number
+            of patches that were written to each pixel is also returned.
 
         Raises
         ------
         ValueError
             If image is not 2D
         ValueError
-            If offset does not have shape (1, 2)
+            If offset does not have shape (n_offsets, 2)
 
         Returns
         -------
         new_image : :map:`BooleanImage`
             A new boolean image where the provided patch locations have been
             set to the provided values.
+        weights : ``(height, width)`` `ndarray`
+            The number of patches written to each pixel. Only returned if
+            ``return_weights=True``.
         """
         # parse arguments
         if self.n_dims != 2:
             raise ValueError('Only two dimensional patch insertion is '
                              'currently supported.')
-        if offset is None:
-            offset = np.zeros([1, 2], dtype=np.intp)
-        elif isinstance(offset, tuple) or isinstance(offset, list):
-            offset = np.asarray([offset])
-        offset = np.require(offset, dtype=np.intp)
-        if not offset.shape == (1, 2):
-            raise ValueError('The offset must be a tuple, a list or a '
-                             'numpy.array with shape (1, 2).')
-        if offset_index is None:
-            offset_index = 0
+        offset, offset_index = _parse_set_patches_offsets(offset, offset_index)
 
         # if patches is a list, convert it to array
         if isinstance(patches, list):
@@ -784,8 +806,12 @@ class BooleanImage(Image):
         # convert pixels to uint8 so that they get recognized by cython
         tmp_pixels = copy.pixels.astype(np.uint8)
         # convert patches to uint8 as well and set them to pixels
-        set_patches(patches.astype(np.uint8), tmp_pixels, patch_centers.points,
-                    offset, offset_index)
+        weights = set_patches(patches.astype(np.uint8), tmp_pixels,
+                              patch_centers.points, offset, offset_index,
+                              mode=mode)
         # convert pixels back to bool
         copy.pixels = tmp_pixels.astype(np.bool)
-        return copy
+        if return_weights:
+            return copy, weights
+        else:
+            return copy
@@ -108,3 +108,128 @@ def cython_interpolation(pixels, template_shape, h_transform, mode='constant',
     if pixels.dtype == np.bool:
         result = result.astype(np.bool)
     return result
+
+
+def _area_block_reduce(pixels, template_shape, factors):
+    r"""
+    Area (box) averaging for integer downsampling factors. The pixels are
+    cropped/zero padded to a multiple of the factors, reshaped so that each
+    block lives on its own axis and summed. The sums are then divided by the
+    number of pixels in each block that were actually inside the image.
+    """
+    n_dims = len(template_shape)
+    integer_type = np.issubdtype(pixels.dtype, np.integer)
+    acc_dtype = np.int64 if integer_type else np.float64
+
+    # Crop (or pad with zeros) so that every axis is an exact multiple of its
+    # factor
+    slices = [slice(None)] + [slice(0, m * k)
+                              for m, k in zip(template_shape, factors)]
+    blocks = pixels[tuple(slices)]
+    pad = [(0, 0)] + [(0, m * k - s) for m, k, s in
+                      zip(template_shape, factors, blocks.shape[1:])]
+    if any(p[1] > 0 for p in pad):
+        blocks = np.pad(blocks, pad, mode='constant')
+
+    # (n_channels, m_0, k_0, m_1, k_1, ...)
+    split_shape = [pixels.shape[0]]
+    for m, k in zip(template_shape, factors):
+        split_shape.extend([m, k])
+    block_sum = blocks.reshape(split_shape).sum(
+        axis=tuple(range(2, 2 * n_dims + 1, 2)), dtype=acc_dtype)
+
+    # Count of valid pixels in each block (only different from prod(factors)
+    # on the trailing edge of an image whose shape is not divisible)
+    count = np.ones(template_shape, dtype=acc_dtype)
+    for i, (m, k, s) in enumerate(zip(template_shape, factors,
+                                      pixels.shape[1:])):
+        axis_count = np.clip(s - np.arange(m) * k, 1, k).astype(acc_dtype)
+        count = count * axis_count.reshape([-1] + [1] * (n_dims - i - 1))
+
+    if integer_type:
+        # Exact round-half-up integer division
+        return ((2 * block_sum + count) // (2 * count)).astype(pixels.dtype)
+    else:
+        return (block_sum / count).astype(pixels.dtype)
+
+
+def _area_weights(n_in, n_out, scale):
+    r"""
+    The sparse (banded) weights of a 1D area filter mapping ``n_in`` pixels
+    to ``n_out`` pixels. Output pixel ``i`` averages the input interval
+    ``[i / scale, (i + 1) / scale)`` weighted by overlap.
+
+    Returns
+    -------
+    indices : ``(n_out, n_taps)`` `ndarray`
+        The input pixel indices that contribute to each output pixel.
+    weights : ``(n_out, n_taps)`` `ndarray`
+        The normalized weight of each contribution.
+    """
+    lo = np.arange(n_out) / scale
+    hi = (np.arange(n_out) + 1) / scale
+    n_taps = int(np.ceil(1. / scale)) + 1
+    indices = (np.floor(lo).astype(np.intp)[:, None] +
+               np.arange(n_taps)[None, :])
+    weights = (np.minimum(hi[:, None], indices + 1) -
+               np.maximum(lo[:, None], indices))
+    weights[(weights < 0) | (indices >= n_in)] = 0
+    indices = np.minimum(indices, n_in - 1)
+    norm = weights.sum(axis=1, keepdims=True)
+    norm[norm == 0] = 1
+    return indices, weights / norm
+
+
+def area_interpolation(pixels, template_shape, scale):
+    r"""
+    Resample an image by area averaging (also known as box filtering). Each
+    output pixel is the mean of the input pixels that its footprint covers,
+    which, unlike point sampling, does not alias when downsampling.
+
+    Integer downsampling factors are computed exactly by block reduction
+    (integer pixel types are summed in integer arithmetic and rounded to the
+    nearest value). Other factors use a separable area filter.
+
+    Note that output pixel ``i`` covers the input interval
+    ``[i / scale, (i + 1) / scale)``, so pixel centres map as
+    ``x_out = (x_in + 0.5) * scale - 0.5``.
+
+    Parameters
+    ----------
+    pixels : ``(n_channels, M, N, ...)`` `ndarray`
+        The image to be resampled, the first axis containing channel
+        information.
+    template_shape : `tuple`
+        The shape of the resampled image.
+    scale : ``(n_dims,)`` `ndarray`
+        The scale factor applied on each dimension.
+
+    Returns
+    -------
+    resampled_pixels : ``(n_channels,) + template_shape`` `ndarray`
+        The resampled pixels, of the same dtype as ``pixels``.
+    """
+    template_shape = tuple(int(s) for s in template_shape)
+    scale = np.asarray(scale, dtype=np.float64)
+    # Boolean pixels are averaged as uint8, which amounts to a majority vote
+    if pixels.dtype == np.bool:
+        return area_interpolation(pixels.astype(np.uint8), template_shape,
+                                  scale).astype(np.bool)
+
+    inverse = 1.0 / scale
+    factors = np.round(inverse).astype(np.intp)
+    if np.all(factors >= 1) and np.allclose(inverse, factors,
+                                            rtol=0, atol=1e-8):
+        return _area_block_reduce(pixels, template_shape, factors)
+
+    # Separable area filter, one spatial axis at a time
+    resampled = pixels.astype(np.float64)
+    for axis, (n_out, s) in enumerate(zip(template_shape, scale), 1):
+        indices, weights = _area_weights(resampled.shape[axis], n_out, s)
+        taps = np.take(resampled, indices, axis=axis)
+        weights = weights.reshape(weights.shape +
+                                  (1,) * (resampled.ndim - axis - 1))
+        resampled = (taps * weights).sum(axis=axis + 1)
+    if np.issubdtype(pixels.dtype, np.integer):
+        resampled = np.round(resampled)
+    return resampled.astype(pixels.dtype)
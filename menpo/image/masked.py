@@ -1032,6 +1032,24 @@ class MaskedImage(Image):
         else:
             return masked_warped_image
 
+    def _rescale_area(self, template_shape, scale, return_transform=False):
+        r"""
+        Rescale this image and its mask by area averaging. See `rescale` for
+        more information.
+        """
+        rescaled, transform = Image._rescale_area(self, template_shape, scale,
+                                                  return_transform=True)
+        # rescale the mask separately and reattach.
+        mask = self.mask._rescale_area(template_shape, scale)
+        masked_rescaled = rescaled.as_masked(mask=mask, copy=False)
+        if hasattr(rescaled, 'path'):
+            masked_rescaled.path = rescaled.path
+        # optionally return the transform
+        if return_transform:
+            return masked_rescaled, transform
+        else:
+            return masked_rescaled
+
     def normalize_std(self, mode='all', limit_to_mask=True):
         r"""
         Returns a copy of this image normalized such that it's pixel values
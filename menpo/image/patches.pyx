@@ -147,16 +147,46 @@ cpdef extract_patches(IMAGE_TYPES[:, :, :] image,
     return patches
 
 
+# Accumulation modes supported by set_patches
+cdef enum:
+    MODE_OVERWRITE = 0
+    MODE_ADD = 1
+    MODE_MEAN = 2
+    MODE_MAX = 3
+
+
+SET_PATCHES_MODES = {'overwrite': MODE_OVERWRITE, 'add': MODE_ADD,
+                     'mean': MODE_MEAN, 'max': MODE_MAX}
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
-cpdef void set_patches(IMAGE_TYPES[:, :, :, :, :] patches,
-                       IMAGE_TYPES[:, :, :] image,
-                       CENTRE_TYPES[:, :] centres,
-                       Py_ssize_t[:, :] offset,
-                       Py_ssize_t offset_index):
+@cython.cdivision(True)
+cpdef set_patches(IMAGE_TYPES[:, :, :, :, :] patches,
+                  IMAGE_TYPES[:, :, :] image,
+                  CENTRE_TYPES[:, :] centres,
+                  Py_ssize_t[:, :] offsets,
+                  Py_ssize_t[:] offset_indices,
+                  str mode='overwrite'):
+    r"""
+    Write a batch of patches into ``image`` (in place). Every centre is
+    combined with every row of ``offsets`` and the patch
+    ``patches[i, offset_indices[j]]`` is written around centre ``i`` shifted
+    by ``offsets[j]``. The whole batch is processed without the GIL.
+
+    The ``'add'`` and ``'mean'`` modes accumulate in double precision.
+    Integer images are rounded and saturated to the range of their type
+    when the result is written back, rather than wrapping around.
+
+    Returns the ``(height, width)`` `float64` buffer holding the number of
+    patches that were written to each pixel.
+    """
     cdef:
+        int c_mode = MODE_OVERWRITE
         Py_ssize_t n_centres = centres.shape[0]
-        object extents_size = [n_centres, 2]
+        Py_ssize_t n_offsets = offsets.shape[0]
+        Py_ssize_t n_augmented_centres = n_centres * n_offsets
+        object extents_size = [n_augmented_centres, 2]
 
         Py_ssize_t patch_shape0 = patches.shape[3]
         Py_ssize_t patch_shape1 = patches.shape[4]
@@ -168,7 +198,11 @@ cpdef void set_patches(IMAGE_TYPES[:, :, :, :, :] patches,
         Py_ssize_t image_shape1 = image.shape[2]
         Py_ssize_t n_channels = image.shape[0]
 
-        Py_ssize_t total_index = 0, i = 0
+        Py_ssize_t total_index = 0, i = 0, j = 0, k = 0, c = 0, y = 0, x = 0
+        Py_ssize_t height = 0, width = 0
+        Py_ssize_t e0 = 0, e1 = 0, p0 = 0, p1 = 0
+        IMAGE_TYPES value
+        double total = 0, lowest = -np.inf, highest = np.inf
 
         # Although it is faster to use malloc in this case, the change in syntax
         # and the mental overhead of handling freeing memory is not considered
@@ -182,18 +216,89 @@ cpdef void set_patches(IMAGE_TYPES[:, :, :, :, :] patches,
         Py_ssize_t[:, :] ins_s_max = np.empty(extents_size, dtype=np.intp)
         Py_ssize_t[:, :] ins_s_min = np.empty(extents_size, dtype=np.intp)
 
-    calc_augmented_centers(centres, offset, augmented_centers)
+        double[:, :] weights
+        double[:, :, :] accumulator
+
+    if mode not in SET_PATCHES_MODES:
+        raise ValueError('mode must be one of {}'.format(
+            ', '.join(sorted(SET_PATCHES_MODES))))
+    if offsets.shape[0] != offset_indices.shape[0]:
+        raise ValueError('The number of offsets ({}) must match the number '
+                         'of offset indices ({}).'.format(
+            offsets.shape[0], offset_indices.shape[0]))
+    for j in range(offset_indices.shape[0]):
+        if not 0 <= offset_indices[j] < patches.shape[1]:
+            raise ValueError('Offset index {} is out of range for patches '
+                             'with {} offsets.'.format(offset_indices[j],
+                                                       patches.shape[1]))
+    c_mode = SET_PATCHES_MODES[mode]
+
+    weights_arr = np.zeros([image_shape0, image_shape1], dtype=np.float64)
+    weights = weights_arr
+    # Sums and means are accumulated in double precision and only written
+    # back into the image once all the patches have been summed
+    if c_mode == MODE_ADD:
+        accumulator = np.array(image, dtype=np.float64)
+    elif c_mode == MODE_MEAN:
+        accumulator = np.zeros([n_channels, image_shape0, image_shape1],
+                               dtype=np.float64)
+    else:
+        accumulator = np.zeros([1, 1, 1], dtype=np.float64)
+    if IMAGE_TYPES is not float and IMAGE_TYPES is not double:
+        info = np.iinfo(dtype_from_memoryview(image))
+        lowest, highest = info.min, info.max
+
+    calc_augmented_centers(centres, offsets, augmented_centers)
     calc_slices(augmented_centers, image_shape0, image_shape1, patch_shape0,
                 patch_shape1, half_patch_shape0, half_patch_shape1,
                 add_to_patch0, add_to_patch1, ext_s_min, ext_s_max, ins_s_min,
                 ins_s_max)
 
-    for i in range(n_centres):
-        image[:,
-              ext_s_min[total_index, 0]:ext_s_max[total_index, 0],
-              ext_s_min[total_index, 1]:ext_s_max[total_index, 1]
-             ] = \
-                 patches[i, offset_index, :,
-                         ins_s_min[total_index, 0]:ins_s_max[total_index, 0],
-                         ins_s_min[total_index, 1]:ins_s_max[total_index, 1]]
-        total_index += 1
+    with nogil:
+        for i in range(n_centres):
+            for j in range(n_offsets):
+                k = offset_indices[j]
+                e0 = ext_s_min[total_index, 0]
+                e1 = ext_s_min[total_index, 1]
+                p0 = ins_s_min[total_index, 0]
+                p1 = ins_s_min[total_index, 1]
+                height = min(ext_s_max[total_index, 0] - e0,
+                             ins_s_max[total_index, 0] - p0)
+                width = min(ext_s_max[total_index, 1] - e1,
+                            ins_s_max[total_index, 1] - p1)
+                total_index += 1
+                if height <= 0 or width <= 0:
+                    continue
+
+                for c in range(n_channels):
+                    for y in range(height):
+                        for x in range(width):
+                            value = patches[i, k, c, p0 + y, p1 + x]
+                            if c_mode == MODE_OVERWRITE:
+                                image[c, e0 + y, e1 + x] = value
+                            elif c_mode == MODE_ADD or c_mode == MODE_MEAN:
+                                accumulator[c, e0 + y, e1 + x] += value
+                            elif (weights[e0 + y, e1 + x] == 0 or
+                                  value > image[c, e0 + y, e1 + x]):
+                                image[c, e0 + y, e1 + x] = value
+
+                for y in range(height):
+                    for x in range(width):
+                        weights[e0 + y, e1 + x] += 1
+
+        if c_mode == MODE_ADD or c_mode == MODE_MEAN:
+            for c in range(n_channels):
+                for y in range(image_shape0):
+                    for x in range(image_shape1):
+                        if weights[y, x] > 0:
+                            total = accumulator[c, y, x]
+                            if c_mode == MODE_MEAN:
+                                total = total / weights[y, x]
+                            if IMAGE_TYPES is float or IMAGE_TYPES is double:
+                                image[c, y, x] = <IMAGE_TYPES> total
+                            else:
+                                # Round to the nearest integer and saturate
+                                total = min(max(total + 0.5, lowest), highest)
+                                image[c, y, x] = <IMAGE_TYPES> total
+
+    return weights_arr
@@ -33,3 +33,12 @@ def test_image_pyramid_shapes():
     shapes = [(512, 512), (128, 128), (32, 32)]
     for l, expected_shape in zip(lenna.pyramid(n_levels=3, downscale=4), shapes):
         assert l.shape == expected_shape
+
+
+def test_image_pyramid_area_shapes():
+    lenna = menpo.io.import_builtin_asset.lenna_png()
+    shapes = [(512, 512), (256, 256), (128, 128)]
+    for l, expected_shape in zip(lenna.pyramid(n_levels=3, method='area'),
+                                 shapes):
+        assert l.shape == expected_shape
+        assert l.landmarks['LJSON'].lms.n_points == 68
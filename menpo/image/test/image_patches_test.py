@@ -1,9 +1,10 @@
 import numpy as np
-from numpy.testing import assert_array_equal
-from nose.tools import assert_equals
+from numpy.testing import assert_array_equal, assert_allclose
+from nose.tools import assert_equals, raises
 
 import menpo.io as mio
 from menpo.landmark import labeller, face_ibug_68_to_face_ibug_68
+from menpo.image import BooleanImage
 from menpo.image.base import (Image, _convert_patches_list_to_single_array,
                               _create_patches_image)
 from menpo.shape import PointCloud
@@ -184,6 +185,131 @@ def test_offset_argument():
         assert_array_equal(image.pixels[:, 48:53, 38:44], patch[1, 0, ...])
 
 
+def _overlapping_patches():
+    patches = np.zeros((2, 1, 1, 3, 3))
+    patches[0, 0] = 1
+    patches[1, 0] = 3
+    patch_centers = PointCloud(np.array([[4., 4.], [5., 5.]]))
+    return patches, patch_centers
+
+
+def test_set_patches_mode_add():
+    patches, patch_centers = _overlapping_patches()
+    im = Image.init_blank((10, 10), fill=1)
+    new_im = im.set_patches(patches, patch_centers, mode='add')
+    assert_equals(new_im.pixels[0, 3, 3], 2)
+    assert_equals(new_im.pixels[0, 4, 4], 5)
+    assert_equals(new_im.pixels[0, 6, 6], 4)
+    assert_equals(new_im.pixels[0, 0, 0], 1)
+
+
+def test_set_patches_mode_mean():
+    patches, patch_centers = _overlapping_patches()
+    im = Image.init_blank((10, 10), fill=-1)
+    new_im = im.set_patches(patches, patch_centers, mode='mean')
+    assert_equals(new_im.pixels[0, 3, 3], 1)
+    assert_equals(new_im.pixels[0, 4, 4], 2)
+    assert_equals(new_im.pixels[0, 6, 6], 3)
+    assert_equals(new_im.pixels[0, 0, 0], -1)
+
+
+def test_set_patches_mode_mean_uint8():
+    patches, patch_centers = _overlapping_patches()
+    im = Image.init_blank((10, 10), dtype=np.uint8)
+    new_im = im.set_patches(patches.astype(np.uint8), patch_centers,
+                            mode='mean')
+    assert(new_im.pixels.dtype == np.uint8)
+    assert_equals(new_im.pixels[0, 4, 4], 2)
+
+
+def test_set_patches_mode_add_uint8_saturates():
+    patches, patch_centers = _overlapping_patches()
+    patches[...] = 200
+    im = Image.init_blank((10, 10), fill=200, dtype=np.uint8)
+    new_im = im.set_patches(patches.astype(np.uint8), patch_centers,
+                            mode='add')
+    assert(new_im.pixels.dtype == np.uint8)
+    assert_equals(new_im.pixels[0, 4, 4], 255)
+    assert_equals(new_im.pixels[0, 0, 0], 200)
+
+
+def test_set_patches_mode_max():
+    patches, patch_centers = _overlapping_patches()
+    patches[1, 0] = -3
+    im = Image.init_blank((10, 10), fill=5)
+    new_im = im.set_patches(patches, patch_centers, mode='max')
+    assert_equals(new_im.pixels[0, 4, 4], 1)
+    assert_equals(new_im.pixels[0, 6, 6], -3)
+    assert_equals(new_im.pixels[0, 0, 0], 5)
+
+
+def test_set_patches_return_weights():
+    patches, patch_centers = _overlapping_patches()
+    im = Image.init_blank((10, 10))
+    new_im, weights = im.set_patches(patches, patch_centers,
+                                     return_weights=True)
+    assert_equals(weights.shape, im.shape)
+    assert_equals(weights[3, 3], 1)
+    assert_equals(weights[4, 4], 2)
+    assert_equals(weights[0, 0], 0)
+    assert_equals(weights.sum(), 18)
+
+
+def test_set_patches_multiple_offsets_mean_reconstruction():
+    image = mio.import_builtin_asset.lenna_png()
+    sample_offsets = np.array([[0, 0], [2, 2], [-3, 1]])
+    patches = image.extract_patches_around_landmarks(
+        patch_shape=(11, 11), sample_offsets=sample_offsets)
+    blank = Image.init_blank(image.shape, image.n_channels)
+    blank.landmarks['LJSON'] = image.landmarks['LJSON']
+    recon, weights = blank.set_patches_around_landmarks(
+        patches, offset=sample_offsets, mode='mean', return_weights=True)
+    covered = weights > 0
+    assert_allclose(recon.pixels[:, covered], image.pixels[:, covered])
+
+
+def test_set_patches_multiple_offsets_matches_sequential():
+    image = mio.import_builtin_asset.lenna_png()
+    sample_offsets = np.array([[0, 0], [4, -4]])
+    patches = image.extract_patches_around_landmarks(
+        patch_shape=(7, 9), sample_offsets=sample_offsets)
+    blank = Image.init_blank(image.shape, image.n_channels)
+    blank.landmarks['LJSON'] = image.landmarks['LJSON']
+    batched = blank.set_patches_around_landmarks(patches,
+                                                 offset=sample_offsets,
+                                                 mode='add')
+    sequential = blank
+    for i, o in enumerate(sample_offsets):
+        sequential = sequential.set_patches_around_landmarks(
+            patches, offset=o[None], offset_index=i, mode='add')
+    assert_array_equal(batched.pixels, sequential.pixels)
+
+
+@raises(ValueError)
+def test_set_patches_invalid_mode():
+    patches, patch_centers = _overlapping_patches()
+    Image.init_blank((10, 10)).set_patches(patches, patch_centers,
+                                           mode='median')
+
+
+@raises(ValueError)
+def test_set_patches_offset_index_mismatch():
+    patches, patch_centers = _overlapping_patches()
+    Image.init_blank((10, 10)).set_patches(patches, patch_centers,
+                                           offset=np.zeros((2, 2)),
+                                           offset_index=0)
+
+
+def test_boolean_set_patches_mode_max():
+    patches, patch_centers = _overlapping_patches()
+    patches[1, 0] = 0
+    mask = BooleanImage.init_blank((10, 10), fill=False)
+    new_mask = mask.set_patches(patches.astype(np.bool), patch_centers,
+                                mode='max')
+    assert(new_mask.pixels[0, 4, 4])
+    assert(not new_mask.pixels[0, 6, 6])
+
+
 def test_convert_patches_list_to_single_array():
     patch_shape = (7, 2)
     n_channels = 10
@@ -4,6 +4,7 @@ from numpy.testing import assert_allclose, assert_equal
 from nose.tools import raises
 from menpo.testing import is_same_array
 from menpo.image import BooleanImage, MaskedImage, Image
+from menpo.shape import PointCloud
 
 # TODO: Remove when Pillow 3.3.0 release on all platforms
 import unittest
@@ -598,6 +599,93 @@ def test_resize():
     assert_allclose(new_image.shape, new_size)
 
 
+def _reference_area_downsample(pixels, factor):
+    # Naive per-block mean, used as a reference for the area rescaling
+    n_channels, h, w = pixels.shape
+    out_h, out_w = int(np.ceil(h / factor)), int(np.ceil(w / factor))
+    out = np.empty((n_channels, out_h, out_w))
+    for i in range(out_h):
+        for j in range(out_w):
+            block = pixels[:, i * factor:(i + 1) * factor,
+                           j * factor:(j + 1) * factor]
+            out[:, i, j] = block.sum(axis=(1, 2)) / (block.size / n_channels)
+    return out
+
+
+def test_rescale_area_integer_factor_exact():
+    pixels = np.random.randint(0, 255, size=(3, 60, 90)).astype(np.float64)
+    image = Image(pixels, copy=False)
+    new_image = image.rescale(1. / 3, method='area')
+    assert_allclose(new_image.shape, (20, 30))
+    assert_equal(new_image.pixels, _reference_area_downsample(pixels, 3))
+
+
+def test_rescale_area_integer_factor_non_divisible():
+    pixels = np.random.randint(0, 255, size=(2, 61, 47)).astype(np.float64)
+    image = Image(pixels, copy=False)
+    new_image = image.rescale(0.5, method='area')
+    assert_allclose(new_image.shape, (31, 24))
+    assert_equal(new_image.pixels, _reference_area_downsample(pixels, 2))
+
+
+def test_rescale_area_uint8():
+    pixels = np.random.randint(0, 255, size=(3, 40, 40)).astype(np.uint8)
+    image = Image(pixels, copy=False)
+    new_image = image.rescale(0.25, method='area')
+    assert(new_image.pixels.dtype == np.uint8)
+    expected = np.floor(_reference_area_downsample(pixels, 4) + 0.5)
+    assert_equal(new_image.pixels, expected)
+
+
+def test_rescale_area_non_integer_factor():
+    image = Image(np.random.randn(3, 120, 120), copy=False)
+    new_image = image.rescale(0.3, method='area')
+    assert_allclose(new_image.shape, (36, 36))
+    # the area filter preserves the mean intensity
+    assert_allclose(new_image.pixels.mean(axis=(1, 2)),
+                    image.pixels.mean(axis=(1, 2)))
+
+
+def test_rescale_area_constant_image():
+    image = Image.init_blank((101, 73), n_channels=2, fill=0.7)
+    new_image = image.rescale([0.37, 0.61], method='area')
+    assert_allclose(new_image.pixels, 0.7)
+
+
+def test_rescale_area_landmarks():
+    image = Image.init_blank((100, 100))
+    image.landmarks['test'] = PointCloud(np.array([[-0.5, -0.5],
+                                                   [10.5, 20.5],
+                                                   [99.5, 99.5]]))
+    new_image, transform = image.rescale(0.5, method='area',
+                                         return_transform=True)
+    assert_allclose(new_image.landmarks['test'].lms.points,
+                    [[-0.5, -0.5], [5., 10.], [49.5, 49.5]])
+    assert_allclose(transform.apply(new_image.landmarks['test'].lms.points),
+                    image.landmarks['test'].lms.points)
+
+
+def test_rescale_area_masked():
+    image = MaskedImage(np.random.randn(3, 120, 120), copy=False)
+    image.mask.pixels[0, :, :60] = False
+    new_image = image.rescale(0.5, method='area')
+    assert(type(new_image) == MaskedImage)
+    assert_allclose(new_image.mask.shape, (60, 60))
+    assert_allclose(new_image.mask.proportion_true(), 0.5)
+
+
+def test_resize_area():
+    image = MaskedImage(np.random.randn(3, 120, 120), copy=False)
+    new_image = image.resize((40, 30), method='area')
+    assert_allclose(new_image.shape, (40, 30))
+
+
+@raises(ValueError)
+def test_rescale_unknown_method():
+    image = Image(np.random.randn(3, 120, 120), copy=False)
+    image.rescale(0.5, method='cubic')
+
+
 def test_as_greyscale_luminosity():
     ones = np.ones([3, 120, 120])
     image = Image(ones, copy=True)
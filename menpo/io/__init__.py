@@ -1,12 +1,15 @@
 from .input import (
-    import_image, import_images, image_paths,
+    import_image, import_images, import_image_metadata, image_paths,
+    ImageCache, warm_image_cache,
     import_video, import_videos, video_paths,
     import_landmark_file, import_landmark_files, landmark_file_paths,
     import_pickle, import_pickles, pickle_paths,
     import_builtin_asset, data_dir_path, data_path_to, ls_builtin_assets,
     register_image_importer, register_landmark_importer,
-    register_pickle_importer, register_video_importer
+    register_pickle_importer, register_video_importer,
+    import_dataset_pack
 )
 from .output import (export_image, export_video,
-                     export_landmark_file, export_pickle)
+                     export_landmark_file, export_pickle,
+                     export_dataset_pack)
 from .exceptions import OverwriteError
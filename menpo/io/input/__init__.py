@@ -1,5 +1,6 @@
 from .base import (
-    import_image, import_images, image_paths,
+    import_image, import_images, import_image_metadata, image_paths,
+    ImageCache, warm_image_cache,
     import_video, import_videos, video_paths,
     import_landmark_file, import_landmark_files, landmark_file_paths,
     import_pickle, import_pickles, pickle_paths,
@@ -11,3 +12,4 @@ from .base import (
     register_pickle_importer, register_video_importer,
     same_name, same_name_video
 )
+from .pack import import_dataset_pack
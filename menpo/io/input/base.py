@@ -1,18 +1,27 @@
+from collections import OrderedDict
+import fnmatch
+import json
 import warnings
 from functools import partial
 import os
 from pathlib import Path
 import random
 
+import numpy as np
+
 from menpo.base import (menpo_src_dir_path, LazyList, partial_doc,
                         MenpoDeprecationWarning)
 from menpo.compatibility import basestring
 from menpo.visualize import print_progress
 
 from ..utils import (_norm_path, _possible_extensions_from_filepath,
-                     _normalize_extension)
+                     _possible_extensions_from_filename,
+                     _normalize_extension, _scandir)
 from .extensions import (image_landmark_types, image_types, pickle_types,
-                         ffmpeg_video_types)
+                         ffmpeg_video_types, image_metadata_types,
+                         image_landmark_array_importers)
+from .cache import ImageCache
+from .image import pillow_importer, _pillow_decode_transform
 
 
 # TODO: Remove once deprecated
@@ -216,8 +225,68 @@ def same_name_video(path, frame_number,
     return {p.suffix[1:].upper(): p for p in paths_callable(pattern)}
 
 
+class _StemIndex(object):
+    r"""
+    A drop-in replacement for the ``paths_callable`` of :map:`same_name` and
+    :map:`same_name_video` that lists each directory once, rather than
+    globbing the directory for every asset (or frame). Patterns of the form
+    ``'dir/stem.*'`` are answered from a ``{stem: [paths]}`` index of the
+    directory, built on first use. Any other pattern falls back to
+    ``paths_callable``.
+
+    Note that the index is a snapshot - files created after a directory has
+    been indexed will not be found.
+    """
+
+    def __init__(self, extensions_map, paths_callable=landmark_file_paths):
+        self.extensions_map = extensions_map
+        self.paths_callable = paths_callable
+        self._indices = {}
+
+    def __call__(self, pattern):
+        pattern = Path(pattern)
+        stem = pattern.name[:-2]
+        if not pattern.name.endswith('.*') or any(c in stem for c in '*?['):
+            return self.paths_callable(pattern)
+        return self._index(str(pattern.parent)).get(stem, [])
+
+    def _index(self, directory):
+        index = self._indices.get(directory)
+        if index is None:
+            index = {}
+            try:
+                # We only need the names, so a single listing suffices
+                filenames = sorted(os.listdir(directory))
+            except OSError:
+                filenames = []
+            parent = Path(directory)
+            for filename in filenames:
+                path = parent / filename
+                possible_exts = _possible_extensions_from_filepath(path)
+                if not any(ext in self.extensions_map
+                           for ext in possible_exts):
+                    continue
+                # A pattern 'stem.*' matches every file named 'stem.{...}',
+                # so index the file under every possible stem
+                parts = filename.split('.')
+                for i in range(1, len(parts)):
+                    index.setdefault('.'.join(parts[:i]), []).append(path)
+            self._indices[directory] = index
+        return index
+
+
+def _indexed_landmark_resolver(landmark_resolver, landmark_ext_map):
+    # Replace the default resolvers with ones that share a directory index,
+    # as globbing once per asset is quadratic in the size of the directory
+    if (landmark_ext_map is not None and
+            landmark_resolver in (same_name, same_name_video)):
+        return partial(landmark_resolver,
+                       paths_callable=_StemIndex(landmark_ext_map))
+    return landmark_resolver
+
+
 def import_image(filepath, landmark_resolver=same_name, normalize=None,
-                 normalise=None):
+                 normalise=None, max_shape=None, scale=None, cache=None):
     r"""Single image (and associated landmarks) importer.
 
     If an image file is found at `filepath`, returns an :map:`Image` or
@@ -247,6 +316,19 @@ def import_image(filepath, landmark_resolver=same_name, normalize=None,
         useful to save on memory usage if you only wish to view or crop images.
     normalise: `bool`, optional
         Deprecated version of normalize. Please use the normalize arg.
+    max_shape : `tuple` or ``None``, optional
+        If not ``None``, the image is downscaled (preserving the aspect ratio)
+        so that it fits within ``(max_height, max_width)``. Landmarks are
+        rescaled to match. For JPEGs the downscaling is largely performed by
+        the decoder, which is much faster than importing at full resolution
+        and rescaling afterwards.
+    scale : `float` or ``None``, optional
+        If not ``None``, the image (and its landmarks) are rescaled by this
+        factor at import time. See ``max_shape``.
+    cache : :map:`ImageCache` or `str` or ``None``, optional
+        If not ``None``, the image and its landmarks are read from (or stored
+        in) this cache. A path is interpreted as the directory of an unbounded
+        :map:`ImageCache`.
 
     Returns
     -------
@@ -254,17 +336,38 @@ def import_image(filepath, landmark_resolver=same_name, normalize=None,
         An instantiated :map:`Image` or subclass thereof or a list of images.
     """
     normalize = _parse_deprecated_normalise(normalise, normalize)
-    kwargs = {'normalize': normalize}
+    kwargs = _image_importer_kwargs(normalize, max_shape, scale)
+    cache = _parse_image_cache(cache)
     return _import(filepath, image_types,
                    landmark_ext_map=image_landmark_types,
                    landmark_resolver=landmark_resolver,
-                   landmark_attach_func=_import_object_attach_landmarks,
-                   importer_kwargs=kwargs)
+                   landmark_attach_func=partial(
+                       _import_object_attach_landmarks, cache=cache),
+                   importer_kwargs=kwargs, cache=cache)
+
+
+def _parse_image_cache(cache):
+    if cache is None or isinstance(cache, ImageCache):
+        return cache
+    return ImageCache(cache)
+
+
+def _image_importer_kwargs(normalize, max_shape, scale):
+    kwargs = {'normalize': normalize}
+    # Only forward the rescaling options when used, so that custom importers
+    # that do not accept them are unaffected
+    if max_shape is not None:
+        kwargs['max_shape'] = max_shape
+    if scale is not None:
+        kwargs['scale'] = scale
+    return kwargs
 
 
 def import_video(filepath, landmark_resolver=same_name_video, normalize=None,
                  normalise=None, importer_method='ffmpeg',
-                 exact_frame_count=True):
+                 exact_frame_count=True, output_shape=None, crop=None,
+                 pix_fmt='rgb24', frame_stride=1, start_time=None,
+                 end_time=None, n_decoders=1):
     r"""Single video (and associated landmarks) importer.
 
     If a video file is found at `filepath`, returns an :map:`LazyList` wrapping
@@ -311,6 +414,30 @@ def import_video(filepath, landmark_resolver=same_name_video, normalize=None,
     exact_frame_count: `bool`, optional
         If ``True``, the import fails if ffprobe is not available
         (reading from ffmpeg's output returns inexact frame count)
+    output_shape : `(int, int)` or ``None``, optional
+        If not ``None``, the ``(height, width)`` that ffmpeg resizes the frames
+        to while decoding. Landmarks are rescaled accordingly.
+    crop : `((int, int), (int, int))` or ``None``, optional
+        If not ``None``, the ``(min_indices, max_indices)`` of the region of
+        the frames that ffmpeg keeps while decoding (before any resizing).
+        Landmarks are translated accordingly.
+    pix_fmt : {``'rgb24'``, ``'gray'``, ``'rgb48le'``, ``'gray16le'``}
+        The pixel format of the imported frames. For example, ``'gray'``
+        imports single channel frames, converted by ffmpeg.
+    frame_stride : `int`, optional
+        Only every ``frame_stride``-th frame of the video is imported, with
+        the frames that are skipped never leaving ffmpeg. Landmarks are
+        resolved using the number of each frame in the original video.
+    start_time : `float` or ``None``, optional
+        If not ``None``, the time (in seconds) of the first frame to import.
+    end_time : `float` or ``None``, optional
+        If not ``None``, the time (in seconds) to import frames up to
+        (exclusive).
+    n_decoders : `int` or ``None``, optional
+        The number of ffmpeg processes decoding each video at once. If not
+        ``1``, iterating over the frames in order decodes keyframe aligned
+        segments of the video in parallel (see :map:`ParallelVideoReader`).
+        If ``None``, one decoder per CPU is used.
 
     Returns
     -------
@@ -324,16 +451,25 @@ def import_video(filepath, landmark_resolver=same_name_video, normalize=None,
     >>> video = menpo.io.import_video('video.avi')
     >>> # Lazily load the 100th frame without reading the entire video
     >>> frame100 = video[100]
+    >>> # Import every 5th frame, at half resolution and in greyscale
+    >>> video = menpo.io.import_video('video.avi', frame_stride=5,
+    >>>                               output_shape=(360, 640), pix_fmt='gray')
     """
     normalize = _parse_deprecated_normalise(normalise, normalize)
 
-    kwargs = {'normalize': normalize, 'exact_frame_count': exact_frame_count}
+    kwargs = {'normalize': normalize, 'exact_frame_count': exact_frame_count,
+              'output_shape': output_shape, 'crop': crop, 'pix_fmt': pix_fmt,
+              'frame_stride': frame_stride, 'start_time': start_time,
+              'end_time': end_time, 'n_decoders': n_decoders}
 
     video_importer_methods = {'ffmpeg': ffmpeg_video_types}
     if importer_method not in video_importer_methods:
         raise ValueError('Unsupported importer method requested. Valid values '
                          'are: {}'.format(video_importer_methods.keys()))
 
+    # Frames are resolved one at a time, so index the directory once
+    landmark_resolver = _indexed_landmark_resolver(landmark_resolver,
+                                                   image_landmark_types)
     return _import(filepath, video_importer_methods[importer_method],
                    landmark_ext_map=image_landmark_types,
                    landmark_resolver=landmark_resolver,
@@ -370,10 +506,19 @@ def import_pickle(filepath, **kwargs):
     reduce the filesize of a pickle file at the cost of longer import and
     export times.
 
+    Pickles exported with ``out_of_band=True`` (see :map:`export_pickle`)
+    have their large arrays memory-mapped from the sidecar file next to the
+    pickle, which makes loading them near instant.
+
     Parameters
     ----------
     filepath : `pathlib.Path` or `str`
         A relative or absolute filepath to a ``.pkl`` or ``.pkl.gz`` file.
+    mmap_mode : ``{'r', 'c', 'r+'}`` or ``None``, optional
+        How out-of-band arrays are loaded. By default, they are memory-mapped
+        read-only (``'r'``), so the pages are shared between processes.
+        ``'c'`` memory-maps them copy-on-write and ``None`` reads them into
+        memory.
 
     Returns
     -------
@@ -442,7 +587,8 @@ def import_pickles(pattern, max_pickles=None, shuffle=False,
 
 def import_images(pattern, max_images=None, shuffle=False,
                   landmark_resolver=same_name, normalize=None,
-                  normalise=None, as_generator=False, verbose=False):
+                  normalise=None, as_generator=False, verbose=False,
+                  max_shape=None, scale=None, cache=None, manifest=None):
     r"""Multiple image (and associated landmarks) importer.
 
     For each image found creates an importer than returns a :map:`Image` or
@@ -492,6 +638,24 @@ def import_images(pattern, max_images=None, shuffle=False,
     verbose : `bool`, optional
         If ``True`` progress of the importing will be dynamically reported with
         a progress bar.
+    max_shape : `tuple` or ``None``, optional
+        If not ``None``, each image is downscaled (preserving the aspect ratio)
+        so that it fits within ``(max_height, max_width)``. Landmarks are
+        rescaled to match. For JPEGs the downscaling is largely performed by
+        the decoder, which is much faster than importing at full resolution
+        and rescaling afterwards.
+    scale : `float` or ``None``, optional
+        If not ``None``, each image (and its landmarks) is rescaled by this
+        factor at import time. See ``max_shape``.
+    cache : :map:`ImageCache` or `str` or ``None``, optional
+        If not ``None``, the images and their landmarks are read from (or
+        stored in) this cache, so that only the first import of each image
+        decodes it. A path is interpreted as the directory of an unbounded
+        :map:`ImageCache`. See :map:`warm_image_cache`.
+    manifest : `pathlib.Path` or `str` or ``None``, optional
+        If not ``None``, the path of a manifest file used to persist the
+        result of the glob, so that repeated imports of a large, unmodified,
+        directory tree do not need to list it. See :map:`glob_with_suffix`.
 
     Returns
     -------
@@ -508,30 +672,190 @@ def import_images(pattern, max_images=None, shuffle=False,
     --------
     Import images at 20% scale from a huge collection:
 
-    >>> rescale_20p = lambda x: x.rescale(0.2)
-    >>> images =  menpo.io.import_images('./massive_image_db/*')  # Returns immediately
-    >>> images = images.map(rescale_20p)  # Returns immediately
-    >>> images[0]  # Get the first image, resize, lazily loaded
+    >>> images =  menpo.io.import_images('./massive_image_db/*', scale=0.2)
+    >>> images[0]  # Get the first image, decoded directly at 20% scale
     """
     normalize = _parse_deprecated_normalise(normalise, normalize)
 
-    kwargs = {'normalize': normalize}
+    kwargs = _image_importer_kwargs(normalize, max_shape, scale)
+    cache = _parse_image_cache(cache)
     return _import_glob_lazy_list(
         pattern, image_types,
         max_assets=max_images, shuffle=shuffle,
         landmark_resolver=landmark_resolver,
         landmark_ext_map=image_landmark_types,
-        landmark_attach_func=_import_object_attach_landmarks,
+        landmark_attach_func=partial(_import_object_attach_landmarks,
+                                     cache=cache),
         as_generator=as_generator,
         verbose=verbose,
-        importer_kwargs=kwargs
+        importer_kwargs=kwargs,
+        cache=cache,
+        manifest=manifest
+    )
+
+
+def warm_image_cache(pattern, cache, max_images=None,
+                     landmark_resolver=same_name, max_shape=None, scale=None,
+                     n_threads=None, verbose=False):
+    r"""Pre-populate an :map:`ImageCache` with images (and their landmarks).
+
+    Every image found is decoded and stored in the cache, so that subsequent
+    calls to :map:`import_images` with the same ``cache``, ``max_shape`` and
+    ``scale`` read the memory-mapped pixels back without decoding.
+
+    Parameters
+    ----------
+    pattern : `str`
+        A glob path pattern to search for images. See :map:`import_images`.
+    cache : :map:`ImageCache` or `str`
+        The cache to populate. A path is interpreted as the directory of an
+        unbounded :map:`ImageCache`.
+    max_images : positive `int`, optional
+        If not ``None``, only cache the first ``max_images`` found.
+    landmark_resolver : `function` or `None`, optional
+        The landmark resolver that will be used when importing the images.
+        If ``None``, no landmarks will be cached.
+    max_shape : `tuple` or ``None``, optional
+        The ``max_shape`` the images will be imported with.
+    scale : `float` or ``None``, optional
+        The ``scale`` the images will be imported with.
+    n_threads : positive `int` or ``None``, optional
+        If not ``None``, the images are decoded using a pool of ``n_threads``
+        threads.
+    verbose : `bool`, optional
+        If ``True`` progress will be dynamically reported with a progress bar.
+
+    Returns
+    -------
+    cache : :map:`ImageCache`
+        The populated cache.
+
+    Raises
+    ------
+    ValueError
+        If no images are found at the provided glob.
+    """
+    cache = _parse_image_cache(cache)
+    # Only the native pixels are ever stored, so don't pay for normalizing
+    images = import_images(pattern, max_images=max_images,
+                           landmark_resolver=landmark_resolver,
+                           normalize=False, max_shape=max_shape, scale=scale,
+                           cache=cache)
+    for _ in _import_all(images, n_threads=n_threads, verbose=verbose,
+                         prefix='Caching images'):
+        pass
+    return cache
+
+
+def import_image_metadata(pattern, max_images=None, shuffle=False,
+                          landmark_resolver=None, n_threads=None,
+                          verbose=False):
+    r"""Multiple image metadata importer.
+
+    For each image found, the header of the file is parsed to find the shape,
+    number of channels, mode and native datatype of the image. The pixels are
+    never decoded, so this is very cheap in comparison to
+    :map:`import_images` and is useful for filtering or bucketing large image
+    collections by size before importing them.
+
+    Note that this is a function returns a :map:`LazyList`. Therefore, the
+    function will return immediately and indexing into the returned list
+    will read the metadata at run time, unless ``n_threads`` is provided.
+
+    Parameters
+    ----------
+    pattern : `str`
+        A glob path pattern to search for images. Every image found to match
+        the glob will be inspected one by one.
+    max_images : positive `int`, optional
+        If not ``None``, only inspect the first ``max_images`` found. Else,
+        inspect all.
+    shuffle : `bool`, optional
+        If ``True``, the order of the returned metadata will be randomised. If
+        ``False``, the order of the returned metadata will be alphanumerically
+        ordered.
+    landmark_resolver : `function` or `None`, optional
+        If not ``None``, this function will be used to find landmarks for each
+        image (see :map:`import_images`) and the number of landmarks in each
+        landmark file found will be reported in ``landmark_counts``. Note that
+        this requires the landmark files to be parsed. If ``None``,
+        ``landmark_counts`` will be ``None``.
+    n_threads : positive `int` or ``None``, optional
+        If not ``None``, the metadata of all the images is read eagerly
+        using a pool of ``n_threads`` threads. As reading headers is
+        dominated by IO, this is much faster than sequential reading on
+        network or cold storage.
+    verbose : `bool`, optional
+        If ``True`` and ``n_threads`` is provided, progress of the reading
+        will be dynamically reported with a progress bar.
+
+    Returns
+    -------
+    lazy_list : :map:`LazyList` of :map:`ImageMetadata`
+        A :map:`LazyList` of ``(path, shape, n_channels, mode, dtype,
+        landmark_counts)`` named tuples.
+
+    Raises
+    ------
+    ValueError
+        If no images are found at the provided glob.
+
+    Examples
+    --------
+    Find all the images that are at least 500 pixels wide:
+
+    >>> metadata = menpo.io.import_image_metadata('./image_db/*', n_threads=8)
+    >>> paths = [m.path for m in metadata if m.shape[1] >= 500]
+    """
+    lazy_list = _import_glob_lazy_list(
+        pattern, image_metadata_types,
+        max_assets=max_images, shuffle=shuffle,
+        landmark_resolver=landmark_resolver,
+        landmark_ext_map=image_landmark_types,
+        landmark_attach_func=_import_metadata_attach_landmark_counts,
+        verbose=verbose and n_threads is None
     )
+    if n_threads is None:
+        return lazy_list
+    return LazyList.init_from_iterable(list(
+        _import_all(lazy_list, n_threads=n_threads, verbose=verbose,
+                    prefix='Reading metadata')))
+
+
+def _import_all(lazy_list, n_threads=None, verbose=False,
+                prefix='Importing assets'):
+    # Generator importing every item of a LazyList in order, optionally using
+    # a pool of threads (importing is dominated by IO and decoders that
+    # release the GIL)
+    if n_threads is not None and n_threads <= 0:
+        raise ValueError('n_threads should be positive '
+                         '({} provided)'.format(n_threads))
+    if n_threads is None:
+        results = (x for x in lazy_list)
+        pool = None
+    else:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(n_threads)
+        results = pool.imap(lazy_list.__getitem__, range(len(lazy_list)))
+    try:
+        if verbose:
+            results = print_progress(results, prefix=prefix,
+                                     n_items=len(lazy_list))
+        for x in results:
+            yield x
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
 
 def import_videos(pattern, max_videos=None, shuffle=False,
                   landmark_resolver=same_name_video, normalize=None,
                   normalise=None, importer_method='ffmpeg',
-                  exact_frame_count=True, as_generator=False, verbose=False):
+                  exact_frame_count=True, as_generator=False, verbose=False,
+                  manifest=None, output_shape=None, crop=None,
+                  pix_fmt='rgb24', frame_stride=1, start_time=None,
+                  end_time=None, n_decoders=1):
     r"""Multiple video (and associated landmarks) importer.
 
     For each video found yields a :map:`LazyList`. By default, landmark files
@@ -597,6 +921,34 @@ def import_videos(pattern, max_videos=None, shuffle=False,
     verbose : `bool`, optional
         If ``True`` progress of the importing will be dynamically reported with
         a progress bar.
+    manifest : `pathlib.Path` or `str` or ``None``, optional
+        If not ``None``, the path of a manifest file used to persist the
+        result of the glob, so that repeated imports of a large, unmodified,
+        directory tree do not need to list it. See :map:`glob_with_suffix`.
+    output_shape : `(int, int)` or ``None``, optional
+        If not ``None``, the ``(height, width)`` that ffmpeg resizes the frames
+        to while decoding. Landmarks are rescaled accordingly.
+    crop : `((int, int), (int, int))` or ``None``, optional
+        If not ``None``, the ``(min_indices, max_indices)`` of the region of
+        the frames that ffmpeg keeps while decoding (before any resizing).
+        Landmarks are translated accordingly.
+    pix_fmt : {``'rgb24'``, ``'gray'``, ``'rgb48le'``, ``'gray16le'``}
+        The pixel format of the imported frames. For example, ``'gray'``
+        imports single channel frames, converted by ffmpeg.
+    frame_stride : `int`, optional
+        Only every ``frame_stride``-th frame of the video is imported, with
+        the frames that are skipped never leaving ffmpeg. Landmarks are
+        resolved using the number of each frame in the original video.
+    start_time : `float` or ``None``, optional
+        If not ``None``, the time (in seconds) of the first frame to import.
+    end_time : `float` or ``None``, optional
+        If not ``None``, the time (in seconds) to import frames up to
+        (exclusive).
+    n_decoders : `int` or ``None``, optional
+        The number of ffmpeg processes decoding each video at once. If not
+        ``1``, iterating over the frames in order decodes keyframe aligned
+        segments of the video in parallel (see :map:`ParallelVideoReader`).
+        If ``None``, one decoder per CPU is used.
 
     Returns
     -------
@@ -623,7 +975,10 @@ def import_videos(pattern, max_videos=None, shuffle=False,
     """
     normalize = _parse_deprecated_normalise(normalise, normalize)
 
-    kwargs = {'normalize': normalize, 'exact_frame_count':exact_frame_count}
+    kwargs = {'normalize': normalize, 'exact_frame_count': exact_frame_count,
+              'output_shape': output_shape, 'crop': crop, 'pix_fmt': pix_fmt,
+              'frame_stride': frame_stride, 'start_time': start_time,
+              'end_time': end_time, 'n_decoders': n_decoders}
     video_importer_methods = {'ffmpeg': ffmpeg_video_types}
     if importer_method not in video_importer_methods:
         raise ValueError('Unsupported importer method requested. Valid values '
@@ -637,12 +992,14 @@ def import_videos(pattern, max_videos=None, shuffle=False,
         landmark_attach_func=_import_lazylist_attach_landmarks,
         as_generator=as_generator,
         verbose=verbose,
-        importer_kwargs=kwargs
+        importer_kwargs=kwargs,
+        manifest=manifest
     )
 
 
 def import_landmark_files(pattern, max_landmarks=None, shuffle=False,
-                          as_generator=False, verbose=False):
+                          as_generator=False, verbose=False, manifest=None,
+                          as_array=False):
     r"""Import Multiple landmark files.
 
     For each landmark file found returns an importer than
@@ -653,6 +1010,11 @@ def import_landmark_files(pattern, max_landmarks=None, shuffle=False,
     will load the landmarks at run time. If all landmarks should be loaded, then
     simply wrap the returned :map:`LazyList` in a Python `list`.
 
+    If all the landmark files share the same number of points and labels (as
+    is the case for most datasets), ``as_array=True`` imports them eagerly
+    into a single ``(n_files, n_points, n_dims)`` array, which is much faster
+    and more compact than building a :map:`LandmarkGroup` per file.
+
     Parameters
     ----------
     pattern : `str`
@@ -672,25 +1034,50 @@ def import_landmark_files(pattern, max_landmarks=None, shuffle=False,
         one after another when the generator is iterated over.
     verbose : `bool`, optional
         If ``True`` progress of the importing will be dynamically reported.
+    manifest : `pathlib.Path` or `str` or ``None``, optional
+        If not ``None``, the path of a manifest file used to persist the
+        result of the glob, so that repeated imports of a large, unmodified,
+        directory tree do not need to list it. See :map:`glob_with_suffix`.
+    as_array : `bool`, optional
+        If ``True``, every landmark file is imported immediately and the
+        points and labels are returned as arrays rather than
+        :map:`LandmarkGroup` instances. Any connectivity is ignored. The
+        built-in formats are read directly into arrays, while the files of
+        registered importers are read through their :map:`LandmarkGroup`.
 
     Returns
     -------
     lazy_list : :map:`LazyList` or generator of :map:`LandmarkGroup`
         A :map:`LazyList` or generator yielding :map:`LandmarkGroup` instances
-        found to match the glob pattern provided.
+        found to match the glob pattern provided. If ``as_array=True``, a tuple
+        of the ``(n_files, n_points, n_dims)`` `ndarray` of points and the
+        ``{label: mask}`` `OrderedDict` of boolean masks shared by every file.
 
     Raises
     ------
     ValueError
         If no landmarks are found at the provided glob.
+    ValueError
+        If ``as_array=True`` and the landmark files do not all have the same
+        number of points and labels.
+    ValueError
+        If both ``as_array`` and ``as_generator`` are ``True``.
     """
+    if as_array:
+        if as_generator:
+            raise ValueError('as_array and as_generator cannot both be True')
+        filepaths = _glob_filepaths(pattern, image_landmark_types,
+                                    max_assets=max_landmarks, shuffle=shuffle,
+                                    manifest=manifest)
+        return _import_landmark_arrays(filepaths, verbose=verbose)
     return _import_glob_lazy_list(pattern, image_landmark_types,
                                   max_assets=max_landmarks, shuffle=shuffle,
-                                  as_generator=as_generator, verbose=verbose)
+                                  as_generator=as_generator, verbose=verbose,
+                                  manifest=manifest)
 
 
 def import_pickles(pattern, max_pickles=None, shuffle=False, as_generator=False,
-                   verbose=False):
+                   verbose=False, manifest=None, mmap_mode='r'):
     r"""Import multiple pickle files.
 
     Menpo unambiguously uses ``.pkl`` as it's choice of extension for pickle
@@ -720,6 +1107,13 @@ def import_pickles(pattern, max_pickles=None, shuffle=False, as_generator=False,
         one after another when the generator is iterated over.
     verbose : `bool`, optional
         If ``True`` progress of the importing will be dynamically reported.
+    manifest : `pathlib.Path` or `str` or ``None``, optional
+        If not ``None``, the path of a manifest file used to persist the
+        result of the glob, so that repeated imports of a large, unmodified,
+        directory tree do not need to list it. See :map:`glob_with_suffix`.
+    mmap_mode : ``{'r', 'c', 'r+'}`` or ``None``, optional
+        How the arrays of pickles exported with ``out_of_band=True`` are
+        loaded. See :map:`import_pickle`.
 
     Returns
     -------
@@ -734,33 +1128,29 @@ def import_pickles(pattern, max_pickles=None, shuffle=False, as_generator=False,
     """
     return _import_glob_lazy_list(pattern, pickle_types,
                                   max_assets=max_pickles, shuffle=shuffle,
-                                  as_generator=as_generator, verbose=verbose)
+                                  as_generator=as_generator, verbose=verbose,
+                                  importer_kwargs={'mmap_mode': mmap_mode},
+                                  manifest=manifest)
 
 
 def _import_glob_lazy_list(pattern, extension_map, max_assets=None,
                            landmark_resolver=same_name, shuffle=False,
                            as_generator=False, landmark_ext_map=None,
                            landmark_attach_func=None, importer_kwargs=None,
-                           verbose=False):
-    filepaths = list(glob_with_suffix(pattern, extension_map,
-                                      sort=(not shuffle)))
-    if shuffle:
-        random.shuffle(filepaths)
-    if (max_assets is not None) and max_assets <= 0:
-        raise ValueError('Max elements should be positive'
-                         ' ({} provided)'.format(max_assets))
-    elif max_assets:
-        filepaths = filepaths[:max_assets]
-
+                           verbose=False, cache=None, manifest=None):
+    filepaths = _glob_filepaths(pattern, extension_map, max_assets=max_assets,
+                                shuffle=shuffle, manifest=manifest)
     n_files = len(filepaths)
-    if n_files == 0:
-        raise ValueError('The glob {} yields no assets'.format(pattern))
+
+    landmark_resolver = _indexed_landmark_resolver(landmark_resolver,
+                                                   landmark_ext_map)
 
     lazy_list = LazyList([partial(_import, f, extension_map,
                                   landmark_resolver=landmark_resolver,
                                   landmark_ext_map=landmark_ext_map,
                                   landmark_attach_func=landmark_attach_func,
-                                  importer_kwargs=importer_kwargs)
+                                  importer_kwargs=importer_kwargs,
+                                  cache=cache)
                           for f in filepaths])
 
     if verbose and as_generator:
@@ -777,8 +1167,60 @@ def _import_glob_lazy_list(pattern, extension_map, max_assets=None,
         return lazy_list
 
 
+def _glob_filepaths(pattern, extension_map, max_assets=None, shuffle=False,
+                    manifest=None):
+    filepaths = list(glob_with_suffix(pattern, extension_map,
+                                      sort=(not shuffle), manifest=manifest))
+    if shuffle:
+        random.shuffle(filepaths)
+    if (max_assets is not None) and max_assets <= 0:
+        raise ValueError('Max elements should be positive'
+                         ' ({} provided)'.format(max_assets))
+    elif max_assets:
+        filepaths = filepaths[:max_assets]
+
+    if len(filepaths) == 0:
+        raise ValueError('The glob {} yields no assets'.format(pattern))
+    return filepaths
+
+
+def _import_landmark_arrays(filepaths, verbose=False):
+    # Import every landmark file into a single stacked array, without
+    # building a LandmarkGroup per file
+    if verbose:
+        filepaths = print_progress(filepaths, prefix='Importing landmarks',
+                                   n_items=len(filepaths))
+    all_points, labels_to_masks, first_path = [], None, None
+    for path in filepaths:
+        points, path_labels_to_masks = _import_landmark_array(path)
+        if labels_to_masks is None:
+            labels_to_masks, first_path = path_labels_to_masks, path
+        elif (points.shape != all_points[0].shape or
+              list(path_labels_to_masks) != list(labels_to_masks) or
+              not all(np.array_equal(m, labels_to_masks[l])
+                      for l, m in path_labels_to_masks.items())):
+            raise ValueError('The landmarks of {} do not match those of {} - '
+                             'only landmarks with the same number of points '
+                             'and labels can be imported as an '
+                             'array'.format(path, first_path))
+        all_points.append(points)
+    return np.array(all_points), labels_to_masks
+
+
+def _import_landmark_array(path):
+    # The (points, labels_to_masks) of a landmark file, read directly by the
+    # array counterpart of its importer if it has one. Otherwise (e.g. for
+    # registered importers), they are taken from its LandmarkGroup
+    importer = importer_for_filepath(path, image_landmark_types)
+    array_importer = image_landmark_array_importers.get(importer)
+    if array_importer is not None:
+        return array_importer(path)
+    lmarks = _import(path, image_landmark_types)
+    return lmarks.lms.points, OrderedDict(lmarks._labels_to_masks)
+
+
 def _import_object_attach_landmarks(built_objects, landmark_resolver,
-                                    landmark_ext_map=None):
+                                    landmark_ext_map=None, cache=None):
     # handle landmarks
     if landmark_ext_map is not None and landmark_resolver is not None:
         for x in built_objects:
@@ -786,40 +1228,62 @@ def _import_object_attach_landmarks(built_objects, landmark_resolver,
             if lm_paths is None:
                 continue
             for group_name, lm_path in lm_paths.items():
-                lms = _import(lm_path, landmark_ext_map, asset=x)
+                lms = _import(lm_path, landmark_ext_map, asset=x, cache=cache)
                 if x.n_dims == lms.n_dims:
                     x.landmarks[group_name] = lms
 
 
+def _import_metadata_attach_landmark_counts(built_objects, landmark_resolver,
+                                            landmark_ext_map=None):
+    # metadata is immutable, so replace each entry with one holding the counts
+    if landmark_ext_map is not None and landmark_resolver is not None:
+        for k, x in enumerate(built_objects):
+            lm_paths = landmark_resolver(x.path)
+            if lm_paths is None:
+                continue
+            counts = {group_name: _import(lm_path, landmark_ext_map,
+                                          asset=x).n_landmarks
+                      for group_name, lm_path in lm_paths.items()}
+            built_objects[k] = x._replace(landmark_counts=counts)
+
+
 def _import_lazylist_attach_landmarks(built_objects, landmark_resolver,
                                       landmark_ext_map=None):
     # handle landmarks
     if landmark_ext_map is not None and landmark_resolver is not None:
         for k, x in enumerate(built_objects):
+            # Frames may be a subset of the frames of the video (see the
+            # frame_stride of ffmpeg_importer) - landmarks are resolved by
+            # the number of the frame in the video
+            frame_numbers = getattr(x, 'frame_numbers', range(len(x)))
+            # Landmark files are expressed in the frame of the video
+            frame_transform = getattr(x, 'frame_transform', None)
             # Use the users function to find landmarks - builds a list
             # of functions that we will map against the frames in order to
             # attach a landmark per frame.
-            lm_resolvers = [partial(landmark_resolver, x.path, i)
-                            for i in range(len(x))]
+            lm_resolvers = [partial(landmark_resolver, x.path, int(i))
+                            for i in frame_numbers]
 
-            def wrap_landmarks(lm_resolver, obj):
+            def wrap_landmarks(lm_resolver, frame_transform, obj):
                 lm_paths = lm_resolver()
                 for group_name, lm_path in lm_paths.items():
                     lms = _import(lm_path, landmark_ext_map, asset=obj)
                     if obj.n_dims == lms.n_dims:
+                        if frame_transform is not None:
+                            frame_transform._apply_inplace(lms.lms)
                         obj.landmarks[group_name] = lms
                 return obj
 
             # Provide the lm_resolver for each wrap_landmarks function and then
             # lazily map against the underlying importers.
-            new_ll = x.map([partial(wrap_landmarks, lmr)
+            new_ll = x.map([partial(wrap_landmarks, lmr, frame_transform)
                             for lmr in lm_resolvers])
             built_objects[k] = new_ll
 
 
 def _import(filepath, extensions_map, landmark_resolver=same_name,
             landmark_ext_map=None, landmark_attach_func=None,
-            asset=None, importer_kwargs=None):
+            asset=None, importer_kwargs=None, cache=None):
     r"""
     Finds an importer for the filepath passed in and then calls it with the
     filepath and optionally an asset, returning either a list of assets or a
@@ -848,6 +1312,8 @@ def _import(filepath, extensions_map, landmark_resolver=same_name,
         Passed through to the importer callable.
     importer_kwargs : `dict`, optional
         kwargs that will be supplied to the importer if not None
+    cache : :map:`ImageCache`, optional
+        If not None, the asset is imported via this cache.
 
     Returns
     -------
@@ -862,7 +1328,12 @@ def _import(filepath, extensions_map, landmark_resolver=same_name,
     importer_callable = importer_for_filepath(path, extensions_map)
     if importer_kwargs is None:
         importer_kwargs = {}
-    built_objects = importer_callable(path, asset=asset, **importer_kwargs)
+    if cache is not None:
+        built_objects = cache.import_asset(importer_callable, path,
+                                           asset=asset, **importer_kwargs)
+    else:
+        built_objects = importer_callable(path, asset=asset,
+                                          **importer_kwargs)
 
     # landmarks are iterable so check for list precisely
     if not isinstance(built_objects, list):
@@ -880,26 +1351,41 @@ def _import(filepath, extensions_map, landmark_resolver=same_name,
         landmark_attach_func(built_objects, landmark_resolver,
                              landmark_ext_map=landmark_ext_map)
 
+    # Landmark files are expressed in the frame of the file on disk, which
+    # images rescaled while being decoded (see pillow_importer) are not in
+    if (importer_callable is pillow_importer and
+            ('max_shape' in importer_kwargs or 'scale' in importer_kwargs)):
+        for x in built_objects:
+            if x.has_landmarks:
+                transform = _pillow_decode_transform(path, x)
+                if transform is not None:
+                    transform._apply_inplace(x.landmarks)
+
     if len(built_objects) == 1:
         built_objects = built_objects[0]
 
     return built_objects
 
 
-def _pathlib_glob_for_pattern(pattern, sort=True):
+def _pathlib_glob_for_pattern(pattern, sort=True, listed_dirs=None):
     r"""Generator for glob matching a string path pattern
 
-    Splits the provided ``pattern`` into a root path for pathlib and a
-    subsequent glob pattern to be applied.
+    Splits the provided ``pattern`` into a root path and a subsequent glob
+    pattern to be applied. The glob is evaluated with ``os.scandir``,
+    following the semantics of ``pathlib.Path.glob``, but without building a
+    ``Path`` for every entry visited.
 
     Parameters
     ----------
     pattern : `str`
         Path including glob patterns. If no glob patterns are present and the
-        pattern is a dir, a '**/*' pattern will be automatically added.
+        pattern is a dir, a '*' pattern will be automatically added.
     sort : `bool`, optional
         If True, the returned paths will be sorted. If False, no guarantees are
         made about the ordering of the results.
+    listed_dirs : `dict` or ``None``, optional
+        If not ``None``, every directory that is listed in evaluating the glob
+        is added as a key of this dictionary.
 
     Yields
     ------
@@ -910,6 +1396,27 @@ def _pathlib_glob_for_pattern(pattern, sort=True):
     ValueError
         If the pattern doesn't contain a '*' wildcard and is not a directory
     """
+    return [Path(p) for p in _glob_paths(pattern, sort=sort,
+                                         listed_dirs=listed_dirs)]
+
+
+def _glob_paths(pattern, sort=True, listed_dirs=None, name_filter=None):
+    # As _pathlib_glob_for_pattern, but returning `str` paths. If not None,
+    # name_filter is called on the name of every match, which is dropped
+    # unless it returns True
+    preglob, pattern = _split_glob_pattern(pattern)
+    if listed_dirs is None:
+        listed_dirs = {}
+    paths = list(_glob_in_dir(preglob, Path(pattern).parts, listed_dirs,
+                              name_filter))
+    if sort:
+        # Order as pathlib does (by path component)
+        paths.sort(key=_path_sort_key)
+    return paths
+
+
+def _split_glob_pattern(pattern):
+    # Split a pattern into the root directory and the glob relative to it
     pattern = _norm_path(pattern)
     pattern_str = str(pattern)
     gsplit = pattern_str.split('*', 1)
@@ -929,14 +1436,72 @@ def _pathlib_glob_for_pattern(pattern, sort=True):
         # to the nearest dir and add the reminder to the pattern
         preglob, pattern_prefix = os.path.split(preglob)
         pattern = pattern_prefix + pattern
-    p = Path(preglob)
-    paths = p.glob(str(pattern))
-    if sort:
-        paths = sorted(paths)
-    return paths
-
-
-def glob_with_suffix(pattern, extensions_map, sort=True):
+    return preglob, pattern
+
+
+def _path_sort_key(path):
+    return os.path.normcase(path).split(os.sep)
+
+
+def _list_dir(directory, listed_dirs):
+    entries = listed_dirs.get(directory)
+    if entries is None:
+        try:
+            entries = list(_scandir(directory))
+        except OSError:
+            entries = []
+        listed_dirs[directory] = entries
+    return entries
+
+
+def _iterate_dirs(directory, listed_dirs):
+    # The directory and all its subdirectories (not following symlinks)
+    yield directory
+    for entry in _list_dir(directory, listed_dirs):
+        try:
+            if entry.is_dir() and not entry.is_symlink():
+                for d in _iterate_dirs(entry.path, listed_dirs):
+                    yield d
+        except OSError:
+            pass
+
+
+def _glob_in_dir(directory, parts, listed_dirs, name_filter=None):
+    part, rest = parts[0], parts[1:]
+    if part == '**':
+        if not rest:
+            # pathlib yields just the directories for a trailing '**'
+            for d in _iterate_dirs(directory, listed_dirs):
+                if name_filter is None or name_filter(os.path.basename(d)):
+                    yield d
+            return
+        yielded = set()
+        for d in list(_iterate_dirs(directory, listed_dirs)):
+            for p in _glob_in_dir(d, rest, listed_dirs, name_filter):
+                if p not in yielded:
+                    yielded.add(p)
+                    yield p
+    else:
+        entries = _list_dir(directory, listed_dirs)
+        matches = set(fnmatch.filter([e.name for e in entries], part))
+        for entry in entries:
+            if entry.name not in matches:
+                continue
+            if not rest:
+                if name_filter is None or name_filter(entry.name):
+                    yield entry.path
+            else:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    for p in _glob_in_dir(entry.path, rest, listed_dirs,
+                                          name_filter):
+                        yield p
+
+
+def glob_with_suffix(pattern, extensions_map, sort=True, manifest=None):
     r"""
     Filters the results from the glob pattern passed in to only those files
     that have an importer given in `extensions_map`.
@@ -952,16 +1517,114 @@ def glob_with_suffix(pattern, extensions_map, sort=True):
     sort : `bool`, optional
         If True, the returned paths will be sorted. If False, no guarantees are
         made about the ordering of the results.
+    manifest : `pathlib.Path` or `str` or ``None``, optional
+        If not ``None``, the path of a manifest file that persists the result
+        of the glob. If the manifest was written for the same pattern and
+        extensions, and none of the directories listed in evaluating the glob
+        have been modified since, the result is read back from the manifest
+        without listing any directories. Otherwise, the glob is evaluated and
+        the manifest is (re)written. Results read from a manifest are always
+        sorted.
 
     Yields
     ------
     filepaths : list of string
         The list of filepaths that have valid extensions.
     """
-    for path in _pathlib_glob_for_pattern(pattern, sort=sort):
-        possible_exts = _possible_extensions_from_filepath(path)
-        if any([ext in extensions_map for ext in possible_exts]):
+    if manifest is not None:
+        for path in _manifest_glob_with_suffix(pattern, extensions_map,
+                                               manifest):
             yield path
+        return
+    # The names are filtered as the directories are listed, so a Path is
+    # only built for the matches that have an importer
+    for path in _glob_paths(pattern, sort=sort,
+                            name_filter=_importable_name(extensions_map)):
+        yield Path(path)
+
+
+def _importable_name(extensions_map):
+    # A filter of the file names that have an importer in extensions_map
+    def name_filter(name):
+        return any([ext in extensions_map for ext in
+                    _possible_extensions_from_filename(name)])
+    return name_filter
+
+
+MANIFEST_VERSION = 1
+
+
+def _manifest_glob_with_suffix(pattern, extensions_map, manifest):
+    manifest = _norm_path(manifest)
+    extensions = sorted(extensions_map)
+    root, _ = _split_glob_pattern(pattern)
+    m = _read_manifest(manifest)
+    if (m is not None and m['pattern'] == str(pattern) and
+            m['extensions'] == extensions and m['root'] == root and
+            not _manifest_is_stale(root, m['directories'])):
+        root_path = Path(root)
+        return [root_path / p for p in m['paths']]
+
+    listed_dirs = {}
+    paths = _glob_paths(pattern, listed_dirs=listed_dirs,
+                        name_filter=_importable_name(extensions_map))
+    try:
+        # Creating the manifest modifies its directory, which may well be in
+        # the tree - so create it before recording the modification times
+        open(str(manifest), 'a').close()
+    except (IOError, OSError):
+        warnings.warn('Unable to write the glob manifest '
+                      '{}'.format(manifest))
+        return paths
+    # A directory modified from now on will be found to be stale
+    directories = {}
+    for d in listed_dirs:
+        try:
+            directories[os.path.relpath(d, root)] = os.stat(d).st_mtime
+        except OSError:
+            pass
+    _write_manifest(manifest, {
+        'version': MANIFEST_VERSION,
+        'pattern': str(pattern),
+        'extensions': extensions,
+        'root': root,
+        'directories': directories,
+        # Every path was built by joining to the root
+        'paths': [p[len(os.path.join(root, '')):] for p in paths]
+    })
+    return [Path(p) for p in paths]
+
+
+def _manifest_is_stale(root, directories):
+    for d, mtime in directories.items():
+        try:
+            if os.stat(os.path.join(root, d)).st_mtime != mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def _read_manifest(manifest):
+    try:
+        with open(str(manifest), 'r') as f:
+            m = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(m, dict) or m.get('version') != MANIFEST_VERSION:
+        return None
+    return m
+
+
+def _write_manifest(manifest, m):
+    # Written in place, as replacing the file would modify its directory.
+    # Concurrent readers may see a partial manifest, which is simply ignored
+    try:
+        with open(str(manifest), 'w') as f:
+            json.dump(m, f)
+    except (IOError, OSError):
+        warnings.warn('Unable to write the glob manifest '
+                      '{}'.format(manifest))
 
 
 def importer_for_filepath(filepath, extensions_map):
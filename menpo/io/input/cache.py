@@ -0,0 +1,321 @@
+from collections import OrderedDict
+from functools import partial
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+from pathlib import Path
+
+from menpo.image import Image, MaskedImage, BooleanImage
+from menpo.image.base import normalize_pixels_range
+from menpo.landmark import LandmarkGroup
+from menpo.shape import PointCloud
+
+from .image import pillow_importer
+
+
+class ImageCache(object):
+    r"""
+    An on-disk cache of decoded images (and their parsed landmarks) that can
+    be provided to :map:`import_image` and :map:`import_images` in order to
+    skip decoding images that have been imported before.
+
+    Decoded pixels are stored in their native datatype (commonly `uint8`) as
+    ``.npy`` files that are memory-mapped when read back, so a warm import
+    performs no decoding at all. Landmark files are parsed once and stored
+    alongside the images. Entries are keyed by the absolute path, modification
+    time and size of the source file, as well as the importer keyword
+    arguments (e.g. ``max_shape``), so editing a file invalidates its entry.
+
+    Only images imported with the PIL importer (JPEG, PNG, etc) are cached,
+    other formats are imported as normal.
+
+    Parameters
+    ----------
+    cache_dir : `pathlib.Path` or `str`
+        The directory to store the cache in. Will be created if it does not
+        exist. A cache directory can safely be shared between processes.
+    max_size : `int` or ``None``, optional
+        The maximum size of the cache in bytes. When exceeded, the least
+        recently used entries are evicted. If ``None``, the cache is
+        unbounded.
+
+    Notes
+    -----
+    Because pixels are stored in their native datatype, normalized images
+    are normalized after being read from the cache. Imports that also
+    downscale the image (``max_shape`` or ``scale``) are therefore resampled
+    in the native datatype, which can differ by rounding from an uncached
+    import.
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        if max_size is not None and max_size <= 0:
+            raise ValueError('max_size should be positive '
+                             '({} provided)'.format(max_size))
+        self.cache_dir = Path(os.path.abspath(os.path.expanduser(
+            str(cache_dir))))
+        self.max_size = max_size
+        if not self.cache_dir.is_dir():
+            try:
+                self.cache_dir.mkdir(parents=True)
+            except OSError:
+                # Created concurrently by another process
+                if not self.cache_dir.is_dir():
+                    raise
+        # Running estimate of the size of the cache - other processes may
+        # be writing to it so it is recomputed whenever we evict
+        self._size = None
+
+    def __str__(self):
+        return 'ImageCache at {} ({} bytes)'.format(self.cache_dir, self.size)
+
+    @property
+    def size(self):
+        r"""
+        The total size of the cache on disk in bytes.
+
+        :type: `int`
+        """
+        return sum(e[1] for e in self._entries().values())
+
+    def clear(self):
+        r"""
+        Delete every entry in the cache.
+        """
+        for filenames in self._entry_files().values():
+            for filename in filenames:
+                self._remove(filename)
+        self._size = 0
+
+    def evict(self, max_size=None):
+        r"""
+        Evict the least recently used entries until the cache is no larger
+        than ``max_size`` bytes.
+
+        Parameters
+        ----------
+        max_size : `int` or ``None``, optional
+            The size to shrink the cache to. If ``None``, the ``max_size`` of
+            this cache is used.
+        """
+        if max_size is None:
+            max_size = self.max_size
+        entries = self._entries()
+        size = sum(e[1] for e in entries.values())
+        if max_size is not None and size > max_size:
+            files = self._entry_files()
+            # Oldest entries first
+            for key in sorted(entries, key=lambda k: entries[k][0]):
+                for filename in files[key]:
+                    self._remove(filename)
+                size -= entries[key][1]
+                if size <= max_size:
+                    break
+        self._size = size
+
+    def import_asset(self, importer, filepath, asset=None, **importer_kwargs):
+        r"""
+        Import an asset using the given importer, via the cache. Called by the
+        import functions, there is normally no need to call this directly.
+
+        Parameters
+        ----------
+        importer : `callable`
+            The importer for the asset.
+        filepath : `pathlib.Path`
+            The absolute filepath of the asset.
+        asset : `object`, optional
+            An optional asset passed on to the importer.
+        \**importer_kwargs : `dict`, optional
+            Keyword arguments for the importer.
+
+        Returns
+        -------
+        asset : `object`
+            The imported asset.
+        """
+        if importer is pillow_importer:
+            return self._import_image(importer, filepath, importer_kwargs)
+        # Landmarks may depend on the shape of the asset they belong to
+        shape = getattr(asset, 'shape', None)
+        key = self._key(importer, filepath, dict(importer_kwargs,
+                                                 asset_shape=shape))
+        lmarks = self._load_landmarks(key)
+        if lmarks is None:
+            lmarks = importer(filepath, asset=asset, **importer_kwargs)
+            # Only simple landmark groups are cached (connectivity is not)
+            if (isinstance(lmarks, LandmarkGroup) and
+                    type(lmarks.lms) is PointCloud):
+                self._store_landmarks(key, lmarks)
+        return lmarks
+
+    def _import_image(self, importer, filepath, importer_kwargs):
+        normalize = importer_kwargs.pop('normalize', True)
+        if normalize is None:
+            normalize = True
+        key = self._key(importer, filepath, importer_kwargs)
+        image = self._load_image(key)
+        if image is None:
+            image = importer(filepath, normalize=False, **importer_kwargs)
+            self._store_image(key, image)
+        if normalize:
+            image = _normalize_native_image(image)
+        return image
+
+    def _key(self, importer, filepath, importer_kwargs):
+        stat = os.stat(str(filepath))
+        kwargs = sorted((k, repr(v)) for k, v in importer_kwargs.items())
+        key = repr((_importer_name(importer), os.path.abspath(str(filepath)),
+                    repr(stat.st_mtime), stat.st_size, kwargs))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _path(self, key, suffix):
+        return str(self.cache_dir / (key + suffix))
+
+    def _load_image(self, key):
+        pixels_path = self._path(key, '.npy')
+        mask_path = self._path(key, '.mask.npy')
+        if not os.path.isfile(pixels_path):
+            return None
+        try:
+            # Copy on write - modifying the image never touches the cache
+            pixels = np.load(pixels_path, mmap_mode='c')
+            mask = None
+            if os.path.isfile(mask_path):
+                mask = np.load(mask_path, mmap_mode='c')
+        except (IOError, OSError, ValueError):
+            # Entry was evicted under us or is corrupt
+            return None
+        self._touch(pixels_path)
+        if pixels.dtype == np.bool:
+            image = BooleanImage(pixels[0], copy=False)
+        elif mask is not None:
+            image = MaskedImage(pixels, mask=mask[0], copy=False)
+        else:
+            image = Image(pixels, copy=False)
+        return image
+
+    def _store_image(self, key, image):
+        # The pixels are written last, their presence marks a complete entry
+        if isinstance(image, MaskedImage):
+            self._save(key, '.mask.npy', image.mask.pixels)
+        self._save(key, '.npy', image.pixels)
+
+    def _load_landmarks(self, key):
+        path = self._path(key, '.lms.npz')
+        if not os.path.isfile(path):
+            return None
+        try:
+            with np.load(path) as f:
+                points, labels, masks = f['points'], f['labels'], f['masks']
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        self._touch(path)
+        return LandmarkGroup(PointCloud(points, copy=False),
+                             OrderedDict(zip(labels.tolist(), masks)),
+                             copy=False)
+
+    def _store_landmarks(self, key, lmarks):
+        masks = np.array([lmarks._labels_to_masks[l] for l in lmarks.labels])
+        self._save(key, '.lms.npz', points=lmarks.lms.points,
+                   labels=np.array(lmarks.labels, dtype=np.unicode_),
+                   masks=masks)
+
+    def _save(self, key, suffix, *arrays, **kw_arrays):
+        # Write to a temporary file and move it in place, so that concurrent
+        # readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.cache_dir),
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if kw_arrays:
+                    np.savez(f, **kw_arrays)
+                else:
+                    np.save(f, *arrays)
+            path = self._path(key, suffix)
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            # Failing to cache is never fatal
+            self._remove(tmp_path)
+            return
+        if self.max_size is not None:
+            if self._size is None:
+                self._size = self.size
+            else:
+                self._size += os.path.getsize(path)
+            if self._size > self.max_size:
+                self.evict()
+
+    def _entry_files(self):
+        files = {}
+        for filename in os.listdir(str(self.cache_dir)):
+            if filename.endswith('.tmp'):
+                continue
+            key = filename.split('.', 1)[0]
+            files.setdefault(key, []).append(
+                str(self.cache_dir / filename))
+        return files
+
+    def _entries(self):
+        # {key: (last_used, size)}
+        entries = {}
+        for key, filenames in self._entry_files().items():
+            last_used, size = 0, 0
+            for filename in filenames:
+                try:
+                    stat = os.stat(filename)
+                except OSError:
+                    continue
+                last_used = max(last_used, stat.st_mtime)
+                size += stat.st_size
+            entries[key] = (last_used, size)
+        return entries
+
+    @staticmethod
+    def _touch(path):
+        # Mark as recently used (access times are not reliable)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _importer_name(importer):
+    # A name for the importer that is stable across processes
+    if isinstance(importer, partial):
+        return repr((_importer_name(importer.func),
+                     sorted(importer.keywords.items())))
+    return '{}.{}'.format(getattr(importer, '__module__', None),
+                          getattr(importer, '__name__', None))
+
+
+def _normalize_native_image(image):
+    r"""
+    Produce the image the PIL importer would with ``normalize=True`` from the
+    image it produces with ``normalize=False``.
+    """
+    if isinstance(image, BooleanImage):
+        # Can't normalize a binary image
+        return image
+    pixels = normalize_pixels_range(image.pixels, error_on_unknown_type=False)
+    if isinstance(image, MaskedImage):
+        new_image = MaskedImage(pixels, mask=image.mask, copy=False)
+    elif image.n_channels == 4 and image.pixels.dtype == np.uint8:
+        # RGBA - the alpha channel becomes the mask
+        new_image = MaskedImage(pixels[:3],
+                                mask=image.pixels[3].astype(np.bool),
+                                copy=False)
+    else:
+        new_image = Image(pixels, copy=False)
+    return new_image
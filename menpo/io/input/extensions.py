@@ -1,7 +1,11 @@
-from .landmark import lm2_importer, ljson_importer
-from .image import pillow_importer, abs_importer, flo_importer
+from .landmark import (lm2_importer, ljson_importer, lm2_array_importer,
+                       ljson_array_importer)
+from .image import (pillow_importer, pillow_metadata_importer, abs_importer,
+                    flo_importer)
 from .video import ffmpeg_types, ffmpeg_importer
-from .landmark_image import asf_image_importer, pts_image_importer
+from .landmark_image import (asf_image_importer, pts_image_importer,
+                             asf_image_array_importer,
+                             pts_image_array_importer)
 from .pickle import pickle_importer, pickle_gzip_importer
 
 
@@ -31,6 +35,12 @@ image_types = {'.bmp': pillow_importer,
                '.abs': abs_importer,
                '.flo': flo_importer}
 
+# Formats whose metadata can be read from the header alone
+image_metadata_types = {ext: pillow_metadata_importer
+                        for ext, importer in image_types.items()
+                        if importer is pillow_importer}
+image_metadata_types['.gif'] = pillow_metadata_importer
+
 
 ffmpeg_video_types = ffmpeg_types()
 ffmpeg_video_types['.gif'] = ffmpeg_importer
@@ -41,5 +51,12 @@ image_landmark_types = {'.asf': asf_image_importer,
                         '.ptsx': pts_image_importer,
                         '.ljson': ljson_importer}
 
+# The importers of image_landmark_types that have a counterpart returning
+# raw (points, labels_to_masks) for bulk landmark import
+image_landmark_array_importers = {asf_image_importer: asf_image_array_importer,
+                                  lm2_importer: lm2_array_importer,
+                                  pts_image_importer: pts_image_array_importer,
+                                  ljson_importer: ljson_array_importer}
+
 pickle_types = {'.pkl': pickle_importer,
                 '.pkl.gz': pickle_gzip_importer}
@@ -1,3 +1,4 @@
+from collections import namedtuple
 from functools import partial
 
 import numpy as np
@@ -17,7 +18,60 @@ def _pil_to_numpy(pil_image, normalize, convert=None):
         return p
 
 
-def pillow_importer(filepath, asset=None, normalize=True, **kwargs):
+def _decode_target_shape(shape, max_shape=None, scale=None):
+    r"""
+    The shape an image of the given ``shape`` should be imported at, given the
+    ``max_shape`` and ``scale`` options of :map:`import_image`.
+
+    Parameters
+    ----------
+    shape : `tuple`
+        The ``(height, width)`` of the image stored on disk.
+    max_shape : `tuple` or ``None``, optional
+        If not ``None``, the ``(max_height, max_width)`` the imported image
+        should fit in. Images are only ever downscaled to fit.
+    scale : `float` or ``None``, optional
+        If not ``None``, the scale factor to apply to the image.
+
+    Returns
+    -------
+    target_shape : `tuple`
+        The ``(height, width)`` the image should be imported at.
+    """
+    shape = np.asarray(shape, dtype=np.float)
+    factor = 1.0 if scale is None else float(scale)
+    if factor <= 0:
+        raise ValueError('scale must be a positive float.')
+    if max_shape is not None:
+        factor = min([factor] + list(np.asarray(max_shape) / shape))
+    return tuple(int(max(1, np.round(s * factor))) for s in shape)
+
+
+def _decode_transform(shape, target_shape):
+    r"""
+    The transform from the coordinate frame of an image of ``shape`` to the
+    same image area-resampled to ``target_shape`` (pixel centres map as
+    ``x_new = (x + 0.5) * scale - 0.5``).
+    """
+    from menpo.transform import NonUniformScale, Translation
+    scale = np.asarray(target_shape, dtype=np.float) / np.asarray(shape)
+    return NonUniformScale(scale).compose_before(Translation(0.5 * scale - 0.5))
+
+
+def _pillow_decode_transform(filepath, image):
+    r"""
+    The transform from the coordinate frame of the image file on disk to that
+    of the ``image`` imported from it by :map:`pillow_importer`, or ``None``
+    if the image was not rescaled while being decoded.
+    """
+    shape = pillow_metadata_importer(filepath).shape
+    if tuple(image.shape) == shape:
+        return None
+    return _decode_transform(shape, image.shape)
+
+
+def pillow_importer(filepath, asset=None, normalize=True, max_shape=None,
+                    scale=None, **kwargs):
     r"""
     Imports an image using PIL/pillow.
 
@@ -44,6 +98,11 @@ def pillow_importer(filepath, asset=None, normalize=True, **kwargs):
         If ``True``, normalize between 0.0 and 1.0 and convert to float. If
         ``False`` just pass whatever PIL imports back (according
         to types rules outlined in constructor).
+    max_shape : `tuple` or ``None``, optional
+        If not ``None``, the image is downscaled (preserving the aspect
+        ratio) to fit within ``(max_height, max_width)``.
+    scale : `float` or ``None``, optional
+        If not ``None``, the image is rescaled by this factor.
     \**kwargs : `dict`, optional
         Any other keyword arguments.
 
@@ -51,11 +110,30 @@ def pillow_importer(filepath, asset=None, normalize=True, **kwargs):
     -------
     image : :map:`Image` or subclass
         The imported image.
+
+    Notes
+    -----
+    When downscaling JPEGs, the decoder itself is asked to scale the image in
+    the DCT domain (by 1/2, 1/4 or 1/8) via PIL's ``draft``, which is several
+    times faster than decoding at full resolution. An exact area resize to
+    the requested shape follows.
     """
     import PIL.Image as PILImage
     if isinstance(filepath, Path):
         filepath = str(filepath)
     pil_image = PILImage.open(filepath)
+    target_shape = None
+    if max_shape is not None or scale is not None:
+        # PIL reads the size from the header without decoding any pixels
+        shape = pil_image.size[::-1]
+        target_shape = _decode_target_shape(shape, max_shape=max_shape,
+                                            scale=scale)
+        if target_shape == shape:
+            target_shape = None
+        else:
+            # Decode at the smallest DCT scale still at least as large as the
+            # target (no-op for formats other than JPEG)
+            pil_image.draft(pil_image.mode, target_shape[::-1])
     mode = pil_image.mode
     if mode == 'RGBA':
         # If normalize is False, then we return the alpha as an extra
@@ -89,9 +167,76 @@ def pillow_importer(filepath, asset=None, normalize=True, **kwargs):
             _pil_to_numpy(pil_image, False))
     else:
         raise ValueError('Unexpected mode for PIL: {}'.format(mode))
+
+    if target_shape is not None:
+        image = image.resize(target_shape, method='area')
     return image
 
 
+ImageMetadata = namedtuple('ImageMetadata', ['path', 'shape', 'n_channels',
+                                             'mode', 'dtype',
+                                             'landmark_counts'])
+ImageMetadata.__doc__ = r"""
+The metadata of an image file, as read from its header.
+
+Parameters
+----------
+path : `Path`
+    Absolute filepath of the image.
+shape : `tuple`
+    The ``(height, width)`` of the image.
+n_channels : `int`
+    The number of channels (bands) stored in the file.
+mode : `str`
+    The PIL mode of the image, e.g. ``'RGB'``, ``'L'`` or ``'RGBA'``.
+dtype : `numpy.dtype`
+    The native datatype of the pixels stored in the file.
+landmark_counts : `dict` or ``None``
+    ``{group_name: n_landmarks}`` for the landmark files found by the
+    landmark resolver, or ``None`` if landmarks were not resolved.
+"""
+
+# The native datatype of the pixels of each PIL mode (defaults to uint8)
+_PIL_MODE_DTYPES = {'1': bool, 'I': np.int32, 'F': np.float32,
+                    'I;16': np.uint16, 'I;16L': np.uint16,
+                    'I;16B': np.uint16}
+
+
+def pillow_metadata_importer(filepath, asset=None, **kwargs):
+    r"""
+    Reads the metadata of an image using PIL/pillow. Only the header of the
+    file is parsed - the pixels are never decoded.
+
+    Parameters
+    ----------
+    filepath : `Path`
+        Absolute filepath of image
+    asset : `object`, optional
+        An optional asset that may help with loading. This is unused for this
+        implementation.
+    \**kwargs : `dict`, optional
+        Any other keyword arguments.
+
+    Returns
+    -------
+    metadata : :map:`ImageMetadata`
+        The metadata of the image.
+    """
+    import PIL.Image as PILImage
+    # PIL opens images lazily, only the header is read until load() is called
+    pil_image = PILImage.open(str(filepath))
+    try:
+        mode = pil_image.mode
+        width, height = pil_image.size
+    finally:
+        pil_image.close()
+    return ImageMetadata(path=Path(filepath), shape=(height, width),
+                         n_channels=PILImage.getmodebands(mode),
+                         mode=mode,
+                         dtype=np.dtype(_PIL_MODE_DTYPES.get(mode, np.uint8)),
+                         landmark_counts=None)
+
+
 def abs_importer(filepath, asset=None, **kwargs):
     r"""
     Allows importing the ABS file format from the FRGC dataset.
@@ -1,7 +1,6 @@
 from collections import OrderedDict
 import json
 import warnings
-import itertools
 
 import numpy as np
 
@@ -52,6 +51,17 @@ def asf_importer(filepath, asset=None, image_origin=True, **kwargs):
     ----------
     .. [1] http://www2.imm.dtu.dk/~aam/datasets/datasets.html
     """
+    points, labels_to_masks = asf_array_importer(
+        filepath, asset=asset, image_origin=image_origin)
+    # TODO: Use connectivity and create a graph type instead of PointCloud
+    return LandmarkGroup(PointCloud(points, copy=False), labels_to_masks)
+
+
+def asf_array_importer(filepath, asset=None, image_origin=True, **kwargs):
+    r"""
+    As :map:`asf_importer`, but returns the raw ``(n_points, 2)`` points and
+    the ``{label: mask}`` dictionary rather than a :map:`LandmarkGroup`.
+    """
     with open(str(filepath), 'r') as f:
         landmarks = f.read()
 
@@ -64,33 +74,20 @@ def asf_importer(filepath, asset=None, image_origin=True, **kwargs):
     # Pop the last element of the list for the image_name
     image_name = landmarks.pop()
 
-    xs = np.empty([count, 1])
-    ys = np.empty([count, 1])
-    connectivity = np.empty([count, 2], dtype=np.int)
-    for i in range(count):
-        # Though unpacked, they are still all strings
-        # Only unpack the first 7
-        (path_num, path_type, xpos, ypos,
-         point_num, connects_from, connects_to) = landmarks[i].split()[:7]
-        xs[i, ...] = float(xpos)
-        ys[i, ...] = float(ypos)
-        connectivity[i, ...] = [int(connects_from), int(connects_to)]
+    # Columns are: path_num, path_type, xpos, ypos, point_num, connects_from
+    # and connects_to (only the first 7 are used)
+    columns = _parse_point_rows('\n'.join(landmarks[:count]), 7)
 
     if image_origin:
-        points = np.hstack([ys, xs])
+        points = columns[:, [3, 2]]
     else:
-        points = np.hstack([xs, ys])
+        points = columns[:, [2, 3]]
     if asset is not None:
         # we've been given an asset. As ASF files are normalized,
         # fix that here
         points = Scale(np.array(asset.shape)).apply(points)
 
-    # TODO: Use connectivity and create a graph type instead of PointCloud
-    # edges = scaled_points[connectivity]
-
-    return LandmarkGroup(PointCloud(points, copy=False),
-                         OrderedDict([('all', np.ones(points.shape[0],
-                                                      dtype=np.bool))]))
+    return points, _all_label_masks(points.shape[0])
 
 
 def pts_importer(filepath, asset=None, image_origin=True, **kwargs):
@@ -139,28 +136,29 @@ def pts_importer(filepath, asset=None, image_origin=True, **kwargs):
     landmarks : :map:`LandmarkGroup`
         The landmarks including appropriate labels if available.
     """
-    f = open(str(filepath), 'r')
-    for line in f:
-        if line.split()[0] == '{':
-            break
-    xs = []
-    ys = []
-    for line in f:
-        if line.split()[0] != '}':
-            xpos, ypos = line.split()[0:2]
-            xs.append(xpos)
-            ys.append(ypos)
-    xs = np.array(xs, dtype=np.float).reshape((-1, 1))
-    ys = np.array(ys, dtype=np.float).reshape((-1, 1))
+    points, labels_to_masks = pts_array_importer(filepath,
+                                                 image_origin=image_origin)
+    return LandmarkGroup(PointCloud(points, copy=False), labels_to_masks)
+
+
+def pts_array_importer(filepath, asset=None, image_origin=True, **kwargs):
+    r"""
+    As :map:`pts_importer`, but returns the raw ``(n_points, 2)`` points and
+    the ``{label: mask}`` dictionary rather than a :map:`LandmarkGroup`.
+    """
+    with open(str(filepath), 'r') as f:
+        text = f.read()
+    # The points are the rows between the braces
+    start = text.find('{') + 1
+    end = text.rfind('}')
+    if end < start:
+        end = len(text)
+    points = _parse_point_rows(text[start:end], 2)
     # PTS landmarks are 1-based, need to convert to 0-based (subtract 1)
+    points -= 1
     if image_origin:
-        points = np.hstack([ys - 1, xs - 1])
-    else:
-        points = np.hstack([xs - 1, ys - 1])
-
-    return LandmarkGroup(PointCloud(points, copy=False),
-                         OrderedDict([('all', np.ones(points.shape[0],
-                                                      dtype=np.bool))]))
+        points = points[:, ::-1].copy()
+    return points, _all_label_masks(points.shape[0])
 
 
 def lm2_importer(filepath, asset=None, **kwargs):
@@ -214,6 +212,15 @@ def lm2_importer(filepath, asset=None, **kwargs):
     landmarks : :map:`LandmarkGroup`
         The landmarks including appropriate labels if available.
     """
+    points, labels_to_masks = lm2_array_importer(filepath)
+    return LandmarkGroup(PointCloud(points, copy=False), labels_to_masks)
+
+
+def lm2_array_importer(filepath, asset=None, **kwargs):
+    r"""
+    As :map:`lm2_importer`, but returns the raw ``(n_points, 2)`` points and
+    the ``{label: mask}`` dictionary rather than a :map:`LandmarkGroup`.
+    """
     with open(str(filepath), 'r') as f:
         landmarks = f.read()
 
@@ -245,36 +252,72 @@ def lm2_importer(filepath, asset=None, **kwargs):
                          "Expected a list of coordinates beginning with "
                          "'2D Image coordinates:' "
                          "but found '{0}'".format(coords_str))
-    xs = []
-    ys = []
-    for i in range(num_points):
-        p = landmark_text.pop(0).split()
-        xs.append(float(p[0]))
-        ys.append(float(p[1]))
-
-    xs = np.array(xs, dtype=np.float).reshape((-1, 1))
-    ys = np.array(ys, dtype=np.float).reshape((-1, 1))
-
     # Flip the x and y
-    pointcloud = PointCloud(np.hstack([ys, xs]), copy=False)
+    points = _parse_point_rows('\n'.join(landmark_text[:num_points]), 2)
+    points = points[:, ::-1].copy()
     # Create the mask whereby there is one landmark per label
     # (identity matrix)
-    masks = np.eye(num_points).astype(np.bool)
-    masks = np.vsplit(masks, num_points)
-    masks = [np.squeeze(m) for m in masks]
-    labels_to_masks = OrderedDict(zip(labels, masks))
+    masks = list(np.eye(num_points, dtype=np.bool))
+    return points, OrderedDict(zip(labels, masks))
+
+
+def _all_label_masks(n_points):
+    # The labels of formats with a single 'all' label
+    return OrderedDict([('all', np.ones(n_points, dtype=np.bool))])
+
 
-    return LandmarkGroup(pointcloud, labels_to_masks)
+def _parse_point_rows(text, n_columns):
+    r"""
+    Parse whitespace separated rows of numbers into an ``(n_rows, n_columns)``
+    `float` array. Rows may have more than ``n_columns`` values, in which case
+    the extra values are ignored. A ``ValueError`` is raised for rows with
+    fewer than ``n_columns`` values.
+    """
+    with warnings.catch_warnings():
+        # numpy warns (rather than raising) when it fails to parse
+        warnings.simplefilter('ignore')
+        values = np.fromstring(text, dtype=np.float, sep=' ')
+    tokens_per_row = _count_row_tokens(text)
+    if (values.size == tokens_per_row.sum() and
+            np.all(tokens_per_row == n_columns)):
+        return values.reshape([tokens_per_row.size, n_columns])
+    # The fast path fails for extra columns or tokens numpy can't parse
+    rows = [r for r in (l.split() for l in text.splitlines()) if r]
+    if any(len(r) < n_columns for r in rows):
+        raise ValueError('Expected rows of (at least) {} values'.format(
+            n_columns))
+    return np.array([r[:n_columns] for r in rows],
+                    dtype=np.float).reshape([-1, n_columns])
+
+
+def _count_row_tokens(text):
+    # The number of whitespace separated tokens of every non-blank line,
+    # counted without splitting the lines in Python. Every byte up to the
+    # space is taken as a separator (any control byte besides whitespace
+    # fails to parse anyway)
+    chars = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+    if chars.size == 0:
+        return np.zeros(0, dtype=np.intp)
+    is_space = chars <= ord(' ')
+    # A token starts at every non separator byte that follows a separator
+    starts = np.flatnonzero(is_space[:-1] & ~is_space[1:]) + 1
+    if not is_space[0]:
+        starts = np.concatenate([[0], starts])
+    newlines = np.flatnonzero(chars == ord('\n'))
+    tokens_before = np.searchsorted(starts, newlines)
+    counts = np.diff(np.concatenate([[0], tokens_before, [starts.size]]))
+    return counts[counts > 0]
 
 
 def _ljson_parse_null_values(points_list):
-    filtered_points = [np.nan if x is None else x
-                       for x in itertools.chain(*points_list)]
-    return np.array(filtered_points,
-                    dtype=np.float).reshape([-1, len(points_list[0])])
+    # numpy maps None (JSON null) to nan when building a float array
+    points = np.array(points_list, dtype=np.float)
+    if points.ndim != 2:
+        points = points.reshape([-1, len(points_list[0])])
+    return points
 
 
-def _parse_ljson_v1(lms_dict):
+def _ljson_v1_arrays(lms_dict):
     from menpo.base import MenpoDeprecationWarning
     warnings.warn('LJSON v1 is deprecated. export_landmark_file{s}() will '
                   'only save out LJSON v2 files. Please convert all LJSON '
@@ -299,39 +342,46 @@ def _parse_ljson_v1(lms_dict):
             all_points.append(p['point'])
         offset += len(lms)
 
-    # Don't create a PointUndirectedGraph with no connectivity
     points = _ljson_parse_null_values(all_points)
-    if len(connectivity) == 0:
-        pcloud = PointCloud(points)
-    else:
-        pcloud = PointUndirectedGraph.init_from_edges(points, connectivity)
     labels_to_masks = OrderedDict()
     # go through each label and build the appropriate boolean array
     for label, l_slice in zip(labels, labels_slices):
-        mask = np.zeros(pcloud.n_points, dtype=np.bool)
+        mask = np.zeros(points.shape[0], dtype=np.bool)
         mask[l_slice] = True
         labels_to_masks[label] = mask
-    return pcloud, labels_to_masks
+    return points, connectivity, labels_to_masks
 
 
-def _parse_ljson_v2(lms_dict):
+def _ljson_v2_arrays(lms_dict):
     labels_to_mask = OrderedDict()  # masks into the full pointcloud per label
 
     points = _ljson_parse_null_values(lms_dict['landmarks']['points'])
     connectivity = lms_dict['landmarks'].get('connectivity')
 
+    for label in lms_dict['labels']:
+        mask = np.zeros(points.shape[0], dtype=np.bool)
+        mask[label['mask']] = True
+        labels_to_mask[label['label']] = mask
+
+    return points, connectivity, labels_to_mask
+
+
+def _ljson_pointcloud(points, connectivity):
     # Don't create a PointUndirectedGraph with no connectivity
     if connectivity is None or len(connectivity) == 0:
-        pcloud = PointCloud(points)
+        return PointCloud(points)
     else:
-        pcloud = PointUndirectedGraph.init_from_edges(points, connectivity)
+        return PointUndirectedGraph.init_from_edges(points, connectivity)
+
+
+def _parse_ljson_v1(lms_dict):
+    points, connectivity, labels_to_masks = _ljson_v1_arrays(lms_dict)
+    return _ljson_pointcloud(points, connectivity), labels_to_masks
 
-    for label in lms_dict['labels']:
-        mask = np.zeros(pcloud.n_points, dtype=np.bool)
-        mask[label['mask']] = True
-        labels_to_mask[label['label']] = mask
 
-    return pcloud, labels_to_mask
+def _parse_ljson_v2(lms_dict):
+    points, connectivity, labels_to_masks = _ljson_v2_arrays(lms_dict)
+    return _ljson_pointcloud(points, connectivity), labels_to_masks
 
 
 _ljson_parser_for_version = {
@@ -339,6 +389,24 @@ _ljson_parser_for_version = {
     2: _parse_ljson_v2
 }
 
+_ljson_arrays_for_version = {
+    1: _ljson_v1_arrays,
+    2: _ljson_v2_arrays
+}
+
+
+def _load_ljson(filepath, parsers):
+    with open(str(filepath), 'r') as f:
+        # lms_dict is now a dict rep of the JSON
+        lms_dict = json.load(f, object_pairs_hook=OrderedDict)
+    v = lms_dict.get('version')
+    parser = parsers.get(v)
+
+    if parser is None:
+        raise ValueError("{} has unknown version {} must be "
+                         "1, or 2".format(filepath, v))
+    return parser(lms_dict)
+
 
 def ljson_importer(filepath, asset=None, **kwargs):
     r"""
@@ -365,13 +433,15 @@ def ljson_importer(filepath, asset=None, **kwargs):
     landmarks : :map:`LandmarkGroup`
         The landmarks including appropriate labels if available.
     """
-    with open(str(filepath), 'r') as f:
-        # lms_dict is now a dict rep of the JSON
-        lms_dict = json.load(f, object_pairs_hook=OrderedDict)
-    v = lms_dict.get('version')
-    parser = _ljson_parser_for_version.get(v)
+    return LandmarkGroup(*_load_ljson(filepath, _ljson_parser_for_version))
 
-    if parser is None:
-        raise ValueError("{} has unknown version {} must be "
-                         "1, or 2".format(self.filepath, v))
-    return LandmarkGroup(*parser(lms_dict))
+
+def ljson_array_importer(filepath, asset=None, **kwargs):
+    r"""
+    As :map:`ljson_importer`, but returns the raw ``(n_points, n_dims)``
+    points and the ``{label: mask}`` dictionary rather than a
+    :map:`LandmarkGroup`. Any connectivity is ignored.
+    """
+    points, _, labels_to_masks = _load_ljson(filepath,
+                                             _ljson_arrays_for_version)
+    return points, labels_to_masks
@@ -1,6 +1,7 @@
 from functools import partial
 
-from .landmark import asf_importer, pts_importer
+from .landmark import (asf_importer, pts_importer, asf_array_importer,
+                       pts_array_importer)
 
 
 asf_image_importer = partial(asf_importer, image_origin=True)
@@ -8,3 +9,9 @@ asf_image_importer.__doc__ = asf_importer.__doc__
 
 pts_image_importer = partial(pts_importer, image_origin=True)
 pts_image_importer.__doc__ = pts_importer.__doc__
+
+asf_image_array_importer = partial(asf_array_importer, image_origin=True)
+asf_image_array_importer.__doc__ = asf_array_importer.__doc__
+
+pts_image_array_importer = partial(pts_array_importer, image_origin=True)
+pts_image_array_importer.__doc__ = pts_array_importer.__doc__
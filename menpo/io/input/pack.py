@@ -0,0 +1,163 @@
+from collections import OrderedDict
+from functools import partial
+from io import BytesIO
+import json
+
+import numpy as np
+from pathlib import Path
+
+from menpo.base import LazyList
+from menpo.image import Image, MaskedImage, BooleanImage
+from menpo.image.base import normalize_pixels_range
+from menpo.landmark import LandmarkGroup
+
+from ..utils import _norm_path
+from .image import pillow_importer
+from .landmark import _parse_ljson_v2
+
+# A dataset pack is a directory holding a few large shard files and a single
+# index. Each item of the pack occupies a contiguous region of a shard:
+#
+#   [pixels][mask][landmarks]
+#
+# where the pixels are either the raw C-ordered pixels (so that they can be
+# memory-mapped) or an encoded image file, the (optional) mask is the raw
+# boolean mask and the (optional) landmarks are a JSON object mapping group
+# names to LJSON v2 dictionaries.
+PACK_VERSION = 1
+PACK_INDEX_FILENAME = 'index.npz'
+PACK_ALIGNMENT = 64
+
+_PACK_ITEM_DTYPE = np.dtype([('shard', np.int32),
+                             ('offset', np.int64),
+                             ('pixels_nbytes', np.int64),
+                             ('mask_nbytes', np.int64),
+                             ('landmarks_nbytes', np.int64),
+                             # (n_channels, height, width)
+                             ('shape', np.int64, (3,)),
+                             ('dtype', 'S8'),
+                             ('kind', np.uint8),
+                             ('encoded', np.bool)])
+
+# The type of image stored in each item
+_PACK_KINDS = [Image, MaskedImage, BooleanImage]
+
+
+def _pack_shard_filename(i):
+    return 'shard_{:05d}.bin'.format(i)
+
+
+class _DatasetPack(object):
+    r"""
+    Random access to the items of a dataset pack. Shards are memory-mapped on
+    first access, after which reading an item performs no filesystem calls.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with np.load(str(path / PACK_INDEX_FILENAME)) as index:
+            version = int(index['version'])
+            if version != PACK_VERSION:
+                raise ValueError('{} has unknown dataset pack version '
+                                 '{}'.format(path, version))
+            self.items = index['items']
+            self.paths = index['paths']
+            self.n_shards = int(index['n_shards'])
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def _shard(self, i):
+        shard = self._shards.get(i)
+        if shard is None:
+            # Copy on write - modifying an image never touches the pack
+            shard = np.memmap(str(self.path / _pack_shard_filename(i)),
+                              dtype=np.uint8, mode='c')
+            self._shards[i] = shard
+        return shard
+
+    def read(self, i, normalize=True):
+        item = self.items[i]
+        buf = self._shard(int(item['shard']))
+        pixels_start = int(item['offset'])
+        mask_start = pixels_start + int(item['pixels_nbytes'])
+        landmarks_start = mask_start + int(item['mask_nbytes'])
+        landmarks_end = landmarks_start + int(item['landmarks_nbytes'])
+
+        pixels_buf = buf[pixels_start:mask_start]
+        if item['encoded']:
+            pixels = pillow_importer(BytesIO(pixels_buf.tobytes()),
+                                     normalize=False).pixels
+        else:
+            dtype = np.dtype(item['dtype'].decode('ascii'))
+            pixels = pixels_buf.view(dtype).reshape(item['shape'])
+
+        kind = _PACK_KINDS[item['kind']]
+        if kind is BooleanImage:
+            image = BooleanImage(pixels[0], copy=False)
+        else:
+            if normalize:
+                pixels = normalize_pixels_range(pixels,
+                                                error_on_unknown_type=False)
+            if kind is MaskedImage:
+                mask = buf[mask_start:landmarks_start].view(np.bool)
+                image = MaskedImage(pixels, copy=False,
+                                    mask=mask.reshape(item['shape'][1:]))
+            else:
+                image = Image(pixels, copy=False)
+
+        if landmarks_end > landmarks_start:
+            lms_json = buf[landmarks_start:landmarks_end].tobytes()
+            groups = json.loads(lms_json.decode('utf-8'),
+                                object_pairs_hook=OrderedDict)
+            for group_name, lms_dict in groups.items():
+                image.landmarks[group_name] = LandmarkGroup(
+                    *_parse_ljson_v2(lms_dict))
+
+        path = self.paths[i]
+        if path:
+            image.path = Path(path)
+        return image
+
+
+def import_dataset_pack(path, normalize=True):
+    r"""
+    Import a dataset pack that was written by :map:`export_dataset_pack`.
+
+    The index of the pack is read immediately and the shards are
+    memory-mapped, so indexing into the returned :map:`LazyList` is O(1) and
+    performs no per-item filesystem calls. Items that were stored raw are
+    views into the memory-mapped shards (copy on write).
+
+    Parameters
+    ----------
+    path : `pathlib.Path` or `str`
+        The directory of the dataset pack.
+    normalize : `bool`, optional
+        If ``True``, `uint8` and `uint16` images are normalized between 0 and
+        1 and converted to floating point (which requires a copy of the
+        pixels). If ``False``, the pixels are returned in the datatype they
+        were stored in.
+
+    Returns
+    -------
+    lazy_list : :map:`LazyList` of :map:`Image`
+        A :map:`LazyList` of the images in the pack, with their landmarks
+        attached.
+
+    Raises
+    ------
+    ValueError
+        If ``path`` is not a dataset pack.
+    """
+    path = _norm_path(path)
+    if not (path / PACK_INDEX_FILENAME).is_file():
+        raise ValueError('{} is not a dataset pack'.format(path))
+    pack = _DatasetPack(path)
+    return LazyList.init_from_index_callable(
+        partial(_read_pack_item, pack, normalize), len(pack))
+
+
+def _read_pack_item(pack, normalize, i):
+    return pack.read(i, normalize=normalize)
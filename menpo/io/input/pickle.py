@@ -1,3 +1,4 @@
+import os
 import sys
 try:
     import cPickle as pickle
@@ -5,16 +6,85 @@ except ImportError:
     import pickle
 import gzip
 
+import numpy as np
 
-def _unpickle_with_encoding(f, encoding=None):
+# Large arrays can be exported out-of-band - their raw bytes are written to a
+# sidecar file next to the pickle (the pickle only storing a reference to
+# them) so that they can be memory-mapped on import
+BUFFERS_SUFFIX = '.buffers'
+BUFFERS_ALIGNMENT = 64
+_BUFFER_PID = 'menpo.ndarray'
+
+
+def _buffers_path(filepath):
+    return str(filepath) + BUFFERS_SUFFIX
+
+
+class _BufferLoader(object):
+    r"""
+    Resolves the out-of-band arrays referenced by a pickle. The sidecar is
+    only opened when the first array is encountered.
+    """
+
+    def __init__(self, filepath, mmap_mode='r'):
+        self.path = _buffers_path(filepath)
+        self.mmap_mode = mmap_mode
+        self._buffers = None
+        # Arrays shared in the exported object are shared once loaded
+        self._arrays = {}
+
+    @property
+    def buffers(self):
+        if self._buffers is None:
+            if self.mmap_mode is None:
+                self._buffers = np.fromfile(self.path, dtype=np.uint8)
+            else:
+                self._buffers = np.memmap(self.path, dtype=np.uint8,
+                                          mode=self.mmap_mode)
+        return self._buffers
+
+    def __call__(self, pid):
+        tag, offset, dtype, shape, order = pid
+        if tag != _BUFFER_PID:
+            raise pickle.UnpicklingError('Unsupported persistent '
+                                         'id {}'.format(tag))
+        x = self._arrays.get(offset)
+        if x is None:
+            x = self._load(offset, dtype, shape, order)
+            self._arrays[offset] = x
+        return x
+
+    def _load(self, offset, dtype, shape, order):
+        count = int(np.prod(shape))
+        end = offset + count * dtype.itemsize
+        if end > self.buffers.size:
+            raise ValueError('{} is too small for the arrays referenced by '
+                             'the pickle'.format(self.path))
+        x = self.buffers[offset:end].view(dtype).view(np.ndarray)
+        if order == 'F':
+            return x.reshape(shape[::-1]).T
+        return x.reshape(shape)
+
+
+def _buffer_loader(filepath, mmap_mode='r'):
+    # Only pickles exported out-of-band have a sidecar of buffers
+    if os.path.isfile(_buffers_path(filepath)):
+        return _BufferLoader(filepath, mmap_mode=mmap_mode)
+
+
+def _unpickle_with_encoding(f, encoding=None, persistent_load=None):
     # Support the encoding kwarg on Python 3.x only.
+    kwargs = {}
     if encoding is not None and sys.version_info.major > 2:
-        return pickle.load(f, encoding=encoding)
-    else:
-        return pickle.load(f)
+        kwargs['encoding'] = encoding
+    if persistent_load is None:
+        return pickle.load(f, **kwargs)
+    unpickler = pickle.Unpickler(f, **kwargs)
+    unpickler.persistent_load = persistent_load
+    return unpickler.load()
 
 
-def pickle_importer(filepath, asset=None, **kwargs):
+def pickle_importer(filepath, asset=None, mmap_mode='r', **kwargs):
     r"""Import a pickle file.
 
     Parameters
@@ -24,6 +94,13 @@ def pickle_importer(filepath, asset=None, **kwargs):
     asset : `object`, optional
         An optional asset that may help with loading. This is unused for this
         implementation.
+    mmap_mode : ``{'r', 'c', 'r+'}`` or ``None``, optional
+        How the arrays that were exported out-of-band (see
+        :map:`export_pickle`) are loaded. By default, they are memory-mapped
+        read-only, so that loading is near instant and the pages are shared
+        between processes. ``'c'`` memory-maps them copy-on-write and
+        ``None`` reads them into memory. Ignored for pickles without
+        out-of-band arrays.
     \**kwargs : `dict`, optional
         Any other keyword arguments.
 
@@ -33,11 +110,13 @@ def pickle_importer(filepath, asset=None, **kwargs):
         The pickled objects.
     """
     with open(str(filepath), 'rb') as f:
-        x = _unpickle_with_encoding(f, encoding=kwargs.get('encoding'))
+        x = _unpickle_with_encoding(
+            f, encoding=kwargs.get('encoding'),
+            persistent_load=_buffer_loader(filepath, mmap_mode=mmap_mode))
     return x
 
 
-def pickle_gzip_importer(filepath, asset=None, **kwargs):
+def pickle_gzip_importer(filepath, asset=None, mmap_mode='r', **kwargs):
     r"""Import a pickle file that has been compressed with GZip compression.
 
     Parameters
@@ -47,6 +126,13 @@ def pickle_gzip_importer(filepath, asset=None, **kwargs):
     asset : `object`, optional
         An optional asset that may help with loading. This is unused for this
         implementation.
+    mmap_mode : ``{'r', 'c', 'r+'}`` or ``None``, optional
+        How the arrays that were exported out-of-band (see
+        :map:`export_pickle`) are loaded. By default, they are memory-mapped
+        read-only, so that loading is near instant and the pages are shared
+        between processes. ``'c'`` memory-maps them copy-on-write and
+        ``None`` reads them into memory. Ignored for pickles without
+        out-of-band arrays.
     \**kwargs : `dict`, optional
         Any other keyword arguments.
 
@@ -56,5 +142,7 @@ def pickle_gzip_importer(filepath, asset=None, **kwargs):
         The pickled objects.
     """
     with gzip.open(str(filepath), 'rb') as f:
-        x = _unpickle_with_encoding(f, encoding=kwargs.get('encoding'))
+        x = _unpickle_with_encoding(
+            f, encoding=kwargs.get('encoding'),
+            persistent_load=_buffer_loader(filepath, mmap_mode=mmap_mode))
     return x
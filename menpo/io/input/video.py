@@ -1,5 +1,9 @@
+from collections import OrderedDict
+import copy
 import warnings
 import os
+import tempfile
+import threading
 import numpy as np
 import subprocess as sp
 import re
@@ -9,14 +13,33 @@ from menpo.image.base import normalize_pixels_range, channels_to_front
 from menpo.image import Image
 from menpo.base import LazyList
 
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
 from ..utils import DEVNULL, _call_subprocess
+from .image import _decode_transform
 
 
 _FFMPEG_CMD = lambda: str(Path(os.environ.get('MENPO_FFMPEG_CMD', 'ffmpeg')))
 _FFPROBE_CMD = lambda: str(Path(os.environ.get('MENPO_FFPROBE_CMD', 'ffprobe')))
 
+# Suffix of the keyframe index persisted next to a video
+FRAME_INDEX_SUFFIX = '.frame_index.npz'
+
+# The supported output pixel formats: {pix_fmt: (n_channels, dtype)}
+_PIX_FMTS = {'rgb24': (3, np.uint8),
+             'gray': (1, np.uint8),
+             'rgb48le': (3, np.dtype('<u2')),
+             'gray16le': (1, np.dtype('<u2'))}
 
-def ffmpeg_importer(filepath, normalize=True, exact_frame_count=True, **kwargs):
+
+def ffmpeg_importer(filepath, normalize=True, exact_frame_count=True,
+                    output_shape=None, crop=None, pix_fmt='rgb24',
+                    frame_stride=1, start_time=None, end_time=None,
+                    n_decoders=1, **kwargs):
     r"""
     Imports videos by streaming frames from a pipe using FFMPEG. Returns a
     :map:`LazyList` that gives lazy access to the video on a per-frame basis.
@@ -41,6 +64,23 @@ def ffmpeg_importer(filepath, normalize=True, exact_frame_count=True, **kwargs):
     exact_frame_count: `bool`, optional
         If ``True``, the import fails if ffprobe is not available
         (reading from ffmpeg's output returns inexact frame count)
+    output_shape : `(int, int)` or ``None``, optional
+        The ``(height, width)`` the frames are resized to by ffmpeg.
+    crop : `((int, int), (int, int))` or ``None``, optional
+        The ``(min_indices, max_indices)`` of the region of the frames to
+        keep, applied by ffmpeg before any resizing.
+    pix_fmt : {``'rgb24'``, ``'gray'``, ``'rgb48le'``, ``'gray16le'``}
+        The pixel format ffmpeg outputs frames in.
+    frame_stride : `int`, optional
+        Only every ``frame_stride``-th frame is imported.
+    start_time : `float` or ``None``, optional
+        The time (in seconds) of the first frame to import.
+    end_time : `float` or ``None``, optional
+        The time (in seconds) to import frames up to (exclusive).
+    n_decoders : `int` or ``None``, optional
+        If not ``1``, the frames are read by a :map:`ParallelVideoReader`
+        with this many ffmpeg processes (``None`` for one per CPU), which
+        speeds up reading the video in order.
     \**kwargs : `dict`, optional
         Any other keyword arguments.
 
@@ -48,15 +88,47 @@ def ffmpeg_importer(filepath, normalize=True, exact_frame_count=True, **kwargs):
     -------
     image : :map:`LazyList`
         A :map:`LazyList` containing :map:`Image` or subclasses per frame
-        of the video.
+        of the video. The ``frame_numbers`` attribute of the list gives the
+        number of each frame in the original video and ``frame_transform``
+        the transform from the coordinate frame of the original video to
+        that of the frames (``None`` if they are the same).
     """
-    reader = FFMpegVideoReader(filepath, normalize=normalize, exact_frame_count=exact_frame_count)
-    ll = LazyList.init_from_index_callable(lambda x: Image.init_from_channels_at_back(reader[x]), len(reader))
-    ll.fps = reader.fps
+    # Frames are read as views into the reader's buffers and normalized
+    # while being copied into the image, so each frame is copied only once
+    reader_kwargs = dict(normalize=False, exact_frame_count=exact_frame_count,
+                         output_shape=output_shape, crop=crop, pix_fmt=pix_fmt,
+                         frame_stride=frame_stride, start_time=start_time,
+                         end_time=end_time)
+    if n_decoders == 1:
+        reader = FFMpegVideoReader(filepath, copy=False, **reader_kwargs)
+    else:
+        reader = ParallelVideoReader(filepath, n_decoders=n_decoders,
+                                     **reader_kwargs)
+    ll = LazyList.init_from_index_callable(
+        lambda x: _frame_to_image(reader[x], normalize), len(reader))
+    ll.fps = reader.fps if frame_stride == 1 else reader.fps / frame_stride
+    ll.frame_numbers = reader.frame_numbers
+    ll.frame_transform = reader.frame_transform
 
     return ll
 
 
+def _frame_to_image(frame, normalize):
+    r"""
+    Build an :map:`Image` from a ``(height, width, n_channels)`` frame, moving
+    the channels to the front and (optionally) normalizing in a single pass.
+    """
+    channels = np.rollaxis(frame, -1)
+    if normalize:
+        pixels = np.empty(channels.shape, dtype=np.float64)
+        # Matches normalize_pixels_range
+        np.multiply(channels, 1.0 / np.iinfo(frame.dtype).max, out=pixels)
+    else:
+        pixels = np.empty(channels.shape, dtype=frame.dtype)
+        pixels[...] = channels
+    return Image(pixels, copy=False)
+
+
 def ffmpeg_types():
     r"""The supported FFMPEG types.
 
@@ -74,6 +146,14 @@ class FFMpegVideoReader(object):
     """
     Read a video using ffmpeg and handle state to allow seeking.
 
+    Frames are decoded sequentially from a single ffmpeg pipe. Random access
+    is supported by seeking the pipe to the keyframe preceding the requested
+    frame, using a keyframe index of the video that is built with ffprobe the
+    first time a seek is needed (and persisted next to the video, see
+    :map:`video_frame_index_ffprobe`). Every frame decoded while seeking is
+    kept in a small LRU cache, so that random access within a group of
+    pictures does not need to decode it again.
+
     Parameters
     ----------
     filepath : `Path`
@@ -84,11 +164,66 @@ class FFMpegVideoReader(object):
     exact_frame_count : `bool`, optional
         If True, the import fails if ffmprobe is not available
         (reading from ffmpeg's output returns inexact frame count)
+    frame_cache_size : `int`, optional
+        The maximum number of decoded frames to keep in the LRU cache. Set
+        to ``0`` to disable the cache.
+    persist_frame_index : `bool`, optional
+        If ``True``, the keyframe index is saved next to the video (if the
+        directory is writable) so that it only has to be built once.
+    copy : `bool`, optional
+        If ``True``, every frame is read into a newly allocated array. If
+        ``False`` (and ``normalize`` is ``False``), frames are read directly
+        into a ring of ``n_buffers`` preallocated buffers and views of those
+        buffers are returned, avoiding any per-frame allocation. Such a view
+        is **only valid until** ``n_buffers`` further frames have been read
+        from the reader, after which its contents are overwritten - copy the
+        frame if it has to be kept.
+    n_buffers : `int`, optional
+        The number of buffers in the ring used when ``copy`` is ``False``.
+    output_shape : `(int, int)` or ``None``, optional
+        The ``(height, width)`` ffmpeg resizes the frames to.
+    crop : `((int, int), (int, int))` or ``None``, optional
+        The ``(min_indices, max_indices)`` of the region of the frames ffmpeg
+        keeps, applied before any resizing.
+    pix_fmt : {``'rgb24'``, ``'gray'``, ``'rgb48le'``, ``'gray16le'``}
+        The pixel format ffmpeg outputs frames in. The 16-bit formats give
+        `uint16` frames.
+    frame_stride : `int`, optional
+        Only every ``frame_stride``-th frame is output by ffmpeg. Indexing
+        the reader indexes the output frames.
+    start_time : `float` or ``None``, optional
+        The time (in seconds) of the first frame to read.
+    end_time : `float` or ``None``, optional
+        The time (in seconds) to read frames up to (exclusive).
+
+    Notes
+    -----
+    When ``normalize`` is ``False``, the returned frames may be shared with
+    the frame cache and are therefore read-only.
     """
-    def __init__(self, filepath, normalize=False, exact_frame_count=True):
+    def __init__(self, filepath, normalize=False, exact_frame_count=True,
+                 frame_cache_size=32, persist_frame_index=True, copy=True,
+                 n_buffers=2, output_shape=None, crop=None, pix_fmt='rgb24',
+                 frame_stride=1, start_time=None, end_time=None):
+        if n_buffers <= 0:
+            raise ValueError('n_buffers should be positive '
+                             '({} provided)'.format(n_buffers))
+        if frame_stride <= 0:
+            raise ValueError('frame_stride should be positive '
+                             '({} provided)'.format(frame_stride))
+        if pix_fmt not in _PIX_FMTS:
+            raise ValueError('Unsupported pix_fmt {} - must be one of '
+                             '{}'.format(pix_fmt, sorted(_PIX_FMTS)))
         self.filepath = filepath
         self.normalize = normalize
         self.exact_frame_count = exact_frame_count
+        self.frame_cache_size = frame_cache_size
+        self.persist_frame_index = persist_frame_index
+        self.copy = copy
+        self.n_buffers = n_buffers
+        self.pix_fmt = pix_fmt
+        self.n_channels, self.dtype = _PIX_FMTS[pix_fmt]
+        self.frame_stride = frame_stride
         self._pipe = None
         if self.exact_frame_count:
             try:
@@ -102,13 +237,69 @@ class FFMpegVideoReader(object):
         else:
             infos = video_infos_ffmpeg(self.filepath)
         self.duration = infos['duration']
-        self.width = infos['width']
-        self.height = infos['height']
-        self.n_frames = infos['n_frames']
         self.fps = infos['fps']
+        self._filters = [] if frame_stride == 1 else [
+            # Escape the comma that would otherwise separate filters
+            'select=not(mod(n\\,{}))'.format(frame_stride)]
+        self._init_geometry((infos['height'], infos['width']), crop,
+                            output_shape)
+        self._n_source_frames = infos['n_frames']
+        self._init_frame_numbers(infos['n_frames'], start_time, end_time)
         # contains the index of the last read frame
         # the index is updated in _open_pipe, _read_one_frame and _trash_frames
         self.index = -1
+        # {index: raw frame} of recently decoded frames, oldest first
+        self._frame_cache = OrderedDict()
+        # Built on the first seek - False if it could not be built
+        self._frame_index = None
+        # The ring of buffers frames are read into when not copying
+        self._buffers = []
+        self._next_buffer = 0
+
+    def _init_geometry(self, source_shape, crop, output_shape):
+        # The shape of the output frames and the transform to them from the
+        # coordinate frame of the video
+        from menpo.transform import Translation
+        self.frame_transform = None
+        shape = np.array(source_shape)
+        if crop is not None:
+            min_indices = np.round(crop[0]).astype(np.int)
+            max_indices = np.round(crop[1]).astype(np.int)
+            if (np.any(min_indices < 0) or np.any(max_indices > shape) or
+                    np.any(min_indices >= max_indices)):
+                raise ValueError('Invalid crop {} for frames of shape '
+                                 '{}'.format(crop, tuple(source_shape)))
+            shape = max_indices - min_indices
+            self._filters.append('crop={}:{}:{}:{}'.format(
+                shape[1], shape[0], min_indices[1], min_indices[0]))
+            self.frame_transform = Translation(-min_indices)
+        if output_shape is not None:
+            output_shape = np.array(output_shape, dtype=np.int)
+            # Area resampling, as for images (see pillow_importer)
+            self._filters.append('scale={}:{}:flags=area'.format(
+                output_shape[1], output_shape[0]))
+            transform = _decode_transform(shape, output_shape)
+            if self.frame_transform is not None:
+                transform = self.frame_transform.compose_before(transform)
+            self.frame_transform = transform
+            shape = output_shape
+        self.height, self.width = int(shape[0]), int(shape[1])
+
+    def _init_frame_numbers(self, n_frames, start_time, end_time):
+        # The number in the video of each output frame
+        start, end = 0, n_frames
+        if start_time is not None or end_time is not None:
+            if not self.fps:
+                raise ValueError('The frame rate of {} is unknown, unable to '
+                                 'import from start_time or to '
+                                 'end_time'.format(self.filepath))
+            # The first frame at or after each time (within rounding)
+            if start_time is not None:
+                start = int(np.ceil(start_time * self.fps - 1e-6))
+            if end_time is not None:
+                end = min(end, int(np.ceil(end_time * self.fps - 1e-6)))
+        self.frame_numbers = np.arange(max(start, 0), end, self.frame_stride)
+        self.n_frames = len(self.frame_numbers)
 
     def _shutdown_pipe(self):
         if self._pipe is not None:
@@ -129,6 +320,27 @@ class FFMpegVideoReader(object):
     def __len__(self):
         return self.n_frames
 
+    @property
+    def frame_index(self):
+        r"""
+        The keyframe index of the video, or ``None`` if it is unavailable
+        (e.g. ffprobe is not installed). See :map:`video_frame_index_ffprobe`.
+
+        :type: `dict` or ``None``
+        """
+        if self._frame_index is None:
+            self._frame_index = False
+            try:
+                index = video_frame_index_ffprobe(
+                    self.filepath, persist=self.persist_frame_index)
+            except Exception:
+                index = None
+            # An index that disagrees with the frame count can't be trusted
+            if (index is not None and
+                    len(index['timestamps']) == self._n_source_frames):
+                self._frame_index = index
+        return self._frame_index or None
+
     def _open_pipe(self, frame=None):
         r"""
         Open a pipe at the time just before the specified frame
@@ -136,29 +348,27 @@ class FFMpegVideoReader(object):
         Parameters
         ----------
         frame : `int`, optional
-            If ``None``, pipe opened from the beginning of the video
+            If ``None``, pipe opened from the first frame to read
             otherwise, pipe opened at the time corresponding to that frame
 
         Note
         ----
         Since v.2.1 of ffmpeg, this is frame-accurate
         """
-        if frame is not None and frame > 0:
-            time = str(frame / float(self.fps))
-            command = [_FFMPEG_CMD(),
-                       '-ss', time,
-                       '-i', str(self.filepath),
-                       '-f', 'image2pipe',
-                       '-pix_fmt', 'rgb24',
-                       '-vcodec', 'rawvideo', '-']
-        else:
-            command = [_FFMPEG_CMD(),
-                       '-i', str(self.filepath),
-                       '-f', 'image2pipe',
-                       '-pix_fmt', 'rgb24',
-                       '-vcodec', 'rawvideo', '-']
+        if frame is None:
             frame = 0
-
+        source = int(self.frame_numbers[frame])
+        seek = self._seek_args(source) if source > 0 else []
+        command = ([_FFMPEG_CMD()] + seek +
+                   ['-i', str(self.filepath)])
+        if self._filters:
+            command += ['-vf', ','.join(self._filters)]
+        if self.frame_stride > 1:
+            # Don't duplicate frames to make up for the ones not selected
+            command += ['-vsync', '0']
+        command += ['-f', 'image2pipe',
+                    '-pix_fmt', self.pix_fmt,
+                    '-vcodec', 'rawvideo', '-']
         self._shutdown_pipe()
         self._pipe = sp.Popen(command, stdout=sp.PIPE, stdin=DEVNULL,
                               stderr=DEVNULL,
@@ -166,6 +376,31 @@ class FFMpegVideoReader(object):
         # We have not yet read the specified frame
         self.index = frame - 1
 
+    def _seek_args(self, source):
+        r"""
+        The ffmpeg arguments that seek to the given frame of the video, such
+        that it is the first frame output.
+        """
+        # Only use the keyframe index if it has already been built
+        frame_index = self._frame_index or None
+        if frame_index is None:
+            return ['-ss', str(source / float(self.fps))]
+        timestamps = frame_index['timestamps'] - frame_index['timestamps'][0]
+        if np.any(frame_index['keyframes'] == source):
+            # Without accurate seeking, ffmpeg outputs every frame from the
+            # keyframe preceding the seek time - seek into the middle of the
+            # keyframe so that rounding can never land us on the preceding
+            # keyframe
+            time = timestamps[source]
+            if source + 1 < len(timestamps):
+                time = (time + timestamps[source + 1]) / 2.
+            return ['-noaccurate_seek', '-ss', '{:.6f}'.format(time)]
+        # Accurate seeking decodes from the preceding keyframe and drops the
+        # frames before the seek time - seek between the frame and the
+        # frame before it
+        time = (timestamps[source - 1] + timestamps[source]) / 2.
+        return ['-ss', '{:.6f}'.format(time)]
+
     def __iter__(self):
         r"""
         Iterate through all frames of the video in order
@@ -180,46 +415,361 @@ class FFMpegVideoReader(object):
         r"""
         Get a specific frame from the video
         """
-        # If the user is reading consecutive frames, or a frame later in the
-        # video, do not reopen a pipe
-        if self._pipe is None or self._pipe.poll() is not None or index <= self.index:
-            self._open_pipe(frame=index)
-        else:
-            to_trash = index - self.index - 1
-            if to_trash > 0:
-                self._trash_frames(to_trash)
+        frame = self._frame_cache.get(index)
+        if frame is not None:
+            # Mark as recently used
+            del self._frame_cache[index]
+            self._frame_cache[index] = frame
+            return self._finalize_frame(frame)
+
+        pipe_open = self._pipe is not None and self._pipe.poll() is None
+        if pipe_open and index == self.index + 1:
+            # Sequential reading - the common case
+            return self._finalize_frame(self._read_one_frame(
+                out=self._frame_buffer()))
+        if index == 0:
+            self._open_pipe()
+            return self._finalize_frame(self._read_one_frame(
+                out=self._frame_buffer()))
+
+        keyframe = self._keyframe_before(index)
+        if keyframe is None:
+            # No index - seek directly to the frame (ffmpeg decodes from
+            # the preceding keyframe internally) or skip frames forward
+            if not pipe_open or index <= self.index:
+                self._open_pipe(frame=index)
+            else:
+                to_trash = index - self.index - 1
+                if to_trash > 0:
+                    self._trash_frames(to_trash)
+            return self._finalize_frame(self._read_one_frame(
+                out=self._frame_buffer()))
+
+        # Only seek if it saves decoding frames, i.e. if the pipe is not
+        # already positioned within the keyframe's group of pictures
+        if not pipe_open or not (keyframe <= self.index + 1 <= index):
+            self._open_pipe(frame=keyframe)
+        # Frames up to the requested frame are decoded anyway - keep them
+        while self.index + 1 < index:
+            self._cache_frame(self.index + 1, self._read_one_frame())
+        frame = self._read_one_frame()
+        self._cache_frame(index, frame)
+        return self._finalize_frame(frame)
+
+    def _segment_reader(self):
+        r"""
+        A reader of the same video (sharing the keyframe index) with its own
+        pipe, for reading a segment of the video concurrently.
+        """
+        reader = copy.copy(self)
+        reader._pipe = None
+        reader.index = -1
+        reader._frame_cache = OrderedDict()
+        reader._buffers = []
+        reader._next_buffer = 0
+        return reader
+
+    def _keyframe_before(self, index):
+        r"""
+        The first frame to read at or after the last keyframe of the video
+        before frame ``index``, or ``None`` if the keyframe index is
+        unavailable.
+        """
+        frame_index = self.frame_index
+        if frame_index is None:
+            return None
+        keyframes = frame_index['keyframes']
+        source = self.frame_numbers[index]
+        i = np.searchsorted(keyframes, source, side='right') - 1
+        keyframe = int(keyframes[i]) if i >= 0 else 0
+        # Frames are read with a stride from the first frame
+        return int(np.searchsorted(self.frame_numbers, keyframe))
+
+    def _cache_frame(self, index, frame):
+        if self.frame_cache_size <= 0:
+            return
+        # Cached frames are shared, so must never be modified
+        frame.flags.writeable = False
+        self._frame_cache[index] = frame
+        while len(self._frame_cache) > self.frame_cache_size:
+            self._frame_cache.popitem(last=False)
+
+    def _finalize_frame(self, frame):
+        if self.normalize:
+            frame = normalize_pixels_range(frame)
+        return frame
 
-        return self._read_one_frame()
+    def _frame_buffer(self):
+        r"""
+        The buffer to read the next returned frame into - the next buffer of
+        the ring, or ``None`` (a new array) if frames are copied.
+        """
+        if self.copy or self.normalize:
+            # Normalizing copies the frame anyway
+            return None
+        if self._next_buffer == len(self._buffers):
+            self._buffers.append(self._empty_frame())
+        buf = self._buffers[self._next_buffer]
+        self._next_buffer = (self._next_buffer + 1) % self.n_buffers
+        return buf
+
+    def _empty_frame(self):
+        return np.empty((self.height, self.width, self.n_channels),
+                        dtype=self.dtype)
 
     def _trash_frames(self, n_frames):
         r"""
         Reads and trashes the data corresponding to ``n_frames``
         """
-        _ = self._pipe.stdout.read(self.height*self.width*3*n_frames)
-        self._pipe.stdout.flush()
-        self.index += n_frames
+        # Reuse a single scratch buffer rather than reading every frame into
+        # memory at once
+        scratch = self._empty_frame()
+        for _ in range(n_frames):
+            self._read_one_frame(out=scratch)
 
-    def _read_one_frame(self):
+    def _read_one_frame(self, out=None):
         r"""
-        Reads one frame from the opened ``self._pipe`` and converts it to
-        a numpy array
+        Reads one frame from the opened ``self._pipe`` directly into a
+        numpy array
+
+        Parameters
+        ----------
+        out : `ndarray`, optional
+            The array of shape ``(self.height, self.width, self.n_channels)``
+            and type ``self.dtype`` to read the frame into. If ``None``, a new
+            array is allocated.
 
         Returns
         -------
-        image : :map:`Image`
-            Image of shape ``(self.height, self.width, 3)``
+        image : `ndarray`
+            The raw frame of shape
+            ``(self.height, self.width, self.n_channels)``
         """
-        raw_data = self._pipe.stdout.read(self.height*self.width*3)
-        frame = np.fromstring(raw_data, dtype=np.uint8)
-        frame = frame.reshape((self.height, self.width, 3))
-        self._pipe.stdout.flush()
+        if out is None:
+            out = self._empty_frame()
+        flat = out.reshape(-1).view(np.uint8)
+        n_read = 0
+        # A pipe may return less than asked for, so read until full
+        while n_read < flat.size:
+            n = self._pipe.stdout.readinto(flat[n_read:])
+            if not n:
+                raise ValueError('Unable to read frame {} of {} - the video '
+                                 'ended early'.format(self.index + 1,
+                                                      self.filepath))
+            n_read += n
         self.index += 1
+        return out
 
-        if self.normalize:
-            frame = normalize_pixels_range(frame)
 
+class ParallelVideoReader(object):
+    r"""
+    Read a video by decoding several segments of it at once, each in its own
+    ffmpeg process, which is much faster than a single :map:`FFMpegVideoReader`
+    when a whole video has to be processed on a machine with many cores.
+
+    The video is split into segments that start at keyframes (see
+    :map:`video_frame_index_ffprobe`), so no frame is decoded twice. Iterating
+    over the reader yields the frames in order, while at most ``buffer_size``
+    decoded frames per decoder are held in memory waiting to be consumed.
+    Indexing the reader is also supported - reading consecutive frames uses
+    the parallel decoders, any other access pattern falls back to an
+    :map:`FFMpegVideoReader`.
+
+    Parameters
+    ----------
+    filepath : `Path`
+        Absolute path to the video
+    n_decoders : `int` or ``None``, optional
+        The number of ffmpeg processes decoding at once. If ``None``, the
+        number of CPUs is used.
+    buffer_size : `int`, optional
+        The maximum number of decoded frames buffered per decoder.
+    normalize : `bool`, optional
+        If ``True``, the resulting range of the pixels of the returned
+        frames is normalized (by the decoding threads).
+    \**kwargs : `dict`, optional
+        Passed on to :map:`FFMpegVideoReader`, e.g. ``exact_frame_count``,
+        ``output_shape`` or ``frame_stride``.
+    """
+    def __init__(self, filepath, n_decoders=None, buffer_size=16,
+                 normalize=False, **kwargs):
+        if n_decoders is None:
+            from multiprocessing import cpu_count
+            n_decoders = cpu_count()
+        if n_decoders <= 0:
+            raise ValueError('n_decoders should be positive '
+                             '({} provided)'.format(n_decoders))
+        if buffer_size <= 0:
+            raise ValueError('buffer_size should be positive '
+                             '({} provided)'.format(buffer_size))
+        self._stream = None
+        self.n_decoders = n_decoders
+        self.buffer_size = buffer_size
+        # Frames are handed between threads, so must never share buffers
+        kwargs['copy'] = True
+        self._reader = FFMpegVideoReader(filepath, normalize=normalize,
+                                         **kwargs)
+        self.filepath = filepath
+        self.fps = self._reader.fps
+        self.frame_numbers = self._reader.frame_numbers
+        self.frame_transform = self._reader.frame_transform
+        # The frames being streamed by the parallel decoders
+        self._stream_index = None
+        self._last_index = None
+
+    def __len__(self):
+        return len(self._reader)
+
+    def __del__(self):
+        self._close_stream()
+
+    def __iter__(self):
+        return self.iter_frames()
+
+    def __getitem__(self, index):
+        r"""
+        Get a specific frame from the video
+        """
+        if self._stream is not None and index == self._stream_index:
+            frame = next(self._stream)
+            self._stream_index += 1
+        elif index == 0 or (self._last_index is not None and
+                            index == self._last_index + 1):
+            # Reading in order - stream from here in parallel
+            self._close_stream()
+            self._stream = self.iter_frames(start=index)
+            self._stream_index = index + 1
+            frame = next(self._stream)
+        else:
+            self._close_stream()
+            frame = self._reader[index]
+        self._last_index = index
         return frame
 
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def segments(self, start=0):
+        r"""
+        The ``(start, end)`` frames of the segments of the video that are
+        decoded in parallel, aligned to keyframes if possible.
+
+        Parameters
+        ----------
+        start : `int`, optional
+            The first frame to decode.
+
+        Returns
+        -------
+        segments : `list` of `(int, int)`
+            The segments covering the frames from ``start`` to the end of the
+            video.
+        """
+        n_frames = len(self)
+        # More segments than decoders balances the load between them
+        n_segments = min(4 * self.n_decoders, max(n_frames - start, 1))
+        bounds = {start, n_frames}
+        for i in range(1, n_segments):
+            frame = start + (i * (n_frames - start)) // n_segments
+            keyframe = self._reader._keyframe_before(frame)
+            bounds.add(frame if keyframe is None else max(keyframe, start))
+        bounds = sorted(bounds)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def iter_frames(self, start=0):
+        r"""
+        Generator decoding the frames of the video in parallel, yielding them
+        in order.
+
+        Parameters
+        ----------
+        start : `int`, optional
+            The first frame to yield.
+        """
+        segments = self.segments(start=start)
+        outputs = [queue.Queue(maxsize=self.buffer_size) for _ in segments]
+        # Limits the number of segments decoded ahead of the one consumed
+        tokens = queue.Queue()
+        for _ in range(2 * self.n_decoders):
+            tokens.put(None)
+        todo = queue.Queue()
+        for i in range(len(segments)):
+            todo.put(i)
+        stop = threading.Event()
+        workers = [threading.Thread(target=self._decode_segments,
+                                    args=(segments, outputs, todo, tokens,
+                                          stop))
+                   for _ in range(min(self.n_decoders, len(segments)))]
+        for w in workers:
+            w.daemon = True
+            w.start()
+        try:
+            for (seg_start, seg_end), output in zip(segments, outputs):
+                for _ in range(seg_end - seg_start):
+                    frame = output.get()
+                    if isinstance(frame, _DecodingError):
+                        raise frame.error
+                    yield frame
+                tokens.put(None)
+        finally:
+            stop.set()
+            for w in workers:
+                w.join()
+
+    def _decode_segments(self, segments, outputs, todo, tokens, stop):
+        # Worker thread - decodes segments with an independent pipe until
+        # there are none left
+        reader = self._reader._segment_reader()
+        try:
+            while _get_until_stopped(tokens, stop):
+                try:
+                    i = todo.get_nowait()
+                except queue.Empty:
+                    return
+                start, end = segments[i]
+                try:
+                    reader._open_pipe(frame=start)
+                    for _ in range(start, end):
+                        frame = reader._finalize_frame(
+                            reader._read_one_frame())
+                        if not _put_until_stopped(outputs[i], frame, stop):
+                            return
+                except Exception as e:
+                    _put_until_stopped(outputs[i], _DecodingError(e), stop)
+                    return
+        finally:
+            reader._shutdown_pipe()
+
+
+class _DecodingError(object):
+    # Passes an exception of a decoding thread on to the consumer
+    def __init__(self, error):
+        self.error = error
+
+
+def _get_until_stopped(q, stop):
+    # Block on the queue, giving up if stop is set. True if an item was got
+    while not stop.is_set():
+        try:
+            q.get(timeout=0.05)
+            return True
+        except queue.Empty:
+            pass
+    return False
+
+
+def _put_until_stopped(q, item, stop):
+    # Block on the queue, giving up if stop is set. True if the item was put
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.05)
+            return True
+        except queue.Full:
+            pass
+    return False
+
 
 def video_infos_ffmpeg(filepath):
     r"""
@@ -344,3 +894,103 @@ def video_infos_ffprobe(filepath):
         kv_dict['fps'] = None
 
     return kv_dict
+
+
+def video_frame_index_ffprobe(filepath, persist=True):
+    r"""
+    Build the keyframe index of a video using ffprobe. Only the packets of
+    the video are read (no frames are decoded), so this is much faster than
+    decoding the video.
+
+    If ``persist`` is ``True``, the index is saved next to the video (as
+    ``<filename>.frame_index.npz``) and loaded from there on subsequent
+    calls, unless the video has been modified since.
+
+    Parameters
+    ----------
+    filepath : `Path`
+        Absolute path to the video file to index
+    persist : `bool`, optional
+        Whether to load/save the index next to the video. Failing to save
+        the index (e.g. because the directory is read-only) is not an error.
+
+    Returns
+    -------
+    index : `dict`
+        keys are timestamps (the presentation time of every frame in seconds,
+        in presentation order) and keyframes (the sorted indices of the
+        frames that are keyframes).
+
+    Raises
+    ------
+    ValueError
+        If the video has no timestamps or keyframes to index.
+    """
+    filepath = Path(filepath)
+    index_path = filepath.parent / (filepath.name + FRAME_INDEX_SUFFIX)
+    stat = os.stat(str(filepath))
+    if persist and index_path.is_file():
+        try:
+            with np.load(str(index_path)) as f:
+                if (float(f['mtime']) == stat.st_mtime and
+                        int(f['size']) == stat.st_size):
+                    return {'timestamps': f['timestamps'],
+                            'keyframes': f['keyframes']}
+        except (IOError, OSError, ValueError, KeyError):
+            # Corrupt index - rebuild it
+            pass
+
+    p = sp.Popen(
+        [_FFPROBE_CMD(), '-v', 'quiet',
+         '-select_streams', 'v:0',             # Only the first video stream
+         '-show_entries', 'packet=pts_time,flags',
+         '-of', 'csv=print_section=0',         # Output is just pts_time,flags
+         str(filepath)],
+        stdin=sp.PIPE,
+        stdout=sp.PIPE,
+        stderr=sp.PIPE,
+    )
+    with _call_subprocess(p) as pipe:
+        stdout_output = pipe.stdout.readlines()
+    del p
+
+    packets = [l.decode().strip().split(',') for l in stdout_output]
+    packets = [p for p in packets if p[0]]
+    if len(packets) == 0 or any(p[0] == 'N/A' for p in packets):
+        raise ValueError('Unable to read the timestamps of {}'.format(
+            filepath))
+    timestamps = np.array([p[0] for p in packets], dtype=np.float64)
+    is_key = np.array(['K' in p[1] for p in packets], dtype=np.bool)
+    # Packets are in decoding order, frames are needed in presentation order
+    order = np.argsort(timestamps, kind='mergesort')
+    timestamps, is_key = timestamps[order], is_key[order]
+    keyframes = np.nonzero(is_key)[0]
+    if len(keyframes) == 0:
+        raise ValueError('{} has no keyframes'.format(filepath))
+
+    if persist:
+        _save_frame_index(index_path, timestamps, keyframes, stat)
+    return {'timestamps': timestamps, 'keyframes': keyframes}
+
+
+def _save_frame_index(index_path, timestamps, keyframes, stat):
+    # Write to a temporary file and move it in place, so that concurrent
+    # readers never see partial files
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=str(index_path.parent),
+                                        suffix='.tmp')
+    except (IOError, OSError):
+        # Read-only directory - the index is simply not persisted
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, timestamps=timestamps, keyframes=keyframes,
+                     mtime=stat.st_mtime, size=stat.st_size)
+        if index_path.exists():
+            index_path.unlink()
+        os.rename(tmp_path, str(index_path))
+    except (IOError, OSError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
@@ -1,2 +1,3 @@
 from .base import (export_landmark_file, export_image, export_pickle,
                    export_video)
+from .pack import export_dataset_pack
@@ -5,6 +5,7 @@ from pathlib import Path
 
 from menpo.compatibility import basestring, str
 from .extensions import landmark_types, image_types, pickle_types, video_types
+from ..input.pickle import _buffers_path
 from ..exceptions import OverwriteError
 from ..utils import (_norm_path, _possible_extensions_from_filepath,
                      _normalize_extension)
@@ -106,9 +107,17 @@ def export_video(images, file_path, overwrite=False, fps=30, **kwargs):
 
     Note that exporting of GIF images is also supported.
 
+    The frames are streamed to the encoder, so ``images`` can be a generator
+    (or a :map:`LazyList`) producing each frame on demand. Producing the
+    frames overlaps with encoding them, as the frames are converted and
+    written in background threads (see the ``n_threads`` and ``queue_size``
+    kwargs in the ``menpo.io.output.video`` package). Frames given as
+    `uint8` arrays of shape ``(height, width, n_channels)`` are written
+    without conversion.
+
     Parameters
     ----------
-    images : list of :map:`Image`
+    images : `iterable` of :map:`Image` or `ndarray`
         The images to export as a video.
     file_path : `Path`
         The Path to save the video at. File buffers are not supported, unlike
@@ -140,7 +149,7 @@ def export_video(images, file_path, overwrite=False, fps=30, **kwargs):
                        exporter_kwargs=exporter_kwargs)
 
 
-def export_pickle(obj, fp, overwrite=False, protocol=2):
+def export_pickle(obj, fp, overwrite=False, protocol=2, out_of_band=False):
     r"""
     Exports a given collection of Python objects with Pickle.
 
@@ -155,6 +164,14 @@ def export_pickle(obj, fp, overwrite=False, protocol=2):
     are pickled down as a `pathlib.PurePath` so that pickles can be easily
     moved between different platforms.
 
+    If ``out_of_band`` is ``True``, the raw data of every large `ndarray`
+    (e.g. the components of a :map:`PCAModel`) is written to a sidecar file
+    next to the pickle (with the suffix ``.buffers``, e.g.
+    ``model.pkl.buffers``) rather than into the pickle itself. On import,
+    :map:`import_pickle` memory-maps the sidecar read-only, so loading is
+    near instant, no copies of the arrays are made and the pages are shared
+    between processes. The sidecar must be kept alongside the pickle.
+
     Parameters
     ----------
     obj : ``object``
@@ -179,6 +196,12 @@ def export_pickle(obj, fp, overwrite=False, protocol=2):
         3         Support for byte objects, compatible with python >= 3.0.
         4         Support for large objects, compatible with python >= 3.4.
         ========= =========================================================
+    out_of_band : `bool`, optional
+        If ``True``, large arrays are written to a sidecar file that can be
+        memory-mapped on import. Only supported if ``fp`` is a `Path` and
+        ``protocol`` > 0. The sidecar is never compressed, even for
+        ``.pkl.gz`` files.
+
     Raises
     ------
     ValueError
@@ -189,20 +212,39 @@ def export_pickle(obj, fp, overwrite=False, protocol=2):
     ValueError
         The provided extension does not match to an existing exporter type
         (the output type is not supported).
+    ValueError
+        ``out_of_band`` is ``True`` and ``fp`` is a `file`-like object or
+        ``protocol`` is 0.
     """
     exporter_kwargs = {'protocol': protocol}
     if isinstance(fp, basestring):
         fp = Path(fp)  # cheeky conversion to Path to reuse existing code
+    if out_of_band and not isinstance(fp, Path):
+        raise ValueError('Exporting out-of-band is only supported when '
+                         'exporting to a path')
+    if out_of_band and protocol == 0:
+        raise ValueError('Exporting out-of-band requires a binary pickle '
+                         'protocol (> 0)')
     if isinstance(fp, Path):
         # user provided a path - if it ended .gz we will compress
         path_filepath = _validate_filepath(fp, overwrite)
         extension = _parse_and_validate_extension(path_filepath, None,
                                                   pickle_types)
+        buffers_path = Path(_buffers_path(path_filepath))
+        if buffers_path.exists():
+            # Never leave behind the buffers of a previous export
+            buffers_path.unlink()
         o = gzip_open if extension[-3:] == '.gz' else open
         with o(str(path_filepath), 'wb') as f:
-            # force overwrite as True we've already done the check above
-            _export(obj, f, pickle_types, extension, True,
-                    exporter_kwargs=exporter_kwargs)
+            if out_of_band:
+                with open(str(buffers_path), 'wb') as buffers_f:
+                    exporter_kwargs['buffers_handle'] = buffers_f
+                    _export(obj, f, pickle_types, extension, True,
+                            exporter_kwargs=exporter_kwargs)
+            else:
+                # force overwrite as True we've already done the check above
+                _export(obj, f, pickle_types, extension, True,
+                        exporter_kwargs=exporter_kwargs)
     else:
         _export(obj, fp, pickle_types, '.pkl', overwrite,
                 exporter_kwargs=exporter_kwargs)
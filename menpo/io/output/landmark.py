@@ -26,6 +26,16 @@ def ljson_exporter(landmark_group, file_handle, **kwargs):
     file_handle : `file`-like object
         The file to write in to
     """
+    lg_json = _ljson_dict(landmark_group)
+    return json.dump(lg_json, file_handle, indent=4, separators=(',', ': '),
+                     sort_keys=True, allow_nan=False, cls=_UTF8Encoder)
+
+
+def _ljson_dict(landmark_group):
+    r"""
+    The LJSON v2 representation of the landmark group, as a `dict` that can be
+    directly serialized to JSON.
+    """
     lg_json = landmark_group.tojson()
     # Add version string
     lg_json['version'] = 2
@@ -49,9 +59,7 @@ def ljson_exporter(landmark_group, file_handle, **kwargs):
                                               filtered_points[2::3]))
     else:
         lg_json['landmarks']['points'] = []
-
-    return json.dump(lg_json, file_handle, indent=4, separators=(',', ': '),
-                     sort_keys=True, allow_nan=False, cls=_UTF8Encoder)
+    return lg_json
 
 
 def pts_exporter(landmark_group, file_handle, **kwargs):
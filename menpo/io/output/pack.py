@@ -0,0 +1,184 @@
+from collections import OrderedDict
+from io import BytesIO
+import json
+import os
+
+import numpy as np
+
+from menpo.image import MaskedImage, BooleanImage
+
+from ..exceptions import OverwriteError
+from ..input.pack import (PACK_VERSION, PACK_INDEX_FILENAME, PACK_ALIGNMENT,
+                          _PACK_ITEM_DTYPE, _PACK_KINDS, _pack_shard_filename)
+from ..utils import _norm_path, _normalize_extension
+from .extensions import image_types
+from .landmark import _ljson_dict
+
+
+def export_dataset_pack(images, path, shard_size=2 ** 30, image_format=None,
+                        overwrite=False, verbose=False):
+    r"""
+    Exports a collection of images, along with all their landmark groups and
+    paths, as a dataset pack - a directory containing a small number of large
+    shard files and a single index. Importing the pack back with
+    :map:`import_dataset_pack` provides O(1), memory-mapped random access to
+    the images, which is much faster than reading many small files (in
+    particular on network filesystems).
+
+    Parameters
+    ----------
+    images : `iterable` of :map:`Image`
+        The images to export, e.g. the :map:`LazyList` returned by
+        :map:`import_images`. Only 2D images are supported. For compact packs,
+        import the images with ``normalize=False`` so that their pixels are
+        stored in their native datatype.
+    path : `pathlib.Path` or `str`
+        The directory to write the pack to.
+    shard_size : `int`, optional
+        The (approximate) maximum size of each shard file in bytes. A shard
+        is only ever larger if it contains a single image that is larger.
+    image_format : `str` or ``None``, optional
+        If ``None``, the raw pixels are stored so that they can be
+        memory-mapped on import. Otherwise, the image file extension (e.g.
+        ``'png'``) the pixels are encoded with, trading decoding time for
+        space. Masks are always stored raw and :map:`BooleanImage` instances
+        are never encoded.
+    overwrite : `bool`, optional
+        Whether or not to overwrite an existing pack at ``path``.
+    verbose : `bool`, optional
+        If ``True`` progress of the exporting will be dynamically reported
+        with a progress bar.
+
+    Raises
+    ------
+    OverwriteError
+        If a pack already exists at ``path`` and ``overwrite`` != ``True``
+    OverwriteError
+        If ``path`` holds shard files that are not part of the existing pack
+        (if any) - they are never removed.
+    ValueError
+        If ``image_format`` is not a supported image extension.
+    ValueError
+        If an image is not 2D.
+    """
+    path = _norm_path(path)
+    if shard_size <= 0:
+        raise ValueError('shard_size should be positive '
+                         '({} provided)'.format(shard_size))
+    extension, exporter = None, None
+    if image_format is not None:
+        extension = _normalize_extension(image_format)
+        if extension not in image_types:
+            raise ValueError('The image format ({}) provided is not currently '
+                             'supported.'.format(image_format))
+        exporter = image_types[extension]
+    if (path / PACK_INDEX_FILENAME).exists():
+        if not overwrite:
+            raise OverwriteError('Dataset pack {} already exists. Please set '
+                                 'the overwrite kwarg if you wish to '
+                                 'overwrite it.'.format(path), path)
+        # The index is written last, so a partially written pack is never
+        # valid
+        _remove_pack(path)
+    if not path.is_dir():
+        path.mkdir(parents=True)
+    elif _shard_filenames(path):
+        raise OverwriteError('{} holds shard files that are not part of a '
+                             'dataset pack - they will not be '
+                             'overwritten.'.format(path), path)
+
+    if verbose:
+        from menpo.visualize import print_progress
+        n_items = len(images) if hasattr(images, '__len__') else None
+        images = print_progress(images, prefix='Exporting dataset pack',
+                                n_items=n_items)
+
+    items, paths = [], []
+    shard_index, offset = 0, 0
+    shard = open(str(path / _pack_shard_filename(shard_index)), 'wb')
+    try:
+        for image in images:
+            if image.n_dims != 2:
+                raise ValueError('Only 2D images can be exported to a dataset '
+                                 'pack ({}D image provided)'.format(
+                                     image.n_dims))
+            item = np.zeros((), dtype=_PACK_ITEM_DTYPE)
+            blobs = _pack_item_blobs(image, item, extension=extension,
+                                     exporter=exporter)
+            nbytes = sum(len(b) for b in blobs)
+            if offset > 0 and offset + nbytes > shard_size:
+                shard.close()
+                shard_index, offset = shard_index + 1, 0
+                shard = open(str(path / _pack_shard_filename(shard_index)),
+                             'wb')
+            item['shard'] = shard_index
+            item['offset'] = offset
+            for b in blobs:
+                shard.write(b)
+            offset += nbytes
+            # Keep every item aligned for efficient memory mapped views
+            padding = -offset % PACK_ALIGNMENT
+            shard.write(b'\0' * padding)
+            offset += padding
+            items.append(item)
+            paths.append(str(getattr(image, 'path', '')))
+    finally:
+        shard.close()
+
+    np.savez(str(path / PACK_INDEX_FILENAME), version=PACK_VERSION,
+             n_shards=shard_index + 1,
+             items=np.array(items, dtype=_PACK_ITEM_DTYPE),
+             paths=np.array(paths, dtype=np.unicode_))
+
+
+def _pack_item_blobs(image, item, extension=None, exporter=None):
+    # Fill in the index item for the image and return the raw bytes to store
+    item['kind'] = _PACK_KINDS.index(_pack_kind(image))
+    item['shape'] = image.pixels.shape
+    item['dtype'] = image.pixels.dtype.str
+    if exporter is not None and not isinstance(image, BooleanImage):
+        buf = BytesIO()
+        exporter(image, buf, extension=extension)
+        pixels_bytes = buf.getvalue()
+        item['encoded'] = True
+    else:
+        pixels_bytes = np.ascontiguousarray(image.pixels).tobytes()
+    blobs = [pixels_bytes]
+    item['pixels_nbytes'] = len(pixels_bytes)
+
+    if isinstance(image, MaskedImage):
+        mask_bytes = np.ascontiguousarray(image.mask.mask).tobytes()
+        blobs.append(mask_bytes)
+        item['mask_nbytes'] = len(mask_bytes)
+
+    if image.has_landmarks:
+        groups = OrderedDict((group_name, _ljson_dict(lmarks))
+                             for group_name, lmarks in image.landmarks.items())
+        lms_bytes = json.dumps(groups, allow_nan=False).encode('utf-8')
+        blobs.append(lms_bytes)
+        item['landmarks_nbytes'] = len(lms_bytes)
+    return blobs
+
+
+def _pack_kind(image):
+    # Subclasses are stored as the image type they derive from
+    for kind in _PACK_KINDS[::-1]:
+        if isinstance(image, kind):
+            return kind
+
+
+def _remove_pack(path):
+    # Remove the index and the shards that it lists (only)
+    index_path = path / PACK_INDEX_FILENAME
+    with np.load(str(index_path)) as index:
+        n_shards = int(index['n_shards'])
+    index_path.unlink()
+    for i in range(n_shards):
+        shard_path = path / _pack_shard_filename(i)
+        if shard_path.exists():
+            shard_path.unlink()
+
+
+def _shard_filenames(path):
+    return [filename for filename in os.listdir(str(path))
+            if filename.startswith('shard_') and filename.endswith('.bin')]
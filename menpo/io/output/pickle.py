@@ -5,6 +5,13 @@ try:
 except ImportError:  # Py3
     import pickle
 
+import numpy as np
+
+from ..input.pickle import BUFFERS_ALIGNMENT, _BUFFER_PID
+
+# Arrays smaller than this are always pickled in-band
+OUT_OF_BAND_MIN_NBYTES = 4096
+
 
 # -------------- Custom pickle behavior for pathlib.Path objects ------------ #
 #
@@ -50,6 +57,51 @@ def pickle_paths_as_pure():
         Path.__reduce__ = default_reduce
 
 
-def pickle_exporter(obj, file_handle, protocol=2, **kwargs):
+class _BufferWriter(object):
+    r"""
+    Persistent id callable for a pickler that writes large arrays to a
+    separate file of (aligned) raw buffers rather than into the pickle.
+    """
+
+    def __init__(self, buffers_handle, min_nbytes=OUT_OF_BAND_MIN_NBYTES):
+        self.buffers_handle = buffers_handle
+        self.min_nbytes = min_nbytes
+        self.offset = 0
+        # Arrays already written, so that shared arrays are only stored once
+        self._written = {}
+
+    def __call__(self, obj):
+        # Subclasses of ndarray (e.g. masked arrays) hold more state than
+        # their buffer, so are pickled as usual
+        if (type(obj) is not np.ndarray or obj.dtype.hasobject or
+                obj.nbytes < self.min_nbytes):
+            return None
+        pid = self._written.get(id(obj))
+        if pid is not None:
+            return pid[0]
+        if obj.flags.f_contiguous and not obj.flags.c_contiguous:
+            order, data = 'F', obj.T
+        else:
+            order, data = 'C', np.ascontiguousarray(obj)
+        pid = (_BUFFER_PID, self.offset, obj.dtype, obj.shape, order)
+        # Written from the array's own memory, without copying it to bytes
+        self.buffers_handle.write(memoryview(data.reshape(-1).view(np.uint8)))
+        self.offset += obj.nbytes
+        # Keep every array aligned for efficient memory mapped views
+        padding = -self.offset % BUFFERS_ALIGNMENT
+        self.buffers_handle.write(b'\0' * padding)
+        self.offset += padding
+        # Hold a reference to the array so that its id is not reused
+        self._written[id(obj)] = (pid, obj)
+        return pid
+
+
+def pickle_exporter(obj, file_handle, protocol=2, buffers_handle=None,
+                    **kwargs):
     with pickle_paths_as_pure():
-        pickle.dump(obj, file_handle, protocol=protocol)
+        if buffers_handle is None:
+            pickle.dump(obj, file_handle, protocol=protocol)
+        else:
+            pickler = pickle.Pickler(file_handle, protocol)
+            pickler.persistent_id = _BufferWriter(buffers_handle)
+            pickler.dump(obj)
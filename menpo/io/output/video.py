@@ -1,10 +1,18 @@
+import itertools
 import os
 import subprocess as sp
+import threading
 import warnings
 
 import numpy as np
 from pathlib import Path
 
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
 from menpo.visualize import print_progress
 from ..utils import DEVNULL, _call_subprocess
 
@@ -14,10 +22,18 @@ _FFMPEG_CMD = lambda: str(Path(os.environ.get('MENPO_FFMPEG_CMD', 'ffmpeg')))
 
 def ffmpeg_video_exporter(images, out_path, fps=30, codec='libx264',
                           preset='medium', bitrate=None, verbose=False,
-                          **kwargs):
+                          n_threads=1, queue_size=16, **kwargs):
     r"""
     Uses subprocess PIPE to export the images using FFMPEG.
 
+    The frames are streamed to FFMPEG: they are consumed from ``images`` one
+    at a time on the calling thread, converted to bytes by a pool of
+    ``n_threads`` worker threads and written to FFMPEG by a background
+    writer thread. Therefore, if ``images`` is a generator (or a
+    :map:`LazyList`) that renders or fits each frame, producing the frames
+    overlaps with their conversion and encoding. At most ``queue_size``
+    frames are in flight at any time, which bounds the memory used.
+
     There are is one important environment variable that can be set to alter
     the behaviour of this function:
 
@@ -29,8 +45,13 @@ def ffmpeg_video_exporter(images, out_path, fps=30, codec='libx264',
 
     Parameters
     ----------
-    images : `list` of :map:`Image`
-        List of Menpo images to export as a video.
+    images : `iterable` of :map:`Image` or `ndarray`
+        The frames to export as a video, e.g. a `list`, a :map:`LazyList` or
+        a generator. Frames can also be given as `uint8` arrays of shape
+        ``(height, width)`` or ``(height, width, n_channels)`` (channels at
+        the back), which are written to FFMPEG without any conversion.
+        Likewise, no floating point conversion is performed for images with
+        `uint8` pixels.
     out_path : `Path`
         Path to save the video to.
     fps : `int`, optional
@@ -47,6 +68,12 @@ def ffmpeg_video_exporter(images, out_path, fps=30, codec='libx264',
         The output video bitrate.
     verbose : `bool`, optional
         If ``True``, print a progress bar.
+    n_threads : `int` or ``None``, optional
+        The number of threads used to convert the frames to bytes. If
+        ``None``, the frames are converted on the calling thread (they are
+        still written to FFMPEG by the background writer thread).
+    queue_size : `int`, optional
+        The maximum number of frames waiting to be written to FFMPEG.
     **kwargs : `dict`, optional
         Extra parameters for advanced video exporting options.
         They are passed through directly to FFMPEG and they should.
@@ -54,16 +81,37 @@ def ffmpeg_video_exporter(images, out_path, fps=30, codec='libx264',
         For instance: ``{'crf' : '0'} # equivalent to -crf 0 in ffmpeg.``
         You can find further details in the documentation:
         https://ffmpeg.org/ffmpeg.html#Options
+
+    Raises
+    ------
+    ValueError
+        If ``images`` is empty, a frame is an array that is not `uint8` or
+        ``n_threads`` or ``queue_size`` is not positive.
+    IOError
+        If FFMPEG fails whilst writing the video.
     """
     # Some of the below was inspired by moviepy:
     #   https://github.com/Zulko/moviepy/blob/master/moviepy/video/io/ffmpeg_writer.py
     # and is used under the terms of the MIT license which can be found at
     #   https://github.com/Zulko/moviepy/blob/master/LICENCE.txt
-    first_image = images[0]
-    frame_shape = first_image.shape
+    if n_threads is not None and n_threads <= 0:
+        raise ValueError('n_threads should be positive '
+                         '({} provided)'.format(n_threads))
+    if queue_size <= 0:
+        raise ValueError('queue_size should be positive '
+                         '({} provided)'.format(queue_size))
+    n_frames = len(images) if hasattr(images, '__len__') else None
+    # Peek at the first frame so that generators are supported
+    images = iter(images)
+    try:
+        first_image = next(images)
+    except StopIteration:
+        raise ValueError('At least one frame is required to export a video')
+    images = itertools.chain([first_image], images)
+    frame_shape, n_channels = _frame_shape_and_channels(first_image)
     # If the first image is gray then all the images will be assumed to be
     # gray
-    colour = 'rgb24' if images[0].n_channels == 3 else 'gray8'
+    colour = 'rgb24' if n_channels == 3 else 'gray8'
     cmd = [_FFMPEG_CMD(), '-y',
            '-s', '{}x{}'.format(frame_shape[1], frame_shape[0]),
            '-r', str(fps),
@@ -82,35 +130,128 @@ def ffmpeg_video_exporter(images, out_path, fps=30, codec='libx264',
         cmd.extend(['-{}'.format(key), value])
     cmd.append(str(out_path))
 
-    images = (print_progress(images, prefix='Exporting frames') if verbose
+    images = (print_progress(images, prefix='Exporting frames',
+                             n_items=n_frames) if verbose
               else images)
 
+    pool = None
+    if n_threads is not None:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(n_threads)
     # Pipe stdout to DEVNULL to ignore it
     with _call_subprocess(sp.Popen(cmd, stdin=sp.PIPE, stderr=sp.PIPE,
                                    stdout=DEVNULL)) as pipe:
-        for k, image in enumerate(images):
-            try:
-                if image.n_channels != 1 and colour == 'gray8':
+        frames = queue.Queue(maxsize=queue_size)
+        errors = []
+        writer = threading.Thread(target=_write_frames,
+                                  args=(pipe, frames, errors))
+        writer.daemon = True
+        writer.start()
+        try:
+            for k, image in enumerate(images):
+                shape, channels = _frame_shape_and_channels(image)
+                if channels != 1 and colour == 'gray8':
                     warnings.warn('Frame {} is non-greyscale and the initial '
                                   'frame was greyscale. This frame will be '
                                   'corrupted.'.format(k))
-                if image.shape != frame_shape:  # Valid due to tuple/int
+                if shape != frame_shape:  # Valid due to tuple/int
                     warnings.warn('Frame {} is not the same shape as the '
                                   'initial frame and therefore the output '
                                   'may be corrupted.'.format(k))
+                if pool is None:
+                    frame = _FrameResult(_frame_to_bytes, image, colour)
+                else:
+                    frame = pool.apply_async(_frame_to_bytes, (image, colour))
+                if not _put_unless_failed(frames, frame, errors):
+                    break
+        finally:
+            # Signal the end of the video and wait for the writer to finish
+            _put_unless_failed(frames, None, errors)
+            writer.join()
+            if pool is not None:
+                pool.close()
+                pool.join()
+        if errors:
+            raise errors[0]
+
+
+class _FrameResult(object):
+    # A frame converted on the calling thread, mimicking the AsyncResult
+    # returned by the pool so that the writer treats both the same
+    def __init__(self, f, *args):
+        self._error = None
+        try:
+            self._value = f(*args)
+        except Exception as e:
+            self._error = e
+
+    def get(self):
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def _frame_shape_and_channels(frame):
+    # The (height, width) and number of channels of an Image or of an array
+    # with the channels at the back
+    if isinstance(frame, np.ndarray):
+        if frame.dtype != np.uint8:
+            raise ValueError('Frames given as arrays must be uint8 ({} '
+                             'provided)'.format(frame.dtype))
+        n_channels = frame.shape[2] if frame.ndim == 3 else 1
+        return frame.shape[:2], n_channels
+    return frame.shape, frame.n_channels
+
+
+def _frame_to_bytes(frame, colour):
+    # Convert a frame to the contiguous uint8 buffer that FFMPEG expects.
+    # Arrays (and images) that are already uint8 are never converted to
+    # floating point
+    if isinstance(frame, np.ndarray):
+        if frame.ndim == 3 and frame.shape[2] == 1:
+            frame = frame[..., 0]
+        n_channels = frame.shape[2] if frame.ndim == 3 else 1
+    else:
+        n_channels = frame.n_channels
+        frame = frame.pixels_with_channels_at_back(out_dtype=np.uint8)
+    # Handle the case of a greyscale image amidst colour images
+    if n_channels == 1 and colour == 'rgb24':
+        # Repeat the channels axis 3 times
+        frame = frame.reshape(frame.shape + (1,)).repeat(3, axis=2)
+    return frame.tobytes()
+
+
+def _put_unless_failed(frames, frame, errors):
+    # Put a frame in the bounded queue, giving up if the writer has failed
+    # (and so will never make room in the queue)
+    while not errors:
+        try:
+            frames.put(frame, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
 
-                i = image.pixels_with_channels_at_back(out_dtype=np.uint8)
-                # Handle the case of a greyscale image amidst colour images
-                if image.n_channels == 1 and colour == 'rgb24':
-                    # Repeat the channels axis 3 times
-                    i = i.reshape(i.shape + (1,)).repeat(3, axis=2)
-                pipe.stdin.write(i.tostring())
-            except IOError:
-                error = ('FFMPEG encountered the following error while '
-                         'writing the video:\n\n{}'.format(
-                    pipe.stderr.read().decode()))
-                # Re-raise the error for a useful error message
-                raise IOError(error)
+def _write_frames(pipe, frames, errors):
+    # Writer thread - writes the frames to FFMPEG in order until the end of
+    # the video (None) is reached or an error occurs
+    while True:
+        frame = frames.get()
+        if frame is None:
+            return
+        try:
+            pipe.stdin.write(frame.get())
+        except IOError:
+            error = ('FFMPEG encountered the following error while '
+                     'writing the video:\n\n{}'.format(
+                pipe.stderr.read().decode()))
+            # Re-raise the error for a useful error message
+            errors.append(IOError(error))
+            return
+        except Exception as e:
+            errors.append(e)
+            return
 
 
 def imageio_video_exporter(images, out_path, fps=30, codec='libx264',
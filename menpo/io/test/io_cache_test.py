@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import raises
+
+import menpo.io as mio
+
+
+def with_cache_dir(test):
+    def wrapped():
+        cache_dir = tempfile.mkdtemp()
+        try:
+            test(cache_dir)
+        finally:
+            shutil.rmtree(cache_dir)
+    wrapped.__name__ = test.__name__
+    return wrapped
+
+
+@with_cache_dir
+def test_cache_import_image(cache_dir):
+    path = mio.data_path_to('breakingbad.jpg')
+    cache = mio.ImageCache(cache_dir)
+    img = mio.import_image(path)
+    cold = mio.import_image(path, cache=cache)
+    warm = mio.import_image(path, cache=cache)
+    assert cache.size > 0
+    assert_allclose(cold.pixels, img.pixels)
+    assert_allclose(warm.pixels, img.pixels)
+    assert_allclose(warm.landmarks['PTS'].lms.points,
+                    img.landmarks['PTS'].lms.points)
+    assert warm.landmarks['PTS'].labels == img.landmarks['PTS'].labels
+
+
+@with_cache_dir
+def test_cache_warm_read_is_memory_mapped(cache_dir):
+    path = mio.data_path_to('takeo.ppm')
+    mio.import_image(path, normalize=False, cache=cache_dir)
+    img = mio.import_image(path, normalize=False, cache=cache_dir)
+    assert isinstance(img.pixels, np.memmap)
+    assert img.pixels.dtype == np.uint8
+    # Copy on write - the cache is untouched
+    img.pixels[...] = 0
+    img = mio.import_image(path, normalize=False, cache=cache_dir)
+    assert img.pixels.max() > 0
+
+
+@with_cache_dir
+def test_cache_import_image_max_shape(cache_dir):
+    path = mio.data_path_to('breakingbad.jpg')
+    img = mio.import_image(path, max_shape=(100, 100), normalize=False)
+    mio.import_image(path, max_shape=(100, 100), cache=cache_dir)
+    warm = mio.import_image(path, max_shape=(100, 100), normalize=False,
+                            cache=cache_dir)
+    assert warm.shape == img.shape
+    assert_allclose(warm.pixels, img.pixels)
+    assert_allclose(warm.landmarks['PTS'].lms.points,
+                    img.landmarks['PTS'].lms.points)
+    assert not hasattr(warm, '_decode_transform')
+
+
+@with_cache_dir
+def test_cache_import_image_rgba(cache_dir):
+    path = mio.data_path_to('lenna.png')
+    img = mio.import_image(path)
+    mio.import_image(path, cache=cache_dir)
+    warm = mio.import_image(path, cache=cache_dir)
+    assert type(warm) == type(img)
+    assert_allclose(warm.pixels, img.pixels)
+
+
+@with_cache_dir
+def test_warm_image_cache(cache_dir):
+    cache = mio.warm_image_cache(mio.data_dir_path(), cache_dir, n_threads=2)
+    size = cache.size
+    assert size > 0
+    images = mio.import_images(mio.data_dir_path(), normalize=False,
+                               cache=cache)
+    for img in images:
+        assert isinstance(img.pixels, np.memmap)
+    # Nothing new was decoded and stored
+    assert cache.size == size
+
+
+@with_cache_dir
+def test_cache_eviction(cache_dir):
+    cache = mio.ImageCache(cache_dir)
+    mio.warm_image_cache(mio.data_dir_path(), cache, landmark_resolver=None)
+    n_entries = len(os.listdir(cache_dir))
+    size = cache.size
+    cache.evict(size - 1)
+    assert 0 < cache.size < size
+    assert len(os.listdir(cache_dir)) < n_entries
+
+
+@with_cache_dir
+def test_cache_max_size(cache_dir):
+    path = mio.data_path_to('einstein.jpg')
+    img_size = mio.import_image(path, normalize=False).pixels.nbytes
+    cache = mio.ImageCache(cache_dir, max_size=img_size * 2)
+    mio.warm_image_cache(mio.data_dir_path(), cache, landmark_resolver=None)
+    assert cache.size <= img_size * 2
+
+
+@with_cache_dir
+def test_cache_clear(cache_dir):
+    cache = mio.ImageCache(cache_dir)
+    mio.import_image(mio.data_path_to('einstein.jpg'), cache=cache)
+    cache.clear()
+    assert cache.size == 0
+
+
+@raises(ValueError)
+def test_cache_negative_max_size():
+    mio.ImageCache(tempfile.gettempdir(), max_size=0)
@@ -399,3 +399,77 @@ def test_pickle_paths_as_pure_cleans_up_on_exception():
             raise ValueError()
     except ValueError:
         assert prev_reduce == Path.__reduce__  # ensure we clean up
+
+
+@patch('subprocess.Popen')
+@patch('menpo.io.output.base.Path.exists')
+def test_export_video_avi_generator(exists, pipe):
+    exists.return_value = False
+    fake_path = Path('/fake/fake.avi')
+    frames = (Image(np.full((100, 100), i / 10.)) for i in range(5))
+    mio.export_video(frames, fake_path, extension='avi', n_threads=2,
+                     queue_size=2)
+    writes = pipe.return_value.stdin.write.mock_calls
+    assert len(writes) == 5
+    # Frames are written in order
+    for i, c in enumerate(writes):
+        frame = np.frombuffer(c[1][0], dtype=np.uint8)
+        assert frame.size == 10000
+        assert np.all(frame == int(i / 10. * 255))
+    assert 'gray8' in pipe.call_args[0][0]
+
+
+@patch('subprocess.Popen')
+@patch('menpo.io.output.base.Path.exists')
+def test_export_video_avi_uint8_arrays(exists, pipe):
+    exists.return_value = False
+    fake_path = Path('/fake/fake.avi')
+    frame = np.random.randint(0, 255, size=(100, 50, 3)).astype(np.uint8)
+    mio.export_video([frame, frame], fake_path, extension='avi',
+                     n_threads=None)
+    assert pipe.return_value.stdin.write.call_count == 2
+    written = pipe.return_value.stdin.write.mock_calls[0][1][0]
+    assert np.all(np.frombuffer(written, dtype=np.uint8) == frame.ravel())
+    assert '50x100' in pipe.call_args[0][0]
+    assert 'rgb24' in pipe.call_args[0][0]
+
+
+@patch('subprocess.Popen')
+@patch('menpo.io.output.base.Path.exists')
+def test_export_video_avi_uint8_image(exists, pipe):
+    exists.return_value = False
+    fake_path = Path('/fake/fake.avi')
+    pixels = np.random.randint(0, 255, size=(3, 10, 20)).astype(np.uint8)
+    mio.export_video([Image(pixels)], fake_path, extension='avi')
+    written = pipe.return_value.stdin.write.mock_calls[0][1][0]
+    assert_allclose(np.frombuffer(written, dtype=np.uint8),
+                    np.rollaxis(pixels, 0, 3).ravel())
+
+
+@raises(ValueError)
+@patch('subprocess.Popen')
+@patch('menpo.io.output.base.Path.exists')
+def test_export_video_avi_float_array(exists, pipe):
+    exists.return_value = False
+    mio.export_video([np.zeros((10, 10))], Path('/fake/fake.avi'),
+                     extension='avi')
+
+
+@raises(IOError)
+@patch('subprocess.Popen')
+@patch('menpo.io.output.base.Path.exists')
+def test_export_video_avi_ffmpeg_error(exists, pipe):
+    exists.return_value = False
+    pipe.return_value.stdin.write.side_effect = IOError
+    pipe.return_value.stderr.read.return_value = b'error'
+    frames = (test_img for _ in range(100))
+    mio.export_video(frames, Path('/fake/fake.avi'), extension='avi',
+                     queue_size=1)
+
+
+@raises(ValueError)
+@patch('subprocess.Popen')
+@patch('menpo.io.output.base.Path.exists')
+def test_export_video_empty(exists, pipe):
+    exists.return_value = False
+    mio.export_video([], Path('/fake/fake.avi'), extension='avi')
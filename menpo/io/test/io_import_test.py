@@ -1,3 +1,4 @@
+import os
 import sys
 import warnings
 import numpy as np
@@ -10,6 +11,12 @@ import menpo.io as mio
 builtins_str = '__builtin__' if sys.version_info[0] == 2 else 'builtins'
 
 
+def fill_empty_frame(buf):
+    # Fake reading a black frame from the ffmpeg pipe
+    buf[...] = 0
+    return buf.size
+
+
 @raises(ValueError)
 def test_import_incorrect_built_in():
     mio.import_builtin_asset('adskljasdlkajd.obj')
@@ -69,18 +76,30 @@ def test_path():
     assert(img.path.name == 'einstein.jpg')
 
 
-@patch('menpo.io.input.base._pathlib_glob_for_pattern')
-def test_single_suffix_dot_in_path(pathlib_glob):
+def fake_scandir(*names):
+    # A scandir that lists the given file names in every directory
+    def scandir(directory):
+        entries = []
+        for name in names:
+            entry = MagicMock()
+            entry.name = name
+            entry.path = os.path.join(directory, name)
+            entry.is_dir.return_value = False
+            entries.append(entry)
+        return entries
+    return scandir
+
+
+@patch('menpo.io.input.base._scandir')
+def test_single_suffix_dot_in_path(scandir):
     import menpo.io.input.base as mio_base
-    from pathlib import Path
 
-    fake_path = Path('fake_path.t0.t1.t2')
-    pathlib_glob.return_value = [fake_path]
+    scandir.side_effect = fake_scandir('fake_path.t0.t1.t2')
     ext_map = MagicMock()
     ext_map.__contains__.side_effect = lambda x: x == '.t2'
 
     ret_val = next(mio_base.glob_with_suffix('*.t0.t1.t2', ext_map))
-    assert (ret_val == fake_path)
+    assert (ret_val.name == 'fake_path.t0.t1.t2')
     ext_map.__contains__.assert_called_with('.t2')
 
 
@@ -93,18 +112,16 @@ def test_upper_extension_mapped_to_lower():
     ext_map.get.assert_called_with('.jpg')
 
 
-@patch('menpo.io.input.base._pathlib_glob_for_pattern')
-def test_double_suffix(pathlib_glob):
+@patch('menpo.io.input.base._scandir')
+def test_double_suffix(scandir):
     import menpo.io.input.base as mio_base
-    from pathlib import Path
 
-    fake_path = Path('fake_path.t1.t2')
-    pathlib_glob.return_value = [fake_path]
+    scandir.side_effect = fake_scandir('fake_path.t1.t2')
     ext_map = MagicMock()
     ext_map.__contains__.side_effect = lambda x: x == '.t1.t2'
 
     ret_val = next(mio_base.glob_with_suffix('*.t1.t2', ext_map))
-    assert (ret_val == fake_path)
+    assert (ret_val.name == 'fake_path.t1.t2')
     ext_map.__contains__.assert_any_call('.t1.t2')
     ext_map.__contains__.assert_any_call('.t2')
 
@@ -141,11 +158,203 @@ def test_import_image_no_norm():
     assert im.pixels.dtype == np.uint8
 
 
+def test_import_image_scale():
+    img_path = mio.data_dir_path() / 'breakingbad.jpg'
+    full = mio.import_image(img_path)
+    im = mio.import_image(img_path, scale=0.25)
+    assert im.shape == (270, 480)
+    assert im.n_channels == 3
+    # pixel centres map as x_new = (x + 0.5) * scale - 0.5
+    np.testing.assert_allclose(im.landmarks['PTS'].lms.points,
+                               (full.landmarks['PTS'].lms.points + 0.5) *
+                               0.25 - 0.5)
+
+
+def test_import_image_max_shape():
+    img_path = mio.data_dir_path() / 'einstein.jpg'
+    im = mio.import_image(img_path, max_shape=(256, 256), normalize=False)
+    assert im.shape == (256, 204)
+    assert im.pixels.dtype == np.uint8
+    assert im.landmarks['PTS'].n_landmarks == 68
+
+
+def test_pillow_importer_max_shape_no_decode_transform():
+    from menpo.io.input.image import pillow_importer
+    img_path = mio.data_dir_path() / 'einstein.jpg'
+    im = pillow_importer(img_path, max_shape=(256, 256))
+    assert im.shape == (256, 204)
+    assert not hasattr(im, '_decode_transform')
+
+
+def test_import_image_max_shape_larger_than_image():
+    img_path = mio.data_dir_path() / 'takeo.ppm'
+    im = mio.import_image(img_path, max_shape=(1000, 1000))
+    assert im.shape == (225, 150)
+    assert not hasattr(im, '_decode_transform')
+
+
+def test_import_image_scale_png_no_landmark_resolver():
+    img_path = mio.data_dir_path() / 'lenna.png'
+    im = mio.import_image(img_path, scale=0.5, landmark_resolver=None)
+    assert im.shape == (256, 256)
+    assert not im.has_landmarks
+    assert not hasattr(im, '_decode_transform')
+
+
+def test_import_images_max_shape():
+    for im in mio.import_images(mio.data_dir_path(), max_shape=(100, 100)):
+        assert im.height <= 100 and im.width <= 100
+
+
+def test_import_image_metadata():
+    metadata = mio.import_image_metadata(mio.data_dir_path())
+    assert len(metadata) == 6
+    bb = [m for m in metadata if m.path.name == 'breakingbad.jpg'][0]
+    assert bb.shape == (1080, 1920)
+    assert bb.n_channels == 3
+    assert bb.mode == 'RGB'
+    assert bb.dtype == np.uint8
+    assert bb.landmark_counts is None
+
+
+def test_import_image_metadata_landmark_counts():
+    from menpo.io.input import same_name
+    metadata = mio.import_image_metadata(mio.data_dir_path() / 'breakingbad.*',
+                                         landmark_resolver=same_name)
+    assert metadata[0].landmark_counts == {'PTS': 68}
+
+
+def test_import_image_metadata_n_threads():
+    lazy = list(mio.import_image_metadata(mio.data_dir_path()))
+    threaded = list(mio.import_image_metadata(mio.data_dir_path(),
+                                              n_threads=2))
+    assert lazy == threaded
+
+
+@raises(ValueError)
+def test_import_image_metadata_negative_n_threads():
+    mio.import_image_metadata(mio.data_dir_path(), n_threads=0)
+
+
+def test_stem_index_matches_glob():
+    from menpo.io.input.base import _StemIndex, same_name
+    from menpo.io.input.extensions import image_landmark_types
+    index = _StemIndex(image_landmark_types)
+    for path in mio.image_paths(mio.data_dir_path()):
+        assert same_name(path, paths_callable=index) == same_name(path)
+
+
+def test_stem_index_compound_stem():
+    from menpo.io.input.base import _StemIndex
+    from menpo.io.input.extensions import image_landmark_types
+    index = _StemIndex(image_landmark_types)
+    with patch('menpo.io.input.base.os.listdir') as listdir:
+        listdir.return_value = ['a.b.pts', 'a.jpg', 'a.pts', 'a_1.pts',
+                                'b.ljson', 'b.txt']
+        assert [p.name for p in index('/x/a.*')] == ['a.b.pts', 'a.pts']
+        assert [p.name for p in index('/x/a.b.*')] == ['a.b.pts']
+        assert [p.name for p in index('/x/a_1.*')] == ['a_1.pts']
+        assert [p.name for p in index('/x/b.*')] == ['b.ljson']
+        assert index('/x/c.*') == []
+        assert listdir.call_count == 1
+
+
+def test_import_images_lists_landmark_dir_once():
+    import os
+    with patch('menpo.io.input.base.os.listdir',
+               side_effect=os.listdir) as listdir:
+        images = list(mio.import_images(mio.data_dir_path()))
+    assert listdir.call_count == 1
+    assert images[0].landmarks['PTS'].n_landmarks == 68
+
+
 def test_import_landmark_file():
     lm_path = mio.data_dir_path() / 'einstein.pts'
     mio.import_landmark_file(lm_path)
 
 
+def test_import_landmark_files_as_array():
+    pattern = mio.data_dir_path() / '[be]*.pts'
+    lmarks = list(mio.import_landmark_files(pattern))
+    points, labels_to_masks = mio.import_landmark_files(pattern,
+                                                        as_array=True)
+    assert points.shape == (2, 68, 2)
+    assert list(labels_to_masks) == ['all']
+    for lmark, p in zip(lmarks, points):
+        assert np.all(lmark.lms.points == p)
+
+
+def test_import_landmark_files_as_array_registered_importer():
+    import shutil
+    import tempfile
+    from menpo.landmark import LandmarkGroup
+    from menpo.shape import PointCloud
+
+    def foo_importer(filepath, **kwargs):
+        n = int(filepath.stem)
+        return LandmarkGroup.init_with_all_label(
+            PointCloud(np.full((3, 2), n, dtype=np.float)))
+
+    lm_dir = tempfile.mkdtemp()
+    try:
+        for name in ['1.foo', '2.foo']:
+            open(os.path.join(lm_dir, name), 'w').close()
+        with patch.dict(mio.input.extensions.image_landmark_types):
+            mio.register_landmark_importer('.foo', foo_importer)
+            points, labels_to_masks = mio.import_landmark_files(
+                os.path.join(lm_dir, '*'), as_array=True)
+    finally:
+        shutil.rmtree(lm_dir)
+    assert points.shape == (2, 3, 2)
+    assert np.all(points[1] == 2)
+    assert list(labels_to_masks) == ['all']
+
+
+def test_import_landmark_files_as_array_ljson():
+    lmark = mio.import_landmark_file(mio.data_dir_path() / 'lenna.ljson')
+    points, labels_to_masks = mio.import_landmark_files(
+        mio.data_dir_path() / '*.ljson', as_array=True)
+    assert np.all(points[0] == lmark.lms.points)
+    assert list(labels_to_masks) == lmark.labels
+    for label, mask in labels_to_masks.items():
+        assert np.all(lmark._labels_to_masks[label] == mask)
+
+
+@raises(ValueError)
+def test_import_landmark_files_as_array_mismatched_raises_value_error():
+    # tongue.pts has a different number of points
+    mio.import_landmark_files(mio.data_dir_path() / '*.pts', as_array=True)
+
+
+@raises(ValueError)
+def test_import_landmark_files_as_array_as_generator_raises_value_error():
+    mio.import_landmark_files(mio.data_dir_path() / '*.pts', as_array=True,
+                              as_generator=True)
+
+
+@patch('{}.open'.format(builtins_str))
+@patch('menpo.io.input.base.Path.is_file')
+def test_importing_pts_extra_columns(is_file, mock_open):
+    pts = 'version: 1\nn_points: 2\n{\n1 2 0.5\n3 4 0.9\n}\n'
+    mock_open.return_value.__enter__.return_value.read.return_value = pts
+    is_file.return_value = True
+
+    lmark = mio.import_landmark_file('fake_lmark_being_mocked.pts')
+    assert np.all(lmark.lms.points == [[1, 0], [3, 2]])
+
+
+@raises(ValueError)
+@patch('{}.open'.format(builtins_str))
+@patch('menpo.io.input.base.Path.is_file')
+def test_importing_pts_ragged_rows_raises_value_error(is_file, mock_open):
+    # 4 values, as for 2 points, but not 2 per row
+    pts = 'version: 1\nn_points: 2\n{\n1 2 3\n4\n}\n'
+    mock_open.return_value.__enter__.return_value.read.return_value = pts
+    is_file.return_value = True
+
+    mio.import_landmark_file('fake_lmark_being_mocked.pts')
+
+
 def test_import_images():
     imgs = list(mio.import_images(mio.data_dir_path()))
     imgs_filenames = set(i.path.stem for i in imgs)
@@ -367,8 +576,7 @@ def test_importing_PIL_P_no_normalize(is_file, mock_image):
 def test_importing_ffmpeg_GIF_normalize(is_file, video_infos_ffprobe, pipe):
     video_infos_ffprobe.return_value = {'duration': 2, 'width': 100,
                                         'height': 150, 'n_frames': 10, 'fps': 5}
-    empty_frame = np.zeros(150*100*3, dtype=np.uint8).tostring()
-    pipe.return_value.stdout.read.return_value = empty_frame
+    pipe.return_value.stdout.readinto.side_effect = fill_empty_frame
     is_file.return_value = True
 
     ll = mio.import_image('fake_image_being_mocked.gif', normalize=True)
@@ -388,8 +596,7 @@ def test_importing_ffmpeg_GIF_normalize(is_file, video_infos_ffprobe, pipe):
 def test_importing_ffmpeg_GIF_no_normalize(is_file, video_infos_ffprobe, pipe):
     video_infos_ffprobe.return_value = {'duration': 2, 'width': 100,
                                         'height': 150, 'n_frames': 10, 'fps': 5}
-    empty_frame = np.zeros(150*100*3, dtype=np.uint8).tostring()
-    pipe.return_value.stdout.read.return_value = empty_frame
+    pipe.return_value.stdout.readinto.side_effect = fill_empty_frame
     is_file.return_value = True
 
     ll = mio.import_image('fake_image_being_mocked.gif', normalize=False)
@@ -524,14 +731,13 @@ def test_importing_pickle_encoding_ignored_py2(version_info, is_file, mock_open,
 
 @patch('menpo.io.input.pickle.pickle.load')
 @patch('{}.open'.format(builtins_str))
-@patch('menpo.io.input.base.Path.glob')
+@patch('menpo.io.input.base._scandir')
 @patch('menpo.io.input.base.Path.is_file')
-def test_importing_pickles(is_file, glob, mock_open, mock_pickle):
-    from pathlib import Path
+def test_importing_pickles(is_file, scandir, mock_open, mock_pickle):
     from menpo.base import LazyList
     mock_pickle.return_value = {'test': 1}
     is_file.return_value = True
-    glob.return_value = [Path('mocked1.pkl'), Path('mocked2.pkl')]
+    scandir.side_effect = fake_scandir('mocked1.pkl', 'mocked2.pkl')
 
     objs = mio.import_pickles('*')
     assert isinstance(objs, LazyList)
@@ -542,14 +748,14 @@ def test_importing_pickles(is_file, glob, mock_open, mock_pickle):
 
 @patch('menpo.io.input.pickle.pickle.load')
 @patch('{}.open'.format(builtins_str))
-@patch('menpo.io.input.base.Path.glob')
+@patch('menpo.io.input.base._scandir')
 @patch('menpo.io.input.base.Path.is_file')
-def test_importing_pickles_as_generator(is_file, glob, mock_open, mock_pickle):
-    from pathlib import Path
+def test_importing_pickles_as_generator(is_file, scandir, mock_open,
+                                        mock_pickle):
     import types
     mock_pickle.return_value = {'test': 1}
     is_file.return_value = True
-    glob.return_value = [Path('mocked1.pkl'), Path('mocked2.pkl')]
+    scandir.side_effect = fake_scandir('mocked1.pkl', 'mocked2.pkl')
 
     objs = mio.import_pickles('*', as_generator=True)
     assert isinstance(objs, types.GeneratorType)
@@ -566,8 +772,7 @@ def test_importing_ffmpeg_avi_no_normalize(is_file, video_infos_ffprobe, pipe):
     video_infos_ffprobe.return_value = {'duration': 2, 'width': 100,
                                         'height': 150, 'n_frames': 10, 'fps': 5}
     is_file.return_value = True
-    empty_frame = np.zeros(150*100*3, dtype=np.uint8).tostring()
-    pipe.return_value.stdout.read.return_value = empty_frame
+    pipe.return_value.stdout.readinto.side_effect = fill_empty_frame
     ll = mio.import_video('fake_image_being_mocked.avi', normalize=False)
     assert ll.path.name == 'fake_image_being_mocked.avi'
     assert ll.fps == 5
@@ -585,8 +790,7 @@ def test_importing_ffmpeg_avi_normalize(is_file, video_infos_ffprobe, pipe):
     video_infos_ffprobe.return_value = {'duration': 2, 'width': 100,
                                         'height': 150, 'n_frames': 10, 'fps': 5}
     is_file.return_value = True
-    empty_frame = np.zeros(150*100*3, dtype=np.uint8).tostring()
-    pipe.return_value.stdout.read.return_value = empty_frame
+    pipe.return_value.stdout.readinto.side_effect = fill_empty_frame
     ll = mio.import_video('fake_image_being_mocked.avi', normalize=True)
     assert ll.path.name == 'fake_image_being_mocked.avi'
     assert ll.fps == 5
@@ -618,8 +822,7 @@ def test_importing_ffmpeg_no_exact_frame_count_no_ffprobe(
     video_infos_ffmpeg.return_value = {'duration': 2, 'width': 100,
                                        'height': 150, 'n_frames': 10, 'fps': 5}
     is_file.return_value = True
-    empty_frame = np.zeros(150*100*3, dtype=np.uint8).tostring()
-    pipe.return_value.stdout.read.return_value = empty_frame
+    pipe.return_value.stdout.readinto.side_effect = fill_empty_frame
     ll = mio.import_video('fake_image_being_mocked.avi', normalize=True,
                           exact_frame_count=False)
     assert ll.path.name == 'fake_image_being_mocked.avi'
@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import raises
+
+import menpo.io as mio
+from menpo.image import Image, MaskedImage, BooleanImage
+from menpo.io.exceptions import OverwriteError
+
+
+def with_pack_dir(test):
+    def wrapped():
+        pack_dir = tempfile.mkdtemp()
+        try:
+            test(os.path.join(pack_dir, 'pack'))
+        finally:
+            shutil.rmtree(pack_dir)
+    wrapped.__name__ = test.__name__
+    return wrapped
+
+
+def builtin_images():
+    return mio.import_images(mio.data_dir_path(), normalize=False)
+
+
+@with_pack_dir
+def test_dataset_pack_round_trip(pack_dir):
+    images = builtin_images()
+    mio.export_dataset_pack(images, pack_dir)
+    packed = mio.import_dataset_pack(pack_dir, normalize=False)
+    assert len(packed) == len(images)
+    for img, packed_img in zip(images, packed):
+        assert type(packed_img) == type(img)
+        assert packed_img.pixels.dtype == img.pixels.dtype
+        assert_allclose(packed_img.pixels, img.pixels)
+        assert packed_img.path == img.path
+        assert (packed_img.landmarks.group_labels ==
+                img.landmarks.group_labels)
+        for group in img.landmarks.group_labels:
+            assert_allclose(packed_img.landmarks[group].lms.points,
+                            img.landmarks[group].lms.points)
+            assert (packed_img.landmarks[group].labels ==
+                    img.landmarks[group].labels)
+
+
+@with_pack_dir
+def test_dataset_pack_memory_mapped(pack_dir):
+    mio.export_dataset_pack(builtin_images(), pack_dir)
+    img = mio.import_dataset_pack(pack_dir, normalize=False)[0]
+    assert isinstance(img.pixels.base, np.memmap)
+    # Copy on write - the pack is untouched
+    img.pixels[...] = 0
+    img = mio.import_dataset_pack(pack_dir, normalize=False)[0]
+    assert img.pixels.max() > 0
+
+
+@with_pack_dir
+def test_dataset_pack_normalize(pack_dir):
+    mio.export_dataset_pack(builtin_images(), pack_dir)
+    img = mio.import_dataset_pack(pack_dir)[0]
+    expected = mio.import_images(mio.data_dir_path())[0]
+    assert img.pixels.dtype == np.float
+    assert_allclose(img.pixels, expected.pixels)
+
+
+@with_pack_dir
+def test_dataset_pack_shards(pack_dir):
+    images = builtin_images()
+    mio.export_dataset_pack(images, pack_dir, shard_size=1)
+    shards = [f for f in os.listdir(pack_dir) if f.startswith('shard_')]
+    assert len(shards) == len(images)
+    packed = mio.import_dataset_pack(pack_dir, normalize=False)
+    assert_allclose(packed[-1].pixels, images[-1].pixels)
+
+
+@with_pack_dir
+def test_dataset_pack_image_format(pack_dir):
+    images = builtin_images()
+    mio.export_dataset_pack(images, pack_dir, image_format='png')
+    packed = mio.import_dataset_pack(pack_dir, normalize=False)
+    assert_allclose(packed[0].pixels, images[0].pixels)
+    assert_allclose(packed[0].landmarks['PTS'].lms.points,
+                    images[0].landmarks['PTS'].lms.points)
+
+
+@with_pack_dir
+def test_dataset_pack_masked_and_boolean(pack_dir):
+    masked = MaskedImage(np.random.random((3, 10, 12)))
+    masked.mask.pixels[0, :5] = False
+    boolean = BooleanImage(np.random.random((7, 5)) > 0.5)
+    mio.export_dataset_pack([masked, boolean, Image.init_blank((4, 4))],
+                            pack_dir)
+    packed = mio.import_dataset_pack(pack_dir)
+    assert type(packed[0]) == MaskedImage
+    assert_allclose(packed[0].pixels, masked.pixels)
+    assert np.all(packed[0].mask.pixels == masked.mask.pixels)
+    assert type(packed[1]) == BooleanImage
+    assert np.all(packed[1].pixels == boolean.pixels)
+    assert packed[2].shape == (4, 4)
+    assert not hasattr(packed[2], 'path')
+
+
+@raises(OverwriteError)
+@with_pack_dir
+def test_dataset_pack_overwrite(pack_dir):
+    img = Image.init_blank((4, 4))
+    mio.export_dataset_pack([img], pack_dir)
+    mio.export_dataset_pack([img], pack_dir)
+
+
+@with_pack_dir
+def test_dataset_pack_overwrite_removes_listed_shards(pack_dir):
+    img = Image.init_blank((4, 4))
+    mio.export_dataset_pack([img, img], pack_dir, shard_size=16)
+    assert len(os.listdir(pack_dir)) == 3
+    mio.export_dataset_pack([img], pack_dir, overwrite=True)
+    assert sorted(os.listdir(pack_dir)) == ['index.npz', 'shard_00000.bin']
+    assert len(mio.import_dataset_pack(pack_dir)) == 1
+
+
+@with_pack_dir
+def test_dataset_pack_stray_shards_are_kept(pack_dir):
+    os.makedirs(pack_dir)
+    stray_path = os.path.join(pack_dir, 'shard_00000.bin')
+    with open(stray_path, 'wb') as f:
+        f.write(b'data')
+    for overwrite in [False, True]:
+        try:
+            mio.export_dataset_pack([Image.init_blank((4, 4))], pack_dir,
+                                    overwrite=overwrite)
+        except OverwriteError:
+            pass
+        else:
+            raise AssertionError('OverwriteError not raised')
+    with open(stray_path, 'rb') as f:
+        assert f.read() == b'data'
+
+
+@raises(ValueError)
+@with_pack_dir
+def test_dataset_pack_unknown_image_format(pack_dir):
+    mio.export_dataset_pack([Image.init_blank((4, 4))], pack_dir,
+                            image_format='foo')
+
+
+@raises(ValueError)
+def test_import_dataset_pack_not_a_pack():
+    mio.import_dataset_pack(mio.data_dir_path())
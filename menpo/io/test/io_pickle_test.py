@@ -0,0 +1,129 @@
+import io
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import raises
+
+import menpo.io as mio
+from menpo.shape import PointCloud
+
+
+def with_pickle_path(test):
+    def wrapped():
+        pickle_dir = tempfile.mkdtemp()
+        try:
+            test(os.path.join(pickle_dir, 'model.pkl'))
+        finally:
+            shutil.rmtree(pickle_dir)
+    wrapped.__name__ = test.__name__
+    return wrapped
+
+
+def large_object():
+    components = np.random.random((20, 100))
+    return {'components': components,
+            'shared': components,
+            'fortran': np.asfortranarray(np.random.random((30, 40))),
+            'small': np.arange(5),
+            'pc': PointCloud(np.random.random((1000, 2)))}
+
+
+def is_memory_mapped(x):
+    while x is not None:
+        if isinstance(x, np.memmap):
+            return True
+        x = getattr(x, 'base', None)
+    return False
+
+
+def assert_large_object_equal(a, b):
+    assert_allclose(a['components'], b['components'])
+    assert_allclose(a['fortran'], b['fortran'])
+    assert_allclose(a['small'], b['small'])
+    assert_allclose(a['pc'].points, b['pc'].points)
+
+
+@with_pickle_path
+def test_export_pickle_out_of_band_round_trip(path):
+    obj = large_object()
+    mio.export_pickle(obj, path, out_of_band=True)
+    assert os.path.isfile(path + '.buffers')
+    loaded = mio.import_pickle(path)
+    assert_large_object_equal(obj, loaded)
+    assert is_memory_mapped(loaded['components'])
+    assert not loaded['components'].flags.writeable
+    assert loaded['fortran'].flags.f_contiguous
+    assert loaded['shared'] is loaded['components']
+    # Small arrays are pickled in-band
+    assert loaded['small'].flags.writeable
+
+
+@with_pickle_path
+def test_export_pickle_out_of_band_gzip(path):
+    path += '.gz'
+    obj = large_object()
+    mio.export_pickle(obj, path, out_of_band=True)
+    loaded = mio.import_pickle(path)
+    assert_large_object_equal(obj, loaded)
+    assert is_memory_mapped(loaded['components'])
+
+
+@with_pickle_path
+def test_import_pickle_out_of_band_in_memory(path):
+    obj = large_object()
+    mio.export_pickle(obj, path, out_of_band=True)
+    loaded = mio.import_pickle(path, mmap_mode=None)
+    assert_large_object_equal(obj, loaded)
+    assert not is_memory_mapped(loaded['components'])
+    loaded['components'][...] = 0
+
+
+@with_pickle_path
+def test_import_pickles_out_of_band_mmap_mode(path):
+    obj = large_object()
+    mio.export_pickle(obj, path, out_of_band=True)
+    pattern = os.path.join(os.path.dirname(path), '*.pkl')
+    assert is_memory_mapped(mio.import_pickles(pattern)[0]['components'])
+    loaded = mio.import_pickles(pattern, mmap_mode=None)[0]
+    assert_large_object_equal(obj, loaded)
+    assert not is_memory_mapped(loaded['components'])
+
+
+@with_pickle_path
+def test_export_pickle_out_of_band_datetimes(path):
+    times = np.arange(10000).astype('datetime64[s]')
+    mio.export_pickle({'times': times}, path, out_of_band=True)
+    assert np.all(mio.import_pickle(path)['times'] == times)
+
+
+@with_pickle_path
+def test_export_pickle_out_of_band_masked_array(path):
+    masked = np.ma.masked_less(np.random.random((100, 100)), 0.5)
+    mio.export_pickle({'masked': masked}, path, out_of_band=True)
+    loaded = mio.import_pickle(path)['masked']
+    assert type(loaded) is np.ma.MaskedArray
+    assert_allclose(loaded.data, masked.data)
+    assert np.all(loaded.mask == masked.mask)
+
+
+@with_pickle_path
+def test_export_pickle_overwrite_removes_buffers(path):
+    obj = large_object()
+    mio.export_pickle(obj, path, out_of_band=True)
+    mio.export_pickle(obj, path, overwrite=True)
+    assert not os.path.exists(path + '.buffers')
+    assert_large_object_equal(obj, mio.import_pickle(path))
+
+
+@raises(ValueError)
+def test_export_pickle_out_of_band_file_handle():
+    mio.export_pickle(large_object(), io.BytesIO(), out_of_band=True)
+
+
+@raises(ValueError)
+@with_pickle_path
+def test_export_pickle_out_of_band_protocol_0(path):
+    mio.export_pickle(large_object(), path, protocol=0, out_of_band=True)
@@ -0,0 +1,383 @@
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+from mock import patch, MagicMock
+from nose.tools import raises
+
+import menpo.io as mio
+from menpo.io.input.video import (FFMpegVideoReader, ParallelVideoReader,
+                                  ffmpeg_importer,
+                                  video_frame_index_ffprobe,
+                                  FRAME_INDEX_SUFFIX)
+
+
+HEIGHT, WIDTH, N_FRAMES, FPS = 3, 4, 10, 5.
+
+
+def fake_ffmpeg(command, **kwargs):
+    # A pipe streaming frames filled with their frame number, starting at the
+    # frame the command seeks to
+    start, stride = 0, 1
+    if '-ss' in command:
+        time = float(command[command.index('-ss') + 1]) * FPS
+        if '-noaccurate_seek' in command:
+            # From the keyframe before the time
+            start = int(np.floor(time))
+        else:
+            # From the first frame at or after the time
+            start = int(np.ceil(time - 1e-6))
+    if '-vf' in command:
+        filters = command[command.index('-vf') + 1]
+        select = re.search(r'mod\(n\\,(\d+)\)', filters)
+        if select is not None:
+            stride = int(select.group(1))
+    frames = iter(range(start, N_FRAMES, stride))
+
+    def readinto(buf):
+        buf[...] = next(frames)
+        return buf.size
+
+    pipe = MagicMock()
+    pipe.poll.return_value = None
+    pipe.stdout.readinto.side_effect = readinto
+    return pipe
+
+
+def fake_video_infos(filepath):
+    return {'duration': N_FRAMES / FPS, 'width': WIDTH, 'height': HEIGHT,
+            'n_frames': N_FRAMES, 'fps': FPS}
+
+
+def fake_frame_index(filepath, persist=True):
+    return {'timestamps': np.arange(N_FRAMES) / FPS,
+            'keyframes': np.array([0, 5])}
+
+
+def seeks(popen):
+    return [c[0][0][c[0][0].index('-ss') + 1] if '-ss' in c[0][0] else None
+            for c in popen.call_args_list]
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_seeks_to_keyframe(popen, infos, frame_index):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi')
+    assert reader[7][0, 0, 0] == 7
+    # Opened at the keyframe before 7, in the middle of the keyframe
+    assert seeks(popen) == ['1.100000']
+    assert '-noaccurate_seek' in popen.call_args[0][0]
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_caches_decoded_frames(popen, infos, frame_index):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi')
+    for i in [8, 6, 5, 9, 7, 2, 1, 4]:
+        assert reader[i][0, 0, 0] == i
+    # 6, 5 and 7 were decoded while seeking to 8, 9 is read sequentially
+    # and 1 was decoded while seeking to 2 (from the start)
+    assert seeks(popen) == ['1.100000', None]
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_no_frame_cache(popen, infos, frame_index):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi',
+                               frame_cache_size=0)
+    assert reader[8][0, 0, 0] == 8
+    assert reader[6][0, 0, 0] == 6
+    assert seeks(popen) == ['1.100000', '1.100000']
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_sequential_does_not_index(popen, infos, frame_index):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi')
+    assert [f[0, 0, 0] for f in reader] == list(range(N_FRAMES))
+    assert popen.call_count == 1
+    assert not frame_index.called
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=ValueError)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_no_frame_index(popen, infos, frame_index):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi')
+    assert reader[7][0, 0, 0] == 7
+    assert reader[6][0, 0, 0] == 6
+    assert reader.frame_index is None
+    assert seeks(popen) == ['1.4', '1.2']
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_normalize(popen, infos, frame_index):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi', normalize=True)
+    frame = reader[6]
+    assert frame.dtype == np.float
+    assert frame[0, 0, 0] == 6 / 255.
+    # Cached frames are stored raw
+    assert reader[5][0, 0, 0] == 5 / 255.
+
+
+@patch('subprocess.Popen')
+def test_video_frame_index_ffprobe(popen):
+    # Packets of a video with B-frames, in decoding order
+    popen.return_value.stdout.readlines.return_value = [
+        b'0.000000,K_\n', b'0.080000,__\n', b'0.040000,__\n',
+        b'0.120000,K_\n', b'0.200000,__\n', b'0.160000,__\n']
+    video_dir = tempfile.mkdtemp()
+    try:
+        video_path = os.path.join(video_dir, 'video.mp4')
+        open(video_path, 'wb').close()
+        index = video_frame_index_ffprobe(video_path)
+        assert np.all(np.diff(index['timestamps']) > 0)
+        assert list(index['keyframes']) == [0, 3]
+        assert os.path.isfile(video_path + FRAME_INDEX_SUFFIX)
+        # The persisted index is used from now on
+        index = video_frame_index_ffprobe(video_path)
+        assert popen.call_count == 1
+        assert list(index['keyframes']) == [0, 3]
+    finally:
+        shutil.rmtree(video_dir)
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_no_copy_reuses_buffers(popen, infos):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi', copy=False,
+                               n_buffers=2)
+    frames = [reader[i] for i in range(3)]
+    # The third frame is read into the buffer of the first
+    assert frames[0] is frames[2]
+    assert frames[1][0, 0, 0] == 1
+    assert frames[2][0, 0, 0] == 2
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_copy(popen, infos):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi')
+    frames = [reader[i] for i in range(3)]
+    assert [f[0, 0, 0] for f in frames] == [0, 1, 2]
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_importer_normalize(popen, infos):
+    ll = ffmpeg_importer('fake_video_being_mocked.avi')
+    img = ll[3]
+    assert img.pixels.dtype == np.float
+    assert img.shape == (HEIGHT, WIDTH)
+    assert np.all(img.pixels == 3 / 255.)
+    # The next frame does not affect the image
+    ll[4]
+    assert np.all(img.pixels == 3 / 255.)
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_importer_no_normalize(popen, infos):
+    ll = ffmpeg_importer('fake_video_being_mocked.avi', normalize=False)
+    images = [ll[i] for i in range(4)]
+    assert images[0].pixels.dtype == np.uint8
+    assert [img.pixels[0, 0, 0] for img in images] == [0, 1, 2, 3]
+
+
+@raises(ValueError)
+def test_ffmpeg_reader_negative_n_buffers():
+    FFMpegVideoReader('fake_video_being_mocked.avi', n_buffers=0)
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_frame_stride(popen, infos):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi', frame_stride=3)
+    assert len(reader) == 4
+    assert list(reader.frame_numbers) == [0, 3, 6, 9]
+    assert [f[0, 0, 0] for f in reader] == [0, 3, 6, 9]
+    command = popen.call_args[0][0]
+    assert command[command.index('-vf') + 1] == 'select=not(mod(n\\,3))'
+    assert '-vsync' in command
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_frame_stride_seek(popen, infos, frame_index):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi', frame_stride=3,
+                               start_time=0.2)
+    assert list(reader.frame_numbers) == [1, 4, 7]
+    assert reader[2][0, 0, 0] == 7
+    assert reader[0][0, 0, 0] == 1
+    assert reader[1][0, 0, 0] == 4
+    # The first frame read after the keyframe (5) is 7, seeked to accurately
+    # and 1 is the first frame to read (seeked to directly)
+    assert seeks(popen) == ['1.300000', '0.100000']
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_start_end_time(popen, infos):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi', start_time=0.4,
+                               end_time=1.)
+    assert list(reader.frame_numbers) == [2, 3, 4]
+    assert [f[0, 0, 0] for f in reader] == [2, 3, 4]
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_reader_crop_and_resize(popen, infos):
+    reader = FFMpegVideoReader('fake_video_being_mocked.avi',
+                               crop=((1, 1), (3, 4)), output_shape=(4, 6))
+    assert reader[0].shape == (4, 6, 3)
+    command = popen.call_args[0][0]
+    assert (command[command.index('-vf') + 1] ==
+            'crop=3:2:1:1,scale=6:4:flags=area')
+    # Pixel centres are preserved
+    assert np.allclose(reader.frame_transform.apply(np.array([[1., 1.]])),
+                       [[0.5, 0.5]])
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_importer_gray(popen, infos):
+    ll = ffmpeg_importer('fake_video_being_mocked.avi', pix_fmt='gray')
+    assert ll[0].n_channels == 1
+    assert ll[0].shape == (HEIGHT, WIDTH)
+    command = popen.call_args[0][0]
+    assert command[command.index('-pix_fmt') + 1] == 'gray'
+
+
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_importer_uint16(popen, infos):
+    ll = ffmpeg_importer('fake_video_being_mocked.avi', pix_fmt='gray16le',
+                         normalize=False)
+    img = ll[2]
+    assert img.pixels.dtype == np.uint16
+    # Every byte of the frame is 2
+    assert img.pixels[0, 0, 0] == 2 * 256 + 2
+
+
+@patch('menpo.io.input.base.Path.is_file')
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_import_video_landmarks_frame_stride_and_crop(popen, infos, is_file):
+    is_file.return_value = True
+    lm_path = mio.data_path_to('einstein.pts')
+    resolved = []
+
+    def landmark_resolver(path, frame_number):
+        resolved.append(frame_number)
+        return {'PTS': lm_path}
+
+    ll = mio.import_video('fake_video_being_mocked.avi', frame_stride=3,
+                          crop=((1, 1), (3, 4)),
+                          landmark_resolver=landmark_resolver)
+    img = ll[1]
+    assert resolved == [3]
+    expected = ll.frame_transform.apply(mio.import_landmark_file(lm_path).lms)
+    assert np.allclose(img.landmarks['PTS'].lms.points, expected.points)
+
+
+@raises(ValueError)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+def test_ffmpeg_reader_invalid_crop(infos):
+    FFMpegVideoReader('fake_video_being_mocked.avi', crop=((0, 0), (4, 4)))
+
+
+@raises(ValueError)
+def test_ffmpeg_reader_invalid_pix_fmt():
+    FFMpegVideoReader('fake_video_being_mocked.avi', pix_fmt='yuv420p')
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_parallel_reader_segments_at_keyframes(popen, infos, frame_index):
+    reader = ParallelVideoReader('fake_video_being_mocked.avi', n_decoders=2)
+    assert reader.segments() == [(0, 5), (5, 10)]
+    assert [f[0, 0, 0] for f in reader] == list(range(N_FRAMES))
+    assert sorted(seeks(popen), key=str) == ['1.100000', None]
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=ValueError)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_parallel_reader_no_frame_index(popen, infos, frame_index):
+    reader = ParallelVideoReader('fake_video_being_mocked.avi', n_decoders=3,
+                                 buffer_size=1)
+    assert len(reader.segments()) == N_FRAMES
+    assert [f[0, 0, 0] for f in reader] == list(range(N_FRAMES))
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_parallel_reader_indexing(popen, infos, frame_index):
+    reader = ParallelVideoReader('fake_video_being_mocked.avi', n_decoders=2,
+                                 frame_stride=2)
+    # In order (streamed), then random access, then in order again
+    for i in [0, 1, 2, 4, 0, 1]:
+        assert reader[i][0, 0, 0] == 2 * i
+
+
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=fake_ffmpeg)
+def test_ffmpeg_importer_n_decoders(popen, infos, frame_index):
+    ll = ffmpeg_importer('fake_video_being_mocked.avi', n_decoders=2)
+    assert [img.pixels[0, 0, 0] for img in ll] == [i / 255. for i in
+                                                   range(N_FRAMES)]
+
+
+@raises(OSError)
+@patch('menpo.io.input.video.video_frame_index_ffprobe',
+       side_effect=fake_frame_index)
+@patch('menpo.io.input.video.video_infos_ffprobe',
+       side_effect=fake_video_infos)
+@patch('subprocess.Popen', side_effect=OSError)
+def test_parallel_reader_decoding_error(popen, infos, frame_index):
+    list(ParallelVideoReader('fake_video_being_mocked.avi', n_decoders=2))
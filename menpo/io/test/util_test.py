@@ -1,39 +1,106 @@
-from os.path import sep as PATH_SEP
+import os
+import shutil
+import tempfile
 from mock import patch
 from pathlib import Path
 from nose.tools import raises
 
 
-from menpo.io.input.base import _pathlib_glob_for_pattern
+from menpo.io.input.base import _pathlib_glob_for_pattern, glob_with_suffix
 from menpo.io.output.base import _parse_and_validate_extension
 
 
-@patch('menpo.io.input.base.Path.glob')
-def test_glob_parse_contains_file_glob_no_sort(mock_glob):
-    path = '/tmp/test.*'
-    mock_glob.return_value = ['/tmp/test.test']
+def with_test_tree(test):
+    # /tmp/xxx/{test.test, test.jpg, b/test.test, a/test.test, a/c/test.jpg}
+    def wrapped():
+        root = tempfile.mkdtemp()
+        try:
+            for d in ['a', 'b', os.path.join('a', 'c')]:
+                os.mkdir(os.path.join(root, d))
+            for f in ['test.test', 'test.jpg', os.path.join('b', 'test.test'),
+                      os.path.join('a', 'test.test'),
+                      os.path.join('a', 'c', 'test.jpg')]:
+                open(os.path.join(root, f), 'w').close()
+            test(root)
+        finally:
+            shutil.rmtree(root)
+    wrapped.__name__ = test.__name__
+    return wrapped
+
+
+@with_test_tree
+def test_glob_parse_contains_file_glob_no_sort(root):
+    path = os.path.join(root, 'test.*')
     result = list(_pathlib_glob_for_pattern(path, sort=False))
-    assert len(result) == 1
-    mock_glob.assert_called_with('test.*')
+    assert len(result) == 2
+    assert set(p.name for p in result) == {'test.test', 'test.jpg'}
 
 
-@patch('menpo.io.input.base.Path.glob')
-def test_glob_parse_contains_dir_glob_no_sort(mock_glob):
-    path = '/tmp/**/*'
-    mock_glob.return_value = ['/tmp/a/test.test', '/tmp/b/test.test']
+@with_test_tree
+def test_glob_parse_contains_dir_glob_no_sort(root):
+    path = os.path.join(root, '**', '*')
     result = list(_pathlib_glob_for_pattern(path, sort=False))
-    assert len(result) == 2
-    mock_glob.assert_called_with('**/*'.replace('/', PATH_SEP))
+    assert len(result) == 8
 
 
-@patch('menpo.io.input.base.Path.glob')
-def test_glob_parse_sort(mock_glob):
-    path = '/tmp/**/*'
-    mock_glob.return_value = ['/tmp/b/test.test', '/tmp/a/test.test']
+@with_test_tree
+def test_glob_parse_sort(root):
+    path = os.path.join(root, '**', '*.test')
     result = list(_pathlib_glob_for_pattern(path, sort=True))
-    assert len(result) == 2
-    assert result[0] == mock_glob.return_value[1]
-    mock_glob.assert_called_with('**/*'.replace('/', PATH_SEP))
+    assert len(result) == 3
+    assert result == [Path(root, 'a', 'test.test'),
+                      Path(root, 'b', 'test.test'),
+                      Path(root, 'test.test')]
+
+
+@with_test_tree
+def test_glob_matches_pathlib_glob(root):
+    for pattern in ['*', '**/*', '*/*', '**/*.jpg', 'a/**/*', '**',
+                    'a/c/*']:
+        result = _pathlib_glob_for_pattern(os.path.join(root, pattern))
+        assert result == sorted(Path(root).glob(pattern))
+
+
+@with_test_tree
+def test_glob_with_suffix_manifest(root):
+    manifest = os.path.join(root, 'manifest.json')
+    pattern = os.path.join(root, '**', '*')
+    ext_map = {'.jpg': None}
+    expected = list(glob_with_suffix(pattern, ext_map))
+    assert len(expected) == 2
+    assert list(glob_with_suffix(pattern, ext_map,
+                                 manifest=manifest)) == expected
+    assert os.path.isfile(manifest)
+    # A fresh manifest is used without listing any directories
+    with patch('menpo.io.input.base._scandir') as scandir:
+        result = list(glob_with_suffix(pattern, ext_map, manifest=manifest))
+    assert result == expected
+    assert scandir.call_count == 0
+
+
+@with_test_tree
+def test_glob_with_suffix_manifest_stale(root):
+    manifest = os.path.join(root, 'manifest.json')
+    pattern = os.path.join(root, '**', '*')
+    ext_map = {'.jpg': None}
+    list(glob_with_suffix(pattern, ext_map, manifest=manifest))
+    new_file = os.path.join(root, 'b', 'new.jpg')
+    open(new_file, 'w').close()
+    # Make sure the modification is visible at any mtime resolution
+    os.utime(os.path.join(root, 'b'), (0, 0))
+    result = list(glob_with_suffix(pattern, ext_map, manifest=manifest))
+    assert Path(new_file) in result
+    assert len(result) == 3
+
+
+@with_test_tree
+def test_glob_with_suffix_manifest_other_extensions(root):
+    manifest = os.path.join(root, 'manifest.json')
+    pattern = os.path.join(root, '**', '*')
+    list(glob_with_suffix(pattern, {'.jpg': None}, manifest=manifest))
+    result = list(glob_with_suffix(pattern, {'.test': None},
+                                   manifest=manifest))
+    assert len(result) == 3
 
 
 def test_parse_extension_given_extension():
@@ -8,6 +8,25 @@ try:
 except ImportError:
     DEVNULL = open(os.devnull, 'wb')
 
+try:
+    from os import scandir as _scandir
+except ImportError:
+    # Python 2 - a (slower) scandir built on listdir
+    class _DirEntry(object):
+
+        def __init__(self, directory, name):
+            self.name = name
+            self.path = os.path.join(directory, name)
+
+        def is_dir(self):
+            return os.path.isdir(self.path)
+
+        def is_symlink(self):
+            return os.path.islink(self.path)
+
+    def _scandir(directory):
+        return [_DirEntry(directory, name) for name in os.listdir(directory)]
+
 
 def _norm_path(filepath):
     r"""
@@ -35,7 +54,18 @@ def _possible_extensions_from_filepath(filepath):
         A list of extensions **with** leading '.' characters and converted
         to lowercase.
     """
-    suffixes = filepath.suffixes
+    return _possible_extensions_from_filename(filepath.name)
+
+
+def _possible_extensions_from_filename(filename):
+    r"""
+    As :func:`_possible_extensions_from_filepath`, for a filename `str`. Far
+    cheaper than building a `Path` when filtering many filenames.
+    """
+    # Follows the semantics of pathlib's suffixes
+    if filename.endswith('.'):
+        return []
+    suffixes = ['.' + s for s in filename.lstrip('.').split('.')[1:]]
     return [''.join(suffixes[i:]).lower() for i in range(len(suffixes))]
 
 